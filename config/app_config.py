@@ -17,18 +17,74 @@ class LLMConfig:
     request_timeout: int = 60
     max_retries: int = 3
     rate_limit_rpm: int = 50  # Requests per minute
+    rate_limit_tpm: int = 0  # Tokens per minute (0: unlimited)
+    model_rate_limits: str = ""  # Per-model overrides of both limits, "model=rpm:tpm" entries separated by commas
     cache_enabled: bool = True
     cache_ttl: int = 3600  # Cache time-to-live in seconds
+    cache_max_entries: int = 1000  # Responses held in the in-process LRU tier
+    cache_dir: str = ".cache/llm"  # Directory of the on-disk response cache shared by processes (empty disables)
+    cache_disk_max_entries: int = 50000  # Responses kept in the on-disk tier
+    executor_workers: int = 16  # Threads of the shared executor running API calls under deadlines
+    http_max_connections: int = 20  # Connections of the shared HTTP pool (per event loop for async calls)
+    http_max_keepalive: int = 10  # Idle connections kept open in the shared HTTP pool
+    http_keepalive_expiry: float = 30.0  # Seconds an idle pooled connection stays open
+    circuit_failure_threshold: int = 5  # Consecutive failures that stop calls to a model (0: never)
+    circuit_reset_timeout: float = 30.0  # Seconds before a model with an open circuit is probed again
+    latency_budget: float = 0.0  # Seconds a chat completion may take across fallback models (0: no budget)
+    hedge_after: float = 0.0  # Seconds before a slow request is hedged to the next fallback model (0: no hedging)
 
 @dataclass
 class VectorStoreConfig:
-    """Configuration for vector storage."""
+    """Configuration for vector storage.
+    
+    Every field is read from the environment (see from_environment); the
+    vector_store stage of config/pipelines/rag_pipeline.yaml is not loaded.
+    The FAISS index type defaults to exact flat search; approximate indexes
+    are chosen with FAISS_INDEX_TYPE (hnsw, ivf_flat, ivf_pq, sq8, sq4) and
+    tuned with FAISS_HNSW_M, FAISS_EF_CONSTRUCTION, FAISS_EF_SEARCH,
+    FAISS_IVF_NLIST and FAISS_NPROBE.
+    """
     index_dir: str = "models/faiss_index"
     embedding_model: str = "text-embedding-ada-002"
     chunk_size: int = 1000
     chunk_overlap: int = 200
     similarity_top_k: int = 4
+    min_similarity_score: Optional[float] = None  # Normalized 0-1 score below which chunks are dropped
+    semantic_cache_enabled: bool = False  # Answer near-duplicate questions from earlier answers (opt-in)
+    semantic_cache_threshold: float = 0.95  # Question cosine similarity needed to reuse an answer
+    semantic_cache_max_entries: int = 1000  # Answered questions kept per store and pipeline settings
+    semantic_cache_ttl: int = 86400  # Seconds a cached answer stays valid
     cache_embeddings: bool = True
+    embedding_cache_max_mb: int = 1024  # Byte budget of the embedding cache before LRU eviction
+    embedding_memory_cache_mb: int = 256  # Memory cap of the shared in-process embedding LRU (0 disables)
+    faiss_index_type: str = "flat"  # flat, hnsw, ivf_flat, ivf_pq, sq8, sq4
+    hnsw_m: int = 16
+    hnsw_ef_construction: int = 200
+    hnsw_ef_search: int = 50
+    ivf_nlist: int = 100
+    ivf_nprobe: int = 10
+    pq_m: int = 64  # Product quantizer sub-vectors (bytes per vector at 8 bits)
+    pq_nbits: int = 8
+    faiss_train_sample_size: int = 50000  # Vectors sampled for quantizer training
+    rerank_factor: int = 0  # Re-rank k * factor candidates exactly for compressed indexes (0 disables)
+    faiss_load_mode: str = "memory"  # memory, mmap
+    compaction_threshold: int = 8  # Delta segments before background compaction
+    faiss_num_shards: int = 4  # Shards of the faiss_sharded store
+    faiss_shard_processes: bool = True  # Run each shard in its own worker process
+    vertex_upsert_batch_size: int = 100  # Datapoints per Vertex AI upsert
+    vertex_embedding_workers: int = 4  # Parallel embedding requests during Vertex AI ingest
+    vertex_local: bool = False  # Use the in-process Vector Search stand-in instead of Vertex AI
+    snapshot_retention: int = 3
+    embedding_batch_size: int = 20  # Chunks per embedding request during ingest
+    embedding_max_batch_tokens: int = 50000  # Tokens per embedding request of EmbeddingManager
+    embedding_max_batch_texts: int = 512  # Texts per embedding request of EmbeddingManager
+    embedding_workers: int = 4  # Embedding requests in flight in EmbeddingManager
+    embedding_timeout: int = 0  # Deadline in seconds of one EmbeddingManager call (0: none)
+    local_embedding_batch_size: int = 32  # Texts per batch of the local embedding model
+    local_embedding_max_batch_tokens: int = 8192  # Padded tokens per batch of the local embedding model
+    local_embedding_workers: int = 0  # Concurrent local embedding batches (0: one per two cores)
+    local_embedding_quantize: bool = False  # Run the local embedding model quantized to int8
+    ingest_write_batch_size: int = 500  # Embedded chunks per vector store write
 
 @dataclass
 class DocumentConfig:
@@ -71,8 +127,21 @@ class AppConfig:
             request_timeout=int(os.getenv("LLM_TIMEOUT", "60")),
             max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
             rate_limit_rpm=int(os.getenv("LLM_RATE_LIMIT", "50")),
+            rate_limit_tpm=int(os.getenv("LLM_RATE_LIMIT_TPM", "0")),
+            model_rate_limits=os.getenv("LLM_MODEL_RATE_LIMITS", ""),
             cache_enabled=os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true",
-            cache_ttl=int(os.getenv("LLM_CACHE_TTL", "3600"))
+            cache_ttl=int(os.getenv("LLM_CACHE_TTL", "3600")),
+            cache_max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000")),
+            cache_dir=os.getenv("LLM_CACHE_DIR", ".cache/llm"),
+            cache_disk_max_entries=int(os.getenv("LLM_CACHE_DISK_MAX_ENTRIES", "50000")),
+            executor_workers=int(os.getenv("LLM_EXECUTOR_WORKERS", "16")),
+            http_max_connections=int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "20")),
+            http_max_keepalive=int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "10")),
+            http_keepalive_expiry=float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "30")),
+            circuit_failure_threshold=int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5")),
+            circuit_reset_timeout=float(os.getenv("LLM_CIRCUIT_RESET_TIMEOUT", "30")),
+            latency_budget=float(os.getenv("LLM_LATENCY_BUDGET", "0")),
+            hedge_after=float(os.getenv("LLM_HEDGE_AFTER", "0"))
         )
         
         # Create vector store config
@@ -82,7 +151,42 @@ class AppConfig:
             chunk_size=int(os.getenv("CHUNK_SIZE", "1000")),
             chunk_overlap=int(os.getenv("CHUNK_OVERLAP", "200")),
             similarity_top_k=int(os.getenv("SIMILARITY_TOP_K", "4")),
-            cache_embeddings=os.getenv("CACHE_EMBEDDINGS", "true").lower() == "true"
+            min_similarity_score=float(os.getenv("SIMILARITY_THRESHOLD")) if os.getenv("SIMILARITY_THRESHOLD") else None,
+            semantic_cache_enabled=os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true",
+            semantic_cache_threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")),
+            semantic_cache_max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000")),
+            semantic_cache_ttl=int(os.getenv("SEMANTIC_CACHE_TTL", "86400")),
+            cache_embeddings=os.getenv("CACHE_EMBEDDINGS", "true").lower() == "true",
+            embedding_cache_max_mb=int(os.getenv("EMBEDDING_CACHE_MAX_MB", "1024")),
+            embedding_memory_cache_mb=int(os.getenv("EMBEDDING_MEMORY_CACHE_MB", "256")),
+            faiss_index_type=os.getenv("FAISS_INDEX_TYPE", "flat"),
+            hnsw_m=int(os.getenv("FAISS_HNSW_M", "16")),
+            hnsw_ef_construction=int(os.getenv("FAISS_EF_CONSTRUCTION", "200")),
+            hnsw_ef_search=int(os.getenv("FAISS_EF_SEARCH", "50")),
+            ivf_nlist=int(os.getenv("FAISS_IVF_NLIST", "100")),
+            ivf_nprobe=int(os.getenv("FAISS_NPROBE", "10")),
+            pq_m=int(os.getenv("FAISS_PQ_M", "64")),
+            pq_nbits=int(os.getenv("FAISS_PQ_NBITS", "8")),
+            faiss_train_sample_size=int(os.getenv("FAISS_TRAIN_SAMPLE_SIZE", "50000")),
+            rerank_factor=int(os.getenv("FAISS_RERANK_FACTOR", "0")),
+            faiss_load_mode=os.getenv("FAISS_LOAD_MODE", "memory"),
+            compaction_threshold=int(os.getenv("INDEX_COMPACTION_THRESHOLD", "8")),
+            faiss_num_shards=int(os.getenv("FAISS_NUM_SHARDS", "4")),
+            faiss_shard_processes=os.getenv("FAISS_SHARD_PROCESSES", "true").lower() == "true",
+            vertex_upsert_batch_size=int(os.getenv("VERTEX_UPSERT_BATCH_SIZE", "100")),
+            vertex_embedding_workers=int(os.getenv("VERTEX_EMBEDDING_WORKERS", "4")),
+            vertex_local=os.getenv("VERTEX_LOCAL", "false").lower() == "true",
+            snapshot_retention=int(os.getenv("INDEX_SNAPSHOT_RETENTION", "3")),
+            embedding_batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", "20")),
+            embedding_max_batch_tokens=int(os.getenv("EMBEDDING_MAX_BATCH_TOKENS", "50000")),
+            embedding_max_batch_texts=int(os.getenv("EMBEDDING_MAX_BATCH_TEXTS", "512")),
+            embedding_workers=int(os.getenv("EMBEDDING_WORKERS", "4")),
+            embedding_timeout=int(os.getenv("EMBEDDING_TIMEOUT", "0")),
+            local_embedding_batch_size=int(os.getenv("LOCAL_EMBEDDING_BATCH_SIZE", "32")),
+            local_embedding_max_batch_tokens=int(os.getenv("LOCAL_EMBEDDING_MAX_BATCH_TOKENS", "8192")),
+            local_embedding_workers=int(os.getenv("LOCAL_EMBEDDING_WORKERS", "0")),
+            local_embedding_quantize=os.getenv("LOCAL_EMBEDDING_QUANTIZE", "false").lower() == "true",
+            ingest_write_batch_size=int(os.getenv("INGEST_WRITE_BATCH_SIZE", "500"))
         )
         
         # Create document config
@@ -0,0 +1,6 @@
+# core/conftest.py
+
+import os
+
+# config.app_config requires an API key at import time; tests never call the API
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
@@ -1,6 +1,7 @@
 # core/document_processing/file_handler.py
 
 import os
+import hashlib
 import tempfile
 import shutil
 import uuid
@@ -20,14 +21,25 @@ class FileHandlerError(Exception):
 class UploadedFile:
     """Represents an uploaded file with metadata."""
     
-    def __init__(self, temp_path: str, original_name: str, file_type: str, size: int):
+    def __init__(self, temp_path: str, original_name: str, file_type: str, size: int, content_hash: str = ""):
         """Initialize with file information."""
         self.temp_path = temp_path
         self.original_name = original_name
         self.file_type = file_type
         self.size = size
+        self.content_hash = content_hash
         self.uuid = str(uuid.uuid4())
     
+    @property
+    def source_id(self) -> str:
+        """Identity of the upload in the vector store.
+        
+        Files with the same name but different content (e.g. two students'
+        IEP.pdf) get different identities, so indexing one never replaces the
+        chunks of the other, while re-uploading the same file is recognized.
+        """
+        return f"upload/{self.content_hash or self.uuid}/{self.original_name}"
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary representation."""
         return {
@@ -35,6 +47,7 @@ class UploadedFile:
             "original_name": self.original_name,
             "file_type": self.file_type,
             "size": self.size,
+            "content_hash": self.content_hash,
             "temp_path": self.temp_path
         }
 
@@ -75,9 +88,10 @@ class FileHandler:
                 extension = '.txt'  # Default extension
             
             # Create temporary file with proper extension
+            content = uploaded_file.getvalue()
             with tempfile.NamedTemporaryFile(delete=False, suffix=extension) as temp_file:
                 # Write uploaded file content to temporary file
-                temp_file.write(uploaded_file.getvalue())
+                temp_file.write(content)
                 temp_path = temp_file.name
             
             # Add to tracking for cleanup
@@ -88,7 +102,8 @@ class FileHandler:
                 temp_path=temp_path,
                 original_name=uploaded_file.name,
                 file_type=extension,
-                size=uploaded_file.size if hasattr(uploaded_file, 'size') else os.path.getsize(temp_path)
+                size=uploaded_file.size if hasattr(uploaded_file, 'size') else os.path.getsize(temp_path),
+                content_hash=hashlib.sha256(content).hexdigest()[:16]
             )
                 
         except FileHandlerError as e:
@@ -1,21 +1,48 @@
 # core/embeddings/chroma_store.py
 
 import os
-import time
-from typing import List, Optional, Dict, Any, Callable
+import threading
+from typing import List, Optional, Dict, Any, Callable, Set, Tuple
 from langchain.schema import Document
 from langchain_chroma import Chroma
 from langchain_openai import OpenAIEmbeddings
 from config.app_config import config
 from config.logging_config import get_module_logger
+from core.embeddings.chunk_store import document_chunk_id, document_source_id
+from core.embeddings.store_retriever import ScoredStoreRetriever
 
 # Create a logger for this module
 logger = get_module_logger("chroma_store")
 
+# Records per write when the client does not report its limit
+DEFAULT_MAX_BATCH_SIZE = 5000
+
 class VectorStoreError(Exception):
     """Exception raised for vector store errors."""
     pass
 
+# One long-lived client per persist directory, shared by every store in the process
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+
+def get_chroma_client(persist_directory: str) -> Any:
+    """Get the shared persistent ChromaDB client for a directory.
+    
+    Args:
+        persist_directory: Directory of the ChromaDB database
+        
+    Returns:
+        chromadb.PersistentClient
+    """
+    import chromadb
+    
+    path = os.path.abspath(persist_directory)
+    with _clients_lock:
+        if path not in _clients:
+            _clients[path] = chromadb.PersistentClient(path=path)
+            logger.debug(f"Opened ChromaDB client for {path}")
+        return _clients[path]
+
 class ChromaVectorStore:
     """Manages ChromaDB vector store operations using LangChain's implementation."""
     
@@ -37,12 +64,63 @@ class ChromaVectorStore:
         
         self.collection_name = "documents"
         self.vectorstore = None
+        self.collection = None
+        self.client = None
+        
+        # Changed by every write, so caches of answers over the index know when they are stale
+        self.version = 0
+        self._version_lock = threading.Lock()
         
         # Create persist directory if it doesn't exist
         os.makedirs(self.persist_directory, exist_ok=True)
         
         logger.debug(f"Initialized ChromaDB vector store with directory: {self.persist_directory}")
     
+    def _get_client(self) -> Any:
+        """Get the shared ChromaDB client for this store's directory."""
+        if self.client is None:
+            self.client = get_chroma_client(self.persist_directory)
+        return self.client
+    
+    def _collection_names(self) -> List[str]:
+        """List the collection names in the database."""
+        collections = self._get_client().list_collections()
+        
+        # Newer APIs return names, older ones collection objects
+        return [c if isinstance(c, str) else c.name for c in collections]
+    
+    def _max_batch_size(self) -> int:
+        """Get the maximum number of records ChromaDB accepts per write."""
+        client = self._get_client()
+        try:
+            return client.get_max_batch_size()
+        except AttributeError:
+            return getattr(client, "max_batch_size", DEFAULT_MAX_BATCH_SIZE)
+    
+    def _open_vectorstore(self) -> Chroma:
+        """Open (or create) the collection through the shared client."""
+        return Chroma(
+            client=self._get_client(),
+            collection_name=self.collection_name,
+            embedding_function=self.embedding_provider
+        )
+    
+    def _get_collection(self) -> Any:
+        """Get the collection handle for raw reads and writes through the client's public API."""
+        if self.collection is None:
+            self.collection = self._get_client().get_collection(self.collection_name)
+        return self.collection
+    
+    @property
+    def index_version(self) -> int:
+        """Version of the indexed documents, changed by every add, delete, rebuild or clear."""
+        return self.version
+    
+    def _bump_version(self) -> None:
+        """Record a change of the indexed documents."""
+        with self._version_lock:
+            self.version += 1
+    
     def _index_exists(self) -> bool:
         """Check if index exists on disk.
         
@@ -50,29 +128,15 @@ class ChromaVectorStore:
             True if index exists, False otherwise
         """
         try:
-            # Try to import ChromaDB
-            import chromadb
+            # Cached handle means the collection exists
+            if self.vectorstore is not None:
+                return True
             
             # Check if the directory exists and is not empty
             if not os.path.exists(self.persist_directory) or not os.listdir(self.persist_directory):
                 return False
             
-            # Try to connect to ChromaDB and check if the collection exists
-            client = chromadb.PersistentClient(path=self.persist_directory)
-            
-            # Get collection names - this handles different API versions
-            try:
-                collections = client.list_collections()
-                if isinstance(collections, list):
-                    # Newer API that returns collection objects
-                    if isinstance(collections[0], str) if collections else False:
-                        return self.collection_name in collections
-                    else:
-                        return self.collection_name in [c.name for c in collections]
-                return False
-            except Exception:
-                # If the above fails, try the alternative API
-                return False
+            return self.collection_name in self._collection_names()
             
         except Exception as e:
             logger.error(f"Error checking if ChromaDB collection exists: {str(e)}")
@@ -90,12 +154,9 @@ class ChromaVectorStore:
                 logger.warning(f"ChromaDB collection not found: {self.collection_name}")
                 return False
             
-            # Create Chroma instance
-            self.vectorstore = Chroma(
-                collection_name=self.collection_name,
-                embedding_function=self.embedding_provider,
-                persist_directory=self.persist_directory
-            )
+            # Cache the collection handle for the lifetime of the store
+            if self.vectorstore is None:
+                self.vectorstore = self._open_vectorstore()
             
             logger.info(f"Loaded ChromaDB collection: {self.collection_name}")
             return True
@@ -104,12 +165,16 @@ class ChromaVectorStore:
             logger.error(f"Error loading ChromaDB: {str(e)}", exc_info=True)
             return False
     
-    def build_index(self, documents: List[Document], force_rebuild: bool = False) -> bool:
+    def build_index(self,
+                    documents: List[Document],
+                    force_rebuild: bool = False,
+                    embeddings: Optional[List[List[float]]] = None) -> bool:
         """Build a ChromaDB index from documents.
         
         Args:
             documents: Documents to index
             force_rebuild: Whether to force rebuild even if index exists
+            embeddings: Optional precomputed embeddings, one per document
             
         Returns:
             True if successful, False otherwise
@@ -122,70 +187,81 @@ class ChromaVectorStore:
             
             # Force delete existing collection if requested
             if force_rebuild and self._index_exists():
-                self.clear_index()
+                self._delete_collection()
             
             # Handle empty documents case
             if not documents or len(documents) == 0:
                 logger.info("Creating empty ChromaDB collection")
                 
                 # Create an empty vectorstore with a single placeholder document
-                placeholder_doc = Document(
+                documents = [Document(
                     page_content="This is a placeholder document for empty index",
                     metadata={"source": "placeholder", "id": "placeholder_doc"}
-                )
-                
-                self.vectorstore = Chroma.from_documents(
-                    [placeholder_doc],
-                    embedding=self.embedding_provider,
-                    collection_name=self.collection_name,
-                    persist_directory=self.persist_directory
-                )
-                
-                # Make sure changes are persisted
-                self.vectorstore.persist()
-                
-                logger.info("Created empty ChromaDB collection")
-                return True
+                )]
+                embeddings = None
             
             logger.info(f"Building ChromaDB index with {len(documents)} documents")
             
-            # Make sure documents have IDs in metadata
-            docs_with_ids = []
-            for i, doc in enumerate(documents):
-                # Create a new document with the same content and metadata
-                new_doc = Document(
-                    page_content=doc.page_content,
-                    metadata=dict(doc.metadata) if doc.metadata else {}
-                )
-                # Make sure the document has an ID in its metadata
-                if 'id' not in new_doc.metadata:
-                    new_doc.metadata['id'] = f"doc_{int(time.time())}_{i}"
-                docs_with_ids.append(new_doc)
-            
-            # Create ChromaDB index
-            self.vectorstore = Chroma.from_documents(
-                docs_with_ids,
-                embedding=self.embedding_provider,
-                collection_name=self.collection_name,
-                persist_directory=self.persist_directory,
-                ids=[doc.metadata['id'] for doc in docs_with_ids]
-            )
+            self.vectorstore = self._open_vectorstore()
+            
+            # Give documents content-derived IDs and write them in batches
+            positions = {}
+            docs_with_ids = self._with_content_ids(documents, positions)
+            if embeddings is not None:
+                embeddings = [embeddings[positions[doc.metadata['id']]] for doc in docs_with_ids]
+            self._write_batches(docs_with_ids, embeddings)
+            self._bump_version()
             
-            # Make sure changes are persisted
-            self.vectorstore.persist()
+            # Other shared instances of this directory still serve the replaced index
+            from core.embeddings.store_registry import VectorStoreRegistry
+            VectorStoreRegistry.invalidate(index_dir=self.persist_directory, keep=self)
             
-            logger.info(f"Successfully built ChromaDB index with {len(documents)} documents")
+            logger.info(f"Successfully built ChromaDB index with {len(docs_with_ids)} documents")
             return True
             
         except Exception as e:
             logger.error(f"Error building ChromaDB index: {str(e)}", exc_info=True)
             return False
     
-    def add_documents(self, documents: List[Document]) -> bool:
+    def _write_batches(self,
+                       docs_with_ids: List[Document],
+                       embeddings: Optional[List[List[float]]] = None) -> None:
+        """Write documents to the collection in slices of the client's maximum batch size.
+        
+        Each slice is embedded (unless embeddings are given) and written
+        with its precomputed embeddings in one call.
+        
+        Args:
+            docs_with_ids: Documents with metadata['id'] set
+            embeddings: Optional precomputed embeddings, one per document
+        """
+        batch_size = self._max_batch_size()
+        
+        for start in range(0, len(docs_with_ids), batch_size):
+            batch = docs_with_ids[start:start + batch_size]
+            texts = [doc.page_content for doc in batch]
+            
+            if embeddings is not None:
+                batch_embeddings = embeddings[start:start + batch_size]
+            else:
+                batch_embeddings = self.embedding_provider.embed_documents(texts)
+            
+            self._get_collection().add(
+                ids=[doc.metadata['id'] for doc in batch],
+                embeddings=batch_embeddings,
+                documents=texts,
+                metadatas=[doc.metadata for doc in batch]
+            )
+            logger.debug(f"Wrote {start + len(batch)}/{len(docs_with_ids)} documents to ChromaDB")
+    
+    def add_documents(self, 
+                     documents: List[Document],
+                     embeddings: Optional[List[List[float]]] = None) -> bool:
         """Add documents to the vector store.
         
         Args:
             documents: Documents to add
+            embeddings: Optional precomputed embeddings, one per document
             
         Returns:
             True if successful, False otherwise
@@ -201,33 +277,158 @@ class ChromaVectorStore:
                     logger.error("Failed to load or create index for adding documents")
                     return False
             
-            # Generate IDs for the documents if they don't have them in metadata
-            docs_with_ids = []
-            for i, doc in enumerate(documents):
-                # Create a new document with the same content and metadata
-                new_doc = Document(
-                    page_content=doc.page_content,
-                    metadata=dict(doc.metadata) if doc.metadata else {}
-                )
-                # Make sure the document has an ID in its metadata
-                if 'id' not in new_doc.metadata:
-                    new_doc.metadata['id'] = f"doc_{int(time.time())}_{i}"
-                docs_with_ids.append(new_doc)
-            
-            # Add documents with explicit IDs
-            ids = [doc.metadata['id'] for doc in docs_with_ids]
-            self.vectorstore.add_documents(docs_with_ids, ids=ids)
-            
-            # Remove the persist call - newer Chroma versions persist automatically
-            # No need to call self.vectorstore.persist()
-            
-            logger.info(f"Added {len(documents)} documents to ChromaDB")
+            # Give documents content-derived IDs and skip those already stored
+            positions = {}
+            docs_with_ids = self._with_content_ids(documents, positions)
+            existing = self.existing_ids([doc.metadata['id'] for doc in docs_with_ids])
+            docs_with_ids = [doc for doc in docs_with_ids if doc.metadata['id'] not in existing]
+            
+            if not docs_with_ids:
+                logger.info(f"All {len(documents)} documents are already in ChromaDB")
+                return True
+            
+            # Write with explicit IDs in slices Chroma accepts
+            if embeddings is not None:
+                embeddings = [embeddings[positions[doc.metadata['id']]] for doc in docs_with_ids]
+            self._write_batches(docs_with_ids, embeddings)
+            self._bump_version()
+            
+            logger.info(f"Added {len(docs_with_ids)} of {len(documents)} documents to ChromaDB")
             return True
             
         except Exception as e:
             logger.error(f"Error adding documents to ChromaDB: {str(e)}", exc_info=True)
             return False
     
+    def _with_content_ids(self,
+                          documents: List[Document],
+                          positions: Optional[Dict[str, int]] = None) -> List[Document]:
+        """Copy documents with content-derived IDs, dropping repeated chunks.
+        
+        Args:
+            documents: Documents to prepare
+            positions: Optional dict filled with each kept ID's index in documents
+            
+        Returns:
+            Documents with metadata['id'] set
+        """
+        docs_with_ids = []
+        seen = set()
+        
+        for i, doc in enumerate(documents):
+            # The same source and text always map to the same ID
+            doc_id = document_chunk_id(doc)
+            if doc_id in seen:
+                continue
+            seen.add(doc_id)
+            
+            metadata = dict(doc.metadata) if doc.metadata else {}
+            if metadata.get('id') not in (None, doc_id):
+                metadata.setdefault('document_id', metadata['id'])
+            metadata['id'] = doc_id
+            
+            docs_with_ids.append(Document(page_content=doc.page_content, metadata=metadata))
+            if positions is not None:
+                positions[doc_id] = i
+        
+        return docs_with_ids
+    
+    def existing_ids(self, ids: List[str]) -> Set[str]:
+        """Find which document IDs are already in the collection.
+        
+        Args:
+            ids: Document IDs to check
+            
+        Returns:
+            Set of the given IDs that are already stored
+        """
+        if not ids:
+            return set()
+        
+        if not self.vectorstore and not self.load_index():
+            return set()
+        
+        ids = list(ids)
+        batch_size = self._max_batch_size()
+        
+        found = set()
+        for start in range(0, len(ids), batch_size):
+            response = self._get_collection().get(ids=ids[start:start + batch_size], include=[])
+            found.update(response["ids"])
+        return found
+    
+    def delete_documents(self,
+                         ids: Optional[List[str]] = None,
+                         source: Optional[str] = None,
+                         keep_ids: Optional[List[str]] = None) -> bool:
+        """Delete documents by ID and/or all chunks of a source.
+        
+        Args:
+            ids: Document IDs to delete
+            source: Source identity whose chunks to delete (see document_source_id)
+            keep_ids: Document IDs to keep even if they match
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            if not self.vectorstore and not self.load_index():
+                logger.warning("No index to delete documents from")
+                return True
+            
+            doc_ids = set(ids or [])
+            if source is not None:
+                # Chunks indexed before source_id existed are identified by their source
+                for key in ("source_id", "source"):
+                    response = self._get_collection().get(where={key: source}, include=["metadatas"])
+                    doc_ids.update(
+                        doc_id for doc_id, metadata in zip(response["ids"], response["metadatas"])
+                        if document_source_id(metadata) == source
+                    )
+            doc_ids -= set(keep_ids or [])
+            
+            if not doc_ids:
+                logger.info("No matching documents to delete")
+                return True
+            
+            doc_ids = sorted(doc_ids)
+            batch_size = self._max_batch_size()
+            for start in range(0, len(doc_ids), batch_size):
+                self._get_collection().delete(ids=doc_ids[start:start + batch_size])
+            self._bump_version()
+            
+            logger.info(f"Deleted {len(doc_ids)} documents from ChromaDB")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error deleting documents from ChromaDB: {str(e)}", exc_info=True)
+            return False
+    
+    def upsert_documents(self,
+                         documents: List[Document],
+                         embeddings: Optional[List[List[float]]] = None) -> bool:
+        """Replace the stored chunks of each document source with new ones.
+        
+        Chunks of the same sources that are not among the new documents are
+        deleted; unchanged chunks are kept and not re-embedded.
+        
+        Args:
+            documents: New chunks
+            embeddings: Optional precomputed embeddings, one per document
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        new_ids: Dict[str, List[str]] = {}
+        for doc in documents:
+            new_ids.setdefault(document_source_id(doc.metadata), []).append(document_chunk_id(doc))
+        
+        for source, keep_ids in new_ids.items():
+            if source is not None and not self.delete_documents(source=source, keep_ids=keep_ids):
+                return False
+        
+        return self.add_documents(documents, embeddings=embeddings)
+    
     def search(self, query: str, k: int = None) -> List[Document]:
         """Search the index for similar documents.
         
@@ -259,6 +460,154 @@ class ChromaVectorStore:
             logger.error(f"Error searching ChromaDB: {str(e)}", exc_info=True)
             raise VectorStoreError(f"Search failed: {str(e)}")
     
+    def _scored_results(self,
+                        texts: List[str],
+                        metadatas: List[Optional[Dict[str, Any]]],
+                        distances: List[float],
+                        min_score: Optional[float]) -> List[Tuple[Document, float]]:
+        """Build scored documents from one query's raw collection results.
+        
+        Args:
+            texts: Document texts
+            metadatas: Document metadata
+            distances: Squared L2 distances from the collection
+            min_score: Minimum similarity score to keep
+            
+        Returns:
+            List of (document, score) tuples with the score also in metadata['score']
+        """
+        results = []
+        for text, metadata, distance in zip(texts, metadatas, distances):
+            # Cosine similarity for unit-length embeddings, clamped to 0-1
+            score = max(0.0, min(1.0, 1.0 - distance / 2.0))
+            if min_score is not None and score < min_score:
+                continue
+            results.append((Document(page_content=text, metadata=dict(metadata or {}, score=score)), score))
+        
+        return results
+    
+    def _query_collection(self,
+                          query_embeddings: List[List[float]],
+                          k: int,
+                          min_score: Optional[float]) -> List[List[Tuple[Document, float]]]:
+        """Run one collection query for a batch of embeddings.
+        
+        Args:
+            query_embeddings: Query embeddings
+            k: Number of results per query
+            min_score: Minimum similarity score to keep
+            
+        Returns:
+            Scored results per query
+        """
+        response = self._get_collection().query(
+            query_embeddings=query_embeddings,
+            n_results=k,
+            include=["documents", "metadatas", "distances"]
+        )
+        
+        return [
+            self._scored_results(texts, metadatas, distances, min_score)
+            for texts, metadatas, distances in zip(
+                response["documents"], response["metadatas"], response["distances"]
+            )
+        ]
+    
+    def search_with_scores(self,
+                           query: str,
+                           k: int = None,
+                           min_score: Optional[float] = None,
+                           query_vector: Optional[List[float]] = None) -> List[Tuple[Document, float]]:
+        """Search the index for similar documents, with similarity scores.
+        
+        Args:
+            query: Query string
+            k: Number of results to return
+            min_score: Minimum normalized similarity score (0-1) to return
+            query_vector: Precomputed embedding of the query (embedded here if None)
+            
+        Returns:
+            List of (document, score) tuples, most similar first
+            
+        Raises:
+            VectorStoreError: If search fails
+        """
+        try:
+            if not self.vectorstore:
+                if not self.load_index():
+                    raise VectorStoreError("No ChromaDB available for search")
+            
+            # Use configurable k if not specified
+            k = k or config.vector_store.similarity_top_k
+            
+            if query_vector is None:
+                query_vector = self.embedding_provider.embed_query(query)
+            results = self._query_collection([list(query_vector)], k, min_score)[0]
+            
+            logger.debug(f"Found {len(results)} documents above score {min_score} for query: {query[:50]}...")
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error searching ChromaDB: {str(e)}", exc_info=True)
+            raise VectorStoreError(f"Search failed: {str(e)}")
+    
+    def search_batch(self,
+                     queries: List[str],
+                     k: int = None,
+                     min_score: Optional[float] = None) -> List[List[Document]]:
+        """Search the index for documents similar to each of several queries.
+        
+        All queries are embedded in one request and sent to the collection
+        as a single query.
+        
+        Args:
+            queries: Query strings
+            k: Number of results to return per query
+            min_score: Minimum normalized similarity score (0-1) to return
+            
+        Returns:
+            List of similar documents for each query, in query order, with
+            the similarity score in metadata['score']
+            
+        Raises:
+            VectorStoreError: If search fails
+        """
+        try:
+            if not queries:
+                return []
+            
+            if not self.vectorstore:
+                if not self.load_index():
+                    raise VectorStoreError("No ChromaDB available for search")
+            
+            # Use configurable k if not specified
+            k = k or config.vector_store.similarity_top_k
+            
+            query_embeddings = self.embedding_provider.embed_documents(queries)
+            results = [
+                [doc for doc, _ in hits]
+                for hits in self._query_collection(query_embeddings, k, min_score)
+            ]
+            
+            logger.debug(f"Found documents for {len(queries)} queries in one batch")
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error batch searching ChromaDB: {str(e)}", exc_info=True)
+            raise VectorStoreError(f"Batch search failed: {str(e)}")
+    
+    def _delete_collection(self) -> None:
+        """Delete the collection and drop the cached handle."""
+        try:
+            if self.collection_name in self._collection_names():
+                self._get_client().delete_collection(self.collection_name)
+                logger.info(f"Deleted collection: {self.collection_name}")
+        except Exception as e:
+            logger.warning(f"Error deleting collection: {str(e)}")
+        
+        self.vectorstore = None
+        self.collection = None
+    
     def clear_index(self) -> bool:
         """Clear the index and remove all documents.
         
@@ -266,32 +615,7 @@ class ChromaVectorStore:
             True if successful, False otherwise
         """
         try:
-            # Delete the collection
-            import chromadb
-            
-            try:
-                client = chromadb.PersistentClient(path=self.persist_directory)
-                
-                # Get collection names
-                collections = client.list_collections()
-                collection_exists = False
-                
-                if isinstance(collections, list):
-                    # Check if collection exists
-                    if isinstance(collections[0], str) if collections else False:
-                        collection_exists = self.collection_name in collections
-                    else:
-                        collection_exists = self.collection_name in [c.name for c in collections]
-                
-                # Delete if exists
-                if collection_exists:
-                    client.delete_collection(self.collection_name)
-                    logger.info(f"Deleted collection: {self.collection_name}")
-            except Exception as e:
-                logger.warning(f"Error deleting collection: {str(e)}")
-            
-            # Reset vectorstore reference
-            self.vectorstore = None
+            self._delete_collection()
             
             # Create a new empty collection
             return self.build_index([])
@@ -300,14 +624,14 @@ class ChromaVectorStore:
             logger.error(f"Error clearing ChromaDB index: {str(e)}", exc_info=True)
             return False
     
-    def as_retriever(self, search_kwargs: Optional[Dict[str, Any]] = None) -> Any:
-        """Get a retriever for the vector store.
+    def as_retriever(self, search_kwargs: Optional[Dict[str, Any]] = None) -> ScoredStoreRetriever:
+        """Get a LangChain retriever for the vector store.
         
         Args:
-            search_kwargs: Search parameters
+            search_kwargs: Search parameters (k, score_threshold)
             
         Returns:
-            Retriever object
+            Retriever, also callable with a query
             
         Raises:
             VectorStoreError: If retriever creation fails
@@ -317,13 +641,15 @@ class ChromaVectorStore:
                 if not self.load_index():
                     raise VectorStoreError("No ChromaDB available for retrieval")
             
-            # Get the native retriever from LangChain
-            retriever = self.vectorstore.as_retriever(
-                search_kwargs=search_kwargs or {"k": config.vector_store.similarity_top_k}
-            )
+            # Create search parameters with defaults
+            search_kwargs = search_kwargs or {
+                "k": config.vector_store.similarity_top_k
+            }
+            min_score = search_kwargs.get("score_threshold", config.vector_store.min_similarity_score)
             
-            return retriever
+            # Low-scoring chunks never reach the prompt
+            return ScoredStoreRetriever(store=self, k=search_kwargs.get("k"), min_score=min_score)
             
         except Exception as e:
             logger.error(f"Error creating retriever: {str(e)}", exc_info=True)
-            raise VectorStoreError(f"Failed to create retriever: {str(e)}")
\ No newline at end of file
+            raise VectorStoreError(f"Failed to create retriever: {str(e)}")
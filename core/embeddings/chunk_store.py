@@ -0,0 +1,359 @@
+# core/embeddings/chunk_store.py
+
+import json
+import hashlib
+import sqlite3
+import threading
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Set, Tuple
+from langchain.schema import Document
+from config.logging_config import get_module_logger
+
+# Create a logger for this module
+logger = get_module_logger("chunk_store")
+
+# (vector_id, doc_id, text, metadata)
+ChunkRecord = Tuple[int, str, str, Dict[str, Any]]
+
+# Maximum number of bound parameters per SQLite query
+MAX_QUERY_PARAMS = 500
+
+def chunk_id(text: str, source: Optional[str] = None) -> str:
+    """Derive a stable chunk ID from its source and text.
+
+    Re-ingesting the same chunk always yields the same ID, so stores can
+    skip chunks they already hold.
+
+    Args:
+        text: Chunk text
+        source: Source the chunk came from
+
+    Returns:
+        Hex digest identifying the chunk
+    """
+    digest = hashlib.sha256()
+    digest.update((source or "").encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+# SQL expression of a chunk's source identity, see document_source_id
+SOURCE_ID_SQL = "COALESCE(json_extract(metadata, '$.source_id'), json_extract(metadata, '$.source'))"
+
+def document_source_id(metadata: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Get the identity of the document a chunk came from.
+
+    The source is a display name that several files can share (e.g. two
+    students' IEP.pdf), so ingest sets source_id to a unique identity such
+    as a stored path. Chunks indexed without one fall back to their source.
+
+    Args:
+        metadata: Chunk metadata
+
+    Returns:
+        Source identity, or None if the chunk has neither
+    """
+    if not metadata:
+        return None
+    return metadata.get("source_id") or metadata.get("source")
+
+def document_chunk_id(document: Document) -> str:
+    """Get the content-derived ID of a document chunk.
+
+    Args:
+        document: Document chunk
+
+    Returns:
+        Chunk ID
+    """
+    return chunk_id(document.page_content, document_source_id(document.metadata))
+
+class ChunkStore:
+    """Random-access on-disk store for chunk text and metadata.
+
+    Rows are keyed by the vector's position in the FAISS index, so a search
+    only reads the rows of its top-k hits instead of unpickling the whole
+    docstore.
+    """
+
+    def __init__(self, db_path: str, read_only: bool = False):
+        """Open a chunk store.
+
+        Args:
+            db_path: Path to the SQLite database
+            read_only: Open the database read-only (safe to share across processes)
+        """
+        self.db_path = db_path
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        self._readers = 0
+        self._close_pending = False
+
+        if read_only:
+            self._conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._init_db()
+
+        logger.debug(f"Opened chunk store at {db_path} (read_only={read_only})")
+
+    def _init_db(self) -> None:
+        """Initialize database with schema."""
+        with self._lock:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS chunks (
+                    vector_id INTEGER PRIMARY KEY,
+                    doc_id TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    metadata TEXT NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_doc_id ON chunks (doc_id)")
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_chunks_source_id ON chunks ({SOURCE_ID_SQL})"
+            )
+            self._conn.commit()
+
+    @classmethod
+    def create(cls,
+               db_path: str,
+               records: Iterable[ChunkRecord],
+               copy_from: Optional["ChunkStore"] = None) -> "ChunkStore":
+        """Create a new chunk store file.
+
+        Args:
+            db_path: Path of the new database (must not exist)
+            records: Records to insert
+            copy_from: Existing store whose rows are copied first
+
+        Returns:
+            The new store, opened read-write
+        """
+        if copy_from is not None:
+            # SQLite's online backup copies pages without decoding rows
+            target = sqlite3.connect(db_path)
+            with copy_from._lock:
+                copy_from._conn.backup(target)
+            target.close()
+
+        store = cls(db_path)
+        store.add(records)
+        return store
+
+    def add(self, records: Iterable[ChunkRecord]) -> None:
+        """Insert chunk records.
+
+        Args:
+            records: (vector_id, doc_id, text, metadata) tuples
+        """
+        rows = (
+            (vector_id, doc_id, text, json.dumps(metadata, default=str))
+            for vector_id, doc_id, text, metadata in records
+        )
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (vector_id, doc_id, text, metadata) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def get_many(self, vector_ids: List[int]) -> Dict[int, Document]:
+        """Fetch the documents for a set of vectors.
+
+        Args:
+            vector_ids: Vector IDs to fetch
+
+        Returns:
+            Mapping of vector ID to document (missing IDs are omitted)
+        """
+        found = {}
+        vector_ids = [int(vector_id) for vector_id in vector_ids]
+
+        for start in range(0, len(vector_ids), MAX_QUERY_PARAMS):
+            batch = vector_ids[start:start + MAX_QUERY_PARAMS]
+            placeholders = ",".join("?" for _ in batch)
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT vector_id, text, metadata FROM chunks WHERE vector_id IN ({placeholders})",
+                    batch
+                ).fetchall()
+            found.update(
+                (vector_id, Document(page_content=text, metadata=json.loads(metadata)))
+                for vector_id, text, metadata in rows
+            )
+
+        return found
+
+    def existing_doc_ids(self, doc_ids: List[str]) -> Set[str]:
+        """Find which document IDs are already stored.
+
+        Args:
+            doc_ids: Document IDs to check
+
+        Returns:
+            Set of the given IDs present in the store
+        """
+        found = set()
+        doc_ids = list(doc_ids)
+
+        for start in range(0, len(doc_ids), MAX_QUERY_PARAMS):
+            batch = doc_ids[start:start + MAX_QUERY_PARAMS]
+            placeholders = ",".join("?" for _ in batch)
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT DISTINCT doc_id FROM chunks WHERE doc_id IN ({placeholders})",
+                    batch
+                ).fetchall()
+            found.update(row[0] for row in rows)
+
+        return found
+
+    def vector_ids_for(self,
+                       doc_ids: Optional[List[str]] = None,
+                       source: Optional[str] = None) -> Dict[int, str]:
+        """Find the vectors holding given documents or all chunks of a source.
+
+        Args:
+            doc_ids: Document IDs to look up
+            source: Source identity whose chunks to look up (see document_source_id)
+
+        Returns:
+            Mapping of vector ID to document ID
+        """
+        found = {}
+
+        if source is not None:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT vector_id, doc_id FROM chunks WHERE {SOURCE_ID_SQL} = ?",
+                    (source,)
+                ).fetchall()
+            found.update(rows)
+
+        doc_ids = list(doc_ids or [])
+        for start in range(0, len(doc_ids), MAX_QUERY_PARAMS):
+            batch = doc_ids[start:start + MAX_QUERY_PARAMS]
+            placeholders = ",".join("?" for _ in batch)
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT vector_id, doc_id FROM chunks WHERE doc_id IN ({placeholders})",
+                    batch
+                ).fetchall()
+            found.update(rows)
+
+        return found
+
+    def delete(self, vector_ids: Iterable[int]) -> None:
+        """Delete rows by vector ID.
+
+        Args:
+            vector_ids: Vector IDs to delete
+        """
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM chunks WHERE vector_id = ?",
+                ((int(vector_id),) for vector_id in vector_ids)
+            )
+            self._conn.commit()
+
+    def max_vector_id(self) -> int:
+        """Get the highest stored vector ID, or -1 if the store is empty."""
+        with self._lock:
+            value = self._conn.execute("SELECT MAX(vector_id) FROM chunks").fetchone()[0]
+        return -1 if value is None else value
+
+    def count(self) -> int:
+        """Count stored chunks."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def iter_records(self, batch_size: int = 1000) -> Iterator[ChunkRecord]:
+        """Iterate over all records in vector ID order.
+
+        Args:
+            batch_size: Rows fetched per query
+        """
+        last_id = -1
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT vector_id, doc_id, text, metadata FROM chunks "
+                    "WHERE vector_id > ? ORDER BY vector_id LIMIT ?",
+                    (last_id, batch_size)
+                ).fetchall()
+
+            if not rows:
+                return
+
+            for vector_id, doc_id, text, metadata in rows:
+                yield vector_id, doc_id, text, json.loads(metadata)
+            last_id = rows[-1][0]
+
+    def iter_doc_ids(self, batch_size: int = 10000) -> Iterator[Tuple[int, str]]:
+        """Iterate over (vector_id, doc_id) pairs of all records.
+
+        Args:
+            batch_size: Rows fetched per query
+        """
+        last_id = -1
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT vector_id, doc_id FROM chunks WHERE vector_id > ? ORDER BY vector_id LIMIT ?",
+                    (last_id, batch_size)
+                ).fetchall()
+
+            if not rows:
+                return
+
+            yield from rows
+            last_id = rows[-1][0]
+
+    def iter_metadata(self, batch_size: int = 1000) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Iterate over the metadata of all records, without their text.
+
+        Args:
+            batch_size: Rows fetched per query
+        """
+        last_id = -1
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT vector_id, metadata FROM chunks WHERE vector_id > ? ORDER BY vector_id LIMIT ?",
+                    (last_id, batch_size)
+                ).fetchall()
+
+            if not rows:
+                return
+
+            for vector_id, metadata in rows:
+                yield vector_id, json.loads(metadata)
+            last_id = rows[-1][0]
+
+    def retain(self) -> "ChunkStore":
+        """Register a reader that uses the store outside its owner's lock.
+
+        A retained store stays open until every reader has called release,
+        even if it is closed meanwhile.
+
+        Returns:
+            This store
+        """
+        with self._lock:
+            if self._close_pending:
+                raise sqlite3.ProgrammingError("Cannot retain a closed chunk store")
+            self._readers += 1
+        return self
+
+    def release(self) -> None:
+        """Unregister a reader, closing the connection if a close is pending."""
+        with self._lock:
+            self._readers -= 1
+            if self._close_pending and self._readers == 0:
+                self._conn.close()
+
+    def close(self) -> None:
+        """Close the database connection, once no retained reader is left."""
+        with self._lock:
+            self._close_pending = True
+            if self._readers == 0:
+                self._conn.close()
@@ -1,35 +1,229 @@
 # core/embeddings/embedding_manager.py
 
 import os
-import pickle
+import sqlite3
 import hashlib
 import time
 import threading
-import functools
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
 from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
 from langchain.schema import Document
 from config.app_config import config
 from config.logging_config import get_module_logger
 from core.llm.llm_client import LLMClient
+from core.embeddings.embedding_scheduler import EmbeddingBatchScheduler
+from core.llm.timeouts import Deadline
 
 # Create a logger for this module
 logger = get_module_logger("embedding_manager")
 
+# File suffix of the per-text pickles the cache used before it moved to SQLite
+LEGACY_CACHE_SUFFIX = ".pkl"
+
+@dataclass
+class EmbeddingCacheStats:
+    """Counters of an embedding cache."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+class EmbeddingMemoryCache:
+    """Bounded in-process LRU of embeddings, the L1 tier in front of EmbeddingCache.
+    
+    Entries are float32 arrays keyed by the EmbeddingCache key (a hash of
+    the text), so repeated chunks are served without touching the disk.
+    One instance is shared by every cache in the process; see
+    get_memory_cache.
+    """
+    
+    def __init__(self, max_bytes: int):
+        """Initialize with a memory cap.
+        
+        Args:
+            max_bytes: Byte budget of the held vectors
+        """
+        self.max_bytes = max_bytes
+        self.stats = EmbeddingCacheStats()
+        self._entries: "OrderedDict[bytes, Tuple[np.ndarray, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get_many(self, keys: List[bytes]) -> List[Optional[Tuple[np.ndarray, float]]]:
+        """Look up several keys, marking the hits as recently used.
+        
+        Args:
+            keys: Cache keys
+            
+        Returns:
+            (vector, created) per key, None where not held
+        """
+        with self._lock:
+            results = []
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                results.append(entry)
+            
+            hits = sum(1 for entry in results if entry is not None)
+            self.stats.hits += hits
+            self.stats.misses += len(keys) - hits
+            return results
+    
+    def set_many(self, entries: Dict[bytes, Tuple[np.ndarray, float]]) -> None:
+        """Add entries, evicting the least recently used ones past the memory cap.
+        
+        Args:
+            entries: Cache key -> (float32 vector, created time)
+        """
+        with self._lock:
+            for key, entry in entries.items():
+                previous = self._entries.pop(key, None)
+                if previous is not None:
+                    self.stats.bytes -= previous[0].nbytes
+                self._entries[key] = entry
+                self.stats.bytes += entry[0].nbytes
+            
+            while self.stats.bytes > self.max_bytes and self._entries:
+                _, (vector, _) = self._entries.popitem(last=False)
+                self.stats.bytes -= vector.nbytes
+                self.stats.evictions += 1
+            self.stats.entries = len(self._entries)
+    
+    def discard(self, keys: List[bytes]) -> None:
+        """Drop entries.
+        
+        Args:
+            keys: Cache keys
+        """
+        with self._lock:
+            for key in keys:
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self.stats.bytes -= entry[0].nbytes
+            self.stats.entries = len(self._entries)
+    
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self.stats.entries = 0
+            self.stats.bytes = 0
+
+_memory_cache: Optional[EmbeddingMemoryCache] = None
+_memory_cache_lock = threading.Lock()
+
+def get_memory_cache() -> Optional[EmbeddingMemoryCache]:
+    """Get the process-wide L1 embedding cache.
+    
+    Returns:
+        Shared EmbeddingMemoryCache, or None if disabled in config
+    """
+    global _memory_cache
+    max_bytes = config.vector_store.embedding_memory_cache_mb * 1024 * 1024
+    if max_bytes <= 0:
+        return None
+    
+    with _memory_cache_lock:
+        if _memory_cache is None:
+            _memory_cache = EmbeddingMemoryCache(max_bytes)
+            logger.debug(f"Created shared embedding memory cache ({max_bytes} bytes)")
+        return _memory_cache
+
 class EmbeddingCache:
-    """Cache for document embeddings."""
+    """Cache for document embeddings.
+    
+    Embeddings live in a single SQLite file as raw float32 blobs, keyed by a
+    hash of the text. Lookups and writes are batched into one statement per
+    few hundred texts, and the least recently used entries are evicted once
+    the cache grows past its byte budget. A shared in-memory LRU sits in
+    front of the file and serves repeated texts without touching the disk.
+    """
     
-    def __init__(self, cache_dir: str = ".cache/embeddings"):
+    # Texts per SQL statement, below SQLite's bound-parameter limit
+    _SQL_BATCH_SIZE = 500
+    
+    def __init__(self,
+                 cache_dir: str = ".cache/embeddings",
+                 max_bytes: Optional[int] = None,
+                 namespace: str = "",
+                 memory_cache: Optional[EmbeddingMemoryCache] = None,
+                 use_memory_cache: bool = True):
         """Initialize with cache directory.
         
         Args:
-            cache_dir: Directory to store cache files
+            cache_dir: Directory to store the cache file
+            max_bytes: Byte budget of the stored vectors (default: from config)
+            namespace: Prefix mixed into every key, e.g. the embedding model name
+            memory_cache: L1 tier (default: the shared one from get_memory_cache)
+            use_memory_cache: Whether to use an L1 tier at all
         """
         self.cache_dir = cache_dir
         os.makedirs(cache_dir, exist_ok=True)
         self.ttl = config.vector_store.cache_ttl if hasattr(config.vector_store, 'cache_ttl') else 86400  # 24 hours
-        logger.debug(f"Initialized embedding cache in {cache_dir}")
+        self.max_bytes = max_bytes if max_bytes is not None else config.vector_store.embedding_cache_max_mb * 1024 * 1024
+        self.namespace = namespace
+        self.stats = EmbeddingCacheStats()
+        self.memory_cache = (memory_cache or get_memory_cache()) if use_memory_cache else None
+        self._lock = threading.Lock()
+        
+        self.cache_path = os.path.join(cache_dir, "embeddings.sqlite3")
+        self._conn = sqlite3.connect(self.cache_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # Bookkeeping lives apart from the vectors, so touching an entry does not rewrite its blob
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key BLOB PRIMARY KEY, size INTEGER NOT NULL, created REAL NOT NULL, last_access REAL NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS vectors (key BLOB PRIMARY KEY, vector BLOB NOT NULL)")
+        
+        self._refresh_stats()
+        self._remove_legacy_files()
+        
+        logger.debug(f"Initialized embedding cache in {self.cache_path} ({self.stats.entries} entries)")
+    
+    def _refresh_stats(self) -> None:
+        """Recount entries and bytes from the cache file.
+        
+        Other processes write the same file and rolled back writes leave the
+        in-memory counters behind, so they are recounted after every write
+        and failure instead of being tracked incrementally.
+        """
+        entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        self.stats.entries, self.stats.bytes = entries, size
     
-    def _get_cache_key(self, text: str) -> str:
+    def _remove_legacy_files(self) -> None:
+        """Delete the pickled embeddings of the old cache layout.
+        
+        They were keyed by a hash of the text alone, without the model
+        namespace, so they cannot be moved into the new file.
+        """
+        removed = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(LEGACY_CACHE_SUFFIX):
+                try:
+                    os.remove(entry.path)
+                    removed += 1
+                except OSError as e:
+                    logger.warning(f"Could not remove legacy cache file {entry.path}: {str(e)}")
+        
+        if removed:
+            logger.info(f"Removed {removed} legacy pickled embeddings from {self.cache_dir}")
+    
+    def _get_cache_key(self, text: str) -> bytes:
         """Generate a cache key for a text.
         
         Args:
@@ -38,51 +232,102 @@ class EmbeddingCache:
         Returns:
             Cache key
         """
-        return hashlib.md5(text.encode('utf-8')).hexdigest()
+        return hashlib.blake2b(f"{self.namespace}\0{text}".encode('utf-8'), digest_size=16).digest()
     
-    def _get_cache_path(self, key: str) -> str:
-        """Get the cache file path for a key.
+    def get(self, text: str) -> Optional[List[float]]:
+        """Get embeddings from cache if available.
         
         Args:
-            key: Cache key
+            text: Text to get embeddings for
             
         Returns:
-            Cache file path
+            Cached embeddings or None if not found/expired
         """
-        return os.path.join(self.cache_dir, f"{key}.pkl")
+        return self.get_many([text])[0]
     
-    def get(self, text: str) -> Optional[List[float]]:
-        """Get embeddings from cache if available.
+    def get_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Get embeddings of several texts from cache.
         
         Args:
-            text: Text to get embeddings for
+            texts: Texts to get embeddings for
             
         Returns:
-            Cached embeddings or None if not found/expired
+            Cached embeddings in the order of the texts, None where not found/expired
+        """
+        keys = [self._get_cache_key(text) for text in texts]
+        found: Dict[bytes, np.ndarray] = {}
+        now = time.time()
+        
+        # Serve what the L1 tier holds; only the rest goes to disk
+        if self.memory_cache is not None:
+            stale = []
+            for key, entry in zip(keys, self.memory_cache.get_many(keys)):
+                if entry is None:
+                    continue
+                if now - entry[1] > self.ttl:
+                    stale.append(key)
+                else:
+                    found[key] = entry[0]
+            self.memory_cache.discard(stale)
+        
+        disk_keys = list(dict.fromkeys(key for key in keys if key not in found))
+        if disk_keys:
+            found.update(self._read(disk_keys, now))
+        
+        return [found[key].tolist() if key in found else None for key in keys]
+    
+    def _read(self, keys: List[bytes], now: float) -> Dict[bytes, np.ndarray]:
+        """Read embeddings from the cache file and promote them to the L1 tier.
+        
+        Args:
+            keys: Distinct cache keys
+            now: Lookup time
+            
+        Returns:
+            Cache key -> vector for the keys found and not expired
         """
-        key = self._get_cache_key(text)
-        cache_path = self._get_cache_path(key)
-        
-        if os.path.exists(cache_path):
-            try:
-                # Check if cache is still valid
-                if time.time() - os.path.getmtime(cache_path) > self.ttl:
-                    logger.debug(f"Cache expired for key {key}")
-                    return None
+        found: Dict[bytes, np.ndarray] = {}
+        created_times: Dict[bytes, float] = {}
+        
+        try:
+            with self._lock:
+                expired = []
+                for start in range(0, len(keys), self._SQL_BATCH_SIZE):
+                    batch = keys[start:start + self._SQL_BATCH_SIZE]
+                    rows = self._conn.execute(
+                        "SELECT entries.key, vector, created FROM entries JOIN vectors ON vectors.key = entries.key "
+                        f"WHERE entries.key IN ({','.join('?' * len(batch))})",
+                        batch
+                    ).fetchall()
+                    for key, vector, created in rows:
+                        if now - created > self.ttl:
+                            expired.append(key)
+                        else:
+                            found[key] = np.frombuffer(vector, dtype=np.float32)
+                            created_times[key] = created
                 
-                # Load cached embeddings
-                with open(cache_path, 'rb') as f:
-                    return pickle.load(f)
-                    
-            except Exception as e:
-                logger.error(f"Error loading cache for key {key}: {str(e)}")
-                # Delete corrupted cache file
-                try:
-                    os.unlink(cache_path)
-                except:
-                    pass
+                if found or expired:
+                    with self._transaction():
+                        self._conn.executemany(
+                            "UPDATE entries SET last_access = ? WHERE key = ?",
+                            [(now, key) for key in found]
+                        )
+                        if expired:
+                            self._delete(expired)
+                            logger.debug(f"Cache expired for {len(expired)} embeddings")
                 
-        return None
+                self.stats.hits += len(found)
+                self.stats.misses += len(keys) - len(found)
+                
+        except sqlite3.Error as e:
+            logger.error(f"Error reading embedding cache: {str(e)}")
+            self.stats.misses += len(keys)
+            self._recount_after_error()
+            return {}
+        
+        if self.memory_cache is not None and found:
+            self.memory_cache.set_many({key: (vector, created_times[key]) for key, vector in found.items()})
+        return found
     
     def set(self, text: str, embeddings: List[float]) -> None:
         """Set embeddings in cache.
@@ -91,30 +336,130 @@ class EmbeddingCache:
             text: Text to cache embeddings for
             embeddings: Embeddings to cache
         """
-        key = self._get_cache_key(text)
-        cache_path = self._get_cache_path(key)
+        self.set_many([text], [embeddings])
+    
+    def set_many(self, texts: List[str], embeddings: List[List[float]]) -> None:
+        """Set embeddings of several texts in cache in one transaction.
+        
+        Args:
+            texts: Texts to cache embeddings for
+            embeddings: Embeddings to cache, one per text
+        """
+        now = time.time()
+        rows = {}
+        for text, embedding in zip(texts, embeddings):
+            rows[self._get_cache_key(text)] = np.asarray(embedding, dtype=np.float32).tobytes()
+        if not rows:
+            return
+        
+        if self.memory_cache is not None:
+            self.memory_cache.set_many({
+                key: (np.frombuffer(vector, dtype=np.float32), now) for key, vector in rows.items()
+            })
         
         try:
-            with open(cache_path, 'wb') as f:
-                pickle.dump(embeddings, f)
-                
-            logger.debug(f"Cached embeddings for key {key}")
+            with self._lock:
+                with self._transaction():
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO entries (key, size, created, last_access) VALUES (?, ?, ?, ?)",
+                        [(key, len(vector), now, now) for key, vector in rows.items()]
+                    )
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO vectors (key, vector) VALUES (?, ?)",
+                        rows.items()
+                    )
+                    
+                    # Other processes fill the same file, so the budget is checked against its real size
+                    self._refresh_stats()
+                    if self.stats.bytes > self.max_bytes:
+                        self._evict()
+                    
+            logger.debug(f"Cached {len(rows)} embeddings")
                 
-        except Exception as e:
-            logger.error(f"Error caching embeddings for key {key}: {str(e)}")
+        except sqlite3.Error as e:
+            logger.error(f"Error caching embeddings: {str(e)}")
+            self._recount_after_error()
+    
+    @contextmanager
+    def _transaction(self):
+        """Run statements in one transaction, rolling back on error."""
+        self._conn.execute("BEGIN")
+        try:
+            yield
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+    
+    def _recount_after_error(self) -> None:
+        """Recount the counters after a failed write rolled back their updates."""
+        try:
+            with self._lock:
+                self._refresh_stats()
+        except sqlite3.Error as e:
+            logger.error(f"Error recounting embedding cache: {str(e)}")
+    
+    def _sizes(self, keys: List[bytes]) -> Dict[bytes, int]:
+        """Get the stored vector sizes of the keys already in the cache."""
+        sizes = {}
+        for start in range(0, len(keys), self._SQL_BATCH_SIZE):
+            batch = keys[start:start + self._SQL_BATCH_SIZE]
+            sizes.update(self._conn.execute(
+                f"SELECT key, size FROM entries WHERE key IN ({','.join('?' * len(batch))})",
+                batch
+            ).fetchall())
+        return sizes
+    
+    def _delete(self, keys: List[bytes]) -> None:
+        """Delete entries and update the counters."""
+        sizes = self._sizes(keys)
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in sizes])
+        self._conn.executemany("DELETE FROM vectors WHERE key = ?", [(key,) for key in sizes])
+        self.stats.entries -= len(sizes)
+        self.stats.bytes -= sum(sizes.values())
+    
+    def _evict(self) -> None:
+        """Evict least recently used entries until the cache is 10% under its byte budget."""
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        while self.stats.bytes > target and self.stats.entries > 0:
+            # Average entry size tells how many rows to drop per round
+            average = max(1, self.stats.bytes // self.stats.entries)
+            count = max(1, (self.stats.bytes - target + average - 1) // average)
+            keys = [row[0] for row in self._conn.execute(
+                "SELECT key FROM entries ORDER BY last_access LIMIT ?", (count,)
+            ).fetchall()]
+            if not keys:
+                break
+            self._delete(keys)
+            evicted += len(keys)
+        
+        self.stats.evictions += evicted
+        logger.debug(f"Evicted {evicted} least recently used embeddings")
     
     def clear(self) -> None:
         """Clear the entire cache."""
         try:
-            for filename in os.listdir(self.cache_dir):
-                file_path = os.path.join(self.cache_dir, filename)
-                if os.path.isfile(file_path):
-                    os.unlink(file_path)
+            if self.memory_cache is not None:
+                self.memory_cache.clear()
+            
+            with self._lock:
+                with self._transaction():
+                    self._conn.execute("DELETE FROM entries")
+                    self._conn.execute("DELETE FROM vectors")
+                self._conn.execute("VACUUM")
+                self.stats.entries = 0
+                self.stats.bytes = 0
                     
             logger.debug("Cleared embedding cache")
                 
-        except Exception as e:
+        except sqlite3.Error as e:
             logger.error(f"Error clearing cache: {str(e)}")
+    
+    def close(self) -> None:
+        """Close the cache file."""
+        with self._lock:
+            self._conn.close()
 
 
 class TextChunkProcessor:
@@ -171,12 +516,12 @@ class TextChunkProcessor:
             # Add the chunk
             chunks.append(text[start:end])
             
-            # Move start with overlap
-            start = max(start, end - self.chunk_overlap)
-            
-            # If we're at the end, break
-            if start >= len(text):
+            # The last chunk reached the end; stepping back by the overlap would repeat it forever
+            if end >= len(text):
                 break
+            
+            # Move start with overlap, always making progress
+            start = max(start + 1, end - self.chunk_overlap)
         
         logger.debug(f"Split text into {len(chunks)} chunks")
         return chunks
@@ -212,39 +557,12 @@ class TextChunkProcessor:
         return chunked_docs
 
 
-def timeout_after(seconds):
-    """Decorator that adds a timeout to a function."""
-    def decorator(func):
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            result = [None]
-            exception = [None]
-            
-            def target():
-                try:
-                    result[0] = func(*args, **kwargs)
-                except Exception as e:
-                    exception[0] = e
-            
-            thread = threading.Thread(target=target)
-            thread.daemon = True
-            thread.start()
-            thread.join(seconds)
-            
-            if thread.is_alive():
-                thread.join(0.1)  # Give it a tiny bit more time to finish
-                raise TimeoutError(f"Function {func.__name__} timed out after {seconds} seconds")
-            
-            if exception[0]:
-                raise exception[0]
-                
-            return result[0]
-        return wrapper
-    return decorator
-
 class EmbeddingManager:
     """Manages document embedding with caching."""
     
+    # Dimension of the zero vectors returned for texts that could not be embedded
+    FALLBACK_DIMENSION = 1536  # Standard OpenAI embedding size
+    
     def __init__(self, llm_client: Optional[LLMClient] = None, use_cache: bool = True):
         """Initialize with client and cache.
         
@@ -255,108 +573,77 @@ class EmbeddingManager:
         self.llm_client = llm_client or LLMClient()
         self.chunk_processor = TextChunkProcessor()
         self.use_cache = use_cache and config.vector_store.cache_embeddings
-        self.embedding_timeout = 30  # 30 seconds timeout for embedding operations
+        
+        # Requests go through the client, so they share its rate limiter and retries
+        self.scheduler = EmbeddingBatchScheduler(self.llm_client.embeddings)
         
         if self.use_cache:
             self.cache = EmbeddingCache()
         
         logger.debug(f"Initialized embedding manager with cache={'enabled' if self.use_cache else 'disabled'}")
     
-    @timeout_after(30)  # Apply 30 second timeout to prevent hanging
-    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+    def _fallback(self, position: int) -> List[float]:
+        """Zero vector for a text that could not be embedded, to prevent complete failure."""
+        logger.warning(f"Using zero fallback embedding for text {position}")
+        return [0.0] * self.FALLBACK_DIMENSION
+    
+    def get_embeddings(self, texts: List[str], timeout: Optional[float] = None) -> List[List[float]]:
         """Get embeddings for texts with caching.
         
+        Uncached texts are packed into token-bounded batches that run
+        concurrently; each batch is cached as soon as it is embedded, so
+        work done before a timeout is kept for the next call.
+        
         Args:
             texts: Texts to embed
+            timeout: Deadline in seconds for the whole call (default: from config, 0 for none)
             
         Returns:
             List of embedding vectors
+            
+        Raises:
+            DeadlineExceeded: If the deadline passes before all texts are embedded
         """
         if not texts:
             return []
             
         start_time = time.time()
+        timeout = timeout if timeout is not None else config.vector_store.embedding_timeout
+        deadline = Deadline(timeout) if timeout else None
         
-        # If cache disabled, get all embeddings from API
-        if not self.use_cache:
-            try:
-                result = self.llm_client.embeddings(texts)
-                elapsed = time.time() - start_time
-                if elapsed > 5.0:  # Log slow operations
-                    logger.warning(f"Slow embedding generation (no cache): {elapsed:.2f}s for {len(texts)} texts")
-                return result
-            except Exception as e:
-                logger.error(f"Error getting embeddings without cache: {str(e)}")
-                # Return zero vectors as a fallback to prevent complete failure
-                return [[0.0] * 1536 for _ in range(len(texts))]
-        
-        # Check cache for each text
-        embeddings = []
-        texts_to_embed = []
-        cache_indices = []
-        
-        # Track cache hit rate for performance metrics
-        cache_hits = 0
-        
-        # Limit batch size to prevent timeouts with large requests
-        max_batch_size = 10
-        
-        for i, text in enumerate(texts):
-            cached_embedding = self.cache.get(text)
-            
-            if cached_embedding is not None:
-                # Use cached embedding
-                embeddings.append((i, cached_embedding))
-                cache_hits += 1
-                logger.debug(f"Using cached embedding for text {i}")
-            else:
-                # Need to get embedding from API
-                texts_to_embed.append(text)
-                cache_indices.append(i)
-        
-        # Process embeddings in smaller batches if needed
-        if texts_to_embed:
-            num_batches = (len(texts_to_embed) + max_batch_size - 1) // max_batch_size
+        # Check cache for all texts at once
+        if self.use_cache:
+            embeddings: List[Optional[List[float]]] = self.cache.get_many(texts)
+        else:
+            embeddings = [None] * len(texts)
+        cache_hits = sum(1 for embedding in embeddings if embedding is not None)
+        
+        # Embed each distinct missing text once, however often it repeats
+        missing: Dict[str, List[int]] = {}
+        for i, (text, embedding) in enumerate(zip(texts, embeddings)):
+            if embedding is None:
+                missing.setdefault(text, []).append(i)
+        
+        if missing:
+            unique_texts = list(missing)
+            logger.debug(f"Getting {len(unique_texts)} embeddings from API")
             
-            for batch_idx in range(num_batches):
-                start_idx = batch_idx * max_batch_size
-                end_idx = min((batch_idx + 1) * max_batch_size, len(texts_to_embed))
-                
-                batch_texts = texts_to_embed[start_idx:end_idx]
-                batch_indices = cache_indices[start_idx:end_idx]
+            for batch, vectors in self.scheduler.stream(unique_texts, deadline):
+                embedded = [(unique_texts[i], vector) for i, vector in zip(batch, vectors) if vector is not None]
+                if self.use_cache and embedded:
+                    self.cache.set_many([text for text, _ in embedded], [vector for _, vector in embedded])
                 
-                try:
-                    logger.debug(f"Getting batch {batch_idx+1}/{num_batches} with {len(batch_texts)} embeddings from API")
-                    api_time_start = time.time()
-                    api_embeddings = self.llm_client.embeddings(batch_texts)
-                    api_time = time.time() - api_time_start
-                    
-                    if api_time > 5.0:  # Log slow API calls
-                        logger.warning(f"Slow API embedding call: {api_time:.2f}s for batch {batch_idx+1}/{num_batches}")
-                    
-                    # Cache new embeddings
-                    for idx, embedding in zip(batch_indices, api_embeddings):
-                        self.cache.set(texts[idx], embedding)
-                        embeddings.append((idx, embedding))
-                except Exception as e:
-                    logger.error(f"Error getting batch {batch_idx+1}/{num_batches} embeddings: {str(e)}")
-                    # Return zero vectors as a fallback to prevent complete failure
-                    for idx in batch_indices:
-                        zero_embedding = [0.0] * 1536  # Standard OpenAI embedding size
-                        embeddings.append((idx, zero_embedding))
-                        logger.warning(f"Using zero fallback embedding for text {idx}")
-        
-        # Sort by original index and return only embeddings
-        embeddings.sort(key=lambda x: x[0])
-        result = [e[1] for e in embeddings]
+                for i, vector in zip(batch, vectors):
+                    for position in missing[unique_texts[i]]:
+                        embeddings[position] = vector if vector is not None else self._fallback(position)
         
         # Log performance metrics
         elapsed = time.time() - start_time
         if elapsed > 5.0:  # Log slow operations
-            cache_rate = (cache_hits / len(texts)) * 100 if texts else 0
+            cache_rate = (cache_hits / len(texts)) * 100
             logger.warning(f"Slow embedding generation: {elapsed:.2f}s for {len(texts)} texts (cache hit rate: {cache_rate:.1f}%)")
         
-        return result
+        return embeddings
     
     def embed_documents(self, documents: List[Document]) -> Tuple[List[Document], List[List[float]]]:
         """Embed documents with chunking and caching.
@@ -0,0 +1,146 @@
+# core/embeddings/embedding_scheduler.py
+
+from collections import deque
+from typing import Callable, Iterator, List, Optional, Tuple
+from config.app_config import config
+from config.logging_config import get_module_logger
+from core.llm.timeouts import Deadline, DeadlineExceeded, current_deadline, get_executor
+from core.llm.token_counter import count_tokens
+
+# Create a logger for this module
+logger = get_module_logger("embedding_scheduler")
+
+# OpenAI embedding requests accept at most 2048 inputs and 300k tokens
+MAX_REQUEST_TEXTS = 2048
+MAX_REQUEST_TOKENS = 300000
+
+# (positions of the texts in the input, their embeddings; None where embedding failed)
+EmbeddedBatch = Tuple[List[int], List[Optional[List[float]]]]
+
+class EmbeddingBatchScheduler:
+    """Packs texts into token-bounded requests and runs several in flight.
+
+    Batches are filled in input order up to the per-request text and token
+    limits and submitted to the shared API executor; the embedding function
+    applies its own rate limiting, so concurrent requests share the model's
+    request and token budget. A failed batch is retried one text at a time, so one bad input
+    only costs its own embedding. Results come back batch by batch in input
+    order while later batches are still running.
+    """
+
+    def __init__(self,
+                 embed_fn: Callable[[List[str]], List[List[float]]],
+                 max_batch_tokens: int = None,
+                 max_batch_texts: int = None,
+                 max_workers: int = None):
+        """Initialize with the embedding function and limits.
+
+        Args:
+            embed_fn: Embeds a list of texts in one request
+            max_batch_tokens: Tokens per request (default: from config)
+            max_batch_texts: Texts per request (default: from config)
+            max_workers: Requests in flight (default: from config)
+        """
+        self.embed_fn = embed_fn
+        self.max_batch_tokens = min(max_batch_tokens or config.vector_store.embedding_max_batch_tokens,
+                                    MAX_REQUEST_TOKENS)
+        self.max_batch_texts = min(max_batch_texts or config.vector_store.embedding_max_batch_texts,
+                                   MAX_REQUEST_TEXTS)
+        self.max_workers = max_workers or config.vector_store.embedding_workers
+
+        logger.debug(f"Initialized embedding scheduler with max_batch_tokens={self.max_batch_tokens}, "
+                     f"max_batch_texts={self.max_batch_texts}, max_workers={self.max_workers}")
+
+    def _batches(self, texts: List[str]) -> Iterator[List[int]]:
+        """Group text positions into consecutive batches within the request limits."""
+        batch: List[int] = []
+        batch_tokens = 0
+        for position, text in enumerate(texts):
+            tokens = count_tokens(text)
+            if batch and (len(batch) >= self.max_batch_texts or batch_tokens + tokens > self.max_batch_tokens):
+                yield batch
+                batch, batch_tokens = [], 0
+            batch.append(position)
+            batch_tokens += tokens
+        if batch:
+            yield batch
+
+    def _embed_batch(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Embed one batch, retrying text by text if the request fails."""
+        try:
+            return self.embed_fn(texts)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            if len(texts) == 1:
+                logger.error(f"Error embedding text: {str(e)}")
+                return [None]
+            logger.warning(f"Embedding batch of {len(texts)} texts failed, retrying individually: {str(e)}")
+
+        return [self._embed_batch([text])[0] for text in texts]
+
+    def stream(self, texts: List[str], deadline: Optional[Deadline] = None) -> Iterator[EmbeddedBatch]:
+        """Embed texts, yielding each batch in input order as soon as it is done.
+
+        At most max_workers batches are in flight, so memory stays bounded
+        for long inputs. When the deadline passes, batches not yet started
+        are dropped and running requests stop at their client timeout.
+
+        Args:
+            texts: Texts to embed
+            deadline: Deadline of the whole call (default: the caller's current one)
+
+        Yields:
+            (positions, embeddings) per batch; embeddings are None for texts that failed
+
+        Raises:
+            DeadlineExceeded: If the deadline passes before all batches are done
+        """
+        if not texts:
+            return
+
+        deadline = deadline or current_deadline()
+        executor = get_executor()
+        pending = deque()
+
+        def next_result() -> EmbeddedBatch:
+            batch, future = pending[0]
+            result = executor.wait(future, deadline)
+            pending.popleft()
+            return batch, result
+
+        try:
+            for batch in self._batches(texts):
+                if deadline is not None:
+                    deadline.check()
+                future = executor.submit(self._embed_batch, [texts[i] for i in batch], deadline=deadline)
+                pending.append((batch, future))
+
+                if len(pending) >= self.max_workers:
+                    yield next_result()
+
+            while pending:
+                yield next_result()
+        except DeadlineExceeded:
+            # Drop the batches still queued behind the one that ran out of time
+            executor.abandon(deadline, [future for _, future in pending])
+            raise
+
+    def embed(self, texts: List[str], deadline: Optional[Deadline] = None) -> List[Optional[List[float]]]:
+        """Embed texts.
+
+        Args:
+            texts: Texts to embed
+            deadline: Deadline of the whole call (default: the caller's current one)
+
+        Returns:
+            Embeddings in the order of the texts; None for texts that failed
+
+        Raises:
+            DeadlineExceeded: If the deadline passes before all texts are embedded
+        """
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        for batch, vectors in self.stream(texts, deadline):
+            for position, vector in zip(batch, vectors):
+                embeddings[position] = vector
+        return embeddings
@@ -0,0 +1,548 @@
+# core/embeddings/faiss_index.py
+
+import time
+from typing import List, Optional, Dict, Any, Tuple
+import numpy as np
+import faiss
+from config.app_config import config
+from config.logging_config import get_module_logger
+
+# Create a logger for this module
+logger = get_module_logger("faiss_index")
+
+# Minimum number of training points per IVF centroid recommended by FAISS
+MIN_POINTS_PER_CENTROID = 39
+
+class FAISSIndexFactory:
+    """Factory for creating and tuning native FAISS indexes."""
+
+    SUPPORTED_INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_pq", "sq8", "sq4")
+
+    # Index types that store lossy codes instead of the original vectors
+    COMPRESSED_INDEX_TYPES = ("ivf_pq", "pq", "sq8", "sq4")
+
+    @staticmethod
+    def create_index(
+        dimension: int,
+        num_vectors: int,
+        index_type: str = None,
+        m: int = None,
+        ef_construction: int = None,
+        nlist: int = None,
+        pq_m: int = None,
+        pq_nbits: int = None
+    ) -> Any:
+        """Create an empty FAISS index of the requested type.
+
+        Args:
+            dimension: Embedding dimension
+            num_vectors: Number of vectors the index will be built with
+            index_type: Index type ('flat', 'hnsw', 'ivf_flat', 'ivf_pq', 'sq8', 'sq4')
+            m: Number of HNSW neighbors per node
+            ef_construction: HNSW construction-time search depth
+            nlist: Number of IVF cells
+            pq_m: Number of product quantizer sub-vectors
+            pq_nbits: Bits per product quantizer code
+
+        Returns:
+            FAISS index (IVF and quantized indexes still need training)
+        """
+        vs_config = config.vector_store
+        index_type = (index_type or vs_config.faiss_index_type).lower()
+
+        if index_type not in FAISSIndexFactory.SUPPORTED_INDEX_TYPES:
+            logger.warning(f"Unknown FAISS index type: {index_type}. Using flat index.")
+            index_type = "flat"
+
+        if index_type == "hnsw":
+            m = m or vs_config.hnsw_m
+            index = faiss.index_factory(dimension, f"HNSW{m},Flat", faiss.METRIC_L2)
+            index.hnsw.efConstruction = ef_construction or vs_config.hnsw_ef_construction
+            logger.debug(f"Created HNSW index with M={m}, efConstruction={index.hnsw.efConstruction}")
+            return index
+
+        if index_type == "ivf_flat":
+            nlist = FAISSIndexFactory.effective_nlist(num_vectors, nlist or vs_config.ivf_nlist)
+            if nlist is None:
+                logger.info(f"Too few vectors ({num_vectors}) to train an IVF index. Using flat index.")
+                return faiss.IndexFlatL2(dimension)
+            index = faiss.index_factory(dimension, f"IVF{nlist},Flat", faiss.METRIC_L2)
+            logger.debug(f"Created IVF-Flat index with nlist={nlist}")
+            return index
+
+        if index_type == "ivf_pq":
+            pq_m = FAISSIndexFactory.effective_pq_m(dimension, pq_m or vs_config.pq_m)
+            pq_nbits = pq_nbits or vs_config.pq_nbits
+
+            # Each sub-quantizer trains 2^nbits centroids, which needs enough points per centroid.
+            # Flat PQ cannot filter by ID at search time, so small corpora use SQ8 instead
+            if num_vectors < MIN_POINTS_PER_CENTROID * 2 ** pq_nbits:
+                logger.info(f"Too few vectors ({num_vectors}) to train a product quantizer. Using SQ8 index.")
+                return faiss.index_factory(dimension, "SQ8", faiss.METRIC_L2)
+
+            nlist = FAISSIndexFactory.effective_nlist(num_vectors, nlist or vs_config.ivf_nlist)
+            if nlist is None:
+                logger.info(f"Too few vectors ({num_vectors}) to train an IVF index. Using SQ8 index.")
+                return faiss.index_factory(dimension, "SQ8", faiss.METRIC_L2)
+
+            description = f"IVF{nlist},PQ{pq_m}x{pq_nbits}"
+            index = faiss.index_factory(dimension, description, faiss.METRIC_L2)
+            logger.debug(f"Created {description} index")
+            return index
+
+        if index_type in ("sq8", "sq4"):
+            index = faiss.index_factory(dimension, index_type.upper(), faiss.METRIC_L2)
+            logger.debug(f"Created {index_type.upper()} scalar quantizer index")
+            return index
+
+        return faiss.IndexFlatL2(dimension)
+
+    @staticmethod
+    def effective_pq_m(dimension: int, pq_m: int) -> int:
+        """Get the largest sub-vector count not above pq_m that divides the dimension.
+
+        Args:
+            dimension: Embedding dimension
+            pq_m: Requested number of sub-vectors
+
+        Returns:
+            Usable number of sub-vectors
+        """
+        for candidate in range(min(pq_m, dimension), 0, -1):
+            if dimension % candidate == 0:
+                return candidate
+        return 1
+
+    @staticmethod
+    def effective_nlist(num_vectors: int, nlist: int) -> Optional[int]:
+        """Scale the IVF cell count down to what the corpus can train.
+
+        Args:
+            num_vectors: Number of training vectors available
+            nlist: Requested number of IVF cells
+
+        Returns:
+            Usable number of cells, or None if the corpus is too small for IVF
+        """
+        max_cells = num_vectors // MIN_POINTS_PER_CENTROID
+        if max_cells < 2:
+            return None
+        return min(nlist, max_cells)
+
+    @staticmethod
+    def train_index(index: Any, embeddings: List[List[float]], sample_size: int = None) -> None:
+        """Train the index on the given embeddings if it requires training.
+
+        Args:
+            index: FAISS index
+            embeddings: Training vectors
+            sample_size: Maximum number of vectors to train on (default: from config)
+        """
+        if index.is_trained:
+            return
+
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        sample_size = sample_size or config.vector_store.faiss_train_sample_size
+
+        # Quantizers converge on a random sample; training on everything only costs time
+        if len(vectors) > sample_size:
+            rng = np.random.default_rng(0)
+            vectors = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+
+        logger.info(f"Training FAISS index on {len(vectors)} vectors")
+        start_time = time.time()
+        index.train(vectors)
+        logger.debug(f"Trained FAISS index in {time.time() - start_time:.2f}s")
+
+    @staticmethod
+    def apply_search_params(index: Any,
+                            ef_search: Optional[int] = None,
+                            nprobe: Optional[int] = None) -> None:
+        """Apply query-time parameters to an index.
+
+        Parameters that do not apply to the index type are ignored.
+
+        Args:
+            index: FAISS index
+            ef_search: HNSW search-time depth
+            nprobe: Number of IVF cells to visit per query
+        """
+        parameter_space = faiss.ParameterSpace()
+
+        for name, value in (("efSearch", ef_search), ("nprobe", nprobe)):
+            if value is None:
+                continue
+            try:
+                parameter_space.set_index_parameter(index, name, value)
+                logger.debug(f"Set FAISS search parameter {name}={value}")
+            except RuntimeError:
+                # Parameter not supported by this index type
+                pass
+
+    @staticmethod
+    def with_id_map(index: Any, ids: Optional[np.ndarray] = None) -> Any:
+        """Wrap an index so vectors are addressed by stable IDs instead of positions.
+
+        Args:
+            index: FAISS index (empty, or holding vectors at positions 0..n-1)
+            ids: IDs for the existing vectors (default: their positions)
+
+        Returns:
+            IndexIDMap2 holding the same vectors
+        """
+        if isinstance(index, faiss.IndexIDMap2):
+            return index
+
+        if index.ntotal == 0:
+            return FAISSIndexFactory._owning_id_map(faiss.clone_index(index))
+
+        vectors = FAISSIndexFactory.reconstruct_all(index)
+        inner = faiss.clone_index(index)
+        inner.reset()
+
+        id_mapped = FAISSIndexFactory._owning_id_map(inner)
+        id_mapped.add_with_ids(vectors, ids if ids is not None else np.arange(index.ntotal, dtype=np.int64))
+        return id_mapped
+
+    @staticmethod
+    def _owning_id_map(inner: Any) -> Any:
+        """Wrap an index in an IndexIDMap2 that takes ownership of it.
+
+        Without this the inner index is freed as soon as the caller drops
+        its Python reference.
+
+        Args:
+            inner: Index to wrap (ownership moves to the wrapper)
+
+        Returns:
+            IndexIDMap2 around the index
+        """
+        id_mapped = faiss.IndexIDMap2(inner)
+        id_mapped.own_fields = True
+        inner.this.disown()
+        return id_mapped
+
+    @staticmethod
+    def reconstruct_all(index: Any) -> np.ndarray:
+        """Get all stored vectors of an index in position order (lossy for quantized indexes).
+
+        Args:
+            index: FAISS index
+
+        Returns:
+            Array of shape (ntotal, d)
+        """
+        index = faiss.downcast_index(index)
+        if isinstance(index, faiss.IndexIDMap2):
+            index = faiss.downcast_index(index.index)
+        if isinstance(index, faiss.IndexIVF):
+            # IVF indexes need a direct map to look vectors up by position
+            index = faiss.clone_index(index)
+            index.make_direct_map()
+        return index.reconstruct_n(0, index.ntotal)
+
+    @staticmethod
+    def reconstruct_ids(index: Any, ids: np.ndarray) -> np.ndarray:
+        """Get the stored vectors of given IDs (lossy for quantized indexes).
+
+        Args:
+            index: FAISS index
+            ids: Vector IDs to look up
+
+        Returns:
+            Array of shape (len(ids), d)
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(ids):
+            return np.zeros((0, index.d), dtype=np.float32)
+
+        try:
+            return index.reconstruct_batch(ids)
+        except RuntimeError:
+            # No direct lookup (IVF): reconstruct everything and pick the rows
+            positions = {int(vector_id): i for i, vector_id in enumerate(FAISSIndexFactory.vector_ids(index))}
+            return FAISSIndexFactory.reconstruct_all(index)[[positions[int(vector_id)] for vector_id in ids]]
+
+    @staticmethod
+    def vector_ids(index: Any) -> np.ndarray:
+        """Get the ID stored at each position of an index.
+
+        Args:
+            index: FAISS index
+
+        Returns:
+            Array of IDs in position order
+        """
+        index = faiss.downcast_index(index)
+        if isinstance(index, faiss.IndexIDMap2):
+            return faiss.vector_to_array(index.id_map)
+        return np.arange(index.ntotal, dtype=np.int64)
+
+    @staticmethod
+    def remove_ids(index: Any, ids: List[int]) -> Any:
+        """Remove vectors by ID from an ID-mapped index.
+
+        Index types that cannot remove in place (HNSW) are rebuilt from
+        their stored vectors, keeping the remaining IDs.
+
+        Args:
+            index: IndexIDMap2
+            ids: IDs to remove
+
+        Returns:
+            Index without the given IDs (may be a new object)
+        """
+        ids = np.asarray(sorted(ids), dtype=np.int64)
+        if not len(ids):
+            return index
+
+        try:
+            index.remove_ids(faiss.IDSelectorBatch(ids))
+            return index
+        except RuntimeError:
+            logger.debug(f"{FAISSIndexFactory.describe_index(index)} index cannot remove vectors in place; rebuilding")
+
+        all_ids = FAISSIndexFactory.vector_ids(index)
+        keep = ~np.isin(all_ids, ids)
+        vectors = FAISSIndexFactory.reconstruct_all(index)[keep]
+
+        inner = faiss.clone_index(faiss.downcast_index(index.index))
+        inner.reset()
+        rebuilt = FAISSIndexFactory._owning_id_map(inner)
+        rebuilt.add_with_ids(vectors, all_ids[keep])
+        return rebuilt
+
+    @staticmethod
+    def search(index: Any,
+               queries: np.ndarray,
+               k: int,
+               selector: Optional[Any] = None,
+               ef_search: Optional[int] = None,
+               nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Search an index, optionally restricted to the IDs accepted by a selector.
+
+        ef_search and nprobe apply to this search only; the index's own
+        settings are left unchanged for concurrent and later searches.
+
+        Args:
+            index: FAISS index
+            queries: Query vectors of shape (n, d)
+            k: Number of results per query
+            selector: Optional FAISS IDSelector applied during the search
+            ef_search: HNSW search-time depth override
+            nprobe: Number of IVF cells to visit override
+
+        Returns:
+            Tuple of (distances, ids)
+        """
+        if selector is None and ef_search is None and nprobe is None:
+            return index.search(queries, k)
+
+        # Search parameters replace the index's own settings, so carry them over
+        inner = faiss.downcast_index(index)
+        if isinstance(inner, faiss.IndexIDMap2):
+            inner = faiss.downcast_index(inner.index)
+        if isinstance(inner, faiss.IndexHNSW):
+            params = faiss.SearchParametersHNSW(sel=selector, efSearch=ef_search or inner.hnsw.efSearch)
+        elif isinstance(inner, faiss.IndexIVF):
+            params = faiss.SearchParametersIVF(sel=selector, nprobe=nprobe or inner.nprobe)
+        else:
+            params = faiss.SearchParameters(sel=selector)
+
+        return index.search(queries, k, params=params)
+
+    @staticmethod
+    def describe_index(index: Any) -> str:
+        """Get a short description of an index type.
+
+        Args:
+            index: FAISS index
+
+        Returns:
+            Index type name ('flat', 'hnsw', 'ivf_flat', 'ivf_pq', 'pq', 'sq8',
+            'sq4' or the FAISS class name)
+        """
+        index = faiss.downcast_index(index)
+        if isinstance(index, faiss.IndexIDMap2):
+            index = faiss.downcast_index(index.index)
+
+        if isinstance(index, faiss.IndexHNSW):
+            return "hnsw"
+        if isinstance(index, faiss.IndexIVFFlat):
+            return "ivf_flat"
+        if isinstance(index, faiss.IndexIVFPQ):
+            return "ivf_pq"
+        if isinstance(index, faiss.IndexPQ):
+            return "pq"
+        if isinstance(index, faiss.IndexScalarQuantizer):
+            if index.sq.qtype == faiss.ScalarQuantizer.QT_8bit:
+                return "sq8"
+            if index.sq.qtype == faiss.ScalarQuantizer.QT_4bit:
+                return "sq4"
+        if isinstance(index, faiss.IndexFlat):
+            return "flat"
+        return type(index).__name__
+
+    @staticmethod
+    def is_compressed(index: Any) -> bool:
+        """Check whether an index stores lossy codes rather than the original vectors.
+
+        Args:
+            index: FAISS index
+
+        Returns:
+            True for product- and scalar-quantized indexes
+        """
+        return FAISSIndexFactory.describe_index(index) in FAISSIndexFactory.COMPRESSED_INDEX_TYPES
+
+    @staticmethod
+    def index_size_bytes(index: Any) -> int:
+        """Get the serialized size of an index, a close proxy for its memory use.
+
+        Args:
+            index: FAISS index
+
+        Returns:
+            Size in bytes
+        """
+        return int(faiss.serialize_index(index).nbytes)
+
+    @staticmethod
+    def recall_memory_report(
+        vectors: np.ndarray,
+        queries: np.ndarray,
+        k: int = 10,
+        index_types: Optional[List[str]] = None,
+        rerank_factor: int = 0
+    ) -> List[Dict[str, Any]]:
+        """Measure recall@k against exact search and memory use per index type.
+
+        Args:
+            vectors: Corpus vectors to index
+            queries: Query vectors
+            k: Number of neighbors to compare
+            index_types: Index types to measure (default: all supported types)
+            rerank_factor: If set, also measure exact re-ranking of k * rerank_factor candidates
+
+        Returns:
+            One entry per index type with recall, size and timing figures
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        queries = np.asarray(queries, dtype=np.float32)
+        index_types = index_types or list(FAISSIndexFactory.SUPPORTED_INDEX_TYPES)
+
+        # Exact neighbors as ground truth
+        exact = faiss.IndexFlatL2(vectors.shape[1])
+        exact.add(vectors)
+        _, truth = exact.search(queries, k)
+        flat_bytes = FAISSIndexFactory.index_size_bytes(exact)
+
+        report = []
+        for index_type in index_types:
+            start_time = time.time()
+            index = FAISSIndexFactory.create_index(vectors.shape[1], len(vectors), index_type=index_type)
+            FAISSIndexFactory.train_index(index, vectors)
+            index.add(vectors)
+            build_seconds = time.time() - start_time
+            FAISSIndexFactory.apply_search_params(
+                index,
+                ef_search=config.vector_store.hnsw_ef_search,
+                nprobe=config.vector_store.ivf_nprobe
+            )
+
+            variants = [(index_type, 0)]
+            if rerank_factor and FAISSIndexFactory.is_compressed(index):
+                variants.append((f"{index_type}+rerank", rerank_factor))
+
+            size_bytes = FAISSIndexFactory.index_size_bytes(index)
+            for name, factor in variants:
+                start_time = time.time()
+                _, found = index.search(queries, k * factor if factor else k)
+                if factor:
+                    _, found = FAISSIndexFactory.rerank(vectors, queries, found, k)
+                query_ms = (time.time() - start_time) * 1000 / len(queries)
+
+                hits = sum(len(set(row_found[:k]) & set(row_truth)) for row_found, row_truth in zip(found, truth))
+                report.append({
+                    "index_type": name,
+                    "built_as": FAISSIndexFactory.describe_index(index),
+                    f"recall_at_{k}": hits / float(truth.size),
+                    "index_bytes": size_bytes,
+                    "bytes_per_vector": size_bytes / len(vectors),
+                    "compression_ratio": flat_bytes / size_bytes,
+                    "build_seconds": build_seconds,
+                    "query_ms": query_ms
+                })
+
+        return report
+
+    @staticmethod
+    def rerank(vectors: np.ndarray,
+               queries: np.ndarray,
+               candidates: np.ndarray,
+               k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Re-order candidate IDs by exact L2 distance to the original vectors.
+
+        Args:
+            vectors: Original vectors, indexed by vector ID (may be memory-mapped)
+            queries: Query vectors of shape (n, d)
+            candidates: Candidate IDs of shape (n, c), -1 for empty slots
+            k: Number of IDs to keep per query
+
+        Returns:
+            Tuple of (distances, ids) arrays of shape (n, k), closest first, padded with -1
+        """
+        result_distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+        result_ids = np.full((len(queries), k), -1, dtype=np.int64)
+
+        for row, (query, row_candidates) in enumerate(zip(queries, candidates)):
+            ids = np.unique(row_candidates[row_candidates >= 0])
+            if not len(ids):
+                continue
+            distances = ((np.asarray(vectors[ids], dtype=np.float32) - query) ** 2).sum(axis=1)
+            order = np.argsort(distances)[:k]
+            result_distances[row, :len(order)] = distances[order]
+            result_ids[row, :len(order)] = ids[order]
+
+        return result_distances, result_ids
+
+    @staticmethod
+    def search_subset(index: Any,
+                      queries: np.ndarray,
+                      ids: np.ndarray,
+                      k: int,
+                      vectors: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Search exactly among a small set of IDs.
+
+        Approximate indexes can miss most of a very selective ID filter
+        (HNSW walks the graph through non-matching nodes, IVF only probes
+        a few cells), so small subsets are compared by brute force.
+
+        Args:
+            index: ID-mapped FAISS index
+            queries: Query vectors of shape (n, d)
+            ids: Sorted IDs to search among
+            k: Number of results per query
+            vectors: Original vectors indexed by vector ID, if kept
+
+        Returns:
+            Tuple of (distances, ids) arrays of shape (n, k), closest first, padded with -1
+        """
+        if vectors is not None:
+            return FAISSIndexFactory.rerank(vectors, queries, np.tile(ids, (len(queries), 1)), k)
+
+        try:
+            subset = index.reconstruct_batch(ids)
+        except RuntimeError:
+            # No direct map (IVF): probe every cell instead, the selector skips the rest
+            inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap2) else index
+            selector = faiss.IDSelectorBatch(ids)
+            return FAISSIndexFactory.search(index, queries, k, selector=selector,
+                                            nprobe=getattr(inner, "nlist", None))
+
+        distances, positions = faiss.knn(queries, subset, min(k, len(ids)))
+        result_distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+        result_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        result_distances[:, :positions.shape[1]] = distances
+        result_ids[:, :positions.shape[1]] = np.where(positions >= 0, ids[positions], -1)
+        return result_distances, result_ids
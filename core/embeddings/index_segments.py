@@ -0,0 +1,517 @@
+# core/embeddings/index_segments.py
+
+import os
+import json
+import shutil
+import time
+import threading
+from contextlib import contextmanager
+from typing import List, Optional, Dict, Any, Callable, Iterator, Tuple, IO
+import numpy as np
+from config.app_config import config
+from config.logging_config import get_module_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Create a logger for this module
+logger = get_module_logger("index_segments")
+
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = "manifest.lock"
+SNAPSHOT_DIR = "snapshots"
+VECTORS_FILE = "vectors.npy"
+DOCS_FILE = "docs.jsonl"
+DELETES_FILE = "deletes.json"
+
+# Segment name prefixes
+DELTA_PREFIX = "delta"
+DELETE_PREFIX = "delete"
+
+# Files written by LangChain's FAISS.save_local in the legacy single-directory layout
+LEGACY_INDEX_FILES = ("index.faiss", "index.pkl")
+
+# Where legacy files are moved once a base segment replaces them
+LEGACY_BACKUP_DIR = "legacy_backup"
+
+# Unfinished segment directories untouched for this long are left over from a crash
+STALE_TMP_SECONDS = 3600
+
+class ManifestConflictError(Exception):
+    """Raised when the manifest changed underneath a writer, e.g. another process compacted."""
+    pass
+
+def _lock_file(f: IO) -> None:
+    """Take an exclusive lock on an open file, blocking until it is free."""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+def _unlock_file(f: IO) -> None:
+    """Release a lock taken with _lock_file."""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+class SegmentedIndexStorage:
+    """Segment-based on-disk layout for a vector index.
+
+    The index directory holds an immutable base segment, a list of small
+    append-only delta segments (added vectors or deleted IDs, applied in
+    order) and a manifest naming the live segments.
+    Segments are never modified after they are written, so snapshots are
+    hardlinked copies of the manifest's files.
+
+    Several stores (in this or other processes) may write the same
+    directory: every manifest change is made under a file lock, starting
+    from the manifest as it is on disk, so segment names are never handed
+    out twice and no writer overwrites another's segments.
+    """
+
+    def __init__(self, index_dir: str, snapshot_retention: int = None):
+        """Initialize with the index directory.
+
+        Args:
+            index_dir: Directory holding the manifest and segments
+            snapshot_retention: Number of snapshots to keep (default: from config)
+        """
+        self.index_dir = index_dir
+        self.snapshot_dir = os.path.join(index_dir, SNAPSHOT_DIR)
+        self.snapshot_retention = (
+            snapshot_retention if snapshot_retention is not None
+            else config.vector_store.snapshot_retention
+        )
+
+        os.makedirs(self.index_dir, exist_ok=True)
+        self.manifest = self._read_manifest()
+        
+        # Guards the manifest; segment directories being written are tracked so cleanup skips them
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+        self._lock_file: Optional[IO] = None
+        self._pending = set()
+
+        logger.debug(f"Initialized segmented index storage in {index_dir}")
+
+    @property
+    def base(self) -> Optional[str]:
+        """Name of the live base segment, if any."""
+        return self.manifest["base"]
+
+    @property
+    def segments(self) -> List[str]:
+        """Names of the live delta segments, oldest first."""
+        return list(self.manifest["segments"])
+
+    def base_path(self) -> Optional[str]:
+        """Get the directory of the live base segment.
+
+        Returns:
+            Base segment path or None if no base has been written
+        """
+        return os.path.join(self.index_dir, self.base) if self.base else None
+
+    def has_base(self) -> bool:
+        """Check if a base segment exists on disk."""
+        return self.base is not None and os.path.isdir(self.base_path())
+
+    def has_legacy_index(self) -> bool:
+        """Check for an index saved in the old single-directory layout."""
+        return all(
+            os.path.exists(os.path.join(self.index_dir, filename))
+            for filename in LEGACY_INDEX_FILES
+        )
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        """Read the manifest, returning an empty one if none exists."""
+        manifest_path = os.path.join(self.index_dir, MANIFEST_FILE)
+
+        if os.path.exists(manifest_path):
+            try:
+                with open(manifest_path, "r") as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.error(f"Error reading index manifest: {str(e)}")
+
+        return {"base": None, "segments": [], "next_segment": 1, "version": 0, "updated_at": None}
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the manifest lock of this directory across threads and processes.
+
+        The outermost acquisition re-reads the manifest, so changes written
+        by other processes are seen before anything is allocated or written.
+        """
+        with self._lock:
+            if self._lock_depth == 0:
+                self._lock_file = open(os.path.join(self.index_dir, LOCK_FILE), "a+")
+                try:
+                    _lock_file(self._lock_file)
+                except Exception:
+                    self._lock_file.close()
+                    raise
+                self.manifest = self._read_manifest()
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    _unlock_file(self._lock_file)
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    def refresh(self) -> None:
+        """Re-read the manifest to pick up segments written by other processes."""
+        with self._locked():
+            pass
+
+    @property
+    def version(self) -> int:
+        """Counter bumped whenever the indexed documents change (not by compaction)."""
+        return self.manifest.get("version", 0)
+
+    def _write_manifest(self, manifest: Dict[str, Any], changed: bool = True) -> None:
+        """Atomically replace the manifest on disk. Call under _locked.
+
+        Args:
+            manifest: New manifest
+            changed: Whether the indexed documents changed, bumping the version
+        """
+        version = self.version + 1 if changed else self.version
+        manifest = dict(manifest, version=version, updated_at=time.time())
+        manifest_path = os.path.join(self.index_dir, MANIFEST_FILE)
+        tmp_path = f"{manifest_path}.tmp"
+
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, manifest_path)
+
+        self.manifest = manifest
+
+    def _next_segment_name(self, prefix: str) -> str:
+        """Reserve the next segment name. Call under _locked and write the manifest before releasing it."""
+        number = self.manifest["next_segment"]
+        self.manifest["next_segment"] = number + 1
+        return f"{prefix}_{number:06d}"
+
+    def write_delta(self,
+                    ids: List[str],
+                    texts: List[str],
+                    embeddings: List[List[float]],
+                    metadatas: List[Dict[str, Any]]) -> str:
+        """Append a delta segment holding newly added vectors.
+
+        Args:
+            ids: Document IDs
+            texts: Document texts
+            embeddings: Embedding vectors
+            metadatas: Document metadata
+
+        Returns:
+            Name of the new segment
+        """
+        with self._locked():
+            name = self._next_segment_name(DELTA_PREFIX)
+            segment_path = os.path.join(self.index_dir, name)
+            tmp_path = f"{segment_path}.tmp"
+
+            os.makedirs(tmp_path, exist_ok=True)
+            np.save(os.path.join(tmp_path, VECTORS_FILE), np.asarray(embeddings, dtype=np.float32))
+            with open(os.path.join(tmp_path, DOCS_FILE), "w") as f:
+                for doc_id, text, metadata in zip(ids, texts, metadatas):
+                    f.write(json.dumps({"id": doc_id, "text": text, "metadata": metadata}, default=str) + "\n")
+
+            # Segment becomes visible only once complete and listed in the manifest
+            os.rename(tmp_path, segment_path)
+            self._write_manifest(dict(self.manifest, segments=self.segments + [name]))
+
+        logger.debug(f"Wrote delta segment {name} with {len(ids)} vectors")
+        return name
+
+    def write_deletes(self, ids: List[str]) -> str:
+        """Append a segment recording deleted document IDs.
+
+        Args:
+            ids: Document IDs deleted from the index
+
+        Returns:
+            Name of the new segment
+        """
+        with self._locked():
+            name = self._next_segment_name(DELETE_PREFIX)
+            segment_path = os.path.join(self.index_dir, name)
+            tmp_path = f"{segment_path}.tmp"
+
+            os.makedirs(tmp_path, exist_ok=True)
+            with open(os.path.join(tmp_path, DELETES_FILE), "w") as f:
+                json.dump(list(ids), f)
+
+            os.rename(tmp_path, segment_path)
+            self._write_manifest(dict(self.manifest, segments=self.segments + [name]))
+
+        logger.debug(f"Wrote delete segment {name} with {len(ids)} IDs")
+        return name
+
+    @staticmethod
+    def is_delete_segment(name: str) -> bool:
+        """Check whether a segment records deletions rather than added vectors."""
+        return name.startswith(f"{DELETE_PREFIX}_")
+
+    def read_deletes(self, name: str) -> List[str]:
+        """Read the document IDs recorded in a delete segment.
+
+        Args:
+            name: Segment name
+
+        Returns:
+            Deleted document IDs
+        """
+        with open(os.path.join(self.index_dir, name, DELETES_FILE), "r") as f:
+            return json.load(f)
+
+    def read_delta(self, name: str) -> Tuple[List[str], List[str], np.ndarray, List[Dict[str, Any]]]:
+        """Read a delta segment.
+
+        Args:
+            name: Segment name
+
+        Returns:
+            Tuple of (ids, texts, embeddings, metadatas)
+        """
+        segment_path = os.path.join(self.index_dir, name)
+        embeddings = np.load(os.path.join(segment_path, VECTORS_FILE))
+
+        ids, texts, metadatas = [], [], []
+        with open(os.path.join(segment_path, DOCS_FILE), "r") as f:
+            for line in f:
+                record = json.loads(line)
+                ids.append(record["id"])
+                texts.append(record["text"])
+                metadatas.append(record["metadata"])
+
+        return ids, texts, embeddings, metadatas
+
+    def iter_deltas(self) -> Iterator[Tuple[List[str], List[str], np.ndarray, List[Dict[str, Any]]]]:
+        """Iterate over the live added-vector segments in write order."""
+        for name in self.segments:
+            if not self.is_delete_segment(name):
+                yield self.read_delta(name)
+
+    def delta_vector_count(self) -> int:
+        """Count vectors held in live delta segments without loading them."""
+        count = 0
+        for name in self.segments:
+            if self.is_delete_segment(name):
+                continue
+            vectors = np.load(os.path.join(self.index_dir, name, VECTORS_FILE), mmap_mode="r")
+            count += vectors.shape[0]
+        return count
+
+    def commit_base(self,
+                    write_base: Callable[[str], Any],
+                    merged_segments: List[str],
+                    rebuilt: bool = False,
+                    expected_base: Optional[str] = None) -> str:
+        """Write a new base segment and retire the segments merged into it.
+
+        The base is written without holding the manifest lock, so delta
+        segments can keep being appended while a compaction runs. Unless
+        the base is rebuilt from scratch, it is only committed if the live
+        base is still the one it was built from and every merged segment
+        is still live.
+
+        Args:
+            write_base: Function that writes the full index into a directory
+            merged_segments: Delta segments whose contents are included in the new base
+            rebuilt: Whether the base holds new documents rather than the merged ones
+            expected_base: Base segment the new base was built from (None: the legacy layout or no base)
+
+        Returns:
+            Name of the new base segment
+
+        Raises:
+            ManifestConflictError: If another writer replaced the base or merged the segments first
+        """
+        with self._locked():
+            name = self._next_segment_name("base")
+            self._pending.add(f"{name}.tmp")
+            # Persist the reservation so other processes never reuse the name
+            self._write_manifest(self.manifest, changed=False)
+        base_path = os.path.join(self.index_dir, name)
+        tmp_path = f"{base_path}.tmp"
+
+        try:
+            os.makedirs(tmp_path, exist_ok=True)
+            write_base(tmp_path)
+            os.rename(tmp_path, base_path)
+        except Exception:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+        finally:
+            with self._lock:
+                self._pending.discard(f"{name}.tmp")
+
+        with self._locked():
+            if not rebuilt and (self.base != expected_base or not set(merged_segments) <= set(self.segments)):
+                shutil.rmtree(base_path, ignore_errors=True)
+                raise ManifestConflictError(
+                    f"Index in {self.index_dir} changed while base {name} was written (live base: {self.base})"
+                )
+            remaining = [s for s in self.segments if s not in merged_segments]
+            self._write_manifest(dict(self.manifest, base=name, segments=remaining), changed=rebuilt)
+            self._remove_unreferenced()
+
+        logger.info(f"Committed base segment {name} (merged {len(merged_segments)} delta segments)")
+        return name
+
+    def reset(self) -> None:
+        """Drop all live segments from the manifest and disk."""
+        with self._locked():
+            self._write_manifest(dict(self.manifest, base=None, segments=[]))
+            self._remove_unreferenced()
+
+    def _remove_unreferenced(self) -> None:
+        """Delete segment directories no longer named by the manifest and retire legacy files.
+
+        Snapshots hold hardlinks, so removing a directory here never loses
+        data a snapshot still refers to. Call under _locked.
+        """
+        live = set(self.segments)
+        if self.base:
+            live.add(self.base)
+
+        for entry in os.listdir(self.index_dir):
+            path = os.path.join(self.index_dir, entry)
+            is_segment = entry.startswith(("base_", f"{DELTA_PREFIX}_", f"{DELETE_PREFIX}_")) and os.path.isdir(path)
+            if not is_segment or entry in live or entry in self._pending:
+                continue
+
+            # Another process may still be writing an unfinished base
+            if entry.endswith(".tmp") and not self._is_stale(path):
+                continue
+
+            shutil.rmtree(path, ignore_errors=True)
+            logger.debug(f"Removed retired segment {entry}")
+
+        # Move index files from the old layout aside once a base segment replaces them.
+        # Snapshots only cover segments, so this is the only copy of the old index.
+        if self.base:
+            backup_dir = os.path.join(self.index_dir, LEGACY_BACKUP_DIR)
+            for filename in LEGACY_INDEX_FILES:
+                legacy_path = os.path.join(self.index_dir, filename)
+                if os.path.exists(legacy_path):
+                    os.makedirs(backup_dir, exist_ok=True)
+                    os.replace(legacy_path, os.path.join(backup_dir, filename))
+                    logger.info(f"Moved legacy index file {filename} to {backup_dir}")
+
+    @staticmethod
+    def _is_stale(path: str) -> bool:
+        """Check whether nothing in a directory was written for STALE_TMP_SECONDS."""
+        try:
+            latest = max([os.path.getmtime(path)] + [
+                os.path.getmtime(os.path.join(path, filename)) for filename in os.listdir(path)
+            ])
+        except OSError:
+            return False
+        return time.time() - latest > STALE_TMP_SECONDS
+
+    def snapshot(self) -> Optional[str]:
+        """Create a snapshot of the live segments using hardlinks.
+
+        Returns:
+            Snapshot name or None if there is nothing to snapshot
+        """
+        with self._locked():
+            manifest = dict(self.manifest)
+            live = ([self.base] if self.base else []) + self.segments
+            if not live:
+                return None
+
+            try:
+                name = f"snapshot_{int(time.time() * 1000)}"
+                snapshot_path = os.path.join(self.snapshot_dir, name)
+                os.makedirs(snapshot_path, exist_ok=True)
+
+                # Linking is cheap, so hold the lock to keep the segment set consistent
+                for segment in live:
+                    self._link_tree(os.path.join(self.index_dir, segment), os.path.join(snapshot_path, segment))
+            except Exception as e:
+                logger.error(f"Error creating index snapshot: {str(e)}")
+                return None
+
+        try:
+            with open(os.path.join(snapshot_path, MANIFEST_FILE), "w") as f:
+                json.dump(manifest, f, indent=2)
+
+            logger.debug(f"Created index snapshot {name}")
+            self._prune_snapshots()
+            return name
+
+        except Exception as e:
+            logger.error(f"Error creating index snapshot: {str(e)}")
+            return None
+
+    def list_snapshots(self) -> List[str]:
+        """List snapshot names, oldest first."""
+        if not os.path.isdir(self.snapshot_dir):
+            return []
+        return sorted(
+            entry for entry in os.listdir(self.snapshot_dir)
+            if os.path.exists(os.path.join(self.snapshot_dir, entry, MANIFEST_FILE))
+        )
+
+    def restore_snapshot(self, name: str) -> None:
+        """Make a snapshot the live index.
+
+        Args:
+            name: Snapshot name
+        """
+        snapshot_path = os.path.join(self.snapshot_dir, name)
+        with open(os.path.join(snapshot_path, MANIFEST_FILE), "r") as f:
+            manifest = json.load(f)
+
+        with self._locked():
+            live = ([manifest["base"]] if manifest["base"] else []) + manifest["segments"]
+            for segment in live:
+                target = os.path.join(self.index_dir, segment)
+                if not os.path.isdir(target):
+                    self._link_tree(os.path.join(snapshot_path, segment), target)
+
+            # Never reuse segment numbers allocated after the snapshot was taken
+            manifest["next_segment"] = max(manifest["next_segment"], self.manifest["next_segment"])
+            self._write_manifest(manifest)
+            self._remove_unreferenced()
+
+        logger.info(f"Restored index snapshot {name}")
+
+    def _prune_snapshots(self) -> None:
+        """Delete the oldest snapshots beyond the retention limit."""
+        snapshots = self.list_snapshots()
+        excess = len(snapshots) - self.snapshot_retention
+
+        for name in snapshots[:max(excess, 0)]:
+            shutil.rmtree(os.path.join(self.snapshot_dir, name), ignore_errors=True)
+            logger.debug(f"Pruned index snapshot {name}")
+
+    @staticmethod
+    def _link_tree(source: str, target: str) -> None:
+        """Recreate a directory of files as hardlinks, copying if linking is unsupported."""
+        os.makedirs(target, exist_ok=True)
+
+        for filename in os.listdir(source):
+            src_file = os.path.join(source, filename)
+            dst_file = os.path.join(target, filename)
+            try:
+                os.link(src_file, dst_file)
+            except OSError:
+                shutil.copy2(src_file, dst_file)
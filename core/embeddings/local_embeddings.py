@@ -0,0 +1,251 @@
+# core/embeddings/local_embeddings.py
+
+import os
+import re
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Any, Tuple
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from config.logging_config import get_module_logger
+
+# Create a logger for this module
+logger = get_module_logger("local_embeddings")
+
+# Model spec prefixes understood by VectorStoreFactory.create_embeddings_provider
+LOCAL_MODEL_PREFIX = "local:"
+HASHING_MODEL_PREFIX = "hashing"
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic feature-hashing embedder.
+
+    Words and word bigrams are hashed into a fixed number of signed
+    buckets and the result is L2-normalized, so texts sharing vocabulary
+    score close together. Needs no model and no network, and the same
+    text always maps to the same vector, which makes it the embedder for
+    tests and offline smoke runs.
+    """
+
+    _TOKEN_PATTERN = re.compile(r"\w+")
+
+    def __init__(self, dimension: int = 384):
+        """Initialize with the output dimension.
+
+        Args:
+            dimension: Number of hash buckets (embedding dimension)
+        """
+        self.dimension = dimension
+
+    def _features(self, text: str) -> List[str]:
+        """Get the hashed features of a text: lowercase words and word bigrams."""
+        words = self._TOKEN_PATTERN.findall(text.lower())
+        return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+    def _embed(self, text: str) -> List[float]:
+        """Embed one text."""
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for feature in self._features(text):
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:7], "little") % self.dimension
+            vector[bucket] += 1.0 if digest[7] & 1 else -1.0
+
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a list of documents."""
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query."""
+        return self._embed(text)
+
+class LocalOnnxEmbeddings(Embeddings):
+    """Sentence-transformer style embedder running an ONNX model on the CPU.
+
+    The model directory holds an exported transformer (model.onnx) and its
+    Hugging Face tokenizer (tokenizer.json). Texts are tokenized up front,
+    sorted by length and grouped into batches bounded by a token budget, so
+    each batch is padded only to its own longest text. Batches run
+    concurrently on a thread pool; the token embeddings are mean-pooled over
+    the attention mask and L2-normalized.
+
+    Requires the optional onnxruntime and tokenizers packages.
+    """
+
+    def __init__(self,
+                 model_path: str,
+                 batch_size: int = 32,
+                 max_batch_tokens: int = 8192,
+                 num_workers: int = 0,
+                 quantize: bool = False,
+                 max_length: int = 512,
+                 normalize: bool = True):
+        """Load the model and tokenizer.
+
+        Args:
+            model_path: Directory with model.onnx and tokenizer.json (or the .onnx file itself)
+            batch_size: Maximum texts per batch
+            max_batch_tokens: Maximum padded tokens per batch
+            num_workers: Batches run concurrently (0: one per two CPU cores)
+            quantize: Run an int8 dynamically quantized copy of the model
+            max_length: Tokens kept per text
+            normalize: L2-normalize the embeddings
+
+        Raises:
+            ImportError: If onnxruntime or tokenizers is not installed
+            FileNotFoundError: If the model or tokenizer file is missing
+        """
+        try:
+            import onnxruntime
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise ImportError(
+                "Local embeddings require the onnxruntime and tokenizers packages "
+                "(pip install onnxruntime tokenizers)"
+            ) from e
+
+        if os.path.isdir(model_path):
+            model_dir, model_file = model_path, os.path.join(model_path, "model.onnx")
+        else:
+            model_dir, model_file = os.path.dirname(model_path), model_path
+        tokenizer_file = os.path.join(model_dir, "tokenizer.json")
+
+        for path in (model_file, tokenizer_file):
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Local embedding model file not found: {path}")
+
+        if quantize:
+            model_file = self._quantized_model(model_file)
+
+        self.model_path = model_path
+        self.batch_size = batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_length = max_length
+        self.normalize = normalize
+
+        cpu_count = os.cpu_count() or 1
+        self.num_workers = num_workers or max(1, cpu_count // 2)
+
+        # Split the cores between concurrent batches instead of oversubscribing them
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = max(1, cpu_count // self.num_workers)
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(model_file, options, providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(tokenizer_file)
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.no_padding()
+
+        self._executor = ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="local-embed")
+
+        logger.info(f"Loaded local embedding model {model_file} "
+                    f"({self.num_workers} workers, quantized={quantize})")
+
+    @staticmethod
+    def _quantized_model(model_file: str) -> str:
+        """Get an int8 dynamically quantized copy of a model, creating it on first use.
+
+        Args:
+            model_file: Path of the float model
+
+        Returns:
+            Path of the quantized model
+        """
+        quantized_file = f"{os.path.splitext(model_file)[0]}_int8.onnx"
+        if not os.path.exists(quantized_file):
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+
+            logger.info(f"Quantizing {model_file} to int8")
+            quantize_dynamic(model_file, quantized_file, weight_type=QuantType.QInt8)
+        return quantized_file
+
+    def _batches(self, lengths: List[int]) -> List[List[int]]:
+        """Group text positions into length-sorted batches within the size and token limits.
+
+        Args:
+            lengths: Token count of each text
+
+        Returns:
+            Batches of text positions
+        """
+        batches = []
+        batch: List[int] = []
+        for position in sorted(range(len(lengths)), key=lambda i: lengths[i]):
+            # Texts are sorted, so the newest text sets the padded length
+            padded_tokens = max(lengths[position], 1) * (len(batch) + 1)
+            if batch and (len(batch) >= self.batch_size or padded_tokens > self.max_batch_tokens):
+                batches.append(batch)
+                batch = []
+            batch.append(position)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _run_batch(self, encodings: List[Any]) -> np.ndarray:
+        """Run the model on one batch of encodings and pool the token embeddings.
+
+        Args:
+            encodings: Tokenizer encodings of the batch
+
+        Returns:
+            Array of shape (batch, dimension)
+        """
+        width = max(len(encoding.ids) for encoding in encodings)
+        input_ids = np.zeros((len(encodings), width), dtype=np.int64)
+        attention_mask = np.zeros((len(encodings), width), dtype=np.int64)
+        for row, encoding in enumerate(encodings):
+            input_ids[row, :len(encoding.ids)] = encoding.ids
+            attention_mask[row, :len(encoding.ids)] = 1
+
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            inputs["token_type_ids"] = np.zeros_like(input_ids)
+        inputs = {name: value for name, value in inputs.items() if name in self.input_names}
+
+        output = self.session.run(None, inputs)[0]
+
+        # Models exported with pooling return sentence embeddings directly
+        if output.ndim == 3:
+            mask = attention_mask[:, :, None].astype(np.float32)
+            output = (output * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+        output = output.astype(np.float32)
+        if self.normalize:
+            output /= np.maximum(np.linalg.norm(output, axis=1, keepdims=True), 1e-12)
+        return output
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a list of documents.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            Embeddings in the order of the texts
+        """
+        if not texts:
+            return []
+
+        encodings = self.tokenizer.encode_batch(texts)
+        batches = self._batches([len(encoding.ids) for encoding in encodings])
+
+        futures: List[Tuple[List[int], Any]] = [
+            (batch, self._executor.submit(self._run_batch, [encodings[i] for i in batch]))
+            for batch in batches
+        ]
+
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        for batch, future in futures:
+            for position, vector in zip(batch, future.result()):
+                embeddings[position] = vector.tolist()
+
+        logger.debug(f"Embedded {len(texts)} texts locally in {len(batches)} batches")
+        return embeddings
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query."""
+        return self.embed_documents([text])[0]
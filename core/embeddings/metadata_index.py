@@ -0,0 +1,119 @@
+# core/embeddings/metadata_index.py
+
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+import numpy as np
+import faiss
+from config.logging_config import get_module_logger
+
+# Create a logger for this module
+logger = get_module_logger("metadata_index")
+
+# Per-chunk fields that would only ever match a single vector
+UNINDEXED_FIELDS = ("id", "document_id", "score")
+
+# Metadata filter: field -> value, or a list/tuple/set of accepted values
+MetadataFilter = Dict[str, Any]
+
+class MetadataIndex:
+    """Inverted index from metadata values to the vector IDs holding them.
+
+    Filtered searches look up the matching IDs here and hand them to FAISS
+    as an ID selector, so the index only ever returns matching vectors
+    instead of over-fetching and post-filtering.
+    """
+
+    def __init__(self):
+        """Create an empty index."""
+        self._postings: Dict[Tuple[str, Any], Set[int]] = {}
+
+    @staticmethod
+    def _entries(metadata: Optional[Dict[str, Any]]) -> Iterable[Tuple[str, Any]]:
+        """Get the indexable (field, value) pairs of a metadata dict."""
+        for field, value in (metadata or {}).items():
+            if field in UNINDEXED_FIELDS:
+                continue
+            if isinstance(value, (str, int, float, bool)):
+                yield field, value
+
+    def add(self, vector_id: int, metadata: Optional[Dict[str, Any]]) -> None:
+        """Index the metadata of one vector.
+
+        Args:
+            vector_id: Vector ID (or delta position)
+            metadata: Chunk metadata
+        """
+        for entry in self._entries(metadata):
+            self._postings.setdefault(entry, set()).add(int(vector_id))
+
+    def discard(self, vector_ids: Iterable[int]) -> None:
+        """Remove vectors from the index.
+
+        Args:
+            vector_ids: Vector IDs to remove
+        """
+        vector_ids = {int(vector_id) for vector_id in vector_ids}
+        if not vector_ids:
+            return
+
+        for entry in list(self._postings):
+            postings = self._postings[entry]
+            postings.difference_update(vector_ids)
+            if not postings:
+                del self._postings[entry]
+
+    def match(self, metadata_filter: MetadataFilter) -> np.ndarray:
+        """Find the vectors matching a filter.
+
+        Fields are combined with AND; a list of values for one field
+        matches any of them.
+
+        Args:
+            metadata_filter: Field -> value (or list of values) to match
+
+        Returns:
+            Sorted array of matching vector IDs
+        """
+        matched: Optional[Set[int]] = None
+
+        # Start from the most selective field so intersections stay small
+        field_matches = []
+        for field, value in metadata_filter.items():
+            values = value if isinstance(value, (list, tuple, set, frozenset)) else [value]
+            ids = set()
+            for accepted in values:
+                ids.update(self._postings.get((field, accepted), ()))
+            field_matches.append(ids)
+
+        for ids in sorted(field_matches, key=len):
+            matched = ids if matched is None else matched & ids
+            if not matched:
+                break
+
+        result = np.asarray(sorted(matched or ()), dtype=np.int64)
+        logger.debug(f"Metadata filter {metadata_filter} matched {len(result)} vectors")
+        return result
+
+    @staticmethod
+    def selector(vector_ids: np.ndarray) -> Any:
+        """Build a FAISS ID selector accepting only the given IDs.
+
+        The IDs are packed into a bitmap, so membership tests during the
+        search cost one bit lookup per candidate.
+
+        Args:
+            vector_ids: Accepted vector IDs
+
+        Returns:
+            IDSelectorBitmap over the IDs
+        """
+        bits = np.zeros(int(vector_ids.max()) + 1 if len(vector_ids) else 1, dtype=bool)
+        bits[vector_ids] = True
+        bitmap = np.packbits(bits, bitorder="little")
+
+        selector = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))
+        selector.referenced = bitmap  # FAISS does not copy the bitmap
+        return selector
+
+    def __len__(self) -> int:
+        """Number of distinct indexed (field, value) pairs."""
+        return len(self._postings)
@@ -0,0 +1,812 @@
+# core/embeddings/sharded_store.py
+
+import os
+import json
+import heapq
+import threading
+import weakref
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Any, Set, Tuple
+import numpy as np
+from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+from config.app_config import config
+from config.logging_config import get_module_logger
+from core.embeddings.vector_store import FAISSVectorStore, VectorStoreError
+from core.embeddings.chunk_store import document_chunk_id, document_source_id
+from core.embeddings.metadata_index import MetadataFilter
+from core.embeddings.store_retriever import ScoredStoreRetriever
+
+# Create a logger for this module
+logger = get_module_logger("sharded_store")
+
+# Shard layout of a sharded index directory
+SHARDS_FILE = "shards.json"
+
+def shard_for(doc_id: str, num_shards: int) -> int:
+    """Pick the shard of a document with jump consistent hashing.
+
+    Growing from n to n + 1 shards only moves about 1/(n + 1) of the
+    documents, all of them onto the new shard.
+
+    Args:
+        doc_id: Content-derived document ID (hex)
+        num_shards: Number of shards
+
+    Returns:
+        Shard index in the range [0, num_shards)
+    """
+    key = int(doc_id[:16], 16)
+    bucket, candidate = -1, 0
+    while candidate < num_shards:
+        bucket = candidate
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        candidate = int((bucket + 1) * (float(1 << 31) / float((key >> 33) + 1)))
+    return bucket
+
+class PrecomputedEmbeddings(Embeddings):
+    """Embedding provider of shard stores, which only receive precomputed vectors.
+
+    Keeps shard workers from building an API client they would never use.
+    """
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Shards never embed documents."""
+        raise VectorStoreError("Shard stores only accept precomputed embeddings")
+
+    def embed_query(self, text: str) -> List[float]:
+        """Shards never embed queries."""
+        raise VectorStoreError("Shard stores only accept precomputed query vectors")
+
+class ShardServer:
+    """Serves one shard: a FAISSVectorStore that only ever sees precomputed vectors."""
+
+    def __init__(self,
+                 index_dir: str,
+                 store_kwargs: Dict[str, Any],
+                 embedding_provider: Optional[Any] = None):
+        """Open the shard's store.
+
+        Args:
+            index_dir: Directory of this shard
+            store_kwargs: FAISSVectorStore arguments
+            embedding_provider: Embedding provider (default: PrecomputedEmbeddings)
+        """
+        self.index_dir = index_dir
+        self.store_kwargs = store_kwargs
+        self.embedding_provider = embedding_provider or PrecomputedEmbeddings()
+        self.store = self._open_store()
+
+    def _open_store(self) -> FAISSVectorStore:
+        """Open the shard's store, loading its index if there is one."""
+        store = FAISSVectorStore(embedding_provider=self.embedding_provider, index_dir=self.index_dir,
+                                 **self.store_kwargs)
+        if store._index_exists():
+            store.load_index()
+        return store
+
+    def build(self, documents: List[Document], embeddings: List[List[float]]) -> bool:
+        """Replace the shard's index with the given documents."""
+        return self.store.build_index(documents, force_rebuild=True, embeddings=embeddings)
+
+    def add(self, documents: List[Document], embeddings: List[List[float]]) -> bool:
+        """Add documents with their embeddings."""
+        return self.store.add_documents(documents, embeddings=embeddings)
+
+    def search(self,
+               query_vectors: np.ndarray,
+               k: int,
+               metadata_filter: Optional[MetadataFilter] = None,
+               ef_search: Optional[int] = None,
+               nprobe: Optional[int] = None) -> List[List[Tuple[Document, float]]]:
+        """Search the shard; a shard without an index has no hits."""
+        if self.store.index is None:
+            return [[] for _ in range(len(query_vectors))]
+        return self.store.search_by_vectors(query_vectors, k, filter=metadata_filter,
+                                            ef_search=ef_search, nprobe=nprobe)
+
+    def existing_ids(self, ids: List[str]) -> Set[str]:
+        """Find which document IDs the shard holds."""
+        if self.store.index is None:
+            return set()
+        return self.store.existing_ids(ids)
+
+    def delete(self, ids: Optional[List[str]], source: Optional[str], keep_ids: Optional[List[str]]) -> bool:
+        """Delete documents by ID and/or source."""
+        if self.store.index is None:
+            return True
+        return self.store.delete_documents(ids=ids, source=source, keep_ids=keep_ids)
+
+    def misplaced(self, shard_index: int, num_shards: int) -> Tuple[List[Document], np.ndarray]:
+        """Get the documents (and vectors) that belong to another shard."""
+        if self.store.index is None:
+            return [], np.zeros((0, 0), dtype=np.float32)
+        doc_ids = [doc_id for doc_id in self.store.document_ids() if shard_for(doc_id, num_shards) != shard_index]
+        if not doc_ids:
+            return [], np.zeros((0, 0), dtype=np.float32)
+        return self.store.get_documents(doc_ids)
+
+    def set_search_params(self, ef_search: Optional[int], nprobe: Optional[int]) -> None:
+        """Tune query-time parameters."""
+        self.store.set_search_params(ef_search=ef_search, nprobe=nprobe)
+
+    def version(self) -> int:
+        """Version of the shard's indexed documents."""
+        return self.store.index_version
+
+    def save(self) -> bool:
+        """Compact the shard's pending segments into its base."""
+        if self.store.index is None:
+            return True
+        return self.store.save_index()
+
+    def clear(self) -> bool:
+        """Remove every document and leave the shard without an index."""
+        if self.store._index_exists():
+            with self.store._lock:
+                self.store.storage.snapshot()
+                self.store.storage.reset()
+            self.store = self._open_store()
+        return True
+
+def _serve_shard(conn: Any, index_dir: str, store_kwargs: Dict[str, Any]) -> None:
+    """Worker process loop: run ShardServer methods requested over a pipe.
+
+    Args:
+        conn: Pipe end receiving (method, args, kwargs) tuples; None stops the worker
+        index_dir: Directory of this shard
+        store_kwargs: FAISSVectorStore arguments
+    """
+    server = ShardServer(index_dir, store_kwargs)
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+
+        method, args, kwargs = message
+        try:
+            conn.send((True, getattr(server, method)(*args, **kwargs)))
+        except Exception as e:
+            logger.error(f"Error in shard {index_dir} during {method}: {str(e)}", exc_info=True)
+            conn.send((False, f"{type(e).__name__}: {str(e)}"))
+
+    conn.close()
+
+class ShardClient:
+    """Handle to one shard, served by a worker process or in-process."""
+
+    def __init__(self,
+                 index_dir: str,
+                 store_kwargs: Dict[str, Any],
+                 embedding_provider: Optional[Any] = None,
+                 use_process: bool = True):
+        """Start the shard.
+
+        Args:
+            index_dir: Directory of this shard
+            store_kwargs: FAISSVectorStore arguments
+            embedding_provider: Embedding provider for an in-process shard
+            use_process: Run the shard in its own worker process
+        """
+        self.index_dir = index_dir
+        self.use_process = use_process
+        self._lock = threading.Lock()  # One request at a time per pipe
+
+        if use_process:
+            # Spawned rather than forked, so no FAISS or SQLite state is inherited
+            context = multiprocessing.get_context("spawn")
+            self._conn, child_conn = context.Pipe()
+            self._process = context.Process(
+                target=_serve_shard,
+                args=(child_conn, index_dir, store_kwargs),
+                name=f"faiss-shard-{os.path.basename(index_dir)}",
+                daemon=True
+            )
+            self._process.start()
+            child_conn.close()
+            self._server = None
+        else:
+            self._server = ShardServer(index_dir, store_kwargs, embedding_provider)
+
+    def call(self, method: str, *args, **kwargs) -> Any:
+        """Run a ShardServer method on this shard.
+
+        Raises:
+            VectorStoreError: If the shard fails
+        """
+        if self._server is not None:
+            return getattr(self._server, method)(*args, **kwargs)
+
+        with self._lock:
+            try:
+                self._conn.send((method, args, kwargs))
+                success, result = self._conn.recv()
+            except (EOFError, OSError) as e:
+                raise VectorStoreError(f"Shard {self.index_dir} is not running: {str(e)}")
+
+        if not success:
+            raise VectorStoreError(f"Shard {self.index_dir} failed: {result}")
+        return result
+
+    def close(self) -> None:
+        """Stop the shard's worker process."""
+        if self._server is not None:
+            return
+
+        with self._lock:
+            try:
+                self._conn.send(None)
+            except (EOFError, OSError):
+                pass
+            self._conn.close()
+
+        self._process.join(timeout=10)
+        if self._process.is_alive():
+            self._process.terminate()
+
+def _stop_shards(shards: List[ShardClient]) -> None:
+    """Stop shard workers; runs on close or once their store is garbage collected."""
+    for shard in shards:
+        shard.close()
+
+class ShardedFAISSVectorStore:
+    """FAISS vector store partitioned across shards.
+
+    Chunks are assigned to shards by a consistent hash of their content ID.
+    Queries are embedded once, fanned out to every shard in parallel, and
+    the per-shard top-k lists are merged by distance. Each shard is a
+    FAISSVectorStore in its own directory, served by a worker process so
+    searches use one core (and one process's memory) per shard.
+    """
+
+    def __init__(self,
+                 embedding_provider: Optional[Any] = None,
+                 index_dir: Optional[str] = None,
+                 num_shards: Optional[int] = None,
+                 use_processes: Optional[bool] = None,
+                 **store_kwargs):
+        """Initialize and start the shards.
+
+        Args:
+            embedding_provider: Provider for embeddings (default: OpenAIEmbeddings)
+            index_dir: Directory holding the shard directories
+            num_shards: Number of shards for a new index (an existing layout wins)
+            use_processes: Run each shard in a worker process (default: from config)
+            **store_kwargs: FAISSVectorStore index arguments applied to every shard
+        """
+        self.index_dir = index_dir or config.vector_store.index_dir
+        self.use_processes = (use_processes if use_processes is not None
+                              else config.vector_store.faiss_shard_processes)
+        self.store_kwargs = store_kwargs
+
+        # Use OpenAIEmbeddings as the default embedding provider
+        self.embedding_provider = embedding_provider or OpenAIEmbeddings(
+            model=config.vector_store.embedding_model
+        )
+
+        layout = self._read_layout()
+        self.num_shards = layout.get("num_shards") or num_shards or config.vector_store.faiss_num_shards
+        if num_shards and num_shards != self.num_shards:
+            logger.warning(f"Index at {self.index_dir} has {self.num_shards} shards; "
+                           f"use add_shards to grow it to {num_shards}")
+
+        os.makedirs(self.index_dir, exist_ok=True)
+        self._lock = threading.RLock()
+        self.shards: List[ShardClient] = []
+        self._stop_shards = weakref.finalize(self, _stop_shards, self.shards)
+        self._executor = None
+        self._version: Optional[Tuple[int, ...]] = None  # Cached shard versions, reset by writes
+        self._start_shards(self.num_shards)
+
+        logger.debug(f"Initialized sharded FAISS vector store with {self.num_shards} shards "
+                     f"(processes={self.use_processes}) in {self.index_dir}")
+
+    def _shard_dir(self, shard_index: int) -> str:
+        """Directory of one shard."""
+        return os.path.join(self.index_dir, f"shard_{shard_index:03d}")
+
+    def _read_layout(self) -> Dict[str, Any]:
+        """Read the shard layout file, if any."""
+        path = os.path.join(self.index_dir, SHARDS_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_layout(self) -> None:
+        """Persist the shard layout atomically."""
+        path = os.path.join(self.index_dir, SHARDS_FILE)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump({"num_shards": self.num_shards}, f)
+        os.replace(f"{path}.tmp", path)
+
+    def _start_shards(self, num_shards: int) -> None:
+        """Start shards up to the given count."""
+        for shard_index in range(len(self.shards), num_shards):
+            self.shards.append(ShardClient(
+                self._shard_dir(shard_index),
+                self.store_kwargs,
+                embedding_provider=self.embedding_provider,
+                use_process=self.use_processes
+            ))
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        self._executor = ThreadPoolExecutor(max_workers=len(self.shards), thread_name_prefix="faiss-shard")
+
+    def _fan_out(self, method: str, *args, **kwargs) -> List[Any]:
+        """Run the same method on every shard in parallel.
+
+        Returns:
+            Per-shard results, in shard order
+        """
+        futures = [self._executor.submit(shard.call, method, *args, **kwargs) for shard in self.shards]
+        return [future.result() for future in futures]
+
+    def _scatter(self, method: str, requests: Dict[int, Tuple]) -> Dict[int, Any]:
+        """Run a method on some shards in parallel, each with its own arguments.
+
+        Args:
+            method: ShardServer method name
+            requests: Shard index -> positional arguments
+
+        Returns:
+            Shard index -> result
+        """
+        futures = {
+            shard_index: self._executor.submit(self.shards[shard_index].call, method, *args)
+            for shard_index, args in requests.items()
+        }
+        return {shard_index: future.result() for shard_index, future in futures.items()}
+
+    def _partition(self,
+                   documents: List[Document],
+                   embeddings: List[List[float]]) -> Dict[int, Tuple[List[Document], List[List[float]]]]:
+        """Group documents and their embeddings by shard."""
+        groups: Dict[int, Tuple[List[Document], List[List[float]]]] = {}
+        for doc, embedding in zip(documents, embeddings):
+            docs, vectors = groups.setdefault(shard_for(document_chunk_id(doc), self.num_shards), ([], []))
+            docs.append(doc)
+            vectors.append(embedding)
+        return groups
+
+    @property
+    def index_version(self) -> Tuple[int, ...]:
+        """Version of the indexed documents: the shard count and every shard's version.
+
+        Shards only change through this store, so their versions are fetched
+        once after each write instead of on every call.
+        """
+        version = self._version
+        if version is None:
+            with self._lock:
+                if self._version is None:
+                    self._version = (self.num_shards, *self._fan_out("version"))
+                version = self._version
+        return version
+
+    def _index_exists(self) -> bool:
+        """Check if a sharded index exists on disk."""
+        return os.path.exists(os.path.join(self.index_dir, SHARDS_FILE))
+
+    def load_index(self) -> bool:
+        """Load the sharded index (shards load their own segments on start).
+
+        Returns:
+            True if an index exists, False otherwise
+        """
+        return self._index_exists()
+
+    def build_index(self,
+                    documents: List[Document],
+                    force_rebuild: bool = False,
+                    embeddings: Optional[List[List[float]]] = None) -> bool:
+        """Build the sharded index from documents.
+
+        Args:
+            documents: Documents to index
+            force_rebuild: Whether to force rebuild even if the index exists
+            embeddings: Optional precomputed embeddings, one per document
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            if not force_rebuild and self._index_exists():
+                logger.debug("Sharded index already exists")
+                return True
+
+            # Handle empty documents case like FAISSVectorStore
+            if not documents:
+                documents = [Document(
+                    page_content="This is a placeholder document for empty index",
+                    metadata={"source": "placeholder", "id": "placeholder_doc"}
+                )]
+                embeddings = None
+
+            # One embedding request for the whole corpus, shards never embed
+            if embeddings is None:
+                embeddings = self.embedding_provider.embed_documents([doc.page_content for doc in documents])
+
+            with self._lock:
+                self._version = None
+                if not all(self._fan_out("clear")):
+                    return False
+
+                groups = self._partition(documents, embeddings)
+                results = self._scatter("build", {shard: group for shard, group in groups.items()})
+                self._write_layout()
+
+            # Other shared instances of this directory still serve the replaced index
+            from core.embeddings.store_registry import VectorStoreRegistry
+            VectorStoreRegistry.invalidate(index_dir=self.index_dir, keep=self)
+
+            logger.info(f"Built sharded FAISS index with {len(documents)} documents "
+                        f"across {len(groups)} of {self.num_shards} shards")
+            return all(results.values())
+
+        except Exception as e:
+            logger.error(f"Error building sharded FAISS index: {str(e)}", exc_info=True)
+            return False
+
+    def existing_ids(self, ids: List[str]) -> Set[str]:
+        """Find which document IDs are already indexed on any shard.
+
+        Args:
+            ids: Document IDs to check
+
+        Returns:
+            Set of the given IDs that are already stored
+        """
+        if not ids:
+            return set()
+        return set().union(*self._fan_out("existing_ids", list(ids)))
+
+    def add_documents(self,
+                      documents: List[Document],
+                      embeddings: Optional[List[List[float]]] = None) -> bool:
+        """Add documents, routing each to its shard.
+
+        Args:
+            documents: Documents to add
+            embeddings: Optional precomputed embeddings, one per document
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            if not documents:
+                logger.warning("No documents to add")
+                return True
+
+            if not self._index_exists():
+                return self.build_index(documents, embeddings=embeddings)
+
+            # Skip indexed chunks before embedding
+            ids = [document_chunk_id(doc) for doc in documents]
+            existing = self.existing_ids(ids)
+            keep = [i for i, doc_id in enumerate(ids) if doc_id not in existing]
+            if not keep:
+                logger.info(f"All {len(documents)} documents are already indexed")
+                return True
+
+            documents = [documents[i] for i in keep]
+            if embeddings is not None:
+                embeddings = [embeddings[i] for i in keep]
+            else:
+                embeddings = self.embedding_provider.embed_documents([doc.page_content for doc in documents])
+
+            with self._lock:
+                self._version = None
+                results = self._scatter("add", self._partition(documents, embeddings))
+
+            logger.info(f"Added {len(documents)} documents to {len(results)} shards")
+            return all(results.values())
+
+        except Exception as e:
+            logger.error(f"Error adding documents to sharded FAISS index: {str(e)}", exc_info=True)
+            return False
+
+    def delete_documents(self,
+                         ids: Optional[List[str]] = None,
+                         source: Optional[str] = None,
+                         keep_ids: Optional[List[str]] = None) -> bool:
+        """Delete documents by ID and/or all chunks of a source, on every shard.
+
+        Args:
+            ids: Document IDs to delete
+            source: Source identity whose chunks to delete (see document_source_id)
+            keep_ids: Document IDs to keep even if they match
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            with self._lock:
+                self._version = None
+                return all(self._fan_out("delete", ids, source, keep_ids))
+        except Exception as e:
+            logger.error(f"Error deleting documents from sharded FAISS index: {str(e)}", exc_info=True)
+            return False
+
+    def upsert_documents(self,
+                         documents: List[Document],
+                         embeddings: Optional[List[List[float]]] = None) -> bool:
+        """Replace the indexed chunks of each document source with new ones.
+
+        Args:
+            documents: New chunks
+            embeddings: Optional precomputed embeddings, one per document
+
+        Returns:
+            True if successful, False otherwise
+        """
+        new_ids: Dict[str, List[str]] = {}
+        for doc in documents:
+            new_ids.setdefault(document_source_id(doc.metadata), []).append(document_chunk_id(doc))
+
+        for source, keep_ids in new_ids.items():
+            if source is not None and not self.delete_documents(source=source, keep_ids=keep_ids):
+                return False
+
+        return self.add_documents(documents, embeddings=embeddings)
+
+    def search_by_vectors(self,
+                          query_vectors: List[List[float]],
+                          k: int = None,
+                          filter: Optional[MetadataFilter] = None,
+                          ef_search: Optional[int] = None,
+                          nprobe: Optional[int] = None) -> List[List[Tuple[Document, float]]]:
+        """Scatter precomputed query embeddings to all shards and merge their top-k.
+
+        Args:
+            query_vectors: Query embeddings
+            k: Number of results to return per query
+            filter: Only return chunks whose metadata matches
+            ef_search: Optional HNSW search depth for this search only
+            nprobe: Optional IVF probe count for this search only
+
+        Returns:
+            Per query, a list of (document, L2 distance) tuples, closest first
+        """
+        k = k or config.vector_store.similarity_top_k
+        query_vectors = np.asarray(query_vectors, dtype=np.float32)
+
+        shard_results = self._fan_out("search", query_vectors, k, filter, ef_search=ef_search, nprobe=nprobe)
+
+        # Every shard returns its own top-k, so the global top-k is among them
+        return [
+            heapq.nsmallest(k, (hit for hits in per_shard for hit in hits), key=lambda hit: hit[1])
+            for per_shard in zip(*shard_results)
+        ]
+
+    def search(self,
+               query: str,
+               k: int = None,
+               ef_search: Optional[int] = None,
+               nprobe: Optional[int] = None,
+               filter: Optional[MetadataFilter] = None) -> List[Document]:
+        """Search all shards for documents similar to the query.
+
+        Args:
+            query: Query string
+            k: Number of results to return
+            ef_search: Optional HNSW search depth override for this search only
+            nprobe: Optional IVF probe count override for this search only
+            filter: Only return chunks whose metadata matches
+
+        Returns:
+            List of similar documents
+
+        Raises:
+            VectorStoreError: If search fails
+        """
+        try:
+            query_vector = [self.embedding_provider.embed_query(query)]
+            hits = self.search_by_vectors(query_vector, k, filter=filter, ef_search=ef_search, nprobe=nprobe)[0]
+            results = [doc for doc, _ in hits]
+
+            logger.debug(f"Found {len(results)} documents across {self.num_shards} shards for query: {query[:50]}...")
+            return results
+
+        except Exception as e:
+            logger.error(f"Error searching sharded FAISS index: {str(e)}", exc_info=True)
+            raise VectorStoreError(f"Search failed: {str(e)}")
+
+    def search_with_scores(self,
+                           query: str,
+                           k: int = None,
+                           min_score: Optional[float] = None,
+                           filter: Optional[MetadataFilter] = None,
+                           query_vector: Optional[List[float]] = None) -> List[Tuple[Document, float]]:
+        """Search all shards, with similarity scores.
+
+        Args:
+            query: Query string
+            k: Number of results to return
+            min_score: Minimum normalized similarity score (0-1) to return
+            filter: Only return chunks whose metadata matches
+            query_vector: Precomputed embedding of the query (embedded here if None)
+
+        Returns:
+            List of (document, score) tuples, most similar first
+
+        Raises:
+            VectorStoreError: If search fails
+        """
+        try:
+            if query_vector is None:
+                query_vector = self.embedding_provider.embed_query(query)
+            hits = self.search_by_vectors([query_vector], k, filter=filter)[0]
+            return FAISSVectorStore._scored(hits, min_score)
+
+        except Exception as e:
+            logger.error(f"Error searching sharded FAISS index: {str(e)}", exc_info=True)
+            raise VectorStoreError(f"Search failed: {str(e)}")
+
+    def search_batch(self,
+                     queries: List[str],
+                     k: int = None,
+                     min_score: Optional[float] = None,
+                     filter: Optional[MetadataFilter] = None) -> List[List[Document]]:
+        """Search all shards for each of several queries in one fan-out.
+
+        Args:
+            queries: Query strings
+            k: Number of results to return per query
+            min_score: Minimum normalized similarity score (0-1) to return
+            filter: Only return chunks whose metadata matches
+
+        Returns:
+            List of similar documents for each query, in query order, with
+            the similarity score in metadata['score']
+
+        Raises:
+            VectorStoreError: If search fails
+        """
+        try:
+            if not queries:
+                return []
+
+            query_vectors = self.embedding_provider.embed_documents(queries)
+            return [
+                [doc for doc, _ in FAISSVectorStore._scored(hits, min_score)]
+                for hits in self.search_by_vectors(query_vectors, k, filter=filter)
+            ]
+
+        except Exception as e:
+            logger.error(f"Error batch searching sharded FAISS index: {str(e)}", exc_info=True)
+            raise VectorStoreError(f"Batch search failed: {str(e)}")
+
+    def add_shards(self, count: int = 1) -> bool:
+        """Add shards and move the documents that now belong to them.
+
+        Args:
+            count: Number of shards to add
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            with self._lock:
+                self._version = None
+                self.num_shards += count
+                self._start_shards(self.num_shards)
+                self._write_layout()
+
+            logger.info(f"Added {count} shards, now {self.num_shards}")
+            return self.rebalance() >= 0
+
+        except Exception as e:
+            logger.error(f"Error adding shards: {str(e)}", exc_info=True)
+            return False
+
+    def rebalance(self) -> int:
+        """Move every document that is not on its hashed shard.
+
+        Documents are added to their new shard before being deleted from
+        the old one, so an interrupted rebalance leaves nothing missing and
+        can simply be run again.
+
+        Returns:
+            Number of documents moved, or -1 on failure
+        """
+        try:
+            moved = 0
+            with self._lock:
+                self._version = None
+                for shard_index, (documents, vectors) in enumerate(self._misplaced()):
+                    if not documents:
+                        continue
+
+                    groups = self._partition(documents, vectors.tolist())
+                    results = self._scatter("add", groups)
+                    if not all(results.values()):
+                        return -1
+
+                    doc_ids = [document_chunk_id(doc) for doc in documents]
+                    if not self.shards[shard_index].call("delete", doc_ids, None, None):
+                        return -1
+                    moved += len(documents)
+
+            logger.info(f"Rebalanced {moved} documents across {self.num_shards} shards")
+            return moved
+
+        except Exception as e:
+            logger.error(f"Error rebalancing shards: {str(e)}", exc_info=True)
+            return -1
+
+    def _misplaced(self) -> List[Tuple[List[Document], np.ndarray]]:
+        """Collect each shard's documents that belong to another shard, in parallel."""
+        return list(self._scatter(
+            "misplaced",
+            {shard_index: (shard_index, self.num_shards) for shard_index in range(len(self.shards))}
+        ).values())
+
+    def set_search_params(self, ef_search: Optional[int] = None, nprobe: Optional[int] = None) -> None:
+        """Tune query-time parameters of every shard.
+
+        Args:
+            ef_search: HNSW search-time depth
+            nprobe: Number of IVF cells to visit per query
+        """
+        self._fan_out("set_search_params", ef_search, nprobe)
+
+    def save_index(self) -> bool:
+        """Compact every shard's pending segments.
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            return all(self._fan_out("save"))
+        except Exception as e:
+            logger.error(f"Error saving sharded FAISS index: {str(e)}", exc_info=True)
+            return False
+
+    def clear_index(self) -> bool:
+        """Clear every shard and start a new empty index.
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            with self._lock:
+                self._version = None
+                if not all(self._fan_out("clear")):
+                    return False
+            return self.build_index([], force_rebuild=True)
+
+        except Exception as e:
+            logger.error(f"Error clearing sharded FAISS index: {str(e)}", exc_info=True)
+            return False
+
+    def as_retriever(self, search_kwargs: Optional[Dict[str, Any]] = None) -> ScoredStoreRetriever:
+        """Get a LangChain retriever for the vector store.
+
+        Args:
+            search_kwargs: Search parameters (k, score_threshold, filter)
+
+        Returns:
+            Retriever, also callable with a query
+        """
+        search_kwargs = search_kwargs or {
+            "k": config.vector_store.similarity_top_k
+        }
+        min_score = search_kwargs.get("score_threshold", config.vector_store.min_similarity_score)
+
+        return ScoredStoreRetriever(store=self, k=search_kwargs.get("k"), min_score=min_score,
+                                    filter=search_kwargs.get("filter"))
+
+    def close(self) -> None:
+        """Stop all shard workers."""
+        with self._lock:
+            self._stop_shards()
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
@@ -0,0 +1,187 @@
+# core/embeddings/store_registry.py
+
+import os
+import threading
+import weakref
+from typing import Optional, Any, Dict, Tuple, List
+from config.logging_config import get_module_logger
+from config.app_config import config
+from core.embeddings.vector_store_factory import VectorStoreFactory
+
+# Create a logger for this module
+logger = get_module_logger("store_registry")
+
+# Constructor argument naming the on-disk location of each store type
+DIRECTORY_ARGS = {
+    "faiss": "index_dir",
+    "faiss_sharded": "index_dir",
+    "chroma": "persist_directory"
+}
+
+# (store_type, index_dir, embedding_model, sorted constructor arguments)
+StoreKey = Tuple[str, str, str, Tuple[Tuple[str, Any], ...]]
+
+class VectorStoreRegistry:
+    """Process-wide cache of warm vector stores and embedding providers.
+
+    Stores are keyed by (store_type, index_dir, embedding model, constructor
+    arguments), so every caller asking for the same index shares one loaded
+    instance instead of reading it from disk again. The stores synchronize
+    their own reads and writes, so a shared instance is safe to use from
+    several threads.
+    """
+
+    _stores: Dict[StoreKey, Any] = {}
+    # Dropped stores not closed yet; callers such as UI sessions may still hold them
+    _retired: "weakref.WeakSet[Any]" = weakref.WeakSet()
+    _embedding_providers: Dict[str, Any] = {}
+    _lock = threading.Lock()
+    _key_locks: Dict[StoreKey, threading.Lock] = {}
+
+    @classmethod
+    def _key(cls,
+             store_type: Optional[str],
+             index_dir: Optional[str],
+             embedding_model: Optional[str],
+             kwargs: Dict[str, Any]) -> StoreKey:
+        """Normalize the registry key of a store."""
+        store_type = (store_type or os.environ.get("VECTOR_STORE_TYPE", "faiss")).lower()
+        index_dir = os.path.abspath(index_dir or config.vector_store.index_dir)
+        embedding_model = embedding_model or config.vector_store.embedding_model
+        return store_type, index_dir, embedding_model, tuple(sorted(kwargs.items()))
+
+    @classmethod
+    def get_embedding_provider(cls, model: Optional[str] = None) -> Any:
+        """Get the shared embedding provider for a model.
+
+        Args:
+            model: Embedding model name (default: from config)
+
+        Returns:
+            Embedding provider
+        """
+        model = model or config.vector_store.embedding_model
+        with cls._lock:
+            if model not in cls._embedding_providers:
+                cls._embedding_providers[model] = VectorStoreFactory.create_embeddings_provider(model)
+                logger.debug(f"Created shared embedding provider for {model}")
+            return cls._embedding_providers[model]
+
+    @classmethod
+    def get_vector_store(cls,
+                         store_type: Optional[str] = None,
+                         index_dir: Optional[str] = None,
+                         embedding_model: Optional[str] = None,
+                         **kwargs) -> Any:
+        """Get the shared vector store for an index, creating and loading it once.
+
+        Args:
+            store_type: Type of vector store ('faiss', 'faiss_sharded', 'chroma', 'vertex')
+            index_dir: Index directory (default: from config)
+            embedding_model: Embedding model name (default: from config)
+            **kwargs: Additional (hashable) store arguments; different arguments get their own instance
+
+        Returns:
+            Vector store instance
+        """
+        key = cls._key(store_type, index_dir, embedding_model, kwargs)
+
+        with cls._lock:
+            store = cls._stores.get(key)
+            if store is not None:
+                return store
+            key_lock = cls._key_locks.setdefault(key, threading.Lock())
+
+        # Loading an index can be slow, so only callers of the same key wait for it
+        with key_lock:
+            with cls._lock:
+                store = cls._stores.get(key)
+            if store is not None:
+                return store
+
+            store_type, resolved_dir, model, _ = key
+            if index_dir is not None and store_type in DIRECTORY_ARGS:
+                kwargs.setdefault(DIRECTORY_ARGS[store_type], index_dir)
+
+            store = VectorStoreFactory.create_vector_store(
+                store_type=store_type,
+                embedding_provider=cls.get_embedding_provider(model),
+                **kwargs
+            )
+
+            with cls._lock:
+                cls._stores[key] = store
+
+        logger.info(f"Registered {type(store).__name__} for {resolved_dir} ({model})")
+        return store
+
+    @classmethod
+    def invalidate(cls,
+                   store_type: Optional[str] = None,
+                   index_dir: Optional[str] = None,
+                   keep: Optional[Any] = None,
+                   close: bool = False) -> int:
+        """Drop shared stores so the next request reloads them from disk.
+
+        A store's build_index and clear_index call this for its directory,
+        so other shared instances never keep serving a replaced index. Call it
+        yourself after an index was changed on disk by another process or a
+        restored snapshot.
+
+        By default dropped stores are not closed, since other threads may
+        still be using them: stores holding workers or connections release
+        them once they are garbage collected, or at the latest on clear().
+
+        Args:
+            store_type: Only drop stores of this type (default: all types)
+            index_dir: Only drop stores of this directory (default: all directories)
+            keep: Store instance to keep registered (the one that changed the index)
+            close: Close the dropped stores now; only when nothing uses them any more
+
+        Returns:
+            Number of stores dropped
+        """
+        index_dir = os.path.abspath(index_dir) if index_dir else None
+
+        with cls._lock:
+            keys: List[StoreKey] = [
+                key for key, store in cls._stores.items()
+                if (store_type is None or key[0] == store_type.lower())
+                and (index_dir is None or key[1] == index_dir)
+                and store is not keep
+            ]
+            dropped = [cls._stores.pop(key) for key in keys]
+            if not close:
+                for store in dropped:
+                    cls._retired.add(store)
+
+        if close:
+            cls._close_stores(dropped)
+        if keys:
+            logger.info(f"Invalidated {len(keys)} shared vector stores")
+        return len(keys)
+
+    @staticmethod
+    def _close_stores(stores: List[Any]) -> None:
+        """Close stores that hold workers or connections."""
+        for store in stores:
+            if not hasattr(store, "close"):
+                continue
+            try:
+                store.close()
+            except Exception as e:
+                logger.warning(f"Error closing {type(store).__name__}: {str(e)}")
+
+    @classmethod
+    def clear(cls) -> None:
+        """Drop and close every shared store, also ones dropped earlier, and drop the embedding providers.
+
+        Only call this when no caller uses the stores any more, e.g. at shutdown.
+        """
+        cls.invalidate(close=True)
+        with cls._lock:
+            retired = list(cls._retired)
+            cls._retired = weakref.WeakSet()
+            cls._embedding_providers.clear()
+            cls._key_locks.clear()
+        cls._close_stores(retired)
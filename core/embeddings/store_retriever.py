@@ -0,0 +1,42 @@
+# core/embeddings/store_retriever.py
+
+from typing import Any, Dict, List, Optional
+from langchain.schema import Document
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+
+class ScoredStoreRetriever(BaseRetriever):
+    """LangChain retriever over a vector store's search_with_scores.
+    
+    Chunks scoring below min_score never reach the prompt. Instances can
+    also be called with a query, like the retriever functions returned by
+    the other stores.
+    """
+    
+    store: Any
+    k: Optional[int] = None
+    min_score: Optional[float] = None
+    filter: Optional[Dict[str, Any]] = None
+    
+    def _get_relevant_documents(self,
+                                query: str,
+                                *,
+                                run_manager: CallbackManagerForRetrieverRun,
+                                query_vector: Optional[List[float]] = None) -> List[Document]:
+        """Search the store and drop the scores.
+        
+        Args:
+            query: Query string
+            run_manager: Callback manager of the run
+            query_vector: Precomputed embedding of the query, e.g. from a cache lookup
+        """
+        # Not every store supports metadata filters, so only pass one if set
+        kwargs = {"filter": self.filter} if self.filter is not None else {}
+        if query_vector is not None:
+            kwargs["query_vector"] = query_vector
+        hits = self.store.search_with_scores(query, k=self.k, min_score=self.min_score, **kwargs)
+        return [doc for doc, _ in hits]
+    
+    def __call__(self, query: str) -> List[Document]:
+        """Retrieve documents for a query."""
+        return self.invoke(query)
@@ -0,0 +1,84 @@
+# core/embeddings/test_chunk_store.py
+
+import sqlite3
+import pytest
+from core.embeddings.chunk_store import ChunkStore, MAX_QUERY_PARAMS
+from core.embeddings.store_retriever import ScoredStoreRetriever
+from core.embeddings.vector_store import FAISSVectorStore
+from core.embeddings.test_index_segments import FakeEmbeddings, _docs
+
+def _records(count, start=0):
+    return [
+        (vector_id, f"doc-{vector_id}", f"text {vector_id}", {"source": f"file{vector_id % 3}.txt"})
+        for vector_id in range(start, start + count)
+    ]
+
+def test_get_many_batches_large_id_lists(tmp_path):
+    count = MAX_QUERY_PARAMS * 2 + 7
+    store = ChunkStore.create(str(tmp_path / "chunks.db"), _records(count))
+
+    docs = store.get_many(list(range(count + 10)))
+
+    assert len(docs) == count
+    assert docs[count - 1].page_content == f"text {count - 1}"
+    assert docs[0].metadata == {"source": "file0.txt"}
+    assert store.get_many([]) == {}
+
+def test_lookups_by_doc_id_and_source(tmp_path):
+    store = ChunkStore.create(str(tmp_path / "chunks.db"), _records(6))
+
+    assert store.existing_doc_ids(["doc-1", "doc-5", "missing"]) == {"doc-1", "doc-5"}
+    assert store.vector_ids_for(doc_ids=["doc-2"]) == {2: "doc-2"}
+    assert store.vector_ids_for(source="file0.txt") == {0: "doc-0", 3: "doc-3"}
+
+    store.delete([0, 1])
+    assert store.count() == 4
+    assert store.max_vector_id() == 5
+    assert [vector_id for vector_id, _ in store.iter_metadata()] == [2, 3, 4, 5]
+
+def test_create_copies_an_existing_store(tmp_path):
+    base = ChunkStore.create(str(tmp_path / "base.db"), _records(3))
+    copy = ChunkStore.create(str(tmp_path / "copy.db"), _records(2, start=3), copy_from=base)
+
+    assert copy.count() == 5
+    assert [record[0] for record in copy.iter_records()] == [0, 1, 2, 3, 4]
+
+def test_close_waits_for_retained_readers(tmp_path):
+    ChunkStore.create(str(tmp_path / "chunks.db"), _records(3)).close()
+    store = ChunkStore(str(tmp_path / "chunks.db"), read_only=True)
+
+    reader = store.retain()
+    store.close()
+
+    # The retained reader can still finish its read
+    assert reader.get_many([1])[1].page_content == "text 1"
+    reader.release()
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        store.get_many([1])
+    with pytest.raises(sqlite3.ProgrammingError):
+        store.retain()
+
+def test_compaction_closes_the_previous_base_store(tmp_path):
+    store = FAISSVectorStore(index_dir=str(tmp_path), embedding_provider=FakeEmbeddings(), compaction_threshold=100)
+    store.build_index(_docs("first", 4))
+    previous = store.chunk_store
+
+    store.add_documents(_docs("second", 2))
+    assert store.compact()
+
+    assert store.chunk_store is not previous
+    with pytest.raises(sqlite3.ProgrammingError):
+        previous.count()
+    assert len(store.search("second chunk 1", k=6)) == 6
+
+def test_as_retriever_is_a_langchain_retriever(tmp_path):
+    store = FAISSVectorStore(index_dir=str(tmp_path), embedding_provider=FakeEmbeddings())
+    store.build_index(_docs("first", 4))
+
+    retriever = store.as_retriever(search_kwargs={"k": 2})
+
+    assert isinstance(retriever, ScoredStoreRetriever)
+    assert len(retriever.invoke("first chunk 1")) == 2
+    assert len(retriever.get_relevant_documents("first chunk 1")) == 2
+    assert retriever("first chunk 1")[0].page_content == "first chunk 1"
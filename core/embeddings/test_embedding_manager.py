@@ -0,0 +1,65 @@
+# core/embeddings/test_embedding_manager.py
+
+import sqlite3
+from core.embeddings.embedding_manager import TextChunkProcessor, EmbeddingCache, LEGACY_CACHE_SUFFIX
+
+def test_split_text_covers_the_text_and_terminates():
+    processor = TextChunkProcessor(chunk_size=100, chunk_overlap=20)
+    text = " ".join(f"Sentence {i} is here." for i in range(60))
+
+    chunks = processor.split_text(text)
+
+    assert len(chunks) > 1
+    assert chunks[0].startswith("Sentence 0 ")
+    assert chunks[-1].endswith(text[-30:])
+    assert processor.split_text("short text") == ["short text"]
+    assert processor.split_text("") == []
+
+class FailingConnection:
+    """Connection proxy whose vector inserts fail, after the entries were written."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def executemany(self, sql, rows):
+        if sql.startswith("INSERT OR REPLACE INTO vectors"):
+            raise sqlite3.OperationalError("disk I/O error")
+        return self.conn.executemany(sql, rows)
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+def _cache(path, **kwargs):
+    return EmbeddingCache(cache_dir=str(path), use_memory_cache=False, **kwargs)
+
+def test_failed_write_leaves_counters_matching_the_file(tmp_path):
+    cache = _cache(tmp_path)
+    cache.set_many(["a", "b"], [[1.0] * 4, [2.0] * 4])
+    conn = cache._conn
+
+    cache._conn = FailingConnection(conn)
+    cache.set_many(["c", "d"], [[3.0] * 4, [4.0] * 4])
+    cache._conn = conn
+
+    assert (cache.stats.entries, cache.stats.bytes) == (2, 32)
+    assert cache.get("c") is None
+    assert cache.get("a") == [1.0] * 4
+
+def test_eviction_counts_entries_written_by_other_processes(tmp_path):
+    first = _cache(tmp_path, max_bytes=10 * 16)
+    second = _cache(tmp_path, max_bytes=10 * 16)
+
+    first.set_many([f"first {i}" for i in range(6)], [[float(i)] * 4 for i in range(6)])
+    second.set_many([f"second {i}" for i in range(6)], [[float(i)] * 4 for i in range(6)])
+
+    # The second cache only wrote 96 bytes itself, yet evicts down to 90% of the shared budget
+    assert second.stats.bytes <= 9 * 16
+    assert second.stats.evictions >= 3
+    assert first.get("first 0") is None
+
+def test_legacy_pickles_are_removed(tmp_path):
+    (tmp_path / "0cc175b9c0f1b6a831c399e269772661.pkl").write_bytes(b"legacy")
+
+    _cache(tmp_path)
+
+    assert [path.name for path in tmp_path.iterdir() if path.suffix == LEGACY_CACHE_SUFFIX] == []
@@ -0,0 +1,137 @@
+# core/embeddings/test_index_segments.py
+
+import os
+import hashlib
+import numpy as np
+import pytest
+from langchain.schema import Document
+from core.embeddings.index_segments import (
+    SegmentedIndexStorage, ManifestConflictError, LEGACY_BACKUP_DIR, LEGACY_INDEX_FILES
+)
+from core.embeddings.vector_store import FAISSVectorStore
+
+class FakeEmbeddings:
+    """Deterministic embeddings derived from the text."""
+    
+    def __init__(self, dimension: int = 16):
+        self.dimension = dimension
+    
+    def _embed(self, text):
+        seed = int(hashlib.md5(text.encode("utf-8")).hexdigest()[:8], 16)
+        return np.random.default_rng(seed).standard_normal(self.dimension).astype(np.float32).tolist()
+    
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+    
+    def embed_query(self, text):
+        return self._embed(text)
+
+def _docs(prefix, count):
+    return [Document(page_content=f"{prefix} chunk {i}", metadata={"source": f"{prefix}.txt"}) for i in range(count)]
+
+def _write_delta(storage, ids):
+    return storage.write_delta(ids, [f"text {i}" for i in ids], np.ones((len(ids), 4)), [{} for _ in ids])
+
+def test_delta_roundtrip(tmp_path):
+    storage = SegmentedIndexStorage(str(tmp_path))
+    name = _write_delta(storage, ["a", "b"])
+    
+    ids, texts, embeddings, metadatas = storage.read_delta(name)
+    assert ids == ["a", "b"]
+    assert texts == ["text a", "text b"]
+    assert embeddings.shape == (2, 4)
+    assert storage.segments == [name]
+    assert storage.version == 1
+    
+    # A new storage on the same directory sees the manifest
+    assert SegmentedIndexStorage(str(tmp_path)).segments == [name]
+
+def test_writers_on_one_directory_never_collide(tmp_path):
+    first = SegmentedIndexStorage(str(tmp_path))
+    second = SegmentedIndexStorage(str(tmp_path))
+    
+    names = [_write_delta(first, ["a"]), _write_delta(second, ["b"]), first.write_deletes(["a"])]
+    
+    assert len(set(names)) == 3
+    assert SegmentedIndexStorage(str(tmp_path)).segments == names
+    assert first.version == 3
+
+def test_commit_base_retires_merged_segments(tmp_path):
+    storage = SegmentedIndexStorage(str(tmp_path))
+    merged = _write_delta(storage, ["a"])
+    kept = _write_delta(storage, ["b"])
+    
+    base = storage.commit_base(lambda path: open(os.path.join(path, "data"), "w").close(), [merged])
+    
+    assert storage.base == base
+    assert storage.segments == [kept]
+    assert not os.path.exists(os.path.join(str(tmp_path), merged))
+    assert os.path.exists(os.path.join(storage.base_path(), "data"))
+    # Compaction does not change the indexed documents
+    assert storage.version == 2
+
+def test_commit_base_detects_concurrent_compaction(tmp_path):
+    first = SegmentedIndexStorage(str(tmp_path))
+    second = SegmentedIndexStorage(str(tmp_path))
+    segment = _write_delta(first, ["a"])
+    
+    second.commit_base(lambda path: None, [segment])
+    
+    with pytest.raises(ManifestConflictError):
+        first.commit_base(lambda path: None, [segment])
+    assert first.base == second.base
+
+def test_snapshot_and_restore(tmp_path):
+    storage = SegmentedIndexStorage(str(tmp_path), snapshot_retention=2)
+    first = _write_delta(storage, ["a"])
+    snapshot = storage.snapshot()
+    _write_delta(storage, ["b"])
+    
+    storage.restore_snapshot(snapshot)
+    
+    assert storage.segments == [first]
+    assert storage.read_delta(first)[0] == ["a"]
+
+def test_legacy_files_are_backed_up(tmp_path):
+    for filename in LEGACY_INDEX_FILES:
+        (tmp_path / filename).write_text("legacy")
+    storage = SegmentedIndexStorage(str(tmp_path))
+    
+    storage.commit_base(lambda path: None, [])
+    
+    assert not storage.has_legacy_index()
+    for filename in LEGACY_INDEX_FILES:
+        assert (tmp_path / LEGACY_BACKUP_DIR / filename).read_text() == "legacy"
+
+def test_store_compaction_and_reload(tmp_path):
+    store = FAISSVectorStore(embedding_provider=FakeEmbeddings(), index_dir=str(tmp_path),
+                             index_type="flat", compaction_threshold=100)
+    assert store.build_index(_docs("base", 5))
+    assert store.add_documents(_docs("added", 3))
+    assert store.delete_documents(source="base.txt")
+    assert len(store.storage.segments) == 2
+    
+    assert store.compact()
+    assert store.storage.segments == []
+    
+    reloaded = FAISSVectorStore(embedding_provider=FakeEmbeddings(), index_dir=str(tmp_path), index_type="flat")
+    assert reloaded.load_index()
+    assert sorted(doc.page_content for doc in reloaded.search("added chunk 1", k=10)) == \
+        sorted(doc.page_content for doc in _docs("added", 3))
+
+def test_compaction_keeps_segments_of_other_writers(tmp_path):
+    store = FAISSVectorStore(embedding_provider=FakeEmbeddings(), index_dir=str(tmp_path),
+                             index_type="flat", compaction_threshold=100)
+    store.build_index(_docs("base", 2))
+    other = FAISSVectorStore(embedding_provider=FakeEmbeddings(), index_dir=str(tmp_path),
+                             index_type="flat", compaction_threshold=100)
+    other.load_index()
+    
+    store.add_documents(_docs("mine", 2))
+    other.add_documents(_docs("theirs", 2))
+    assert store.compact()
+    
+    reloaded = FAISSVectorStore(embedding_provider=FakeEmbeddings(), index_dir=str(tmp_path), index_type="flat")
+    reloaded.load_index()
+    contents = {doc.page_content for doc in reloaded.search("x", k=10)}
+    assert contents == {doc.page_content for doc in _docs("base", 2) + _docs("mine", 2) + _docs("theirs", 2)}
@@ -0,0 +1,68 @@
+# core/embeddings/test_store_registry.py
+
+import gc
+import pytest
+from core.embeddings.store_registry import VectorStoreRegistry
+from core.embeddings.test_index_segments import FakeEmbeddings, _docs
+
+@pytest.fixture
+def registry(monkeypatch):
+    VectorStoreRegistry.clear()
+    monkeypatch.setattr(VectorStoreRegistry, "_embedding_providers", {"fake": FakeEmbeddings()})
+    yield VectorStoreRegistry
+    VectorStoreRegistry.clear()
+
+def test_same_arguments_share_one_store(registry, tmp_path):
+    first = registry.get_vector_store("faiss", str(tmp_path), "fake")
+    second = registry.get_vector_store("faiss", str(tmp_path), "fake")
+
+    assert first is second
+
+def test_different_arguments_get_their_own_store(registry, tmp_path):
+    default = registry.get_vector_store("faiss", str(tmp_path), "fake")
+    tuned = registry.get_vector_store("faiss", str(tmp_path), "fake", ef_search=128)
+
+    assert tuned is not default
+    assert tuned.ef_search == 128
+    assert registry.get_vector_store("faiss", str(tmp_path), "fake", ef_search=128) is tuned
+
+def test_rebuild_invalidates_other_instances_of_the_directory(registry, tmp_path):
+    shared = registry.get_vector_store("faiss", str(tmp_path), "fake")
+    tuned = registry.get_vector_store("faiss", str(tmp_path), "fake", ef_search=128)
+
+    assert tuned.build_index(_docs("new", 3), force_rebuild=True)
+
+    # The rebuilding instance stays registered, the stale one is reloaded
+    assert registry.get_vector_store("faiss", str(tmp_path), "fake", ef_search=128) is tuned
+    reloaded = registry.get_vector_store("faiss", str(tmp_path), "fake")
+    assert reloaded is not shared
+    assert reloaded.search("new chunk 1", k=1)[0].page_content == "new chunk 1"
+
+    # A dropped store is not closed while still in use
+    assert shared.search("new chunk 1", k=1)
+
+def test_invalidated_sharded_store_stops_its_shards_once_unused(registry, tmp_path):
+    store = registry.get_vector_store("faiss_sharded", str(tmp_path), "fake", num_shards=2, use_processes=False)
+    stop_shards = store._stop_shards
+
+    assert registry.invalidate(index_dir=str(tmp_path)) == 1
+    assert stop_shards.alive
+
+    del store
+    gc.collect()
+    assert not stop_shards.alive
+
+def test_clear_closes_dropped_stores_still_held(registry, tmp_path):
+    store = registry.get_vector_store("faiss_sharded", str(tmp_path), "fake", num_shards=2, use_processes=False)
+    registry.invalidate(index_dir=str(tmp_path))
+
+    registry.clear()
+
+    # Still referenced here, but its shards are stopped
+    assert not store._stop_shards.alive
+
+def test_invalidate_can_close_dropped_stores(registry, tmp_path):
+    store = registry.get_vector_store("faiss_sharded", str(tmp_path), "fake", num_shards=2, use_processes=False)
+
+    assert registry.invalidate(index_dir=str(tmp_path), close=True) == 1
+    assert not store._stop_shards.alive
@@ -0,0 +1,30 @@
+# core/embeddings/test_vertex_store.py
+
+import sys
+from core.embeddings.vertex_store import VertexVectorStore
+from core.pipelines.ingest_pipeline import DocumentIngestPipeline
+from core.embeddings.test_index_segments import FakeEmbeddings, _docs
+
+def test_local_stand_in_runs_without_the_gcp_sdk():
+    store = VertexVectorStore(embedding_provider=FakeEmbeddings(), local=True)
+
+    assert store.build_index(_docs("a", 5))
+    assert store.search("a chunk 2", k=1)[0].page_content == "a chunk 2"
+    assert store.as_retriever(search_kwargs={"k": 1})("a chunk 3")[0].page_content == "a chunk 3"
+
+    # Nothing on the local path needs the cloud SDK
+    assert "google.cloud.aiplatform" not in sys.modules
+
+def test_delete_and_replace_by_source():
+    store = VertexVectorStore(embedding_provider=FakeEmbeddings(), local=True)
+    store.build_index(_docs("a", 3) + _docs("b", 2))
+
+    assert store.delete_documents(source="b.txt")
+    assert {doc.metadata["source"] for doc in store.search("b chunk 1", k=10)} == {"a.txt"}
+
+    # A replacing ingest deletes the chunks the source no longer contains
+    pipeline = DocumentIngestPipeline(store)
+    result = pipeline.ingest_documents(_docs("a", 1), replace=True)
+
+    assert result.success
+    assert [doc.page_content for doc in store.search("a chunk 0", k=10)] == ["a chunk 0"]
@@ -1,54 +1,140 @@
 # core/embeddings/vector_store.py
 
 import os
-import shutil
+import json
 import time
-from typing import List, Optional, Dict, Any, Tuple, Callable, Union
+import pickle
+import threading
+from typing import List, Optional, Dict, Any, Iterable, Set, Tuple, Callable, Union
+import numpy as np
+import faiss
 from langchain.schema import Document
-from langchain_community.vectorstores import FAISS
 from langchain_openai import OpenAIEmbeddings
 from config.app_config import config
 from config.logging_config import get_module_logger
+from core.embeddings.faiss_index import FAISSIndexFactory
+from core.embeddings.index_segments import SegmentedIndexStorage
+from core.embeddings.chunk_store import ChunkStore, document_chunk_id, document_source_id
+from core.embeddings.metadata_index import MetadataIndex, MetadataFilter
+from core.embeddings.store_retriever import ScoredStoreRetriever
 
 # Create a logger for this module
 logger = get_module_logger("vector_store")
 
+# Files making up a base segment
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "docstore.sqlite"
+VECTORS_FILE = "vectors.npy"  # Original vectors kept beside compressed indexes for re-ranking
+
+# Recall vs. memory report written by compression_report
+COMPRESSION_REPORT_FILE = "compression_report.json"
+
+# Filters matching at most this many base vectors are searched exactly
+EXACT_FILTER_THRESHOLD = 4096
+
+# Pickled docstore written by LangChain's FAISS.save_local in older index versions
+LEGACY_DOCSTORE_FILE = "index.pkl"
+
 class VectorStoreError(Exception):
     """Exception raised for vector store errors."""
     pass
 
 class FAISSVectorStore:
-    """Manages FAISS vector store operations using LangChain's implementation."""
+    """Manages a segmented FAISS index with an on-disk chunk store.
+    
+    The base index is loaded into memory or memory-mapped read-only, and
+    chunk text and metadata are read from SQLite only for the top-k hits.
+    Vectors added since the last compaction live in a small in-memory
+    delta index that is searched alongside the base.
+    """
     
     def __init__(self, 
                 embedding_provider: Optional[Any] = None,
-                index_dir: Optional[str] = None):
+                index_dir: Optional[str] = None,
+                index_type: Optional[str] = None,
+                m: Optional[int] = None,
+                ef_construction: Optional[int] = None,
+                ef_search: Optional[int] = None,
+                nlist: Optional[int] = None,
+                nprobe: Optional[int] = None,
+                pq_m: Optional[int] = None,
+                pq_nbits: Optional[int] = None,
+                rerank_factor: Optional[int] = None,
+                compaction_threshold: Optional[int] = None,
+                load_mode: Optional[str] = None):
         """Initialize with components and directories.
         
         Args:
             embedding_provider: Provider for embeddings (default: OpenAIEmbeddings)
             index_dir: Directory to store the index
+            index_type: FAISS index type ('flat', 'hnsw', 'ivf_flat', 'ivf_pq', 'sq8', 'sq4')
+            m: Number of HNSW neighbors per node
+            ef_construction: HNSW construction-time search depth
+            ef_search: HNSW search-time depth
+            nlist: Number of IVF cells
+            nprobe: Number of IVF cells to visit per query
+            pq_m: Number of product quantizer sub-vectors
+            pq_nbits: Bits per product quantizer code
+            rerank_factor: Re-rank k * factor candidates of compressed indexes exactly (0 disables)
+            compaction_threshold: Number of delta segments that triggers background compaction
+            load_mode: How to load the base index ('memory' or 'mmap')
         """
         self.index_dir = index_dir or config.vector_store.index_dir
         
+        # Index parameters (default: from config)
+        self.index_type = index_type or config.vector_store.faiss_index_type
+        self.m = m or config.vector_store.hnsw_m
+        self.ef_construction = ef_construction or config.vector_store.hnsw_ef_construction
+        self.ef_search = ef_search or config.vector_store.hnsw_ef_search
+        self.nlist = nlist or config.vector_store.ivf_nlist
+        self.nprobe = nprobe or config.vector_store.ivf_nprobe
+        self.pq_m = pq_m or config.vector_store.pq_m
+        self.pq_nbits = pq_nbits or config.vector_store.pq_nbits
+        self.rerank_factor = rerank_factor if rerank_factor is not None else config.vector_store.rerank_factor
+        self.load_mode = (load_mode or config.vector_store.faiss_load_mode).lower()
+        
         # Use OpenAIEmbeddings as the default embedding provider
         self.embedding_provider = embedding_provider or OpenAIEmbeddings(
             model=config.vector_store.embedding_model
         )
         
-        self.vectorstore = None
+        # Base index and its chunk payloads (never modified in place)
+        self.index = None
+        self.base_name: Optional[str] = None  # Base segment the index was opened from
+        self.chunk_store = None
+        self.base_vectors = None  # Memory-mapped original vectors of a compressed base
+        self.base_deleted: Dict[int, str] = {}  # Deleted base vector ID -> document ID
+        self.base_metadata: Optional[MetadataIndex] = None  # Built on the first filtered search
+        self.next_vector_id = 0
         
-        # Create index directory if it doesn't exist
-        os.makedirs(self.index_dir, exist_ok=True)
+        # Vectors added since the last compaction: (doc_id, document) per delta position
+        self.delta_index = None
+        self.delta_docs: List[Tuple[str, Document]] = []
+        self.delta_ids: Set[str] = set()  # Live (not deleted) delta document IDs
+        self.delta_deleted: Set[int] = set()  # Deleted delta positions
+        self.delta_metadata = MetadataIndex()
+        self.loaded_segments: List[str] = []  # Delta segments replayed into or written from this store
         
-        logger.debug(f"Initialized FAISS vector store with index directory: {self.index_dir}")
+        # Segment-based persistence: immutable base plus append-only deltas
+        self.storage = SegmentedIndexStorage(self.index_dir)
+        self.compaction_threshold = compaction_threshold or config.vector_store.compaction_threshold
+        self._lock = threading.RLock()
+        self._compaction_lock = threading.Lock()
+        self._compaction_thread = None
+        
+        logger.debug(f"Initialized FAISS vector store ({self.index_type}, {self.load_mode}) "
+                     f"with index directory: {self.index_dir}")
     
-    def build_index(self, documents: List[Document], force_rebuild: bool = False) -> bool:
+    def build_index(self, 
+                   documents: List[Document], 
+                   force_rebuild: bool = False,
+                   embeddings: Optional[List[List[float]]] = None) -> bool:
         """Build a FAISS index from documents.
         
         Args:
             documents: Documents to index
             force_rebuild: Whether to force rebuild even if index exists
+            embeddings: Optional precomputed embeddings, one per document
             
         Returns:
             True if successful, False otherwise
@@ -63,141 +149,787 @@ class FAISSVectorStore:
             if not documents or len(documents) == 0:
                 logger.info("Creating empty FAISS index")
                 
-                # Create an empty vectorstore with a single placeholder document
-                placeholder_doc = Document(
+                # Create an empty index with a single placeholder document
+                documents = [Document(
                     page_content="This is a placeholder document for empty index",
                     metadata={"source": "placeholder", "id": "placeholder_doc"}
-                )
-                
-                # Extract texts and metadata separately for FAISS.from_texts
-                texts = [placeholder_doc.page_content]
-                metadatas = [placeholder_doc.metadata]
-                
-                # Create FAISS using from_texts instead of from_documents to avoid id attribute issue
-                self.vectorstore = FAISS.from_texts(
-                    texts=texts,
-                    embedding=self.embedding_provider,
-                    metadatas=metadatas
-                )
-                
-                # Save the empty index
-                self.save_index()
-                logger.info("Created empty FAISS index")
-                return True
+                )]
+                embeddings = None
             
             logger.info(f"Building FAISS index with {len(documents)} documents")
             
-            # Extract texts and metadata separately
-            texts = []
-            metadatas = []
+            ids, texts, metadatas, embeddings = self._prepare_documents(documents, embeddings)
             
-            for i, doc in enumerate(documents):
-                # Get document content
-                texts.append(doc.page_content)
-                
-                # Create metadata with ID if not present
-                metadata = dict(doc.metadata) if doc.metadata else {}
-                if 'id' not in metadata:
-                    metadata['id'] = f"doc_{int(time.time())}_{i}"
-                metadatas.append(metadata)
-            
-            # Create FAISS using from_texts instead of from_documents
-            self.vectorstore = FAISS.from_texts(
-                texts=texts,
-                embedding=self.embedding_provider,
-                metadatas=metadatas
+            # Embed up front so IVF indexes can be trained on the corpus
+            if embeddings is None:
+                embeddings = self.embedding_provider.embed_documents(texts)
+            vectors = np.asarray(embeddings, dtype=np.float32)
+            
+            # Create FAISS index of the configured type
+            index = FAISSIndexFactory.create_index(
+                dimension=vectors.shape[1],
+                num_vectors=len(vectors),
+                index_type=self.index_type,
+                m=self.m,
+                ef_construction=self.ef_construction,
+                nlist=self.nlist,
+                pq_m=self.pq_m,
+                pq_nbits=self.pq_nbits
             )
+            FAISSIndexFactory.train_index(index, vectors)
+            
+            # Vectors are addressed by stable IDs so deletes never renumber the index
+            index = FAISSIndexFactory.with_id_map(index)
+            index.add_with_ids(vectors, np.arange(len(vectors), dtype=np.int64))
+            
+            # Compressed indexes keep the original vectors on disk for exact re-ranking
+            base_vectors = [vectors] if FAISSIndexFactory.is_compressed(index) else None
+            
+            records = [
+                (vector_id, doc_id, text, metadata)
+                for vector_id, (doc_id, text, metadata) in enumerate(zip(ids, texts, metadatas))
+            ]
+            
+            with self._lock:
+                # Cheap hardlink snapshot of the generation being replaced
+                if self._index_exists():
+                    self.storage.snapshot()
+                
+                # The new base replaces every pending delta segment
+                self.storage.commit_base(
+                    lambda path: self._write_base(path, index, records, vectors=base_vectors),
+                    merged_segments=self.storage.segments,
+                    rebuilt=True
+                )
+                self._open_base(index)
+                self._reset_delta(index.d)
+                self.loaded_segments = []
             
-            # Save the index
-            self.save_index()
+            # Other shared instances of this directory still serve the replaced index
+            from core.embeddings.store_registry import VectorStoreRegistry
+            VectorStoreRegistry.invalidate(index_dir=self.index_dir, keep=self)
             
-            logger.info(f"Successfully built FAISS index with {len(documents)} documents")
+            logger.info(f"Successfully built {FAISSIndexFactory.describe_index(index)} FAISS index "
+                        f"with {len(records)} documents")
             return True
             
         except Exception as e:
             logger.error(f"Error building FAISS index: {str(e)}", exc_info=True)
             return False
     
-    def save_index(self) -> bool:
-        """Save the FAISS index to disk.
+    def _prepare_documents(self,
+                           documents: List[Document],
+                           embeddings: Optional[List[List[float]]] = None) -> Tuple[List[str], List[str], List[Dict[str, Any]], Optional[List[List[float]]]]:
+        """Extract content-derived IDs, texts and metadata, dropping repeated chunks.
         
+        Args:
+            documents: Documents to prepare
+            embeddings: Optional precomputed embeddings, one per document
+            
         Returns:
-            True if successful, False otherwise
+            Tuple of (ids, texts, metadatas, embeddings)
         """
-        try:
-            if not self.vectorstore:
-                logger.error("No vectorstore to save")
-                return False
+        ids = []
+        texts = []
+        metadatas = []
+        kept_embeddings = [] if embeddings is not None else None
+        seen = set()
+        
+        for i, doc in enumerate(documents):
+            # The same source and text always map to the same ID
+            doc_id = document_chunk_id(doc)
+            if doc_id in seen:
+                continue
+            seen.add(doc_id)
             
-            # Create a backup of existing index if it exists
-            if self._index_exists():
-                self._backup_index()
+            metadata = dict(doc.metadata) if doc.metadata else {}
+            if metadata.get('id') not in (None, doc_id):
+                metadata.setdefault('document_id', metadata['id'])
+            metadata['id'] = doc_id
             
-            # Save index using LangChain's built-in method
-            self.vectorstore.save_local(self.index_dir)
-            logger.info(f"Saved FAISS index to {self.index_dir}")
-            return True
+            ids.append(doc_id)
+            texts.append(doc.page_content)
+            metadatas.append(metadata)
+            if embeddings is not None:
+                kept_embeddings.append(embeddings[i])
+        
+        return ids, texts, metadatas, kept_embeddings
+    
+    def _filter_new(self,
+                    ids: List[str],
+                    texts: List[str],
+                    metadatas: List[Dict[str, Any]],
+                    embeddings: Optional[List[List[float]]]) -> Tuple[List[str], List[str], List[Dict[str, Any]], Optional[List[List[float]]]]:
+        """Drop documents whose IDs are already in the index.
+        
+        Returns:
+            Tuple of (ids, texts, metadatas, embeddings) for new documents only
+        """
+        existing = self.existing_ids(ids)
+        if not existing:
+            return ids, texts, metadatas, embeddings
+        
+        keep = [i for i, doc_id in enumerate(ids) if doc_id not in existing]
+        return (
+            [ids[i] for i in keep],
+            [texts[i] for i in keep],
+            [metadatas[i] for i in keep],
+            [embeddings[i] for i in keep] if embeddings is not None else None
+        )
+    
+    def existing_ids(self, ids: List[str]) -> Set[str]:
+        """Find which document IDs are already in the index.
+        
+        Args:
+            ids: Document IDs to check
             
-        except Exception as e:
-            logger.error(f"Error saving FAISS index: {str(e)}", exc_info=True)
+        Returns:
+            Set of the given IDs that are already indexed
+        """
+        if self.index is None and self._index_exists():
+            self.load_index()
+        
+        with self._lock:
+            found = {doc_id for doc_id in ids if doc_id in self.delta_ids}
+            chunk_store = self.chunk_store.retain() if self.chunk_store is not None else None
+            deleted = set(self.base_deleted.values())
+        
+        if chunk_store is not None:
+            try:
+                in_base = chunk_store.existing_doc_ids([doc_id for doc_id in ids if doc_id not in found])
+            finally:
+                chunk_store.release()
+            found.update(in_base - deleted)
+        
+        return found
+    
+    def _write_base(self,
+                    path: str,
+                    index: Any,
+                    records: List[Tuple[int, str, str, Dict[str, Any]]],
+                    copy_from: Optional[ChunkStore] = None,
+                    vectors: Optional[List[np.ndarray]] = None,
+                    deleted: Optional[List[int]] = None) -> None:
+        """Write a base segment: the FAISS index plus its chunk store.
+        
+        Args:
+            path: Segment directory
+            index: FAISS index to write
+            records: Chunk records to store
+            copy_from: Previous base chunk store whose rows are carried over
+            vectors: Original vectors to store for re-ranking, as consecutive parts
+            deleted: Vector IDs whose carried-over rows are dropped
+        """
+        faiss.write_index(index, os.path.join(path, INDEX_FILE))
+        
+        chunk_store = ChunkStore.create(os.path.join(path, DOCSTORE_FILE), records, copy_from=copy_from)
+        if deleted:
+            chunk_store.delete(deleted)
+        chunk_store.close()
+        
+        if vectors:
+            # Stream the parts into one file so a memory-mapped part is never fully loaded
+            total = sum(len(part) for part in vectors)
+            stored = np.lib.format.open_memmap(
+                os.path.join(path, VECTORS_FILE), mode="w+", dtype=np.float32, shape=(total, index.d)
+            )
+            offset = 0
+            for part in vectors:
+                stored[offset:offset + len(part)] = part
+                offset += len(part)
+            stored.flush()
+            del stored
+    
+    def _read_index(self, path: str) -> Any:
+        """Read a FAISS index file according to the load mode.
+        
+        Args:
+            path: Index file path
+            
+        Returns:
+            FAISS index
+        """
+        if self.load_mode == "mmap":
+            # Map the file read-only so worker processes share the page cache
+            flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+            return faiss.read_index(path, flags)
+        
+        return faiss.read_index(path)
+    
+    def _open_base(self, index: Optional[Any] = None) -> None:
+        """Make the live base segment the searchable base index.
+        
+        Args:
+            index: Already built in-memory index to use instead of reading from disk
+        """
+        base_path = self.storage.base_path()
+        self.base_name = self.storage.base
+        
+        # A memory-mapped store always serves the file on disk
+        if index is None or self.load_mode == "mmap":
+            index = self._read_index(os.path.join(base_path, INDEX_FILE))
+        
+        # Query-time parameters are not reliably persisted, so re-apply them
+        FAISSIndexFactory.apply_search_params(index, ef_search=self.ef_search, nprobe=self.nprobe)
+        
+        # Base segments are immutable, so their chunk stores are opened read-only
+        previous_store = self.chunk_store
+        self.chunk_store = ChunkStore(os.path.join(base_path, DOCSTORE_FILE), read_only=True)
+        
+        # Original vectors stay on disk; re-ranking reads only the candidate rows
+        vectors_path = os.path.join(base_path, VECTORS_FILE)
+        self.base_vectors = np.load(vectors_path, mmap_mode="r") if os.path.exists(vectors_path) else None
+        self.index = index
+        self.base_deleted = {}
+        self.base_metadata = None
+        
+        # Never reuse an ID that still has a row in the stored vectors
+        self.next_vector_id = max(
+            self.chunk_store.max_vector_id() + 1,
+            len(self.base_vectors) if self.base_vectors is not None else 0
+        )
+        
+        # Searches still reading the previous base keep its connection open until they finish
+        if previous_store is not None:
+            previous_store.close()
+    
+    def _reset_delta(self, dimension: int) -> None:
+        """Start an empty delta index.
+        
+        Args:
+            dimension: Embedding dimension
+        """
+        self.delta_index = faiss.IndexFlatL2(dimension)
+        self.delta_docs = []
+        self.delta_ids = set()
+        self.delta_deleted = set()
+        self.delta_metadata = MetadataIndex()
+    
+    def _add_to_delta(self,
+                      ids: List[str],
+                      texts: List[str],
+                      embeddings: Any,
+                      metadatas: List[Dict[str, Any]]) -> None:
+        """Add vectors to the in-memory delta index."""
+        for position, metadata in enumerate(metadatas, start=self.delta_index.ntotal):
+            self.delta_metadata.add(position, metadata)
+        self.delta_index.add(np.asarray(embeddings, dtype=np.float32))
+        self.delta_docs.extend(
+            (doc_id, Document(page_content=text, metadata=metadata))
+            for doc_id, text, metadata in zip(ids, texts, metadatas)
+        )
+        self.delta_ids.update(ids)
+    
+    def _apply_deletes(self, doc_ids: Set[str]) -> None:
+        """Mark documents deleted in the base and delta indexes.
+        
+        Deleted vectors stay in the indexes until the next compaction and
+        are excluded from searches with an ID selector.
+        
+        Args:
+            doc_ids: Document IDs to delete
+        """
+        base_deleted = self.chunk_store.vector_ids_for(doc_ids=list(doc_ids))
+        self.base_deleted.update(base_deleted)
+        if self.base_metadata is not None:
+            self.base_metadata.discard(base_deleted)
+        
+        delta_deleted = [position for position, (doc_id, _) in enumerate(self.delta_docs) if doc_id in doc_ids]
+        self.delta_deleted.update(delta_deleted)
+        self.delta_metadata.discard(delta_deleted)
+        
+        self.delta_ids.difference_update(doc_ids)
+    
+    def _base_metadata_index(self) -> MetadataIndex:
+        """Get the metadata index of the base segment, building it on first use.
+        
+        Returns:
+            MetadataIndex over the live base vectors
+        """
+        with self._lock:
+            if self.base_metadata is not None:
+                return self.base_metadata
+            chunk_store = self.chunk_store.retain()
+        
+        # The base chunk store is never modified, so it is scanned without the lock
+        metadata_index = MetadataIndex()
+        try:
+            for vector_id, metadata in chunk_store.iter_metadata():
+                metadata_index.add(vector_id, metadata)
+            chunk_count = chunk_store.count()
+        finally:
+            chunk_store.release()
+        
+        with self._lock:
+            if self.chunk_store is not chunk_store:
+                # Compacted meanwhile; build again for the new base
+                return self._base_metadata_index()
+            metadata_index.discard(self.base_deleted)
+            self.base_metadata = metadata_index
+        
+        logger.debug(f"Built metadata index with {len(metadata_index)} values over {chunk_count} chunks")
+        return metadata_index
+    
+    @property
+    def index_version(self) -> int:
+        """Version of the indexed documents, changed by every add, delete, rebuild or clear."""
+        return self.storage.version
+    
+    def set_search_params(self, ef_search: Optional[int] = None, nprobe: Optional[int] = None) -> None:
+        """Tune query-time parameters of the loaded index.
+        
+        Args:
+            ef_search: HNSW search-time depth (higher is more accurate, slower)
+            nprobe: Number of IVF cells to visit per query (higher is more accurate, slower)
+        """
+        if ef_search is not None:
+            self.ef_search = ef_search
+        if nprobe is not None:
+            self.nprobe = nprobe
+        
+        if self.index is not None:
+            FAISSIndexFactory.apply_search_params(
+                self.index,
+                ef_search=self.ef_search,
+                nprobe=self.nprobe
+            )
+    
+    def save_index(self) -> bool:
+        """Save the index to disk.
+        
+        Every add is already persisted as a delta segment, so saving merges
+        pending deltas into a new base segment.
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        if self.index is None:
+            logger.error("No index to save")
             return False
+        
+        return self.compact()
+    
+    def compact(self) -> bool:
+        """Merge pending delta segments into a new base segment.
+        
+        The new base is built from a copy of the current one, so searches
+        and adds continue while it is written.
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        with self._compaction_lock:
+            try:
+                with self._lock:
+                    # Only segments this store holds can be merged; others' are kept for their next load
+                    merged_segments = list(self.loaded_segments)
+                    expected_base = self.base_name
+                    if not merged_segments or self.index is None:
+                        return True
+                    
+                    merged_count = self.delta_index.ntotal
+                    merged_vectors = self.delta_index.reconstruct_n(0, merged_count)
+                    merged_docs = self.delta_docs[:merged_count]
+                    merged_deleted = set(self.delta_deleted)
+                    base_deleted = dict(self.base_deleted)
+                    base_index = self.index
+                    base_store = self.chunk_store.retain()
+                    base_vectors = self.base_vectors
+                    start = self.next_vector_id
+                
+                logger.info(f"Compacting {len(merged_segments)} delta segments ({merged_count} vectors, "
+                            f"{len(base_deleted) + len(merged_deleted)} deletions) into base index")
+                
+                # Build the new base from a writable copy of the current one
+                if self.load_mode == "mmap":
+                    writable = faiss.read_index(os.path.join(self.storage.base_path(), INDEX_FILE))
+                else:
+                    writable = faiss.clone_index(base_index)
+                
+                # Bases written before IDs were mapped address vectors by position
+                writable = FAISSIndexFactory.with_id_map(writable)
+                writable = FAISSIndexFactory.remove_ids(writable, list(base_deleted))
+                
+                # Deleted delta entries are simply not carried over
+                kept = [position for position in range(merged_count) if position not in merged_deleted]
+                new_ids = {position: start + i for i, position in enumerate(kept)}
+                if kept:
+                    writable.add_with_ids(merged_vectors[kept], np.asarray(list(new_ids.values()), dtype=np.int64))
+                
+                records = [
+                    (new_ids[position], merged_docs[position][0],
+                     merged_docs[position][1].page_content, merged_docs[position][1].metadata)
+                    for position in kept
+                ]
+                
+                # Keep the original vectors alongside compressed indexes, one row per vector ID
+                vectors = None
+                if base_vectors is not None:
+                    padding = np.zeros((start - len(base_vectors), writable.d), dtype=np.float32)
+                    vectors = [base_vectors, padding, merged_vectors[kept]]
+                
+                # Cheap hardlink snapshot of the generation being replaced
+                self.storage.snapshot()
+                try:
+                    self.storage.commit_base(
+                        lambda path: self._write_base(path, writable, records, copy_from=base_store,
+                                                      vectors=vectors, deleted=list(base_deleted)),
+                        merged_segments=merged_segments,
+                        expected_base=expected_base
+                    )
+                finally:
+                    base_store.release()
+                
+                with self._lock:
+                    self.loaded_segments = [s for s in self.loaded_segments if s not in merged_segments]
+                    
+                    # Keep vectors that were added while compacting
+                    remaining_count = self.delta_index.ntotal - merged_count
+                    remaining_vectors = self.delta_index.reconstruct_n(merged_count, remaining_count)
+                    remaining_docs = self.delta_docs[merged_count:]
+                    
+                    # Carry over deletions made while compacting (base IDs are stable)
+                    carried_deleted = {
+                        vector_id: doc_id for vector_id, doc_id in self.base_deleted.items()
+                        if vector_id not in base_deleted
+                    }
+                    for position in self.delta_deleted - merged_deleted:
+                        if position < merged_count:
+                            carried_deleted[new_ids[position]] = merged_docs[position][0]
+                    remaining_deleted = {
+                        position - merged_count for position in self.delta_deleted if position >= merged_count
+                    }
+                    
+                    base_metadata = self.base_metadata
+                    self._open_base(writable)
+                    self.base_deleted = carried_deleted
+                    
+                    # Extend a built metadata index instead of rescanning the new base
+                    if base_metadata is not None:
+                        for position in kept:
+                            base_metadata.add(new_ids[position], merged_docs[position][1].metadata)
+                        base_metadata.discard(carried_deleted)
+                        self.base_metadata = base_metadata
+                    self._reset_delta(writable.d)
+                    if remaining_docs:
+                        self.delta_index.add(remaining_vectors)
+                        self.delta_docs.extend(remaining_docs)
+                        self.delta_deleted = remaining_deleted
+                        for position, (doc_id, doc) in enumerate(remaining_docs):
+                            if position not in remaining_deleted:
+                                self.delta_ids.add(doc_id)
+                                self.delta_metadata.add(position, doc.metadata)
+                
+                logger.info(f"Saved FAISS index to {self.storage.base_path()}")
+                return True
+                
+            except Exception as e:
+                logger.error(f"Error compacting FAISS index: {str(e)}", exc_info=True)
+                return False
+    
+    def _maybe_schedule_compaction(self) -> None:
+        """Start background compaction once enough delta segments accumulate."""
+        if len(self.loaded_segments) < self.compaction_threshold:
+            return
+        
+        if self._compaction_thread and self._compaction_thread.is_alive():
+            return
+        
+        self._compaction_thread = threading.Thread(
+            target=self.compact,
+            name="faiss-compactor",
+            daemon=True
+        )
+        self._compaction_thread.start()
+    
+    def compression_report(self,
+                           k: int = 10,
+                           num_queries: int = 100,
+                           sample_size: int = None,
+                           index_types: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Measure recall@k and memory of each index type on a sample of this corpus.
+        
+        Held-out stored vectors serve as queries. The report is also written
+        to compression_report.json in the index directory.
+        
+        Args:
+            k: Number of neighbors to compare
+            num_queries: Number of held-out query vectors
+            sample_size: Maximum number of corpus vectors to index (default: training sample size)
+            index_types: Index types to measure (default: all supported types)
+            
+        Returns:
+            One entry per index type with recall, size and timing figures
+        """
+        if self.index is None and not self.load_index():
+            raise VectorStoreError("No index available for report")
+        
+        with self._lock:
+            parts = [self.delta_index.reconstruct_n(0, self.delta_index.ntotal)]
+            if self.base_vectors is not None:
+                parts.insert(0, self.base_vectors)
+            elif self.index.ntotal:
+                try:
+                    parts.insert(0, FAISSIndexFactory.reconstruct_all(self.index))
+                except RuntimeError:
+                    # Index cannot return its vectors
+                    pass
+        
+        vectors = np.concatenate([np.asarray(part, dtype=np.float32) for part in parts])
+        sample_size = sample_size or config.vector_store.faiss_train_sample_size
+        
+        rng = np.random.default_rng(0)
+        order = rng.permutation(len(vectors))[:sample_size + num_queries]
+        queries, corpus = vectors[order[:num_queries]], vectors[order[num_queries:]]
+        if len(corpus) < k:
+            raise VectorStoreError(f"Too few vectors ({len(vectors)}) for a recall@{k} report")
+        
+        report = FAISSIndexFactory.recall_memory_report(
+            corpus,
+            queries,
+            k=k,
+            index_types=index_types,
+            rerank_factor=self.rerank_factor or 4
+        )
+        
+        with open(os.path.join(self.index_dir, COMPRESSION_REPORT_FILE), "w") as f:
+            json.dump({
+                "created_at": time.time(),
+                "vectors": len(corpus),
+                "queries": len(queries),
+                "dimension": int(vectors.shape[1]),
+                "k": k,
+                "results": report
+            }, f, indent=2)
+        
+        for entry in report:
+            logger.info(f"{entry['index_type']}: recall@{k}={entry[f'recall_at_{k}']:.3f}, "
+                        f"{entry['bytes_per_vector']:.0f} bytes/vector, {entry['compression_ratio']:.1f}x smaller")
+        return report
     
     def load_index(self) -> bool:
         """Load the FAISS index from disk.
         
+        Opens the base segment (memory-mapped in 'mmap' mode) and replays
+        any delta segments into the in-memory delta index.
+        
         Returns:
             True if successful, False otherwise
         """
         try:
+            # Pick up segments written by other processes since the storage was opened
+            self.storage.refresh()
             if not self._index_exists():
                 logger.error(f"FAISS index not found at {self.index_dir}")
                 return False
             
-            # Load index using LangChain's built-in method
-            self.vectorstore = FAISS.load_local(
-                self.index_dir,
-                self.embedding_provider
-            )
+            with self._lock:
+                # Convert indexes saved with a pickled docstore
+                self._migrate_pickled_base()
+                
+                self._open_base()
+                self._reset_delta(self.index.d)
+                
+                # Replay adds and deletes written since the last compaction, in order
+                self.loaded_segments = self.storage.segments
+                for name in self.loaded_segments:
+                    if self.storage.is_delete_segment(name):
+                        self._apply_deletes(set(self.storage.read_deletes(name)))
+                    else:
+                        self._add_to_delta(*self.storage.read_delta(name))
             
-            logger.info(f"Loaded FAISS index from {self.index_dir}")
+            index_type = FAISSIndexFactory.describe_index(self.index)
+            logger.info(f"Loaded {index_type} FAISS index ({self.load_mode}) from {self.storage.base_path()} "
+                        f"with {self.delta_index.ntotal} vectors and {len(self.base_deleted) + len(self.delta_deleted)} "
+                        f"deletions from {len(self.storage.segments)} delta segments")
             return True
             
         except Exception as e:
             logger.error(f"Error loading FAISS index: {str(e)}", exc_info=True)
             return False
     
+    def _migrate_pickled_base(self) -> None:
+        """Rewrite a base saved by LangChain's FAISS.save_local with an on-disk chunk store.
+        
+        Handles both the old single-directory layout and base segments that
+        still hold an index.pkl docstore.
+        """
+        if self.storage.has_base():
+            source_dir = self.storage.base_path()
+            if os.path.exists(os.path.join(source_dir, DOCSTORE_FILE)):
+                return
+        else:
+            source_dir = self.index_dir
+        
+        logger.info(f"Migrating pickled FAISS docstore in {source_dir} to {DOCSTORE_FILE}")
+        
+        with open(os.path.join(source_dir, LEGACY_DOCSTORE_FILE), "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+        index = FAISSIndexFactory.with_id_map(faiss.read_index(os.path.join(source_dir, INDEX_FILE)))
+        
+        records = []
+        for position, doc_id in sorted(index_to_docstore_id.items()):
+            doc = docstore.search(doc_id)
+            records.append((position, doc_id, doc.page_content, doc.metadata))
+        
+        self.storage.commit_base(
+            lambda path: self._write_base(path, index, records),
+            merged_segments=[],
+            expected_base=self.storage.base
+        )
+    
     def _index_exists(self) -> bool:
         """Check if index exists on disk.
         
         Returns:
             True if index exists, False otherwise
         """
-        return (
-            os.path.exists(self.index_dir) and 
-            os.path.exists(os.path.join(self.index_dir, "index.faiss")) and
-            os.path.exists(os.path.join(self.index_dir, "index.pkl"))
-        )
+        return self.storage.has_base() or self.storage.has_legacy_index()
     
-    def _backup_index(self) -> None:
-        """Create a backup of the existing index."""
+    def _search_vectors(self,
+                        query_vectors: np.ndarray,
+                        k: int,
+                        metadata_filter: Optional[MetadataFilter] = None,
+                        ef_search: Optional[int] = None,
+                        nprobe: Optional[int] = None) -> List[List[Tuple[Document, float]]]:
+        """Search the base and delta indexes and merge their hits.
+        
+        Args:
+            query_vectors: Query embeddings of shape (n, d)
+            k: Number of results to return per query
+            metadata_filter: Only return chunks whose metadata matches
+            ef_search: HNSW search depth for this search only
+            nprobe: IVF probe count for this search only
+            
+        Returns:
+            Per query, a list of (document, L2 distance) tuples, closest first
+        """
+        base_matches = self._base_metadata_index().match(metadata_filter) if metadata_filter else None
+        
+        with self._lock:
+            index = self.index
+            base_vectors = self.base_vectors
+            
+            # Filters select the matching live vectors; otherwise deleted ones are excluded
+            if metadata_filter:
+                base_selector = MetadataIndex.selector(base_matches)
+                delta_matches = self.delta_metadata.match(metadata_filter)
+                delta_selector = MetadataIndex.selector(delta_matches)
+                base_count, live_count = len(base_matches), len(delta_matches)
+            else:
+                base_selector = self._exclude_selector(self.base_deleted)
+                delta_selector = self._exclude_selector(self.delta_deleted)
+                base_count = index.ntotal
+                live_count = self.delta_index.ntotal - len(self.delta_deleted)
+            
+            delta_hits = [[] for _ in range(len(query_vectors))]
+            if live_count > 0:
+                distances, positions = FAISSIndexFactory.search(
+                    self.delta_index, query_vectors, min(k, live_count), selector=delta_selector
+                )
+                for row, (row_distances, row_positions) in enumerate(zip(distances, positions)):
+                    delta_hits[row] = [
+                        (float(distance), self.delta_docs[position][1])
+                        for distance, position in zip(row_distances, row_positions)
+                        if position >= 0
+                    ]
+            
+            # Held until the hits are read, even if a compaction swaps the base meanwhile
+            chunk_store = self.chunk_store.retain()
+        
         try:
-            # Create backup directory
-            backup_dir = f"{self.index_dir}_backup_{int(time.time())}"
+            # The base is never modified in place, so it is searched without the lock
+            if base_count == 0:
+                distances = np.zeros((len(query_vectors), 0), dtype=np.float32)
+                positions = np.zeros((len(query_vectors), 0), dtype=np.int64)
+            elif metadata_filter and base_count <= EXACT_FILTER_THRESHOLD:
+                distances, positions = FAISSIndexFactory.search_subset(index, query_vectors, base_matches, k,
+                                                                       vectors=base_vectors)
+            elif self.rerank_factor and base_vectors is not None:
+                # Over-fetch from the compressed index, then order candidates by exact distance
+                _, candidates = FAISSIndexFactory.search(index, query_vectors, k * self.rerank_factor, selector=base_selector,
+                                                         ef_search=ef_search, nprobe=nprobe)
+                distances, positions = FAISSIndexFactory.rerank(base_vectors, query_vectors, candidates, k)
+            else:
+                distances, positions = FAISSIndexFactory.search(index, query_vectors, k, selector=base_selector,
+                                                                ef_search=ef_search, nprobe=nprobe)
             
-            # Copy index files
-            shutil.copytree(self.index_dir, backup_dir)
+            # Only the chunk payloads of the hits are read from disk, in one query for the batch
+            hit_ids = {int(position) for position in positions.ravel() if position >= 0}
+            docs = chunk_store.get_many(sorted(hit_ids))
+        finally:
+            chunk_store.release()
+        
+        results = []
+        for row, (row_distances, row_positions) in enumerate(zip(distances, positions)):
+            base_hits = [
+                (float(distance), docs[int(position)])
+                for distance, position in zip(row_distances, row_positions)
+                if position >= 0 and int(position) in docs
+            ]
+            hits = sorted(base_hits + delta_hits[row], key=lambda hit: hit[0])[:k]
+            results.append([(doc, distance) for distance, doc in hits])
+        
+        return results
+    
+    @staticmethod
+    def _exclude_selector(deleted: Iterable[int]) -> Optional[Any]:
+        """Build a FAISS ID selector that skips deleted vectors.
+        
+        Args:
+            deleted: Deleted vector IDs
             
-            logger.debug(f"Created index backup at {backup_dir}")
+        Returns:
+            IDSelector, or None if nothing is deleted
+        """
+        if not deleted:
+            return None
+        
+        excluded = faiss.IDSelectorBatch(np.asarray(sorted(deleted), dtype=np.int64))
+        selector = faiss.IDSelectorNot(excluded)
+        selector.referenced = excluded  # Keep the wrapped selector alive
+        return selector
+    
+    @staticmethod
+    def _scored(hits: List[Tuple[Document, float]],
+                min_score: Optional[float]) -> List[Tuple[Document, float]]:
+        """Convert L2 hits to normalized similarity scores and apply the threshold.
+        
+        Args:
+            hits: (document, squared L2 distance) tuples
+            min_score: Minimum similarity score to keep
             
-        except Exception as e:
-            logger.error(f"Error creating index backup: {str(e)}")
+        Returns:
+            List of (document, score) tuples with the score also in metadata['score']
+        """
+        results = []
+        for doc, distance in hits:
+            # Cosine similarity for unit-length embeddings, clamped to 0-1
+            score = max(0.0, min(1.0, 1.0 - distance / 2.0))
+            if min_score is not None and score < min_score:
+                continue
+            
+            # Copy so cached documents are not annotated in place
+            scored_doc = Document(page_content=doc.page_content, metadata=dict(doc.metadata, score=score))
+            results.append((scored_doc, score))
+        
+        return results
     
-    def search(self, query: str, k: int = None) -> List[Document]:
+    def search(self, 
+              query: str, 
+              k: int = None,
+              ef_search: Optional[int] = None,
+              nprobe: Optional[int] = None,
+              filter: Optional[MetadataFilter] = None) -> List[Document]:
         """Search for documents similar to the query.
         
         Args:
             query: Query string
             k: Number of results to return
+            ef_search: Optional HNSW search depth for this call only
+            nprobe: Optional IVF probe count for this call only
+            filter: Only return chunks whose metadata matches, e.g.
+                {"source": "essay.pdf"} or {"file_type": [".pdf", ".docx"]}
             
         Returns:
             List of similar documents
@@ -206,15 +938,19 @@ class FAISSVectorStore:
             VectorStoreError: If search fails
         """
         try:
-            if not self.vectorstore:
+            if self.index is None:
                 if not self.load_index():
                     raise VectorStoreError("No index available for search")
             
             # Use configurable k if not specified
             k = k or config.vector_store.similarity_top_k
             
-            # Use the built-in similarity_search method
-            results = self.vectorstore.similarity_search(query, k=k)
+            # Query-time tuning applies to this search only, not to concurrent or later ones
+            query_vector = np.asarray([self.embedding_provider.embed_query(query)], dtype=np.float32)
+            results = [
+                doc for doc, _ in self._search_vectors(query_vector, k, metadata_filter=filter,
+                                                       ef_search=ef_search, nprobe=nprobe)[0]
+            ]
             
             logger.debug(f"Found {len(results)} documents for query: {query[:50]}...")
             return results
@@ -223,11 +959,189 @@ class FAISSVectorStore:
             logger.error(f"Error searching FAISS index: {str(e)}", exc_info=True)
             raise VectorStoreError(f"Search failed: {str(e)}")
     
-    def add_documents(self, documents: List[Document]) -> bool:
+    def search_with_scores(self,
+                           query: str,
+                           k: int = None,
+                           min_score: Optional[float] = None,
+                           filter: Optional[MetadataFilter] = None,
+                           query_vector: Optional[List[float]] = None) -> List[Tuple[Document, float]]:
+        """Search for documents similar to the query, with similarity scores.
+        
+        Args:
+            query: Query string
+            k: Number of results to return
+            min_score: Minimum normalized similarity score (0-1) to return
+            filter: Only return chunks whose metadata matches
+            query_vector: Precomputed embedding of the query (embedded here if None)
+            
+        Returns:
+            List of (document, score) tuples, most similar first
+            
+        Raises:
+            VectorStoreError: If search fails
+        """
+        try:
+            if self.index is None:
+                if not self.load_index():
+                    raise VectorStoreError("No index available for search")
+            
+            # Use configurable k if not specified
+            k = k or config.vector_store.similarity_top_k
+            
+            if query_vector is None:
+                query_vector = self.embedding_provider.embed_query(query)
+            query_vectors = np.asarray([query_vector], dtype=np.float32)
+            results = self._scored(self._search_vectors(query_vectors, k, metadata_filter=filter)[0], min_score)
+            
+            logger.debug(f"Found {len(results)} documents above score {min_score} for query: {query[:50]}...")
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error searching FAISS index: {str(e)}", exc_info=True)
+            raise VectorStoreError(f"Search failed: {str(e)}")
+    
+    def search_batch(self,
+                     queries: List[str],
+                     k: int = None,
+                     min_score: Optional[float] = None,
+                     filter: Optional[MetadataFilter] = None) -> List[List[Document]]:
+        """Search for documents similar to each of several queries.
+        
+        All queries are embedded in one request and searched with a single
+        batched index scan.
+        
+        Args:
+            queries: Query strings
+            k: Number of results to return per query
+            min_score: Minimum normalized similarity score (0-1) to return
+            filter: Only return chunks whose metadata matches
+            
+        Returns:
+            List of similar documents for each query, in query order, with
+            the similarity score in metadata['score']
+            
+        Raises:
+            VectorStoreError: If search fails
+        """
+        try:
+            if not queries:
+                return []
+            
+            if self.index is None:
+                if not self.load_index():
+                    raise VectorStoreError("No index available for search")
+            
+            # Use configurable k if not specified
+            k = k or config.vector_store.similarity_top_k
+            
+            query_vectors = np.asarray(self.embedding_provider.embed_documents(queries), dtype=np.float32)
+            results = [
+                [doc for doc, _ in self._scored(hits, min_score)]
+                for hits in self._search_vectors(query_vectors, k, metadata_filter=filter)
+            ]
+            
+            logger.debug(f"Found documents for {len(queries)} queries in one batch")
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error batch searching FAISS index: {str(e)}", exc_info=True)
+            raise VectorStoreError(f"Batch search failed: {str(e)}")
+    
+    def search_by_vectors(self,
+                          query_vectors: List[List[float]],
+                          k: int = None,
+                          filter: Optional[MetadataFilter] = None,
+                          ef_search: Optional[int] = None,
+                          nprobe: Optional[int] = None) -> List[List[Tuple[Document, float]]]:
+        """Search with precomputed query embeddings.
+        
+        Args:
+            query_vectors: Query embeddings
+            k: Number of results to return per query
+            filter: Only return chunks whose metadata matches
+            ef_search: Optional HNSW search depth for this call only
+            nprobe: Optional IVF probe count for this call only
+            
+        Returns:
+            Per query, a list of (document, L2 distance) tuples, closest first
+            
+        Raises:
+            VectorStoreError: If search fails
+        """
+        try:
+            if self.index is None:
+                if not self.load_index():
+                    raise VectorStoreError("No index available for search")
+            
+            k = k or config.vector_store.similarity_top_k
+            return self._search_vectors(np.asarray(query_vectors, dtype=np.float32), k, metadata_filter=filter,
+                                        ef_search=ef_search, nprobe=nprobe)
+            
+        except VectorStoreError:
+            raise
+        except Exception as e:
+            logger.error(f"Error searching FAISS index: {str(e)}", exc_info=True)
+            raise VectorStoreError(f"Search failed: {str(e)}")
+    
+    def document_ids(self) -> List[str]:
+        """List the IDs of all live documents.
+        
+        Returns:
+            Document IDs in the base and delta indexes
+        """
+        with self._lock:
+            if self.chunk_store is None:
+                return []
+            deleted = set(self.base_deleted)
+            doc_ids = [
+                doc_id for vector_id, doc_id in self.chunk_store.iter_doc_ids()
+                if vector_id not in deleted
+            ]
+            doc_ids.extend(self.delta_ids)
+        return doc_ids
+    
+    def get_documents(self, doc_ids: List[str]) -> Tuple[List[Document], np.ndarray]:
+        """Fetch live documents together with their stored vectors.
+        
+        Args:
+            doc_ids: Document IDs to fetch
+            
+        Returns:
+            Tuple of (documents, vectors of shape (n, d)); unknown IDs are omitted
+        """
+        with self._lock:
+            wanted = set(doc_ids)
+            base_ids = {
+                vector_id: doc_id
+                for vector_id, doc_id in self.chunk_store.vector_ids_for(doc_ids=list(wanted)).items()
+                if vector_id not in self.base_deleted
+            }
+            vector_ids = np.asarray(sorted(base_ids), dtype=np.int64)
+            stored = self.chunk_store.get_many(vector_ids.tolist())
+            documents = [stored[int(vector_id)] for vector_id in vector_ids]
+            if self.base_vectors is not None:
+                parts = [np.asarray(self.base_vectors[vector_ids], dtype=np.float32)]
+            else:
+                parts = [FAISSIndexFactory.reconstruct_ids(self.index, vector_ids)]
+            
+            for position, (doc_id, doc) in enumerate(self.delta_docs):
+                if doc_id in wanted and position not in self.delta_deleted:
+                    documents.append(doc)
+                    parts.append(self.delta_index.reconstruct(position).reshape(1, -1))
+        
+        return documents, np.concatenate(parts)
+    
+    def add_documents(self, 
+                     documents: List[Document],
+                     embeddings: Optional[List[List[float]]] = None) -> bool:
         """Add documents to the vector store.
         
+        Documents whose content-derived ID is already indexed are skipped
+        without being embedded.
+        
         Args:
             documents: Documents to add
+            embeddings: Optional precomputed embeddings, one per document
             
         Returns:
             True if successful, False otherwise
@@ -237,77 +1151,156 @@ class FAISSVectorStore:
                 logger.warning("No documents to add")
                 return True
             
-            # Extract texts and metadata
-            texts = []
-            metadatas = []
+            # Load the persisted index before appending to it
+            if self.index is None and self._index_exists():
+                self.load_index()
             
-            for i, doc in enumerate(documents):
-                # Get document content
-                texts.append(doc.page_content)
-                
-                # Create metadata with ID if not present
-                metadata = dict(doc.metadata) if doc.metadata else {}
-                if 'id' not in metadata:
-                    metadata['id'] = f"doc_{int(time.time())}_{i}"
-                metadatas.append(metadata)
-            
-            # If we have an existing index
-            if self.vectorstore:
-                try:
-                    # Try to add texts directly
-                    self.vectorstore.add_texts(texts, metadatas=metadatas)
-                    self.save_index()
-                    logger.info(f"Added {len(documents)} documents to existing FAISS index")
-                    return True
-                except Exception as e:
-                    logger.warning(f"Could not add to existing index: {str(e)}, rebuilding...")
-                    
-                    # Fall back to rebuilding the entire index
-                    # Try to get existing documents first
-                    existing_docs = []
-                    try:
-                        # This is a best effort attempt, may not work with all FAISS versions
-                        if hasattr(self.vectorstore, "docstore") and hasattr(self.vectorstore.docstore, "_dict"):
-                            for doc_id, doc_data in self.vectorstore.docstore._dict.items():
-                                page_content = doc_data.get("page_content", "")
-                                metadata = doc_data.get("metadata", {})
-                                existing_docs.append(Document(page_content=page_content, metadata=metadata))
-                    except Exception as ex:
-                        logger.warning(f"Could not retrieve existing documents: {str(ex)}")
-                    
-                    # Combine existing and new documents
-                    all_docs = existing_docs + documents
-                    
-                    # Rebuild with all documents
-                    return self.build_index(all_docs, force_rebuild=True)
-            else:
-                # No existing vectorstore, build from scratch
-                return self.build_index(documents)
+            # No existing index, build from scratch
+            if self.index is None:
+                return self.build_index(documents, embeddings=embeddings)
+            
+            ids, texts, metadatas, embeddings = self._filter_new(*self._prepare_documents(documents, embeddings))
+            if not ids:
+                logger.info(f"All {len(documents)} documents are already indexed")
+                return True
+            
+            # Embed outside the lock so concurrent searches and adds are not blocked
+            if embeddings is None:
+                embeddings = self.embedding_provider.embed_documents(texts)
+            
+            with self._lock:
+                # Another writer may have added the same chunks while embedding
+                ids, texts, metadatas, embeddings = self._filter_new(ids, texts, metadatas, embeddings)
+                if ids:
+                    # Persist only the new vectors as an append-only delta segment
+                    self.loaded_segments.append(self.storage.write_delta(ids, texts, embeddings, metadatas))
+                    self._add_to_delta(ids, texts, embeddings, metadatas)
+            
+            self._maybe_schedule_compaction()
+            
+            logger.info(f"Added {len(ids)} of {len(documents)} documents to existing FAISS index")
+            return True
         
         except Exception as e:
             logger.error(f"Error adding documents to FAISS index: {str(e)}", exc_info=True)
             return False
     
-    def clear_index(self) -> bool:
-        """Clear the index and remove all documents.
+    def delete_documents(self,
+                         ids: Optional[List[str]] = None,
+                         source: Optional[str] = None,
+                         keep_ids: Optional[List[str]] = None) -> bool:
+        """Delete documents by ID and/or all chunks of a source.
         
+        Deletions are persisted as a delete segment and applied to searches
+        immediately; the vectors are removed from the base index at the
+        next compaction.
+        
+        Args:
+            ids: Document IDs to delete
+            source: Source identity whose chunks to delete (see document_source_id)
+            keep_ids: Document IDs to keep even if they match
+            
         Returns:
             True if successful, False otherwise
         """
         try:
-            # Create backup before clearing
-            if self._index_exists():
-                self._backup_index()
+            if self.index is None and self._index_exists():
+                self.load_index()
+            
+            if self.index is None:
+                logger.warning("No index to delete documents from")
+                return True
             
-            # Remove index files
-            if os.path.exists(os.path.join(self.index_dir, "index.faiss")):
-                os.remove(os.path.join(self.index_dir, "index.faiss"))
+            with self._lock:
+                doc_ids = set(ids or [])
+                if source is not None:
+                    doc_ids.update(
+                        doc_id for vector_id, doc_id in self.chunk_store.vector_ids_for(source=source).items()
+                        if vector_id not in self.base_deleted
+                    )
+                    doc_ids.update(
+                        doc_id for doc_id, doc in self.delta_docs
+                        if document_source_id(doc.metadata) == source
+                    )
+                doc_ids -= set(keep_ids or [])
+                
+                # Only delete what is actually live
+                doc_ids = self.existing_ids(sorted(doc_ids))
+                if not doc_ids:
+                    logger.info("No matching documents to delete")
+                    return True
+                
+                self.loaded_segments.append(self.storage.write_deletes(sorted(doc_ids)))
+                self._apply_deletes(doc_ids)
             
-            if os.path.exists(os.path.join(self.index_dir, "index.pkl")):
-                os.remove(os.path.join(self.index_dir, "index.pkl"))
+            self._maybe_schedule_compaction()
+            
+            logger.info(f"Deleted {len(doc_ids)} documents from FAISS index")
+            return True
+        
+        except Exception as e:
+            logger.error(f"Error deleting documents from FAISS index: {str(e)}", exc_info=True)
+            return False
+    
+    def upsert_documents(self,
+                         documents: List[Document],
+                         embeddings: Optional[List[List[float]]] = None) -> bool:
+        """Replace the indexed chunks of each document source with new ones.
+        
+        Chunks of the same sources that are not among the new documents are
+        deleted; unchanged chunks are kept and not re-embedded.
+        
+        Args:
+            documents: New chunks
+            embeddings: Optional precomputed embeddings, one per document
             
-            # Reset vectorstore
-            self.vectorstore = None
+        Returns:
+            True if successful, False otherwise
+        """
+        new_ids: Dict[str, List[str]] = {}
+        for doc in documents:
+            new_ids.setdefault(document_source_id(doc.metadata), []).append(document_chunk_id(doc))
+        
+        for source, keep_ids in new_ids.items():
+            if source is not None and not self.delete_documents(source=source, keep_ids=keep_ids):
+                return False
+        
+        return self.add_documents(documents, embeddings=embeddings)
+    
+    def clear_index(self) -> bool:
+        """Clear the index and remove all documents.
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            with self._lock:
+                # Snapshot before clearing
+                if self._index_exists():
+                    self.storage.snapshot()
+                
+                # Drop all segments
+                self.storage.reset()
+                
+                # Remove index files from the old layout
+                for filename in (INDEX_FILE, LEGACY_DOCSTORE_FILE):
+                    if os.path.exists(os.path.join(self.index_dir, filename)):
+                        os.remove(os.path.join(self.index_dir, filename))
+                
+                # Reset in-memory indexes
+                self.index = None
+                self.base_name = None
+                if self.chunk_store is not None:
+                    self.chunk_store.close()
+                self.chunk_store = None
+                self.base_vectors = None
+                self.base_deleted = {}
+                self.next_vector_id = 0
+                self.loaded_segments = []
+                self.delta_index = None
+                self.delta_docs = []
+                self.delta_ids = set()
+                self.delta_deleted = set()
             
             # Create a new empty index
             self.build_index([])
@@ -319,30 +1312,33 @@ class FAISSVectorStore:
             logger.error(f"Error clearing FAISS index: {str(e)}", exc_info=True)
             return False
     
-    def as_retriever(self, search_kwargs: Optional[Dict[str, Any]] = None) -> Any:
-        """Get a retriever for the vector store.
+    def as_retriever(self, search_kwargs: Optional[Dict[str, Any]] = None) -> ScoredStoreRetriever:
+        """Get a LangChain retriever for the vector store.
         
         Args:
-            search_kwargs: Search parameters
+            search_kwargs: Search parameters (k, score_threshold, filter)
             
         Returns:
-            Retriever object
+            Retriever, also callable with a query
             
         Raises:
             VectorStoreError: If retriever creation fails
         """
         try:
-            if not self.vectorstore:
+            if self.index is None:
                 if not self.load_index():
                     raise VectorStoreError("No index available for retrieval")
             
-            # Get the native retriever from LangChain
-            retriever = self.vectorstore.as_retriever(
-                search_kwargs=search_kwargs or {"k": config.vector_store.similarity_top_k}
-            )
+            # Create search parameters with defaults
+            search_kwargs = search_kwargs or {
+                "k": config.vector_store.similarity_top_k
+            }
+            min_score = search_kwargs.get("score_threshold", config.vector_store.min_similarity_score)
             
-            return retriever
+            # Low-scoring chunks never reach the prompt
+            return ScoredStoreRetriever(store=self, k=search_kwargs.get("k"), min_score=min_score,
+                                        filter=search_kwargs.get("filter"))
             
         except Exception as e:
             logger.error(f"Error creating retriever: {str(e)}", exc_info=True)
-            raise VectorStoreError(f"Failed to create retriever: {str(e)}")
\ No newline at end of file
+            raise VectorStoreError(f"Failed to create retriever: {str(e)}")
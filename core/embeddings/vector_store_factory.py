@@ -20,9 +20,12 @@ class VectorStoreFactory:
     ) -> Any:
         """Create a vector store instance based on type.
         
+        Every call creates and loads a new instance; use
+        VectorStoreRegistry.get_vector_store to share one per index.
+        
         Args:
-            store_type: Type of vector store to create ('faiss', 'chroma', 'vertex')
-            embedding_provider: Provider for embeddings (default: OpenAIEmbeddings)
+            store_type: Type of vector store to create ('faiss', 'faiss_sharded', 'chroma', 'vertex')
+            embedding_provider: Provider for embeddings (default: shared OpenAIEmbeddings for the configured model)
             **kwargs: Additional arguments for the vector store
             
         Returns:
@@ -31,11 +34,10 @@ class VectorStoreFactory:
         # Default to environment variable or configuration
         store_type = store_type or os.environ.get("VECTOR_STORE_TYPE", "faiss")
         
-        # Setup default embedding provider if not provided
+        # Share one embedding client per model instead of building a new one per store
         if embedding_provider is None:
-            embedding_provider = OpenAIEmbeddings(
-                model=config.vector_store.embedding_model
-            )
+            from core.embeddings.store_registry import VectorStoreRegistry
+            embedding_provider = VectorStoreRegistry.get_embedding_provider()
         
         try:
             logger.debug(f"Creating vector store of type: {store_type}")
@@ -52,6 +54,16 @@ class VectorStoreFactory:
                     store.load_index()
                 return store
                 
+            elif store_type.lower() == "faiss_sharded":
+                from core.embeddings.sharded_store import ShardedFAISSVectorStore
+                store = ShardedFAISSVectorStore(embedding_provider=embedding_provider, **kwargs)
+                
+                # Shards load their own segments when started
+                if not store._index_exists():
+                    logger.info("Creating empty sharded FAISS index during initialization")
+                    store.build_index([])
+                return store
+                
             elif store_type.lower() == "chroma":
                 from core.embeddings.chroma_store import ChromaVectorStore
                 store = ChromaVectorStore(embedding_provider=embedding_provider, **kwargs)
@@ -67,6 +79,10 @@ class VectorStoreFactory:
             elif store_type.lower() == "vertex":
                 try:
                     from core.embeddings.vertex_store import VertexVectorStore
+                    
+                    # The local stand-in can run on any provider; the real index expects Vertex embeddings
+                    if kwargs.get("local", config.vector_store.vertex_local):
+                        kwargs.setdefault("embedding_provider", embedding_provider)
                     store = VertexVectorStore(**kwargs)
                     
                     # Ensure index exists on initialization
@@ -104,16 +120,41 @@ class VectorStoreFactory:
     def create_embeddings_provider(model: str = None) -> Any:
         """Create an embeddings provider.
         
+        Besides OpenAI model names, the model may name a local backend:
+        'local:<path>' runs an ONNX model from a local directory on the CPU,
+        and 'hashing' (or 'hashing-<dimension>') is a deterministic hashing
+        embedder for tests. Neither makes API calls.
+        
         Args:
             model: Model name (defaults to config)
             
         Returns:
             Embeddings provider
+            
+        Raises:
+            ImportError: If a local model is requested without onnxruntime and tokenizers
+            FileNotFoundError: If a local model path does not exist
         """
+        # Use config model if not specified
+        model = model or config.vector_store.embedding_model
+        
+        # Local backends fail loudly: an API model would silently change the embedding space
+        from core.embeddings.local_embeddings import (
+            HashingEmbeddings, LocalOnnxEmbeddings, HASHING_MODEL_PREFIX, LOCAL_MODEL_PREFIX
+        )
+        if model.startswith(LOCAL_MODEL_PREFIX):
+            return LocalOnnxEmbeddings(
+                model[len(LOCAL_MODEL_PREFIX):],
+                batch_size=config.vector_store.local_embedding_batch_size,
+                max_batch_tokens=config.vector_store.local_embedding_max_batch_tokens,
+                num_workers=config.vector_store.local_embedding_workers,
+                quantize=config.vector_store.local_embedding_quantize
+            )
+        if model == HASHING_MODEL_PREFIX or model.startswith(f"{HASHING_MODEL_PREFIX}-"):
+            dimension = model[len(HASHING_MODEL_PREFIX) + 1:]
+            return HashingEmbeddings(int(dimension)) if dimension else HashingEmbeddings()
+        
         try:
-            # Use config model if not specified
-            model = model or config.vector_store.embedding_model
-            
             # Create OpenAI embeddings provider
             return OpenAIEmbeddings(model=model)
         except Exception as e:
@@ -0,0 +1,144 @@
+# core/embeddings/vertex_local.py
+
+import time
+import threading
+from typing import List, Optional, Dict, Any, Tuple
+import numpy as np
+from langchain.schema import Document
+from config.logging_config import get_module_logger
+
+# Create a logger for this module
+logger = get_module_logger("vertex_local")
+
+class LocalVectorSearch:
+    """In-process stand-in for the Vertex AI Vector Search client.
+
+    Implements the subset of the LangChain Vertex vector store interface
+    that VertexVectorStore uses, with exact dot-product search (the
+    index's distance measure) over vectors held in memory. An optional
+    per-call latency mimics network round trips, so the Vertex code path
+    can be load-tested offline.
+    """
+
+    def __init__(self, embedding: Any, latency_ms: float = 0.0):
+        """Create an empty local index.
+
+        Args:
+            embedding: Embedding provider used for text queries
+            latency_ms: Simulated latency added to every call
+        """
+        self.embedding = embedding
+        self.latency_ms = latency_ms
+        self._lock = threading.Lock()
+        self._rows: Dict[str, int] = {}  # Datapoint ID -> row
+        self._ids: List[Optional[str]] = []  # Row -> datapoint ID (None when removed)
+        self._texts: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+
+    def _wait(self) -> None:
+        """Sleep for the simulated latency."""
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+
+    def add_texts_with_embeddings(self,
+                                  texts: List[str],
+                                  embeddings: List[List[float]],
+                                  metadatas: Optional[List[Dict[str, Any]]] = None,
+                                  ids: Optional[List[str]] = None,
+                                  **kwargs) -> List[str]:
+        """Upsert datapoints with precomputed embeddings.
+
+        Args:
+            texts: Datapoint texts
+            embeddings: Datapoint vectors
+            metadatas: Datapoint metadata
+            ids: Datapoint IDs (existing IDs are overwritten)
+
+        Returns:
+            IDs of the written datapoints
+        """
+        self._wait()
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(len(self._ids) + i) for i in range(len(texts))]
+        vectors = np.asarray(embeddings, dtype=np.float32)
+
+        with self._lock:
+            if not len(self._vectors):
+                self._vectors = np.zeros((0, vectors.shape[1]), dtype=np.float32)
+
+            new_rows = []
+            for datapoint_id, text, metadata, vector in zip(ids, texts, metadatas, vectors):
+                row = self._rows.get(datapoint_id)
+                if row is None:
+                    self._rows[datapoint_id] = len(self._ids)
+                    new_rows.append(vector)
+                    self._ids.append(datapoint_id)
+                    self._texts.append(text)
+                    self._metadatas.append(dict(metadata))
+                else:
+                    self._vectors[row] = vector
+                    self._texts[row] = text
+                    self._metadatas[row] = dict(metadata)
+
+            if new_rows:
+                self._vectors = np.vstack([self._vectors, np.asarray(new_rows, dtype=np.float32)])
+
+        return list(ids)
+
+    def delete(self, ids: List[str], **kwargs) -> bool:
+        """Remove datapoints by ID.
+
+        Args:
+            ids: Datapoint IDs
+
+        Returns:
+            True
+        """
+        self._wait()
+        with self._lock:
+            for datapoint_id in ids:
+                row = self._rows.pop(datapoint_id, None)
+                if row is not None:
+                    self._ids[row] = None
+        return True
+
+    def similarity_search_by_vector_with_score(self,
+                                               embedding: List[float],
+                                               k: int = 4,
+                                               **kwargs) -> List[Tuple[Document, float]]:
+        """Find the datapoints with the highest dot product.
+
+        Args:
+            embedding: Query vector
+            k: Number of results
+
+        Returns:
+            List of (document, dot product) tuples, best first
+        """
+        self._wait()
+        with self._lock:
+            if not self._rows:
+                return []
+            scores = self._vectors @ np.asarray(embedding, dtype=np.float32)
+            live = np.asarray([datapoint_id is not None for datapoint_id in self._ids])
+            scores = np.where(live, scores, -np.inf)
+
+            top = np.argsort(-scores)[:min(k, len(self._rows))]
+            return [
+                (Document(page_content=self._texts[row], metadata=dict(self._metadatas[row])), float(scores[row]))
+                for row in top
+            ]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs) -> List[Tuple[Document, float]]:
+        """Embed a query and find the most similar datapoints, with scores."""
+        return self.similarity_search_by_vector_with_score(self.embedding.embed_query(query), k=k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs) -> List[Document]:
+        """Embed a query and find the most similar datapoints."""
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k)]
+
+    def count(self) -> int:
+        """Number of live datapoints."""
+        with self._lock:
+            return len(self._rows)
@@ -2,15 +2,17 @@
 
 import os
 import time
-import uuid
-from typing import List, Optional, Dict, Any, Callable
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Any, Callable, Set, Tuple
 from langchain.schema import Document
-from google.cloud import aiplatform
-from langchain_google_vertexai import VertexAIEmbeddings
 from langchain.vectorstores.utils import DistanceStrategy
 from config.app_config import config
 from config.logging_config import get_module_logger
 from core.embeddings.embedding_manager import TextChunkProcessor
+from core.embeddings.chunk_store import document_chunk_id, document_source_id
+from core.embeddings.store_retriever import ScoredStoreRetriever
 
 # Create a logger for this module
 logger = get_module_logger("vertex_store")
@@ -26,7 +28,10 @@ class VertexVectorStore:
                 project_id: Optional[str] = None,
                 location: Optional[str] = None,
                 index_id: Optional[str] = None,
-                embedding_model: Optional[str] = None):
+                embedding_model: Optional[str] = None,
+                embedding_provider: Optional[Any] = None,
+                local: Optional[bool] = None,
+                local_latency_ms: float = 0.0):
         """Initialize with Vertex AI configuration.
         
         Args:
@@ -34,20 +39,51 @@ class VertexVectorStore:
             location: GCP location
             index_id: Vertex AI Vector Search index ID
             embedding_model: Name of the embedding model to use
+            embedding_provider: Embedding provider (default: VertexAIEmbeddings for embedding_model)
+            local: Use the in-process LocalVectorSearch stand-in (default: from config)
+            local_latency_ms: Simulated per-call latency of the stand-in
         """
         self.project_id = project_id or os.environ.get("GCP_PROJECT", "your-project-id")
         self.location = location or os.environ.get("GCP_LOCATION", "us-central1")
         self.index_name = os.environ.get("VERTEX_INDEX_NAME", "educational-assistant-index")
-        self.index_id = index_id or self._get_or_create_index()
+        self.local = local if local is not None else config.vector_store.vertex_local
+        self.local_latency_ms = local_latency_ms
         self.embedding_model = embedding_model or "textembedding-gecko@latest"
         self.dimension = 768  # Gecko model dimension
         self.chunk_processor = TextChunkProcessor()
+        self.upsert_batch_size = config.vector_store.vertex_upsert_batch_size
+        self.embedding_workers = config.vector_store.vertex_embedding_workers
+        
+        # Vector Search client, created once and reused by every query and upsert
         self.vector_search = None
+        self._vector_search_lock = threading.Lock()
+        
+        # Initialize embeddings; the GCP SDK is only imported when it is needed,
+        # so the local stand-in runs without it
+        if embedding_provider is None:
+            from langchain_google_vertexai import VertexAIEmbeddings
+            embedding_provider = VertexAIEmbeddings(model_name=self.embedding_model)
+        self.embeddings = embedding_provider
+        self.embedding_provider = embedding_provider  # Name shared with the other stores
+        
+        # Changed by every write, so caches of answers over the index know when they are stale
+        self.version = 0
+        self._version_lock = threading.Lock()
         
-        # Initialize embeddings
-        self.embeddings = VertexAIEmbeddings(model_name=self.embedding_model)
+        # Vector Search has no metadata lookup, so chunk IDs are tracked per source identity
+        self._source_ids: Dict[str, Set[str]] = {}
+        self._source_ids_lock = threading.Lock()
+        
+        if self.local:
+            # Nothing to create in the cloud
+            self.index_id = index_id or "local"
+            logger.info("Using local in-process Vector Search stand-in")
+            return
+        
+        self.index_id = index_id or self._get_or_create_index()
         
         # Initialize Vertex AI
+        from google.cloud import aiplatform
         aiplatform.init(project=self.project_id, location=self.location)
         
         logger.debug(f"Initialized Vertex AI Vector Search with index: {self.index_name}")
@@ -83,6 +119,7 @@ class VertexVectorStore:
         try:
             logger.info(f"Creating new Vertex AI index: {self.index_name}")
             
+            from google.cloud import aiplatform
             index = aiplatform.MatchingEngineIndex.create(
                 display_name=self.index_name,
                 dimensions=self.dimension, 
@@ -111,6 +148,16 @@ class VertexVectorStore:
             
         return True
     
+    @property
+    def index_version(self) -> int:
+        """Version of the indexed documents, changed by every add, delete, rebuild or clear."""
+        return self.version
+    
+    def _bump_version(self) -> None:
+        """Record a change of the indexed documents."""
+        with self._version_lock:
+            self.version += 1
+    
     def _index_exists(self) -> bool:
         """Check if index exists and is available."""
         return self.index_id is not None
@@ -155,11 +202,15 @@ class VertexVectorStore:
             logger.error(f"Error building Vertex index: {str(e)}", exc_info=True)
             return False
     
-    def add_documents(self, documents: List[Document]) -> bool:
+    def add_documents(self,
+                      documents: List[Document],
+                      embeddings: Optional[List[List[float]]] = None) -> bool:
         """Add documents to the index.
         
         Args:
             documents: Documents to add
+            embeddings: Optional precomputed embeddings, one per document; only
+                used if chunking leaves the documents as they are
             
         Returns:
             True if successful, False otherwise
@@ -176,21 +227,27 @@ class VertexVectorStore:
                 logger.warning("No document chunks to add")
                 return False
             
-            # Import here to avoid circular imports
-            from langchain_google_vertexai import VertexAIVector
+            # Precomputed embeddings only fit chunks that are the documents themselves
+            if embeddings is not None and [doc.page_content for doc in chunked_docs] != [doc.page_content for doc in documents]:
+                embeddings = None
             
-            # Create unique IDs for each document
-            ids = [str(uuid.uuid4()) for _ in range(len(chunked_docs))]
+            # Content-derived IDs make re-adding the same chunks overwrite rather than duplicate
+            unique_positions = {}
+            for position, doc in enumerate(chunked_docs):
+                unique_positions.setdefault(document_chunk_id(doc), position)
+            ids = list(unique_positions)
+            chunked_docs = [chunked_docs[position] for position in unique_positions.values()]
+            if embeddings is not None:
+                embeddings = [embeddings[position] for position in unique_positions.values()]
             
-            # Add documents to index
-            VertexAIVector.from_documents(
-                documents=chunked_docs,
-                embedding=self.embeddings,
-                index_name=self.index_name,
-                project_id=self.project_id,
-                location=self.location,
-                ids=ids
-            )
+            self._stream_upserts(ids, chunked_docs, embeddings)
+            self._bump_version()
+            
+            with self._source_ids_lock:
+                for doc_id, doc in zip(ids, chunked_docs):
+                    source = document_source_id(doc.metadata)
+                    if source is not None:
+                        self._source_ids.setdefault(source, set()).add(doc_id)
             
             logger.info(f"Added {len(chunked_docs)} document chunks to Vertex AI index")
             return True
@@ -199,6 +256,79 @@ class VertexVectorStore:
             logger.error(f"Error adding documents to Vertex index: {str(e)}", exc_info=True)
             return False
     
+    def delete_documents(self,
+                         ids: Optional[List[str]] = None,
+                         source: Optional[str] = None,
+                         keep_ids: Optional[List[str]] = None) -> bool:
+        """Delete documents by ID and/or all chunks of a source.
+        
+        Vertex AI Vector Search has no metadata lookup, so chunks of a source
+        are found in the IDs this store added; chunks indexed by another
+        process are not found by source.
+        
+        Args:
+            ids: Document IDs to delete
+            source: Source identity whose chunks to delete (see document_source_id)
+            keep_ids: Document IDs to keep even if they match
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            doc_ids = set(ids or [])
+            if source is not None:
+                with self._source_ids_lock:
+                    doc_ids.update(self._source_ids.get(source, ()))
+            doc_ids = sorted(doc_ids - set(keep_ids or []))
+            if not doc_ids:
+                logger.info("No matching documents to delete")
+                return True
+            
+            if not self._ensure_index_exists():
+                return False
+            
+            if self.local:
+                self._get_vector_search().delete(ids=doc_ids)
+            else:
+                from google.cloud import aiplatform
+                index = aiplatform.MatchingEngineIndex(index_name=self.index_id)
+                index.remove_datapoints(datapoint_ids=doc_ids)
+            self._bump_version()
+            
+            with self._source_ids_lock:
+                for source_ids in self._source_ids.values():
+                    source_ids.difference_update(doc_ids)
+            
+            logger.info(f"Deleted {len(doc_ids)} documents from Vertex AI index")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error deleting documents from Vertex index: {str(e)}", exc_info=True)
+            return False
+    
+    def upsert_documents(self, documents: List[Document]) -> bool:
+        """Replace the indexed chunks of each document source with new ones.
+        
+        Chunks keep content-derived IDs, so unchanged chunks are overwritten
+        in place; chunks of the same sources that are not among the new
+        ones are deleted (see delete_documents for its limits).
+        
+        Args:
+            documents: New documents
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        new_ids: Dict[str, List[str]] = {}
+        for doc in self.chunk_processor.split_documents(documents):
+            new_ids.setdefault(document_source_id(doc.metadata), []).append(document_chunk_id(doc))
+        
+        for source, keep_ids in new_ids.items():
+            if source is not None and not self.delete_documents(source=source, keep_ids=keep_ids):
+                return False
+        
+        return self.add_documents(documents)
+    
     def search(self, query: str, k: int = None) -> List[Document]:
         """Search the index for similar documents.
         
@@ -219,35 +349,207 @@ class VertexVectorStore:
             # Use configurable k if not specified
             k = k or config.vector_store.similarity_top_k
             
-            # Import here to avoid circular imports
-            from langchain_google_vertexai import VertexAIVector
+            # Search documents
+            results = self._get_vector_search().similarity_search(query, k=k)
+            
+            logger.debug(f"Found {len(results)} documents for query: {query[:50]}...")
+            return results
             
-            # Create vector store for querying
-            vector_store = VertexAIVector(
-                embedding=self.embeddings,
-                index_name=self.index_name,
-                project_id=self.project_id,
-                location=self.location
+        except Exception as e:
+            logger.error(f"Error searching Vertex index: {str(e)}", exc_info=True)
+            raise VectorStoreError(f"Search failed: {str(e)}")
+    
+    def _get_vector_search(self) -> Any:
+        """Get the cached LangChain vector store used for queries and upserts."""
+        with self._vector_search_lock:
+            if self.vector_search is None:
+                if self.local:
+                    from core.embeddings.vertex_local import LocalVectorSearch
+                    self.vector_search = LocalVectorSearch(self.embeddings, latency_ms=self.local_latency_ms)
+                else:
+                    # Import here to avoid circular imports
+                    from langchain_google_vertexai import VertexAIVector
+                    
+                    self.vector_search = VertexAIVector(
+                        embedding=self.embeddings,
+                        index_name=self.index_name,
+                        project_id=self.project_id,
+                        location=self.location
+                    )
+                logger.debug(f"Created Vector Search client for {self.index_name}")
+            return self.vector_search
+    
+    def _stream_upserts(self,
+                        ids: List[str],
+                        documents: List[Document],
+                        embeddings: Optional[List[List[float]]] = None) -> None:
+        """Embed documents in parallel batches and upsert each batch as soon as it is ready.
+        
+        At most embedding_workers batches are embedded at a time, so memory
+        stays bounded however large the ingest is.
+        
+        Args:
+            ids: Datapoint IDs, one per document
+            documents: Documents to upsert
+            embeddings: Optional precomputed embeddings, one per document (skips embedding)
+        """
+        vector_search = self._get_vector_search()
+        batch_size = self.upsert_batch_size
+        batches = [
+            (ids[start:start + batch_size], documents[start:start + batch_size])
+            for start in range(0, len(ids), batch_size)
+        ]
+        
+        def upsert(batch_ids: List[str], batch_docs: List[Document], embeddings: List[List[float]]) -> None:
+            vector_search.add_texts_with_embeddings(
+                texts=[doc.page_content for doc in batch_docs],
+                embeddings=embeddings,
+                metadatas=[doc.metadata for doc in batch_docs],
+                ids=batch_ids
             )
+        
+        if embeddings is not None:
+            for start in range(0, len(ids), batch_size):
+                upsert(ids[start:start + batch_size], documents[start:start + batch_size],
+                       embeddings[start:start + batch_size])
+            logger.debug(f"Upserted {len(ids)} precomputed datapoints in {len(batches)} batches")
+            return
+        
+        with ThreadPoolExecutor(max_workers=self.embedding_workers, thread_name_prefix="vertex-embed") as executor:
+            pending = deque()
+            for batch_ids, batch_docs in batches:
+                texts = [doc.page_content for doc in batch_docs]
+                pending.append((batch_ids, batch_docs, executor.submit(self.embeddings.embed_documents, texts)))
+                
+                # Upsert the oldest batch once every worker is busy
+                if len(pending) >= self.embedding_workers:
+                    batch_ids, batch_docs, future = pending.popleft()
+                    upsert(batch_ids, batch_docs, future.result())
+            
+            while pending:
+                batch_ids, batch_docs, future = pending.popleft()
+                upsert(batch_ids, batch_docs, future.result())
+        
+        logger.debug(f"Upserted {len(ids)} datapoints in {len(batches)} batches")
+    
+    def _scored(self,
+                hits: List[Tuple[Document, float]],
+                min_score: Optional[float]) -> List[Tuple[Document, float]]:
+        """Normalize dot-product scores and apply the threshold.
+        
+        Args:
+            hits: (document, dot product) tuples
+            min_score: Minimum similarity score to keep
             
-            # Search documents
-            results = vector_store.similarity_search(query, k=k)
+        Returns:
+            List of (document, score) tuples with the score also in metadata['score']
+        """
+        results = []
+        for doc, similarity in hits:
+            # Dot product equals cosine similarity for unit-length embeddings, clamped to 0-1
+            score = max(0.0, min(1.0, float(similarity)))
+            if min_score is not None and score < min_score:
+                continue
+            results.append((Document(page_content=doc.page_content, metadata=dict(doc.metadata, score=score)), score))
+        
+        return results
+    
+    def search_with_scores(self,
+                           query: str,
+                           k: int = None,
+                           min_score: Optional[float] = None,
+                           query_vector: Optional[List[float]] = None) -> List[Tuple[Document, float]]:
+        """Search the index for similar documents, with similarity scores.
+        
+        Args:
+            query: Query string
+            k: Number of results to return
+            min_score: Minimum normalized similarity score (0-1) to return
+            query_vector: Precomputed embedding of the query (embedded here if None)
             
-            logger.debug(f"Found {len(results)} documents for query: {query[:50]}...")
+        Returns:
+            List of (document, score) tuples, most similar first
+            
+        Raises:
+            VectorStoreError: If search fails
+        """
+        try:
+            if not self._index_exists():
+                raise VectorStoreError("No index available for search")
+            
+            # Use configurable k if not specified
+            k = k or config.vector_store.similarity_top_k
+            
+            if query_vector is None:
+                hits = self._get_vector_search().similarity_search_with_score(query, k=k)
+            else:
+                hits = self._get_vector_search().similarity_search_by_vector_with_score(list(query_vector), k=k)
+            results = self._scored(hits, min_score)
+            
+            logger.debug(f"Found {len(results)} documents above score {min_score} for query: {query[:50]}...")
             return results
             
         except Exception as e:
             logger.error(f"Error searching Vertex index: {str(e)}", exc_info=True)
             raise VectorStoreError(f"Search failed: {str(e)}")
     
-    def as_retriever(self, search_kwargs: Optional[Dict[str, Any]] = None) -> Callable:
-        """Get a retriever function for the vector store.
+    def search_batch(self,
+                     queries: List[str],
+                     k: int = None,
+                     min_score: Optional[float] = None) -> List[List[Document]]:
+        """Search the index for documents similar to each of several queries.
+        
+        All queries are embedded in one request; each embedding is then
+        matched against the index.
+        
+        Args:
+            queries: Query strings
+            k: Number of results to return per query
+            min_score: Minimum normalized similarity score (0-1) to return
+            
+        Returns:
+            List of similar documents for each query, in query order, with
+            the similarity score in metadata['score']
+            
+        Raises:
+            VectorStoreError: If search fails
+        """
+        try:
+            if not queries:
+                return []
+            
+            if not self._index_exists():
+                raise VectorStoreError("No index available for search")
+            
+            # Use configurable k if not specified
+            k = k or config.vector_store.similarity_top_k
+            
+            vector_search = self._get_vector_search()
+            
+            # One embedding request for the whole batch
+            query_embeddings = self.embeddings.embed_documents(queries)
+            results = [
+                [doc for doc, _ in self._scored(
+                    vector_search.similarity_search_by_vector_with_score(embedding, k=k), min_score
+                )]
+                for embedding in query_embeddings
+            ]
+            
+            logger.debug(f"Found documents for {len(queries)} queries in one batch")
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error batch searching Vertex index: {str(e)}", exc_info=True)
+            raise VectorStoreError(f"Batch search failed: {str(e)}")
+    
+    def as_retriever(self, search_kwargs: Optional[Dict[str, Any]] = None) -> ScoredStoreRetriever:
+        """Get a LangChain retriever for the vector store.
         
         Args:
             search_kwargs: Search parameters
             
         Returns:
-            Retriever function
+            Retriever, also callable with a query
             
         Raises:
             VectorStoreError: If retriever creation fails
@@ -260,12 +562,10 @@ class VertexVectorStore:
             search_kwargs = search_kwargs or {
                 "k": config.vector_store.similarity_top_k
             }
+            min_score = search_kwargs.get("score_threshold", config.vector_store.min_similarity_score)
             
-            # Create retriever function
-            def retriever(query: str) -> List[Document]:
-                return self.search(query, k=search_kwargs.get("k"))
-            
-            return retriever
+            # Low-scoring chunks never reach the prompt
+            return ScoredStoreRetriever(store=self, k=search_kwargs.get("k"), min_score=min_score)
             
         except Exception as e:
             logger.error(f"Error creating retriever: {str(e)}", exc_info=True)
@@ -278,6 +578,16 @@ class VertexVectorStore:
             True if successful, False otherwise
         """
         try:
+            with self._source_ids_lock:
+                self._source_ids.clear()
+            
+            if self.local:
+                with self._vector_search_lock:
+                    self.vector_search = None
+                self._bump_version()
+                logger.info("Cleared local Vector Search index")
+                return True
+            
             if not self.index_id:
                 logger.warning("No index to clear")
                 return True
@@ -292,8 +602,10 @@ class VertexVectorStore:
             operation = client.delete_index(name=name)
             operation.result()  # Wait for operation to complete
             
-            # Reset index ID
+            # Reset index ID and the client bound to the old index
             self.index_id = None
+            with self._vector_search_lock:
+                self.vector_search = None
             
             # Create a new empty index
             self.index_id = self._create_new_index()
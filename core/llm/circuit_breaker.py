@@ -0,0 +1,187 @@
+"""Per-model circuit breakers for API calls."""
+
+import time
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional
+import openai
+from config.app_config import config, LLMConfig
+from config.logging_config import get_module_logger
+
+# Create a logger for this module
+logger = get_module_logger("circuit_breaker")
+
+# Breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Raised when a model is skipped because its circuit is open."""
+
+def is_service_failure(error: BaseException) -> bool:
+    """Check whether an error means the model's service is unhealthy.
+
+    Timeouts, connection errors, server errors (5xx) and rate limiting (429)
+    count against the model. Other errors, such as a bad request or failed
+    authentication, come from the request and would fail on any model.
+
+    Args:
+        error: Error raised by a call to the model
+
+    Returns:
+        True if the error should count as a failure of the model
+    """
+    if isinstance(error, (TimeoutError, openai.APIConnectionError, openai.RateLimitError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+@dataclass
+class CircuitBreakerStats:
+    """Counters of a circuit breaker."""
+    successes: int = 0
+    failures: int = 0
+    rejected: int = 0  # Calls skipped while the circuit was open
+    opened: int = 0  # Times the circuit opened
+    hedges: int = 0  # Hedged requests sent to the model while another was slow
+    hedge_wins: int = 0  # Hedged requests that answered first
+
+class CircuitBreaker:
+    """Stops calling a model after repeated failures.
+
+    The circuit opens after failure_threshold consecutive failures, so
+    requests go straight to the fallback models instead of retrying a model
+    that is down. After reset_timeout one probe call is let through
+    (half-open): its success closes the circuit, its failure opens it
+    again for another reset_timeout. Only errors of the service count as
+    failures (see is_service_failure).
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        """Initialize closed.
+
+        Args:
+            name: Model name
+            failure_threshold: Consecutive failures that open the circuit (0: never opens)
+            reset_timeout: Seconds the circuit stays open before a probe
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.stats = CircuitBreakerStats()
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Current state: closed, open or half_open."""
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Check whether a call may go to the model, claiming the probe when half-open.
+
+        Returns:
+            True if the call may proceed
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._state == OPEN and now - self._opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+                self._probing = False
+
+            if self._state == CLOSED:
+                return True
+            # A probe that never reported back (its caller gave up) is replaced after reset_timeout
+            if self._state == HALF_OPEN and (not self._probing or now - self._probe_started >= self.reset_timeout):
+                self._probing = True
+                self._probe_started = now
+                logger.info(f"Probing {self.name} after its circuit was open for {self.reset_timeout}s")
+                return True
+
+            self.stats.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        """Record a successful call, closing the circuit."""
+        with self._lock:
+            self.stats.successes += 1
+            self._consecutive_failures = 0
+            if self._state != CLOSED:
+                logger.info(f"Circuit for {self.name} closed")
+            self._state = CLOSED
+            self._probing = False
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the circuit at the threshold or after a failed probe."""
+        with self._lock:
+            self.stats.failures += 1
+            self._consecutive_failures += 1
+            failed_probe = self._state == HALF_OPEN
+            if failed_probe or (self.failure_threshold and self._state == CLOSED
+                                and self._consecutive_failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+                self.stats.opened += 1
+                logger.warning(f"Circuit for {self.name} opened after {self._consecutive_failures} "
+                               f"consecutive failures; retrying in {self.reset_timeout}s")
+
+    def record_error(self, error: BaseException) -> None:
+        """Record a call that raised, counting it as a failure only if the service is at fault.
+
+        Any other error means the model answered, so it resets the failure
+        count and closes a half-open circuit, without counting as a success.
+
+        Args:
+            error: Error raised by the call
+        """
+        if is_service_failure(error):
+            self.record_failure()
+            return
+        with self._lock:
+            self._consecutive_failures = 0
+            if self._state != CLOSED:
+                logger.info(f"Circuit for {self.name} closed")
+            self._state = CLOSED
+            self._probing = False
+
+    def record_hedge(self, won: bool = False) -> None:
+        """Count a hedged request sent to the model, or one that answered first."""
+        with self._lock:
+            if won:
+                self.stats.hedge_wins += 1
+            else:
+                self.stats.hedges += 1
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def get_circuit_breaker(model: str, llm_config: Optional[LLMConfig] = None) -> CircuitBreaker:
+    """Get the process-wide circuit breaker of a model.
+
+    Args:
+        model: Model name
+        llm_config: LLM configuration the thresholds are read from when the breaker is created (default: from app config)
+
+    Returns:
+        Shared CircuitBreaker
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(model)
+        if breaker is None:
+            llm_config = llm_config or config.llm
+            breaker = CircuitBreaker(model, llm_config.circuit_failure_threshold, llm_config.circuit_reset_timeout)
+            _breakers[model] = breaker
+        return breaker
+
+def get_circuit_breakers() -> Dict[str, CircuitBreaker]:
+    """Get the circuit breakers created so far, by model."""
+    with _breakers_lock:
+        return dict(_breakers)
@@ -0,0 +1,65 @@
+"""Shared HTTP connection pools for API clients."""
+
+import asyncio
+import threading
+import weakref
+from typing import Optional
+import httpx
+from config.app_config import config
+from config.logging_config import get_module_logger
+
+# Create a logger for this module
+logger = get_module_logger("http_pool")
+
+_sync_client: Optional[httpx.Client] = None
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+def _limits() -> httpx.Limits:
+    """Connection limits from config."""
+    return httpx.Limits(
+        max_connections=config.llm.http_max_connections,
+        max_keepalive_connections=config.llm.http_max_keepalive,
+        keepalive_expiry=config.llm.http_keepalive_expiry
+    )
+
+def _timeout() -> httpx.Timeout:
+    """Default timeouts; requests pass their own, capped by their deadline."""
+    return httpx.Timeout(config.llm.request_timeout, connect=10.0)
+
+def get_http_client() -> httpx.Client:
+    """Get the process-wide HTTP client of the synchronous API clients.
+
+    Every OpenAI client built on it shares one pool of keep-alive
+    connections instead of opening its own.
+
+    Returns:
+        Shared httpx.Client
+    """
+    global _sync_client
+    with _lock:
+        if _sync_client is None or _sync_client.is_closed:
+            _sync_client = httpx.Client(limits=_limits(), timeout=_timeout())
+            logger.debug(f"Created shared HTTP pool with {config.llm.http_max_connections} connections")
+        return _sync_client
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Get the HTTP client of the asynchronous API clients for the running event loop.
+
+    Async connections belong to the loop that opened them, so there is one
+    pool per loop, dropped with the loop.
+
+    Returns:
+        Shared httpx.AsyncClient of the current loop
+
+    Raises:
+        RuntimeError: If called outside a running event loop
+    """
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(limits=_limits(), timeout=_timeout())
+            _async_clients[loop] = client
+            logger.debug(f"Created async HTTP pool with {config.llm.http_max_connections} connections")
+        return client
@@ -1,14 +1,24 @@
 # core/llm/llm_client.py
 
 import time
+import asyncio
 import threading
-from typing import Dict, Any, Optional, Callable, List, Union
+import weakref
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Dict, Any, Optional, Callable, List, Union, Iterator, Tuple
 import backoff
 import openai
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from config.app_config import config, LLMConfig
 from config.logging_config import get_module_logger
-from core.llm.rate_limiter import RateLimiter  # Import from dedicated module
+from core.llm.rate_limiter import RateLimiter, get_rate_limiter  # Import from dedicated module
+from core.llm.timeouts import (
+    Deadline, DeadlineExceeded, current_deadline, deadline_scope, get_executor, remaining_time, request_timeout
+)
+from core.llm.circuit_breaker import OPEN, CircuitOpenError, get_circuit_breaker
+from core.llm.http_pool import get_http_client, get_async_http_client
+from core.llm.response_cache import ResponseCache, get_response_cache
+from core.llm.token_counter import count_input_tokens, count_message_tokens
 from langchain_openai import ChatOpenAI
 import os
 
@@ -47,14 +57,18 @@ class LLMClient:
             llm_config: LLM configuration (default: from app config)
         """
         self.config = llm_config or config.llm
-        self.client = OpenAI(api_key=self.config.api_key)
-        self.rate_limiter = RateLimiter(self.config.rate_limit_rpm)
+        
+        # All clients share one pool of keep-alive connections per event loop
+        self.client = OpenAI(api_key=self.config.api_key, http_client=get_http_client())
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = weakref.WeakKeyDictionary()
+        # Clients share one request and token budget per model; this is the configured model's
+        self.rate_limiter = get_rate_limiter(self.config.model_name, self.config)
         
         # Configure backoff parameters
         self.max_retries = self.config.max_retries
         
-        # Cache for recent API calls to reduce duplicate requests
-        self._cache = {}
+        # Recent responses are shared with every other client, session and worker process
+        self._cache = get_response_cache()
         self._cache_ttl = self.config.cache_ttl if hasattr(self.config, 'cache_ttl') else 3600  # Cache TTL in seconds
         
         logger.debug(f"Initialized LLM client with model {self.config.model_name}")
@@ -63,11 +77,17 @@ class LLMClient:
         backoff.expo,
         (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError),
         max_tries=5,
+        max_time=remaining_time,
         jitter=backoff.full_jitter
     )
     def _call_with_retry(self, func, *args, **kwargs):
         """Call a function with exponential backoff retry.
         
+        Each attempt first waits for room in the rate limits of the model
+        it calls, then gets the request timeout, capped by the time left
+        before the deadline of the current work, if any. Retries stop at
+        that deadline too.
+        
         Args:
             func: Function to call
             *args: Positional arguments
@@ -75,8 +95,90 @@ class LLMClient:
             
         Returns:
             Function result
+            
+        Raises:
+            DeadlineExceeded: If the deadline passed before an attempt
+        """
+        limiter = get_rate_limiter(kwargs.get("model", self.config.model_name), self.config)
+        tokens = self._request_tokens(kwargs)
+        limiter.acquire(tokens)
+        
+        kwargs["timeout"] = request_timeout(self.config.request_timeout)
+        response = func(*args, **kwargs)
+        self._settle_usage(limiter, tokens, response)
+        return response
+    
+    @backoff.on_exception(
+        backoff.expo,
+        (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError),
+        max_tries=5,
+        max_time=remaining_time,
+        jitter=backoff.full_jitter
+    )
+    async def _acall_with_retry(self, func, *args, **kwargs):
+        """Await a coroutine function with exponential backoff retry.
+        
+        Args:
+            func: Coroutine function to call
+            *args: Positional arguments
+            **kwargs: Keyword arguments
+            
+        Returns:
+            Function result
+            
+        Raises:
+            DeadlineExceeded: If the deadline passed before an attempt
+        """
+        limiter = get_rate_limiter(kwargs.get("model", self.config.model_name), self.config)
+        tokens = self._request_tokens(kwargs)
+        await limiter.aacquire(tokens)
+        
+        kwargs["timeout"] = request_timeout(self.config.request_timeout)
+        response = await func(*args, **kwargs)
+        self._settle_usage(limiter, tokens, response)
+        return response
+    
+    @staticmethod
+    def _request_tokens(kwargs: Dict[str, Any]) -> int:
+        """Estimate the tokens a request counts against the token budget.
+        
+        Chat requests count their prompt plus the completion they may
+        produce; embedding requests count their input.
+        
+        Args:
+            kwargs: Request arguments
+            
+        Returns:
+            Estimated tokens
+        """
+        if "messages" in kwargs:
+            return count_message_tokens(kwargs["messages"]) + (kwargs.get("max_tokens") or 0)
+        if "input" in kwargs:
+            return count_input_tokens(kwargs["input"])
+        return 0
+    
+    @staticmethod
+    def _settle_usage(limiter: RateLimiter, tokens: int, response: Any) -> None:
+        """Replace the token estimate with the usage the response reports, if any.
+        
+        Args:
+            limiter: Rate limiter the tokens were reserved from
+            tokens: Estimated tokens
+            response: API response (streams report no usage up front)
         """
-        return func(*args, **kwargs)
+        total_tokens = getattr(getattr(response, "usage", None), "total_tokens", None)
+        if isinstance(total_tokens, int):
+            limiter.settle(tokens, total_tokens)
+    
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """Async OpenAI client for the running event loop, on the loop's shared connection pool."""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = AsyncOpenAI(api_key=self.config.api_key, http_client=get_async_http_client())
+            self._async_clients[loop] = client
+        return client
     
     def _get_cache_key(self, messages, model, temperature, max_tokens):
         """Generate a cache key for a request.
@@ -88,11 +190,9 @@ class LLMClient:
             max_tokens: The max tokens setting
             
         Returns:
-            A cache key string
+            A cache key string, stable across processes
         """
-        # Simple cache key generation - in production, consider a more robust hashing method
-        message_str = str(messages)
-        return f"{model}_{temperature}_{max_tokens}_{hash(message_str)}"
+        return ResponseCache.make_key(model, messages, temperature, max_tokens)
     
     def _try_get_from_cache(self, cache_key):
         """Try to get a response from the cache.
@@ -105,16 +205,11 @@ class LLMClient:
         """
         if not self.config.cache_enabled:
             return None
-            
-        if cache_key in self._cache:
-            entry = self._cache[cache_key]
-            if time.time() - entry["timestamp"] < self._cache_ttl:
-                logger.debug(f"Cache hit for {cache_key}")
-                return entry["response"]
-            else:
-                # Entry expired
-                del self._cache[cache_key]
-        return None
+        
+        response = self._cache.get(cache_key, ttl=self._cache_ttl)
+        if response is not None:
+            logger.debug(f"Cache hit for {cache_key}")
+        return response
     
     def _add_to_cache(self, cache_key, response):
         """Add a response to the cache.
@@ -125,18 +220,292 @@ class LLMClient:
         """
         if not self.config.cache_enabled:
             return
+        
+        self._cache.set(cache_key, response)
+    
+    def _completion_result(self, response: Any, model_name: str, model: str) -> Dict[str, Any]:
+        """Extract the relevant information from a chat completion response.
+        
+        Args:
+            response: OpenAI chat completion response
+            model_name: Model that produced the response
+            model: Model originally requested
             
-        self._cache[cache_key] = {
-            "response": response,
-            "timestamp": time.time()
+        Returns:
+            Completion result dictionary
+        """
+        result = {
+            "content": response.choices[0].message.content,
+            "finish_reason": response.choices[0].finish_reason,
+            "model": response.model,
+            "usage": {
+                "prompt_tokens": response.usage.prompt_tokens,
+                "completion_tokens": response.usage.completion_tokens,
+                "total_tokens": response.usage.total_tokens
+            }
         }
         
-        # Cleanup old cache entries
-        current_time = time.time()
-        self._cache = {
-            k: v for k, v in self._cache.items()
-            if current_time - v["timestamp"] < self._cache_ttl
-        }
+        # If we used a fallback model, log it
+        if model_name != model:
+            logger.info(f"Used fallback model {model_name} instead of {model}")
+            result["used_fallback"] = True
+            result["original_model"] = model
+        
+        return result
+    
+    def _request_deadline(self) -> Optional[Deadline]:
+        """Deadline of one chat completion: the latency budget, within the caller's deadline."""
+        if self.config.latency_budget > 0:
+            return Deadline(self.config.latency_budget, parent=current_deadline())
+        return current_deadline()
+    
+    def _attempt_deadline(self, deadline: Optional[Deadline], models: List[str]) -> Optional[Deadline]:
+        """Deadline of one model's attempt within a latency budget.
+        
+        Each model still to try whose circuit is not open gets an equal share
+        of the time left, so a slow model hands over to its fallback early.
+        
+        Args:
+            deadline: Deadline of the chat completion
+            models: The model about to be tried and the fallbacks after it
+            
+        Returns:
+            Deadline of the attempt
+        """
+        if self.config.latency_budget <= 0 or deadline is None or deadline.remaining() is None:
+            return deadline
+        candidates = [m for m in models[1:] if get_circuit_breaker(m, self.config).state != OPEN]
+        return Deadline(deadline.remaining() / (1 + len(candidates)), parent=deadline)
+    
+    def _attempt(self, model_name: str, request: Callable[[str], Any]) -> Any:
+        """Make one model's request, reporting the outcome to the model's circuit breaker.
+        
+        Args:
+            model_name: Model to call
+            request: Makes the request (with retries) for a model name
+            
+        Returns:
+            API response
+        """
+        breaker = get_circuit_breaker(model_name, self.config)
+        deadline = current_deadline()
+        try:
+            response = request(model_name)
+        except DeadlineExceeded:
+            # A hedge that lost the race was cancelled; running out of time counts against the model
+            if deadline is None or not deadline.cancelled:
+                breaker.record_failure()
+            raise
+        except Exception as e:
+            # Only errors of the service count against the model, not invalid requests
+            breaker.record_error(e)
+            raise
+        breaker.record_success()
+        return response
+    
+    def _hedged(self,
+                model_name: str,
+                models: List[str],
+                request: Callable[[str], Any],
+                deadline: Optional[Deadline]) -> Tuple[Any, str]:
+        """Make a request, also sending it to the next fallback model if it is slow.
+        
+        If the request is still running after hedge_after seconds, the first
+        fallback whose circuit allows it gets the same request (and is taken
+        off models). The first answer wins and the other request is cancelled.
+        
+        Args:
+            model_name: Model to call
+            models: Fallback models still to try
+            request: Makes the request (with retries) for a model name
+            deadline: Deadline of the attempt
+            
+        Returns:
+            (API response, model that answered)
+        """
+        executor = get_executor()
+        attempts: Dict[Any, Tuple[str, Deadline]] = {}
+        
+        def launch(name: str) -> None:
+            # Each request gets its own deadline so the loser can be cancelled alone
+            attempt_deadline = Deadline(parent=deadline)
+            attempts[executor.submit(self._attempt, name, request, deadline=attempt_deadline)] = (name, attempt_deadline)
+        
+        launch(model_name)
+        done, _ = wait(list(attempts), timeout=self.config.hedge_after)
+        if not done:
+            hedge = next((m for m in models if get_circuit_breaker(m, self.config).allow()), None)
+            if hedge is not None:
+                models.remove(hedge)
+                get_circuit_breaker(hedge, self.config).record_hedge()
+                logger.info(f"{model_name} slower than {self.config.hedge_after}s, hedging with {hedge}")
+                launch(hedge)
+        
+        pending = set(attempts)
+        last_exception = None
+        while pending:
+            timeout = deadline.remaining() if deadline is not None else None
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                for future in pending:
+                    name, attempt_deadline = attempts[future]
+                    attempt_deadline.cancel()
+                    future.cancel()
+                    get_circuit_breaker(name, self.config).record_failure()
+                raise DeadlineExceeded("Deadline exceeded while waiting for hedged requests")
+            
+            for future in done:
+                try:
+                    response = future.result()
+                except Exception as e:
+                    last_exception = e
+                    continue
+                
+                # Stop the slower request
+                for other in pending:
+                    attempts[other][1].cancel()
+                    other.cancel()
+                name = attempts[future][0]
+                if name != model_name:
+                    get_circuit_breaker(name, self.config).record_hedge(won=True)
+                return response, name
+        
+        raise last_exception
+    
+    def _with_fallbacks(self,
+                        models_to_try: List[str],
+                        request: Callable[[str], Any],
+                        hedge: bool = False) -> Tuple[Any, str]:
+        """Make a request on the first model that answers, in fallback order.
+        
+        Models whose circuit is open are skipped. With a latency budget each
+        model gets a share of the time left instead of exhausting its retries
+        first; with hedging, a slow request is raced against the next model.
+        
+        Args:
+            models_to_try: Models in fallback order
+            request: Makes the request (with retries) for a model name
+            hedge: Whether slow requests may be hedged (hedge_after > 0)
+            
+        Returns:
+            (API response, model that answered)
+            
+        Raises:
+            DeadlineExceeded: If the caller's deadline or the latency budget runs out
+            Exception: The last error if every model fails
+        """
+        deadline = self._request_deadline()
+        models = list(models_to_try)
+        last_exception = None
+        
+        while models:
+            model_name = models.pop(0)
+            if not get_circuit_breaker(model_name, self.config).allow():
+                logger.warning(f"Circuit for {model_name} is open, skipping it")
+                last_exception = last_exception or CircuitOpenError(f"Circuit for {model_name} is open")
+                continue
+            
+            attempt_deadline = self._attempt_deadline(deadline, [model_name] + models)
+            try:
+                if hedge and self.config.hedge_after > 0 and models:
+                    return self._hedged(model_name, models, request, attempt_deadline)
+                if attempt_deadline is not deadline:
+                    # Stop waiting when the share runs out, even if the response is still trickling in
+                    executor = get_executor()
+                    future = executor.submit(self._attempt, model_name, request, deadline=attempt_deadline)
+                    return executor.wait(future, attempt_deadline), model_name
+                with deadline_scope(attempt_deadline):
+                    return self._attempt(model_name, request), model_name
+                
+            except DeadlineExceeded as e:
+                if attempt_deadline is not None and attempt_deadline.cancelled:
+                    # Abandoned when its time ran out, so the attempt did not report it
+                    get_circuit_breaker(model_name, self.config).record_failure()
+                if deadline is None or deadline.expired:
+                    # Out of time; fallback models would not fare better
+                    raise
+                logger.warning(f"{model_name} used up its share of the latency budget, falling back")
+                last_exception = e
+                
+            except openai.BadRequestError as e:
+                # If the model doesn't exist or the request is invalid, log and try the next model
+                logger.warning(f"Bad request with model {model_name}: {str(e)}")
+                last_exception = e
+                
+            except Exception as e:
+                # For other exceptions, log and try the next model
+                logger.warning(f"Error with model {model_name}: {str(e)}")
+                last_exception = e
+        
+        # If we get here, all models failed
+        logger.error(f"All models failed. Last error: {str(last_exception)}")
+        raise last_exception or Exception("All models failed for unknown reasons")
+    
+    async def _awith_fallbacks(self,
+                               models_to_try: List[str],
+                               request: Callable[[str], Any]) -> Tuple[Any, str]:
+        """Await a request on the first model that answers, in fallback order.
+        
+        Same circuit breakers and latency budget as _with_fallbacks, without hedging.
+        
+        Args:
+            models_to_try: Models in fallback order
+            request: Coroutine function making the request (with retries) for a model name
+            
+        Returns:
+            (API response, model that answered)
+            
+        Raises:
+            DeadlineExceeded: If the latency budget runs out
+            Exception: The last error if every model fails
+        """
+        budget = self.config.latency_budget
+        expires_at = time.monotonic() + budget if budget > 0 else None
+        models = list(models_to_try)
+        last_exception = None
+        
+        while models:
+            model_name = models.pop(0)
+            breaker = get_circuit_breaker(model_name, self.config)
+            if not breaker.allow():
+                logger.warning(f"Circuit for {model_name} is open, skipping it")
+                last_exception = last_exception or CircuitOpenError(f"Circuit for {model_name} is open")
+                continue
+            
+            timeout = None
+            if expires_at is not None:
+                remaining = expires_at - time.monotonic()
+                if remaining <= 0:
+                    raise DeadlineExceeded("Latency budget exceeded")
+                candidates = [m for m in models if get_circuit_breaker(m, self.config).state != OPEN]
+                timeout = remaining / (1 + len(candidates))
+            
+            try:
+                response = await asyncio.wait_for(request(model_name), timeout)
+                breaker.record_success()
+                return response, model_name
+                
+            except DeadlineExceeded:
+                raise
+                
+            except asyncio.TimeoutError as e:
+                breaker.record_failure()
+                logger.warning(f"{model_name} used up its share of the latency budget, falling back")
+                last_exception = e
+                
+            except openai.BadRequestError as e:
+                breaker.record_error(e)
+                logger.warning(f"Bad request with model {model_name}: {str(e)}")
+                last_exception = e
+                
+            except Exception as e:
+                breaker.record_error(e)
+                logger.warning(f"Error with model {model_name}: {str(e)}")
+                last_exception = e
+        
+        # If we get here, all models failed
+        logger.error(f"All models failed. Last error: {str(last_exception)}")
+        raise last_exception or Exception("All models failed for unknown reasons")
     
     def chat_completion(self,
                        messages: List[Dict[str, str]],
@@ -144,6 +513,10 @@ class LLMClient:
                        max_tokens: Optional[int] = None) -> Dict[str, Any]:
         """Get a chat completion with retry, rate limiting, and model fallbacks.
         
+        Models whose circuit breaker is open are skipped. With a latency
+        budget (latency_budget) a slow model falls back early, and with
+        hedge_after a slow request is also sent to the next fallback model.
+        
         Args:
             messages: List of message dictionaries
             temperature: Optional temperature override
@@ -155,9 +528,6 @@ class LLMClient:
         Raises:
             Exception: If the API call fails after retries and fallbacks
         """
-        # Apply rate limiting
-        self.rate_limiter.wait_if_needed()
-        
         # Use instance defaults if not specified
         temperature = temperature if temperature is not None else self.config.temperature
         max_tokens = max_tokens if max_tokens is not None else self.config.max_tokens
@@ -172,60 +542,116 @@ class LLMClient:
         if cached_response:
             return cached_response
         
-        # Try models in fallback order
-        last_exception = None
-        for model_name in models_to_try:
-            try:
-                logger.debug(f"Making chat completion request with model {model_name} and {len(messages)} messages")
-                
-                # Use retry wrapper
-                response = self._call_with_retry(
-                    self.client.chat.completions.create,
-                    model=model_name,
-                    messages=messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                    timeout=self.config.request_timeout
-                )
-                
-                # Extract and return relevant information
-                result = {
-                    "content": response.choices[0].message.content,
-                    "finish_reason": response.choices[0].finish_reason,
-                    "model": response.model,
-                    "usage": {
-                        "prompt_tokens": response.usage.prompt_tokens,
-                        "completion_tokens": response.usage.completion_tokens,
-                        "total_tokens": response.usage.total_tokens
-                    }
+        def request(model_name: str) -> Any:
+            logger.debug(f"Making chat completion request with model {model_name} and {len(messages)} messages")
+            
+            # Use retry wrapper
+            return self._call_with_retry(
+                self.client.chat.completions.create,
+                model=model_name,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+        
+        # Try models in fallback order, skipping open circuits and hedging slow requests
+        response, model_name = self._with_fallbacks(models_to_try, request, hedge=True)
+        
+        # Extract and return relevant information
+        result = self._completion_result(response, model_name, model)
+        
+        # Cache the successful response
+        self._add_to_cache(cache_key, result)
+        
+        return result
+    
+    def stream_chat_completion(self,
+                               messages: List[Dict[str, str]],
+                               temperature: Optional[float] = None,
+                               max_tokens: Optional[int] = None) -> Iterator[str]:
+        """Stream a chat completion token by token.
+        
+        Retries and model fallbacks apply until the first token arrives;
+        after that an error ends the stream. The complete response is cached
+        like a chat_completion result, and a cached response is yielded as a
+        single piece.
+        
+        Args:
+            messages: List of message dictionaries
+            temperature: Optional temperature override
+            max_tokens: Optional max tokens override
+            
+        Yields:
+            Pieces of the response content as they arrive
+            
+        Raises:
+            Exception: If the API call fails after retries and fallbacks
+        """
+        # Use instance defaults if not specified
+        temperature = temperature if temperature is not None else self.config.temperature
+        max_tokens = max_tokens if max_tokens is not None else self.config.max_tokens
+        
+        # Start with the configured model
+        model = self.config.model_name
+        models_to_try = [model] + self.MODEL_FALLBACKS.get(model, [])
+        
+        # Check cache first
+        cache_key = self._get_cache_key(messages, model, temperature, max_tokens)
+        cached_response = self._try_get_from_cache(cache_key)
+        if cached_response:
+            yield cached_response["content"]
+            return
+        
+        def request(model_name: str) -> Any:
+            logger.debug(f"Making streaming chat completion request with model {model_name} and {len(messages)} messages")
+            
+            return self._call_with_retry(
+                self.client.chat.completions.create,
+                model=model_name,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+        
+        # Try models in fallback order until one starts streaming
+        stream, model_name = self._with_fallbacks(models_to_try, request)
+        
+        pieces = []
+        finish_reason = None
+        response_model = model_name
+        usage = None
+        for chunk in stream:
+            response_model = chunk.model or response_model
+            if chunk.usage is not None:
+                usage = {
+                    "prompt_tokens": chunk.usage.prompt_tokens,
+                    "completion_tokens": chunk.usage.completion_tokens,
+                    "total_tokens": chunk.usage.total_tokens
                 }
-                
-                # If we used a fallback model, log it
-                if model_name != model:
-                    logger.info(f"Used fallback model {model_name} instead of {model}")
-                    result["used_fallback"] = True
-                    result["original_model"] = model
-                
-                # Cache the successful response
-                self._add_to_cache(cache_key, result)
-                
-                return result
-                
-            except openai.BadRequestError as e:
-                # If the model doesn't exist or the request is invalid, log and try the next model
-                logger.warning(f"Bad request with model {model_name}: {str(e)}")
-                last_exception = e
-                continue
-                
-            except Exception as e:
-                # For other exceptions, log and try the next model
-                logger.warning(f"Error with model {model_name}: {str(e)}")
-                last_exception = e
+            if not chunk.choices:
                 continue
+            
+            choice = chunk.choices[0]
+            finish_reason = choice.finish_reason or finish_reason
+            if choice.delta.content:
+                pieces.append(choice.delta.content)
+                yield choice.delta.content
         
-        # If we get here, all models failed
-        logger.error(f"All models failed. Last error: {str(last_exception)}")
-        raise last_exception or Exception("All models failed for unknown reasons")
+        result = {
+            "content": "".join(pieces),
+            "finish_reason": finish_reason,
+            "model": response_model,
+            "usage": usage
+        }
+        if model_name != model:
+            logger.info(f"Used fallback model {model_name} instead of {model}")
+            result["used_fallback"] = True
+            result["original_model"] = model
+        
+        # Cache the complete response
+        self._add_to_cache(cache_key, result)
     
     def embeddings(self, texts: List[str]) -> List[List[float]]:
         """Get embeddings with retry and rate limiting.
@@ -239,9 +665,6 @@ class LLMClient:
         Raises:
             Exception: If the API call fails after retries
         """
-        # Apply rate limiting
-        self.rate_limiter.wait_if_needed()
-        
         try:
             logger.debug(f"Making embeddings request for {len(texts)} texts")
             
@@ -251,17 +674,17 @@ class LLMClient:
                 response = self._call_with_retry(
                     self.client.embeddings.create,
                     model="text-embedding-3-small",  # Try the smaller model first
-                    input=texts,
-                    timeout=self.config.request_timeout
+                    input=texts
                 )
+            except DeadlineExceeded:
+                raise
             except Exception as e:
                 logger.warning(f"Failed to use text-embedding-3-small, falling back to ada: {str(e)}")
                 # Fall back to ada if the 3-small model fails
                 response = self._call_with_retry(
                     self.client.embeddings.create,
                     model="text-embedding-ada-002",  # Fallback embedding model
-                    input=texts,
-                    timeout=self.config.request_timeout
+                    input=texts
                 )
             
             # Extract embeddings from response
@@ -270,6 +693,107 @@ class LLMClient:
             logger.debug(f"Generated {len(embeddings)} embeddings using model {response.model}")
             return embeddings
             
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"Error in embeddings: {str(e)}", exc_info=True)
+            raise
+    
+    async def achat_completion(self,
+                               messages: List[Dict[str, str]],
+                               temperature: Optional[float] = None,
+                               max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """Get a chat completion without blocking the event loop.
+        
+        Same retry, rate limiting, fallback, circuit breaking and caching
+        behavior as chat_completion, without hedging; concurrent calls multiplex over the loop's shared
+        connection pool.
+        
+        Args:
+            messages: List of message dictionaries
+            temperature: Optional temperature override
+            max_tokens: Optional max tokens override
+            
+        Returns:
+            Completion response
+            
+        Raises:
+            Exception: If the API call fails after retries and fallbacks
+        """
+        # Use instance defaults if not specified
+        temperature = temperature if temperature is not None else self.config.temperature
+        max_tokens = max_tokens if max_tokens is not None else self.config.max_tokens
+        
+        # Start with the configured model
+        model = self.config.model_name
+        models_to_try = [model] + self.MODEL_FALLBACKS.get(model, [])
+        
+        # Check cache first
+        cache_key = self._get_cache_key(messages, model, temperature, max_tokens)
+        cached_response = self._try_get_from_cache(cache_key)
+        if cached_response:
+            return cached_response
+        
+        async def request(model_name: str) -> Any:
+            logger.debug(f"Making async chat completion request with model {model_name} and {len(messages)} messages")
+            
+            return await self._acall_with_retry(
+                self.async_client.chat.completions.create,
+                model=model_name,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+        
+        # Try models in fallback order, skipping open circuits
+        response, model_name = await self._awith_fallbacks(models_to_try, request)
+        
+        result = self._completion_result(response, model_name, model)
+        
+        # Cache the successful response
+        self._add_to_cache(cache_key, result)
+        
+        return result
+    
+    async def aembeddings(self, texts: List[str]) -> List[List[float]]:
+        """Get embeddings without blocking the event loop.
+        
+        Args:
+            texts: List of texts to embed
+            
+        Returns:
+            List of embedding vectors
+            
+        Raises:
+            Exception: If the API call fails after retries
+        """
+        try:
+            logger.debug(f"Making async embeddings request for {len(texts)} texts")
+            
+            # Try to use the smaller, faster embedding model first
+            try:
+                response = await self._acall_with_retry(
+                    self.async_client.embeddings.create,
+                    model="text-embedding-3-small",
+                    input=texts
+                )
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                logger.warning(f"Failed to use text-embedding-3-small, falling back to ada: {str(e)}")
+                response = await self._acall_with_retry(
+                    self.async_client.embeddings.create,
+                    model="text-embedding-ada-002",
+                    input=texts
+                )
+            
+            embeddings = [data.embedding for data in response.data]
+            
+            logger.debug(f"Generated {len(embeddings)} embeddings using model {response.model}")
+            return embeddings
+            
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error in embeddings: {str(e)}", exc_info=True)
             raise
@@ -1,26 +1,89 @@
 """Rate limiting utilities for API calls."""
 
 import time
+import asyncio
 import threading
-from typing import Callable, List
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+from config.app_config import config, LLMConfig
 from config.logging_config import get_module_logger
+from core.llm.timeouts import DeadlineExceeded, current_deadline
 
 # Create a logger for this module
 logger = get_module_logger("rate_limiter")
 
+@dataclass
+class RateLimiterStats:
+    """Counters of a rate limiter."""
+    acquired: int = 0
+    throttled: int = 0  # Acquisitions that had to wait
+    wait_time: float = 0.0  # Seconds waited in total
+    waiting: int = 0  # Callers waiting right now (queue depth)
+    max_waiting: int = 0
+    tokens: int = 0  # Tokens charged, corrected by the reported usage
+
+class _Bucket:
+    """Token bucket refilled continuously up to its capacity.
+    
+    The level may go negative: a reservation takes its capacity at once and
+    the caller sleeps until the bucket would have held it, so later callers
+    queue behind earlier ones without holding a lock while they wait.
+    """
+    
+    def __init__(self, capacity: float, time_period: float):
+        """Initialize full.
+        
+        Args:
+            capacity: Units available per time period (0: unlimited)
+            time_period: Refill period in seconds
+        """
+        self.capacity = capacity
+        self.rate = capacity / time_period if capacity else 0.0
+        self.level = float(capacity)
+        self.updated = time.monotonic()
+    
+    def reserve(self, amount: float, now: float) -> float:
+        """Take capacity, returning the seconds until it is available."""
+        if not self.capacity:
+            return 0.0
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        # A request larger than the bucket waits for a full bucket instead of forever
+        amount = min(amount, self.capacity)
+        wait = max(0.0, (amount - self.level) / self.rate)
+        self.level -= amount
+        return wait
+    
+    def give_back(self, amount: float) -> None:
+        """Return capacity that was reserved but not used."""
+        if self.capacity:
+            self.level = min(self.capacity, self.level + amount)
+
 class RateLimiter:
-    """Thread-safe rate limiter for API calls."""
+    """Token-bucket rate limiter for requests and tokens per time period.
     
-    def __init__(self, max_calls: int, time_period: int = 60):
+    Each call reserves one request and its estimated tokens under a short
+    lock and then sleeps outside it, so waiting callers never block others
+    that could proceed. Once a response reports its usage, settle corrects
+    the token estimate.
+    """
+    
+    def __init__(self, max_calls: int, time_period: int = 60, max_tokens: int = 0, name: str = ""):
         """Initialize with rate limit parameters.
         
         Args:
-            max_calls: Maximum number of calls allowed in the time period
+            max_calls: Maximum number of calls allowed in the time period (0: unlimited)
             time_period: Time period in seconds (default: 60)
+            max_tokens: Maximum number of tokens allowed in the time period (0: unlimited)
+            name: Name in log messages, e.g. the model
         """
         self.max_calls = max_calls
+        self.max_tokens = max_tokens
         self.time_period = time_period
-        self.calls = []
+        self.name = name
+        self.stats = RateLimiterStats()
+        self._requests = _Bucket(max_calls, time_period)
+        self._tokens = _Bucket(max_tokens, time_period)
         self.lock = threading.Lock()
     
     def __call__(self, func: Callable) -> Callable:
@@ -28,7 +91,7 @@ class RateLimiter:
         
         Args:
             func: Function to rate limit
-            
+        
         Returns:
             Rate-limited function
         """
@@ -37,86 +100,166 @@ class RateLimiter:
             return func(*args, **kwargs)
         return wrapper
     
-    def wait_if_needed(self):
-        """Wait if rate limit would be exceeded."""
+    def reserve(self, tokens: int = 0) -> float:
+        """Reserve a request and its tokens.
+        
+        Args:
+            tokens: Estimated tokens of the request
+        
+        Returns:
+            Seconds to wait before making the request
+        """
         with self.lock:
-            now = time.time()
-            
-            # Remove calls outside the time window
-            self.calls = [t for t in self.calls if now - t < self.time_period]
-            
-            # If at capacity, wait until we can make a call
-            if len(self.calls) >= self.max_calls:
-                oldest_call = self.calls[0]
-                sleep_time = self.time_period - (now - oldest_call)
-                if sleep_time > 0:
-                    logger.debug(f"Rate limit reached. Waiting {sleep_time:.2f} seconds")
-                    time.sleep(sleep_time)
-            
-            # Record this call
-            self.calls.append(time.time())
-
-
-class TokenRateLimiter(RateLimiter):
-    """Rate limiter based on token usage rather than call count."""
+            now = time.monotonic()
+            wait = max(self._requests.reserve(1, now), self._tokens.reserve(tokens, now))
+            self.stats.acquired += 1
+            self.stats.tokens += tokens
+            if wait > 0:
+                self.stats.throttled += 1
+                self.stats.wait_time += wait
+            return wait
+    
+    def _cancel(self, tokens: int, wait: float) -> None:
+        """Undo a reservation the caller will not use."""
+        with self.lock:
+            self._requests.give_back(1)
+            self._tokens.give_back(tokens)
+            self.stats.acquired -= 1
+            self.stats.tokens -= tokens
+            self.stats.throttled -= 1
+            self.stats.wait_time -= wait
+    
+    def _check_deadline(self, tokens: int, wait: float) -> None:
+        """Give the reservation back if the caller's deadline passes before it is due.
+        
+        Raises:
+            DeadlineExceeded: If the wait outlasts the current deadline
+        """
+        deadline = current_deadline()
+        remaining = deadline.remaining() if deadline is not None else None
+        if remaining is not None and wait > remaining:
+            self._cancel(tokens, wait)
+            raise DeadlineExceeded(f"Rate limit wait of {wait:.2f}s for {self.name or 'API'} exceeds the deadline")
+    
+    def _waiting(self, delta: int) -> None:
+        """Track the number of callers sleeping on a reservation."""
+        with self.lock:
+            self.stats.waiting += delta
+            self.stats.max_waiting = max(self.stats.max_waiting, self.stats.waiting)
     
-    def __init__(self, max_tokens: int, time_period: int = 60):
-        """Initialize with token rate limit parameters.
+    def acquire(self, tokens: int = 0) -> float:
+        """Wait until a request with this many tokens fits the limits.
         
         Args:
-            max_tokens: Maximum number of tokens allowed in the time period
-            time_period: Time period in seconds (default: 60)
+            tokens: Estimated tokens of the request
+        
+        Returns:
+            Seconds waited
+        
+        Raises:
+            DeadlineExceeded: If the wait outlasts the current deadline
         """
-        super().__init__(max_tokens, time_period)
-        self.tokens = []  # List of (timestamp, token_count) tuples
+        wait = self.reserve(tokens)
+        if wait > 0:
+            self._check_deadline(tokens, wait)
+            logger.debug(f"Rate limit reached for {self.name or 'API'}. Waiting {wait:.2f} seconds")
+            self._waiting(1)
+            try:
+                time.sleep(wait)
+            finally:
+                self._waiting(-1)
+        return wait
     
-    def add_tokens(self, token_count: int):
-        """Record token usage.
+    async def aacquire(self, tokens: int = 0) -> float:
+        """Wait until a request with this many tokens fits the limits, without blocking the event loop.
         
         Args:
-            token_count: Number of tokens used
+            tokens: Estimated tokens of the request
+        
+        Returns:
+            Seconds waited
+        
+        Raises:
+            DeadlineExceeded: If the wait outlasts the current deadline
         """
-        with self.lock:
-            now = time.time()
-            
-            # Remove tokens outside the time window
-            self.tokens = [(t, count) for t, count in self.tokens 
-                          if now - t < self.time_period]
-            
-            # Add current token usage
-            self.tokens.append((now, token_count))
+        wait = self.reserve(tokens)
+        if wait > 0:
+            self._check_deadline(tokens, wait)
+            logger.debug(f"Rate limit reached for {self.name or 'API'}. Waiting {wait:.2f} seconds")
+            self._waiting(1)
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self._waiting(-1)
+        return wait
     
-    def wait_if_needed(self, estimated_tokens: int = 0):
-        """Wait if token rate limit would be exceeded.
+    def wait_if_needed(self, tokens: int = 0):
+        """Wait if rate limit would be exceeded.
         
         Args:
-            estimated_tokens: Estimated tokens for the upcoming request
+            tokens: Estimated tokens for the upcoming request
         """
+        self.acquire(tokens)
+    
+    def settle(self, reserved_tokens: int, used_tokens: int) -> None:
+        """Correct a reservation with the tokens the response reports.
+        
+        Args:
+            reserved_tokens: Tokens reserved for the request
+            used_tokens: Tokens the request actually used
+        """
+        difference = reserved_tokens - used_tokens
+        if not difference:
+            return
         with self.lock:
-            now = time.time()
-            
-            # Remove tokens outside the time window
-            self.tokens = [(t, count) for t, count in self.tokens 
-                          if now - t < self.time_period]
-            
-            # Calculate current token usage
-            current_usage = sum(count for _, count in self.tokens)
-            
-            # If adding estimated tokens would exceed limit, wait
-            if current_usage + estimated_tokens > self.max_calls:
-                # Sort tokens by timestamp (oldest first)
-                self.tokens.sort(key=lambda x: x[0])
-                
-                # Calculate how many tokens need to expire
-                tokens_to_expire = current_usage + estimated_tokens - self.max_calls
-                expired_tokens = 0
-                
-                for i, (timestamp, count) in enumerate(self.tokens):
-                    expired_tokens += count
-                    if expired_tokens >= tokens_to_expire:
-                        # Wait until this token expires
-                        wait_time = timestamp + self.time_period - now
-                        if wait_time > 0:
-                            logger.debug(f"Token limit reached. Waiting {wait_time:.2f} seconds")
-                            time.sleep(wait_time)
-                        break
+            if difference > 0:
+                self._tokens.give_back(difference)
+            else:
+                self._tokens.reserve(-difference, time.monotonic())
+            self.stats.tokens -= difference
+
+def _model_limits(llm_config: LLMConfig) -> Dict[str, Tuple[int, int]]:
+    """Parse the per-model overrides, "model=rpm:tpm" entries separated by commas."""
+    limits = {}
+    for entry in filter(None, (part.strip() for part in (llm_config.model_rate_limits or "").split(","))):
+        try:
+            model, values = entry.split("=", 1)
+            rpm, _, tpm = values.partition(":")
+            limits[model.strip()] = (int(rpm or 0), int(tpm or 0))
+        except ValueError:
+            logger.warning(f"Ignoring malformed model rate limit: {entry}")
+    return limits
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+def get_rate_limiter(model: str, llm_config: Optional[LLMConfig] = None) -> RateLimiter:
+    """Get the process-wide rate limiter of a model.
+
+    Every client calling the model shares its request and token budget.
+    Limits come from the model's entry in model_rate_limits, else from
+    rate_limit_rpm and rate_limit_tpm.
+
+    Args:
+        model: Model name
+        llm_config: LLM configuration the limits are read from when the limiter is created (default: from app config)
+
+    Returns:
+        Shared RateLimiter
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(model)
+        if limiter is None:
+            llm_config = llm_config or config.llm
+            rpm, tpm = _model_limits(llm_config).get(
+                model, (llm_config.rate_limit_rpm, llm_config.rate_limit_tpm)
+            )
+            limiter = RateLimiter(rpm, max_tokens=tpm, name=model)
+            _limiters[model] = limiter
+            logger.debug(f"Created rate limiter for {model} ({rpm} RPM, {tpm or 'unlimited'} TPM)")
+        return limiter
+
+def get_rate_limiters() -> Dict[str, RateLimiter]:
+    """Get the rate limiters created so far, by model."""
+    with _limiters_lock:
+        return dict(_limiters)
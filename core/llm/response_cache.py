@@ -0,0 +1,244 @@
+"""Two-tier cache of LLM responses shared across clients, sessions and processes."""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from config.app_config import config
+from config.logging_config import get_module_logger
+
+# Create a logger for this module
+logger = get_module_logger("response_cache")
+
+@dataclass
+class ResponseCacheStats:
+    """Counters of a response cache."""
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0  # Entries dropped from the memory tier to stay under its cap
+    entries: int = 0  # Entries in the memory tier
+
+    @property
+    def hits(self) -> int:
+        """Lookups served from either tier."""
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+class ResponseCache:
+    """LRU+TTL cache of completion results with a persistent SQLite tier.
+
+    The memory tier is a bounded LRU private to the process; the disk tier
+    is one SQLite file in WAL mode that every process pointed at the same
+    directory reads and writes, so a response computed by one worker or
+    Streamlit session is served to the others. Disk hits are promoted into
+    the memory tier. Keys are stable SHA-256 digests (see make_key), so
+    entries stay valid across restarts.
+
+    The disk tier is bounded by entry count: every few hundred writes the
+    expired entries and the least recently read ones past the cap are
+    deleted. Reads served from memory do not touch the file, so its
+    recency order is approximate.
+    """
+
+    # Writes between two prunes of the disk tier
+    _PRUNE_INTERVAL = 200
+
+    def __init__(self,
+                 max_entries: int = 1000,
+                 ttl: float = 3600,
+                 cache_dir: Optional[str] = ".cache/llm",
+                 max_disk_entries: int = 50000):
+        """Initialize the tiers.
+
+        Args:
+            max_entries: Entries held in memory
+            ttl: Seconds an entry stays valid
+            cache_dir: Directory of the disk tier (None disables it)
+            max_disk_entries: Entries kept on disk
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self.stats = ResponseCacheStats()
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        self.cache_path = None
+        self._conn = None
+        if cache_dir:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                self.cache_path = os.path.join(cache_dir, "responses.sqlite3")
+                self._conn = sqlite3.connect(self.cache_path, check_same_thread=False,
+                                             isolation_level=None, timeout=5.0)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL, last_access REAL NOT NULL"
+                    ") WITHOUT ROWID"
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+            except (OSError, sqlite3.Error) as e:
+                logger.error(f"Error opening response cache in {cache_dir}, using memory only: {str(e)}")
+                self.cache_path = None
+                self._conn = None
+
+        logger.debug(f"Initialized response cache with max_entries={max_entries}, ttl={ttl}, "
+                     f"disk={self.cache_path}")
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, Any]], temperature: float, max_tokens: int) -> str:
+        """Generate a cache key for a request.
+
+        The key is a SHA-256 of a canonical JSON encoding of the request,
+        so it is the same in every process and across restarts.
+
+        Args:
+            model: The model name
+            messages: The messages for the request
+            temperature: The temperature setting
+            max_tokens: The max tokens setting
+
+        Returns:
+            Hex digest
+        """
+        payload = json.dumps(
+            {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens},
+            sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, response: Dict[str, Any], created: float) -> None:
+        """Put an entry in the memory tier, evicting the least recently used past the cap."""
+        self._entries[key] = (response, created)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+        self.stats.entries = len(self._entries)
+
+    def get(self, key: str, ttl: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Look up a response.
+
+        Args:
+            key: Cache key from make_key
+            ttl: Maximum age in seconds (default: the cache's TTL)
+
+        Returns:
+            Cached response or None
+        """
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry[1] < ttl:
+                    self._entries.move_to_end(key)
+                    self.stats.memory_hits += 1
+                    return entry[0]
+                del self._entries[key]
+                self.stats.entries = len(self._entries)
+
+            if self._conn is not None:
+                try:
+                    row = self._conn.execute(
+                        "SELECT response, created FROM responses WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is not None and now - row[1] < ttl:
+                        self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                        response = json.loads(row[0])
+                        self._remember(key, response, row[1])
+                        self.stats.disk_hits += 1
+                        return response
+                except (sqlite3.Error, ValueError) as e:
+                    logger.error(f"Error reading response cache: {str(e)}")
+
+            self.stats.misses += 1
+            return None
+
+    def set(self, key: str, response: Dict[str, Any]) -> None:
+        """Add a response to both tiers.
+
+        Args:
+            key: Cache key from make_key
+            response: JSON-serializable completion result
+        """
+        now = time.time()
+        with self._lock:
+            self._remember(key, response, now)
+
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, created, last_access) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(response, ensure_ascii=False, default=str), now, now)
+                )
+                self._writes += 1
+                if self._writes % self._PRUNE_INTERVAL == 0:
+                    self._prune(now)
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                logger.error(f"Error writing response cache: {str(e)}")
+
+    def _prune(self, now: float) -> None:
+        """Delete expired entries and the least recently read ones past the disk cap."""
+        expired = self._conn.execute("DELETE FROM responses WHERE created <= ?", (now - self.ttl,)).rowcount
+        overflow = self._conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,)
+        ).rowcount
+        logger.debug(f"Pruned response cache: {expired} expired, {overflow} over capacity")
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers."""
+        with self._lock:
+            self._entries.clear()
+            self.stats.entries = 0
+            if self._conn is not None:
+                try:
+                    self._conn.execute("DELETE FROM responses")
+                except sqlite3.Error as e:
+                    logger.error(f"Error clearing response cache: {str(e)}")
+        logger.debug("Cleared response cache")
+
+    def close(self) -> None:
+        """Close the cache file."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+def get_response_cache() -> ResponseCache:
+    """Get the process-wide response cache used by every LLMClient.
+
+    Returns:
+        Shared ResponseCache
+    """
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache(
+                max_entries=config.llm.cache_max_entries,
+                ttl=config.llm.cache_ttl,
+                cache_dir=config.llm.cache_dir or None,
+                max_disk_entries=config.llm.cache_disk_max_entries
+            )
+        return _response_cache
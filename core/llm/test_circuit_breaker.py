@@ -0,0 +1,173 @@
+"""Tests of the per-model circuit breakers and hedged requests."""
+
+import time
+import threading
+import httpx
+import openai
+import pytest
+from config.app_config import LLMConfig
+from core.llm import circuit_breaker
+from core.llm.circuit_breaker import CLOSED, OPEN, HALF_OPEN, CircuitBreaker, get_circuit_breaker, is_service_failure
+from core.llm.llm_client import LLMClient
+from core.llm.timeouts import DeadlineExceeded, current_deadline
+
+class FakeClock:
+    """Stands in for time.monotonic in the breaker module."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", fake)
+    return fake
+
+@pytest.fixture(autouse=True)
+def breakers(monkeypatch):
+    monkeypatch.setattr(circuit_breaker, "_breakers", {})
+
+def _status_error(error_class, status_code):
+    response = httpx.Response(status_code, request=httpx.Request("POST", "https://api.test/v1/chat/completions"))
+    return error_class(f"HTTP {status_code}", response=response, body=None)
+
+def test_errors_of_the_service_count_as_failures():
+    request = httpx.Request("POST", "https://api.test/v1/chat/completions")
+
+    assert is_service_failure(DeadlineExceeded("late"))
+    assert is_service_failure(openai.APITimeoutError(request=request))
+    assert is_service_failure(openai.APIConnectionError(request=request))
+    assert is_service_failure(_status_error(openai.RateLimitError, 429))
+    assert is_service_failure(_status_error(openai.InternalServerError, 503))
+
+    assert not is_service_failure(_status_error(openai.BadRequestError, 400))
+    assert not is_service_failure(_status_error(openai.AuthenticationError, 401))
+    assert not is_service_failure(ValueError("bad arguments"))
+
+def test_circuit_opens_probes_and_closes(clock):
+    breaker = CircuitBreaker("model", failure_threshold=2, reset_timeout=30)
+
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.stats.rejected == 1
+
+    # After the reset timeout a single probe is let through
+    clock.now += 30
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    # A failed probe opens the circuit for another reset timeout
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.stats.opened == 2
+
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+def test_abandoned_probe_is_replaced(clock):
+    breaker = CircuitBreaker("model", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+
+    clock.now += 30
+    assert breaker.allow()
+    clock.now += 10
+    assert not breaker.allow()
+    clock.now += 20
+    assert breaker.allow()
+
+def test_client_errors_do_not_open_the_circuit(clock):
+    breaker = CircuitBreaker("model", failure_threshold=2, reset_timeout=30)
+
+    breaker.record_error(_status_error(openai.InternalServerError, 500))
+    for _ in range(3):
+        breaker.record_error(_status_error(openai.BadRequestError, 400))
+    breaker.record_error(_status_error(openai.RateLimitError, 429))
+
+    # The bad requests reset the run of failures
+    assert breaker.state == CLOSED
+    assert (breaker.stats.failures, breaker.stats.successes) == (2, 0)
+
+    breaker.record_error(openai.APIConnectionError(request=httpx.Request("POST", "https://api.test")))
+    assert breaker.state == OPEN
+
+    # A probe answered with a client error shows the model is up
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_error(_status_error(openai.BadRequestError, 400))
+    assert breaker.state == CLOSED
+
+def _client(**overrides):
+    settings = {"api_key": "test", "circuit_failure_threshold": 2, "circuit_reset_timeout": 30.0}
+    settings.update(overrides)
+    return LLMClient(LLMConfig(**settings))
+
+def test_bad_requests_fall_back_without_counting_against_the_model():
+    client = _client()
+
+    def request(model_name):
+        if model_name == "primary":
+            raise _status_error(openai.BadRequestError, 400)
+        return f"answer from {model_name}"
+
+    for _ in range(3):
+        assert client._with_fallbacks(["primary", "fallback"], request) == ("answer from fallback", "fallback")
+
+    primary = get_circuit_breaker("primary")
+    assert primary.state == CLOSED
+    assert primary.stats.failures == 0
+
+def test_server_errors_open_the_circuit_and_skip_the_model():
+    client = _client()
+    calls = []
+
+    def request(model_name):
+        calls.append(model_name)
+        if model_name == "primary":
+            raise _status_error(openai.InternalServerError, 502)
+        return f"answer from {model_name}"
+
+    for _ in range(3):
+        assert client._with_fallbacks(["primary", "fallback"], request)[1] == "fallback"
+
+    assert calls.count("primary") == 2
+    assert get_circuit_breaker("primary").state == OPEN
+
+def test_slow_request_is_hedged_and_the_loser_cancelled():
+    client = _client(hedge_after=0.05)
+    primary_stopped = threading.Event()
+
+    def request(model_name):
+        if model_name == "fallback":
+            return "answer from fallback"
+        # Slow until the hedge wins and cancels this request
+        deadline = current_deadline()
+        try:
+            while not deadline.cancelled:
+                time.sleep(0.01)
+            deadline.check()
+        finally:
+            primary_stopped.set()
+
+    assert client._with_fallbacks(["primary", "fallback"], request, hedge=True) == ("answer from fallback", "fallback")
+    assert primary_stopped.wait(5)
+
+    fallback = get_circuit_breaker("fallback")
+    assert (fallback.stats.hedges, fallback.stats.hedge_wins, fallback.stats.successes) == (1, 1, 1)
+    # Losing the race is not a failure of the primary model
+    assert get_circuit_breaker("primary").stats.failures == 0
+
+def test_fast_request_is_not_hedged():
+    client = _client(hedge_after=5.0)
+
+    assert client._with_fallbacks(["primary", "fallback"], lambda name: name, hedge=True) == ("primary", "primary")
+    assert get_circuit_breaker("fallback").stats.hedges == 0
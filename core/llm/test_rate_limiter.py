@@ -0,0 +1,90 @@
+"""Tests of the token-bucket rate limiter."""
+
+import pytest
+from config.app_config import LLMConfig
+from core.llm import rate_limiter
+from core.llm.rate_limiter import RateLimiter, get_rate_limiter
+from core.llm.timeouts import Deadline, DeadlineExceeded, deadline_scope
+
+class FakeClock:
+    """Stands in for time.monotonic and time.sleep, sleeping by advancing the clock."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+        self.slept = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", fake)
+    monkeypatch.setattr(rate_limiter.time, "sleep", fake.sleep)
+    return fake
+
+def test_reservations_queue_behind_each_other(clock):
+    limiter = RateLimiter(max_calls=2, time_period=60)
+
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == 0
+    # Each further request waits one more refill interval
+    assert limiter.reserve() == pytest.approx(30)
+    assert limiter.reserve() == pytest.approx(60)
+    assert (limiter.stats.acquired, limiter.stats.throttled) == (4, 2)
+
+    clock.now += 90
+    assert limiter.reserve() == pytest.approx(0)
+
+def test_acquire_sleeps_for_the_token_budget(clock):
+    limiter = RateLimiter(max_calls=0, time_period=60, max_tokens=1000)
+
+    assert limiter.acquire(tokens=800) == 0
+    assert limiter.acquire(tokens=400) == pytest.approx(12)
+    assert clock.slept == [pytest.approx(12)]
+    assert limiter.stats.waiting == 0
+    assert limiter.stats.max_waiting == 1
+
+    # A request larger than the bucket waits for a full bucket instead of forever
+    assert limiter.reserve(tokens=5000) == pytest.approx(60)
+
+def test_settle_corrects_the_token_estimate(clock):
+    limiter = RateLimiter(max_calls=0, time_period=60, max_tokens=1000)
+
+    limiter.reserve(tokens=900)
+    limiter.settle(reserved_tokens=900, used_tokens=100)
+    assert limiter.stats.tokens == 100
+    assert limiter.reserve(tokens=900) == 0
+
+    # Using more than reserved charges the difference
+    limiter.settle(reserved_tokens=900, used_tokens=1200)
+    assert limiter.stats.tokens == 1300
+    assert limiter.reserve(tokens=100) == pytest.approx(24)
+
+def test_wait_past_the_deadline_gives_the_reservation_back(clock):
+    limiter = RateLimiter(max_calls=1, time_period=60)
+    limiter.acquire()
+
+    with deadline_scope(Deadline(10)):
+        with pytest.raises(DeadlineExceeded):
+            limiter.acquire()
+
+    assert clock.slept == []
+    assert (limiter.stats.acquired, limiter.stats.throttled) == (1, 0)
+    # The next caller is not queued behind the abandoned reservation
+    assert limiter.reserve() == pytest.approx(60)
+
+def test_shared_limiters_use_the_model_overrides(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "_limiters", {})
+    llm_config = LLMConfig(api_key="test", rate_limit_rpm=50, model_rate_limits="fast=500:2000, broken")
+
+    fast = get_rate_limiter("fast", llm_config)
+    default = get_rate_limiter("other", llm_config)
+
+    assert (fast.max_calls, fast.max_tokens) == (500, 2000)
+    assert (default.max_calls, default.max_tokens) == (50, 0)
+    assert get_rate_limiter("fast") is fast
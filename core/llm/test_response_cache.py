@@ -0,0 +1,92 @@
+"""Tests of the two-tier LLM response cache."""
+
+import pytest
+from core.llm import response_cache
+from core.llm.response_cache import ResponseCache
+
+class FakeClock:
+    """Stands in for time.time in the cache module."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(response_cache.time, "time", fake)
+    return fake
+
+def _key(text):
+    return ResponseCache.make_key("gpt-test", [{"role": "user", "content": text}], 0.0, 100)
+
+def test_keys_are_stable_and_request_specific():
+    assert _key("hello") == _key("hello")
+    assert _key("hello") != _key("hello!")
+    assert ResponseCache.make_key("gpt-test", [], 0.0, 100) != ResponseCache.make_key("gpt-test", [], 0.5, 100)
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = ResponseCache(ttl=60, cache_dir=None)
+    cache.set(_key("a"), {"content": "A"})
+
+    clock.now += 59
+    assert cache.get(_key("a")) == {"content": "A"}
+
+    # A shorter per-call TTL applies to this lookup only
+    assert cache.get(_key("a"), ttl=30) is None
+
+    cache.set(_key("a"), {"content": "A"})
+    clock.now += 61
+    assert cache.get(_key("a")) is None
+    assert cache.stats.entries == 0
+
+def test_memory_tier_evicts_the_least_recently_used(clock):
+    cache = ResponseCache(max_entries=2, cache_dir=None)
+    cache.set(_key("a"), {"content": "A"})
+    cache.set(_key("b"), {"content": "B"})
+
+    # Reading "a" makes "b" the least recently used
+    assert cache.get(_key("a")) is not None
+    cache.set(_key("c"), {"content": "C"})
+
+    assert cache.get(_key("b")) is None
+    assert cache.get(_key("a")) == {"content": "A"}
+    assert cache.stats.evictions == 1
+    assert cache.stats.entries == 2
+
+def test_disk_tier_is_shared_and_promotes_hits(clock, tmp_path):
+    writer = ResponseCache(cache_dir=str(tmp_path))
+    reader = ResponseCache(cache_dir=str(tmp_path))
+    writer.set(_key("a"), {"content": "A"})
+
+    assert reader.get(_key("a")) == {"content": "A"}
+    assert reader.get(_key("a")) == {"content": "A"}
+    assert (reader.stats.disk_hits, reader.stats.memory_hits) == (1, 1)
+
+    # Expired disk entries are not served
+    clock.now += reader.ttl + 1
+    assert ResponseCache(cache_dir=str(tmp_path)).get(_key("a")) is None
+
+def test_prune_drops_expired_and_overflowing_disk_entries(clock, tmp_path):
+    cache = ResponseCache(ttl=100, cache_dir=str(tmp_path), max_disk_entries=3)
+    cache.set(_key("old"), {"content": "old"})
+    clock.now += 101
+    for i in range(5):
+        clock.now += 1
+        cache.set(_key(str(i)), {"content": str(i)})
+
+    cache._prune(clock.now)
+
+    keys = {row[0] for row in cache._conn.execute("SELECT key FROM responses")}
+    assert keys == {_key("2"), _key("3"), _key("4")}
+
+def test_clear_empties_both_tiers(clock, tmp_path):
+    cache = ResponseCache(cache_dir=str(tmp_path))
+    cache.set(_key("a"), {"content": "A"})
+
+    cache.clear()
+
+    assert cache.get(_key("a")) is None
+    assert ResponseCache(cache_dir=str(tmp_path)).get(_key("a")) is None
@@ -0,0 +1,272 @@
+"""Deadlines and a shared cancellable executor for API calls."""
+
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, List, Optional
+import functools
+from config.app_config import config
+from config.logging_config import get_module_logger
+
+# Create a logger for this module
+logger = get_module_logger("timeouts")
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when work runs past its deadline or its deadline was cancelled."""
+
+class Deadline:
+    """Point in time by which a unit of work must finish.
+
+    A deadline is handed down to every API request made for the work: each
+    request gets the remaining time as its client timeout, and no new
+    request starts once the deadline has passed or been cancelled.
+
+    A deadline with a parent is a slice of the parent's time: it never
+    outlasts the parent and is cancelled with it.
+    """
+
+    def __init__(self, seconds: Optional[float] = None, parent: Optional["Deadline"] = None):
+        """Start the deadline.
+
+        Args:
+            seconds: Time allowed from now (None: no time limit, cancellation only)
+            parent: Deadline of the enclosing work, if any
+        """
+        self.expires_at = time.monotonic() + seconds if seconds is not None else None
+        self.parent = parent
+        self._cancelled = threading.Event()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None without a time limit."""
+        remaining = max(0.0, self.expires_at - time.monotonic()) if self.expires_at is not None else None
+        parent_remaining = self.parent.remaining() if self.parent is not None else None
+        if remaining is None or parent_remaining is None:
+            return parent_remaining if remaining is None else remaining
+        return min(remaining, parent_remaining)
+
+    @property
+    def expired(self) -> bool:
+        """Whether the work must stop: the time is up or the deadline was cancelled."""
+        return self.cancelled or self.remaining() == 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the deadline (or its parent) was cancelled."""
+        return self._cancelled.is_set() or (self.parent is not None and self.parent.cancelled)
+
+    def cancel(self) -> None:
+        """Tell everything working under this deadline to stop."""
+        self._cancelled.set()
+
+    def check(self) -> None:
+        """Raise if the work must stop.
+
+        Raises:
+            DeadlineExceeded: If the deadline passed or was cancelled
+        """
+        if self.cancelled:
+            raise DeadlineExceeded("Deadline cancelled")
+        if self.remaining() == 0.0:
+            raise DeadlineExceeded("Deadline exceeded")
+
+    def timeout(self, default: float) -> float:
+        """Client timeout for the next request: the default, capped by the time left.
+
+        Args:
+            default: Timeout of a request without a deadline
+
+        Returns:
+            Timeout in seconds
+
+        Raises:
+            DeadlineExceeded: If the deadline passed or was cancelled
+        """
+        self.check()
+        remaining = self.remaining()
+        return default if remaining is None else min(default, remaining)
+
+_local = threading.local()
+
+def current_deadline() -> Optional[Deadline]:
+    """Get the deadline of the work running on this thread, if any."""
+    return getattr(_local, "deadline", None)
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """Make a deadline the current one on this thread for the duration of a block.
+
+    Args:
+        deadline: Deadline to apply (None leaves the current one in place)
+    """
+    previous = current_deadline()
+    _local.deadline = deadline or previous
+    try:
+        yield _local.deadline
+    finally:
+        _local.deadline = previous
+
+def remaining_time() -> Optional[float]:
+    """Seconds left before the deadline of the work running on this thread, or None without one."""
+    deadline = current_deadline()
+    return deadline.remaining() if deadline is not None else None
+
+def request_timeout(default: float) -> float:
+    """Client timeout for a request made on this thread, honoring its deadline.
+
+    Args:
+        default: Timeout of a request without a deadline
+
+    Returns:
+        Timeout in seconds
+
+    Raises:
+        DeadlineExceeded: If the current deadline passed or was cancelled
+    """
+    deadline = current_deadline()
+    return deadline.timeout(default) if deadline is not None else default
+
+@dataclass
+class TimeoutStats:
+    """Counters of the shared executor."""
+    submitted: int = 0
+    completed: int = 0
+    timed_out: int = 0  # Callers that stopped waiting at their deadline
+    cancelled: int = 0  # Tasks dropped before they started
+    late: int = 0  # Tasks still running when their caller gave up, finished afterwards
+
+class CancellableExecutor:
+    """Bounded thread pool running API calls under deadlines.
+
+    Waiting callers give up at the deadline; the deadline is then cancelled,
+    so queued tasks are dropped without running and running tasks stop at
+    their next request (whose client timeout never outlives the deadline)
+    instead of leaking a thread per call.
+    """
+
+    def __init__(self, max_workers: int):
+        """Initialize with the pool size.
+
+        Args:
+            max_workers: Threads in the pool
+        """
+        self.max_workers = max_workers
+        self.stats = TimeoutStats()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="api-call")
+        self._lock = threading.Lock()
+
+    def _count(self, field: str) -> None:
+        """Increment a counter."""
+        with self._lock:
+            setattr(self.stats, field, getattr(self.stats, field) + 1)
+
+    def submit(self, func: Callable, *args, deadline: Optional[Deadline] = None, **kwargs) -> Future:
+        """Run a function on the pool under a deadline.
+
+        Args:
+            func: Function to run
+            *args: Positional arguments
+            deadline: Deadline applied while the function runs (default: the caller's current one)
+            **kwargs: Keyword arguments
+
+        Returns:
+            Future of the result
+        """
+        deadline = deadline or current_deadline()
+
+        def task():
+            if deadline is not None and deadline.expired:
+                self._count("cancelled")
+                raise DeadlineExceeded(f"{getattr(func, '__name__', 'Task')} cancelled before it started")
+            with deadline_scope(deadline):
+                result = func(*args, **kwargs)
+            self._count("late" if deadline is not None and deadline.expired else "completed")
+            return result
+
+        self._count("submitted")
+        return self._executor.submit(task)
+
+    def wait(self, future: Future, deadline: Optional[Deadline]) -> Any:
+        """Wait for a future until the deadline, cancelling the work when it passes.
+
+        Args:
+            future: Future from submit
+            deadline: Deadline of the work
+
+        Returns:
+            The result
+
+        Raises:
+            DeadlineExceeded: If the deadline passed first
+        """
+        try:
+            return future.result(timeout=deadline.remaining() if deadline is not None else None)
+        except FuturesTimeoutError:
+            self.abandon(deadline, [future])
+            raise DeadlineExceeded("Deadline exceeded while waiting for result")
+
+    def abandon(self, deadline: Deadline, futures: List[Future]) -> None:
+        """Give up on work whose deadline passed: cancel the deadline and drop queued tasks.
+
+        Args:
+            deadline: Deadline of the work
+            futures: Futures of the work not yet collected
+        """
+        # Count each piece of work once, however many of its waiters give up
+        if not deadline.cancelled:
+            self._count("timed_out")
+        deadline.cancel()
+        for future in futures:
+            if future.cancel():
+                self._count("cancelled")
+
+    def run(self, func: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run a function on the pool and wait for it at most timeout seconds.
+
+        Args:
+            func: Function to run
+            *args: Positional arguments
+            timeout: Seconds to wait (None: no limit)
+            **kwargs: Keyword arguments
+
+        Returns:
+            The result
+
+        Raises:
+            DeadlineExceeded: If the function did not finish in time
+        """
+        deadline = Deadline(timeout)
+        return self.wait(self.submit(func, *args, deadline=deadline, **kwargs), deadline)
+
+_executor: Optional[CancellableExecutor] = None
+_executor_lock = threading.Lock()
+
+def get_executor() -> CancellableExecutor:
+    """Get the process-wide executor for API calls."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = CancellableExecutor(config.llm.executor_workers)
+            logger.debug(f"Created shared API executor with {config.llm.executor_workers} workers")
+        return _executor
+
+def with_timeout(seconds: float) -> Callable:
+    """Decorator that runs a function on the shared executor with a deadline.
+
+    The function and every API request it makes see the deadline, so the
+    work stops when the caller gives up instead of running on unobserved.
+
+    Args:
+        seconds: Time allowed per call
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return get_executor().run(func, *args, timeout=seconds, **kwargs)
+            except DeadlineExceeded:
+                logger.warning(f"{func.__name__} timed out after {seconds} seconds")
+                raise
+        return wrapper
+    return decorator
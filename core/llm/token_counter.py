@@ -0,0 +1,65 @@
+"""Token counting for request budgets."""
+
+import threading
+from typing import Any, Dict, List, Union
+from config.logging_config import get_module_logger
+
+# Create a logger for this module
+logger = get_module_logger("token_counter")
+
+# Tokens the chat format adds around each message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+def count_tokens(text: str) -> int:
+    """Count the tokens of a text with the cl100k_base encoding.
+
+    Falls back to an estimate of four characters per token when tiktoken
+    or its encoding file is unavailable.
+
+    Args:
+        text: Text to count
+
+    Returns:
+        Token count
+    """
+    global _encoding
+    with _encoding_lock:
+        if _encoding is None:
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                logger.warning(f"tiktoken unavailable, estimating token counts: {str(e)}")
+                _encoding = False
+
+    if _encoding:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return max(1, len(text) // 4)
+
+def count_message_tokens(messages: List[Dict[str, Any]]) -> int:
+    """Estimate the prompt tokens of chat messages.
+
+    Args:
+        messages: List of message dictionaries
+
+    Returns:
+        Token count
+    """
+    return sum(count_tokens(str(message.get("content") or "")) + MESSAGE_OVERHEAD_TOKENS
+               for message in messages)
+
+def count_input_tokens(texts: Union[str, List[str]]) -> int:
+    """Count the tokens of an embedding request input.
+
+    Args:
+        texts: Text or list of texts
+
+    Returns:
+        Token count
+    """
+    if isinstance(texts, str):
+        return count_tokens(texts)
+    return sum(count_tokens(text) for text in texts)
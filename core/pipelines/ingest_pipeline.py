@@ -0,0 +1,371 @@
+"""Document ingest pipeline: load, chunk, embed in batches and write to a vector store."""
+
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Callable, Iterable, Iterator, Set, Tuple
+from langchain.schema import Document
+
+from config.app_config import config
+from config.logging_config import get_module_logger
+from core.document_processing.document_loader import DocumentLoader
+from core.embeddings.text_chunker import TextChunkProcessor
+from core.embeddings.chunk_store import document_chunk_id, document_source_id
+
+# Create a logger for this module
+logger = get_module_logger("ingest_pipeline")
+
+@dataclass
+class IngestProgress:
+    """Progress update emitted while ingesting documents."""
+    stage: str  # loading, embedding, writing, complete
+    files_done: int
+    files_total: int
+    chunks_embedded: int
+    chunks_written: int
+    chunks_skipped: int = 0  # Chunks already in the vector store
+    current_file: Optional[str] = None
+    message: str = ""
+    fraction: float = 0.0  # Overall completion in the range 0-1, never decreases
+
+@dataclass
+class IngestResult:
+    """Result of an ingest run."""
+    documents: List[Document] = field(default_factory=list)
+    chunk_count: int = 0
+    skipped_count: int = 0
+    errors: Dict[str, str] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    @property
+    def success(self) -> bool:
+        """Whether every file was ingested."""
+        return not self.errors
+
+class _PendingDocuments:
+    """Documents of an ingest run whose chunks are not all stored yet."""
+
+    def __init__(self):
+        self.documents: Dict[str, Tuple[Document, List[Document], Set[str]]] = {}
+        self.owners: Dict[str, str] = {}
+
+    def add(self, name: str, document: Document, chunks: List[Document]) -> None:
+        """Track a chunked document until all its chunks are stored."""
+        chunk_ids = {chunk.metadata["id"] for chunk in chunks}
+        self.documents[name] = (document, chunks, chunk_ids)
+        self.owners.update((chunk_id, name) for chunk_id in chunk_ids)
+
+    def stored(self, chunk_ids: Iterable[str]) -> List[Tuple[str, Document, List[Document]]]:
+        """Mark chunks as stored.
+
+        Returns:
+            (name, document, chunks) of the documents that are now completely stored
+        """
+        done = []
+        for chunk_id in chunk_ids:
+            name = self.owners.pop(chunk_id, None)
+            if name not in self.documents:
+                continue
+            document, chunks, remaining = self.documents[name]
+            remaining.discard(chunk_id)
+            if not remaining:
+                del self.documents[name]
+                done.append((name, document, chunks))
+        return done
+
+    def failed(self, chunk_ids: Iterable[str]) -> Set[str]:
+        """Stop tracking the documents of chunks that could not be stored.
+
+        Returns:
+            Names of the failed documents
+        """
+        names = {self.owners.pop(chunk_id, None) for chunk_id in chunk_ids} - {None}
+        for name in names:
+            self.documents.pop(name, None)
+        return names
+
+class DocumentIngestPipeline:
+    """Streams documents through chunking and batched embedding into a vector store."""
+
+    def __init__(self,
+                 vector_store: Any,
+                 chunk_processor: Optional[TextChunkProcessor] = None,
+                 document_loader: Optional[DocumentLoader] = None,
+                 batch_size: int = None,
+                 write_batch_size: int = None,
+                 progress_callback: Optional[Callable[[IngestProgress], None]] = None):
+        """Initialize with components.
+
+        Args:
+            vector_store: Vector store to write chunks to
+            chunk_processor: Text chunker (default: TextChunkProcessor from config)
+            document_loader: Document loader (default: DocumentLoader)
+            batch_size: Chunks per embedding request (default: from config)
+            write_batch_size: Embedded chunks buffered per vector store write (default: from config)
+            progress_callback: Called with an IngestProgress after each step
+        """
+        self.vector_store = vector_store
+        self.chunk_processor = chunk_processor or TextChunkProcessor()
+        self.document_loader = document_loader or DocumentLoader()
+        self.batch_size = batch_size or config.vector_store.embedding_batch_size
+        self.write_batch_size = max(write_batch_size or config.vector_store.ingest_write_batch_size, self.batch_size)
+        self.progress_callback = progress_callback
+
+        # Stores exposing their embedding provider accept precomputed embeddings
+        self.embedding_provider = getattr(vector_store, "embedding_provider", None)
+
+        logger.debug(f"Initialized ingest pipeline with batch_size={self.batch_size}, "
+                     f"write_batch_size={self.write_batch_size}")
+
+    def ingest_files(self,
+                     file_paths: List[str],
+                     metadata: Optional[Dict[str, Dict[str, Any]]] = None,
+                     replace: bool = False) -> IngestResult:
+        """Load, chunk, embed and store files.
+
+        Args:
+            file_paths: Paths of files to ingest
+            metadata: Optional extra metadata per file path, ideally with a unique
+                source_id (see document_source_id) next to the display name in source
+            replace: Delete indexed chunks of each file that it no longer contains
+
+        Returns:
+            IngestResult with the stored (unchunked) documents and any per-file errors
+        """
+        metadata = metadata or {}
+        result = IngestResult()
+
+        def load_files() -> Iterator[Tuple[str, Document]]:
+            for file_path in file_paths:
+                load_result = self.document_loader.load_single_document(file_path)
+                if not load_result.success:
+                    logger.warning(f"Error loading {file_path}: {load_result.error_message}")
+                    result.errors[file_path] = load_result.error_message
+                    continue
+
+                document = load_result.document
+                document.metadata.update(metadata.get(file_path, {}))
+                yield file_path, document
+
+        return self._run(load_files(), len(file_paths), result, replace=replace)
+
+    def ingest_documents(self, documents: List[Document], replace: bool = False) -> IngestResult:
+        """Chunk, embed and store already loaded documents.
+
+        Args:
+            documents: Documents to ingest
+            replace: Delete indexed chunks of each document source that it no longer contains
+
+        Returns:
+            IngestResult
+        """
+        items = ((doc.metadata.get("source", f"document_{i}"), doc) for i, doc in enumerate(documents))
+        return self._run(items, len(documents), IngestResult(), replace=replace)
+
+    def _run(self,
+             items: Iterable[Tuple[str, Document]],
+             files_total: int,
+             result: IngestResult,
+             replace: bool = False) -> IngestResult:
+        """Stream documents through chunking, batched embedding and bulk writes.
+
+        A document is only added to the result, and its outdated chunks only
+        deleted, once all its new chunks are stored, so a failed embedding or
+        write leaves the previously indexed version in place.
+
+        Args:
+            items: (name, document) pairs, produced lazily
+            files_total: Number of items expected
+            result: Result to fill in
+            replace: Delete indexed chunks of each source that are not among its new chunks
+
+        Returns:
+            The filled-in result
+        """
+        start_time = time.time()
+        progress = IngestProgress(
+            stage="loading",
+            files_done=0,
+            files_total=files_total,
+            chunks_embedded=0,
+            chunks_written=0
+        )
+
+        pending_chunks: List[Document] = []
+        embedded_chunks: List[Document] = []
+        embedded_vectors: List[List[float]] = []
+        unstored = _PendingDocuments()
+
+        def embed(batch: List[Document]) -> None:
+            try:
+                skipped = self._embed_batch(batch, embedded_chunks, embedded_vectors, progress)
+            except Exception as e:
+                logger.error(f"Error embedding chunks: {str(e)}", exc_info=True)
+                for name in unstored.failed(chunk.metadata["id"] for chunk in batch):
+                    result.errors[name] = f"Failed to embed chunks: {str(e)}"
+                return
+            self._finish(unstored.stored(skipped), result, replace)
+
+        def write() -> None:
+            chunk_ids = [chunk.metadata["id"] for chunk in embedded_chunks]
+            if self._write(embedded_chunks, embedded_vectors, progress):
+                self._finish(unstored.stored(chunk_ids), result, replace)
+            else:
+                for name in unstored.failed(chunk_ids):
+                    result.errors[name] = "Failed to write chunks to vector store"
+
+        for name, document in items:
+            progress.current_file = os.path.basename(name)
+
+            chunks = self._with_chunk_ids(self.chunk_processor.split_documents([document]))
+            if not chunks:
+                result.errors[name] = "No text content to index"
+            else:
+                unstored.add(name, document, chunks)
+                pending_chunks.extend(chunks)
+
+            progress.files_done += 1
+            self._report(progress, "loading", f"Loaded {progress.current_file} ({len(chunks)} chunks)")
+
+            # Embed full batches as soon as they are available
+            while len(pending_chunks) >= self.batch_size:
+                batch, pending_chunks = pending_chunks[:self.batch_size], pending_chunks[self.batch_size:]
+                embed(batch)
+
+            if len(embedded_chunks) >= self.write_batch_size:
+                write()
+                embedded_chunks, embedded_vectors = [], []
+
+        # Flush what is left
+        if pending_chunks:
+            embed(pending_chunks)
+        if embedded_chunks:
+            write()
+
+        result.chunk_count = progress.chunks_written
+        result.skipped_count = progress.chunks_skipped
+        result.elapsed = time.time() - start_time
+
+        progress.current_file = None
+        self._report(progress, "complete",
+                     f"Indexed {result.chunk_count} chunks from {len(result.documents)} documents")
+
+        logger.info(f"Ingested {len(result.documents)} documents ({result.chunk_count} new chunks, "
+                    f"{result.skipped_count} already indexed) in {result.elapsed:.2f}s with {len(result.errors)} errors")
+        return result
+
+    @staticmethod
+    def _with_chunk_ids(chunks: List[Document]) -> List[Document]:
+        """Give each chunk its content-derived ID, keeping the file's own ID as document_id.
+
+        Chunks copy their file's metadata, so an ID set on the file (e.g.
+        doc_3 by the upload sidebar) would otherwise be shared by all of them.
+        """
+        for chunk in chunks:
+            chunk_id = document_chunk_id(chunk)
+            if chunk.metadata.get("id") not in (None, chunk_id):
+                chunk.metadata.setdefault("document_id", chunk.metadata["id"])
+            chunk.metadata["id"] = chunk_id
+        return chunks
+
+    def _finish(self,
+                done: List[Tuple[str, Document, List[Document]]],
+                result: IngestResult,
+                replace: bool) -> None:
+        """Record documents whose chunks are all stored, replacing their outdated chunks."""
+        for name, document, chunks in done:
+            if replace:
+                self._remove_stale_chunks(name, chunks, result)
+            result.documents.append(document)
+
+    def _remove_stale_chunks(self, name: str, chunks: List[Document], result: IngestResult) -> None:
+        """Delete chunks indexed for a re-ingested source that it no longer contains.
+
+        Sources are matched by identity (see document_source_id), not display
+        name. Unchanged chunks keep their content-derived IDs and are left in place.
+        """
+        if not hasattr(self.vector_store, "delete_documents"):
+            return
+
+        sources = {document_source_id(chunk.metadata) for chunk in chunks} - {None}
+        keep_ids = [document_chunk_id(chunk) for chunk in chunks]
+        for source in sources:
+            if not self.vector_store.delete_documents(source=source, keep_ids=keep_ids):
+                result.errors[name] = "Failed to remove outdated chunks from vector store"
+
+    def _embed_batch(self,
+                     batch: List[Document],
+                     embedded_chunks: List[Document],
+                     embedded_vectors: List[List[float]],
+                     progress: IngestProgress) -> List[str]:
+        """Embed one batch of chunks with a single embedding request.
+
+        Chunks the store already holds are dropped first, so re-ingesting
+        unchanged files makes no embedding calls. Stores that do not expose
+        an embedding provider embed on write instead.
+
+        Returns:
+            IDs of the chunks skipped because the store already holds them
+        """
+        skipped = []
+        if hasattr(self.vector_store, "existing_ids"):
+            ids = [document_chunk_id(chunk) for chunk in batch]
+            existing = self.vector_store.existing_ids(ids)
+            if existing:
+                skipped = [chunk_id for chunk_id in ids if chunk_id in existing]
+                batch = [chunk for chunk, chunk_id in zip(batch, ids) if chunk_id not in existing]
+                progress.chunks_skipped += len(skipped)
+            if not batch:
+                self._report(progress, "embedding", f"Skipped {progress.chunks_skipped} already indexed chunks")
+                return skipped
+
+        if self.embedding_provider is not None:
+            vectors = self.embedding_provider.embed_documents([chunk.page_content for chunk in batch])
+            embedded_vectors.extend(vectors)
+
+        embedded_chunks.extend(batch)
+        progress.chunks_embedded += len(batch)
+        self._report(progress, "embedding", f"Embedded {progress.chunks_embedded} chunks")
+        return skipped
+
+    def _write(self,
+               chunks: List[Document],
+               vectors: List[List[float]],
+               progress: IngestProgress) -> bool:
+        """Write embedded chunks to the vector store in one call.
+
+        Returns:
+            True if the chunks were stored
+        """
+        if vectors:
+            success = self.vector_store.add_documents(chunks, embeddings=vectors)
+        else:
+            success = self.vector_store.add_documents(chunks)
+
+        if not success:
+            self._report(progress, "writing", f"Failed to write {len(chunks)} chunks")
+            return False
+
+        progress.chunks_written += len(chunks)
+        self._report(progress, "writing", f"Stored {progress.chunks_written} chunks")
+        return True
+
+    def _report(self, progress: IngestProgress, stage: str, message: str) -> None:
+        """Send a progress update to the callback, if any."""
+        progress.stage = stage
+        progress.message = message
+        
+        # Chunk totals are unknown while streaming, so weight chunk progress by files loaded
+        if stage == "complete":
+            progress.fraction = 1.0
+        elif progress.files_total:
+            loaded = progress.files_done / progress.files_total
+            seen = progress.chunks_embedded + progress.chunks_skipped
+            written = (progress.chunks_written + progress.chunks_skipped) / seen if seen else 0.0
+            progress.fraction = max(progress.fraction, min(0.99, 0.5 * loaded + 0.5 * loaded * written))
+
+        if self.progress_callback:
+            try:
+                self.progress_callback(progress)
+            except Exception as e:
+                logger.warning(f"Error in ingest progress callback: {str(e)}")
@@ -0,0 +1,46 @@
+# core/pipelines/test_ingest_pipeline.py
+
+from langchain.schema import Document
+from core.embeddings.vector_store import FAISSVectorStore
+from core.embeddings.test_index_segments import FakeEmbeddings
+from core.pipelines.ingest_pipeline import DocumentIngestPipeline
+
+def _iep(student, version="v1"):
+    text = "\n\n".join(f"{student} goal {i} ({version})" for i in range(3))
+    return Document(page_content=text, metadata={"source": "IEP.pdf", "source_id": f"upload/{student}/IEP.pdf"})
+
+def _sources(store):
+    return sorted({doc.page_content.split(" goal")[0] for doc in store.search("goal", k=20)})
+
+def test_files_with_the_same_name_do_not_replace_each_other(tmp_path):
+    store = FAISSVectorStore(index_dir=str(tmp_path), embedding_provider=FakeEmbeddings())
+    pipeline = DocumentIngestPipeline(store, batch_size=2)
+
+    first = pipeline.ingest_documents([_iep("alice")], replace=True)
+    second = pipeline.ingest_documents([_iep("bob")], replace=True)
+
+    assert first.success and second.success
+    assert _sources(store) == ["alice", "bob"]
+
+def test_new_version_replaces_the_old_one(tmp_path):
+    store = FAISSVectorStore(index_dir=str(tmp_path), embedding_provider=FakeEmbeddings())
+    pipeline = DocumentIngestPipeline(store, batch_size=2)
+    pipeline.ingest_documents([_iep("alice")], replace=True)
+
+    result = pipeline.ingest_documents([_iep("alice", "v2")], replace=True)
+
+    assert result.success
+    assert {doc.page_content.split("(")[-1] for doc in store.search("alice goal", k=20)} == {"v2)"}
+
+def test_failed_write_keeps_the_indexed_version(tmp_path, monkeypatch):
+    store = FAISSVectorStore(index_dir=str(tmp_path), embedding_provider=FakeEmbeddings())
+    pipeline = DocumentIngestPipeline(store, batch_size=2)
+    pipeline.ingest_documents([_iep("alice")], replace=True)
+
+    monkeypatch.setattr(store, "add_documents", lambda chunks, embeddings=None: False)
+    result = pipeline.ingest_documents([_iep("alice", "v2")], replace=True)
+
+    assert result.errors == {"IEP.pdf": "Failed to write chunks to vector store"}
+    assert result.documents == []
+    assert len(store.search("alice goal", k=20)) > 0
+    assert all("(v1)" in doc.page_content for doc in store.search("alice goal", k=20))
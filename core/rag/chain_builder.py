@@ -5,8 +5,9 @@ from langchain.schema import Document
 from langchain_openai import ChatOpenAI
 from config.app_config import config
 from config.logging_config import get_module_logger
-from core.embeddings.vector_store_factory import VectorStoreFactory
+from core.embeddings.store_registry import VectorStoreRegistry
 from core.rag.rag_pipeline import RAGPipeline
+from core.rag.semantic_cache import answer_scope, get_semantic_cache
 
 # Create a logger for this module
 logger = get_module_logger("rag_chain_builder")
@@ -31,8 +32,8 @@ class RAGChainBuilder:
             api_key: OpenAI API key (default: from config)
             model_name: Model name (default: from config)
             temperature: Temperature (default: from config)
-            vector_store: Vector store instance (created if not provided)
-            store_type: Type of vector store to create if not provided
+            vector_store: Vector store instance (shared registry instance if not provided)
+            store_type: Type of vector store to use if not provided
             k_documents: Number of documents to retrieve
             prompt_template: Custom prompt template
             observability_callbacks: List of callables for observability
@@ -47,22 +48,28 @@ class RAGChainBuilder:
             openai_api_key=api_key or config.llm.api_key
         )
         
-        # Create or use vector store
+        # Use the process-wide store so pipelines do not each load the index
         if not vector_store:
-            vector_store = VectorStoreFactory.create_vector_store(store_type=store_type)
+            vector_store = VectorStoreRegistry.get_vector_store(store_type=store_type)
         
         # Get retriever from vector store
         retriever = vector_store.as_retriever(
             search_kwargs={"k": k_documents or config.vector_store.similarity_top_k}
         )
         
+        # Answers are reused only by pipelines with the same settings over the same index
+        semantic_cache = get_semantic_cache(vector_store, scope=answer_scope(
+            llm.model_name, llm.temperature, prompt_template, k_documents or config.vector_store.similarity_top_k
+        ))
+        
         # Create RAG pipeline
         rag_pipeline = RAGPipeline(
             llm=llm,
             retriever=retriever,
             prompt_template=prompt_template,
             k_documents=k_documents,
-            observability_callbacks=observability_callbacks or []
+            observability_callbacks=observability_callbacks or [],
+            semantic_cache=semantic_cache
         )
         
         logger.info(f"Built RAG pipeline with model {model_name or config.llm.model_name}")
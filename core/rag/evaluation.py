@@ -62,7 +62,9 @@ class RAGEvaluator:
                        query: str,
                        rag_pipeline: Any,
                        ground_truth: Optional[str] = None,
-                       expected_doc_ids: Optional[List[str]] = None) -> EvaluationResult:
+                       expected_doc_ids: Optional[List[str]] = None,
+                       retrieved_docs: Optional[List[Document]] = None,
+                       retrieval_time: Optional[float] = None) -> EvaluationResult:
         """Evaluate a single query.
         
         Args:
@@ -70,6 +72,8 @@ class RAGEvaluator:
             rag_pipeline: The RAG pipeline to evaluate
             ground_truth: Optional ground truth answer
             expected_doc_ids: Optional list of expected document IDs
+            retrieved_docs: Optional documents already retrieved for the query
+            retrieval_time: Time spent retrieving retrieved_docs
             
         Returns:
             Evaluation result
@@ -81,13 +85,17 @@ class RAGEvaluator:
         start_time = time.time()
         
         # Track retrieval time
-        retrieval_start = time.time()
-        context, source_docs = rag_pipeline._retrieval_step(query)
-        retrieval_time = time.time() - retrieval_start
-        
-        # Track generation time
+        if retrieved_docs is None:
+            retrieval_start = time.time()
+            context, source_docs = rag_pipeline._retrieval_step(query)
+            retrieval_time = time.time() - retrieval_start
+        else:
+            source_docs = retrieved_docs
+            retrieval_time = retrieval_time or 0.0
+        
+        # Track generation time, reusing the retrieved documents
         generation_start = time.time()
-        result = rag_pipeline.run(query)
+        result = rag_pipeline.run(query, documents=source_docs)
         generation_time = time.time() - generation_start
         
         # Calculate total time
@@ -140,20 +148,50 @@ class RAGEvaluator:
                          queries: List[str],
                          rag_pipeline: Any,
                          ground_truths: Optional[List[str]] = None,
-                         expected_doc_ids: Optional[List[List[str]]] = None) -> List[EvaluationResult]:
+                         expected_doc_ids: Optional[List[List[str]]] = None,
+                         vector_store: Optional[Any] = None,
+                         k: Optional[int] = None) -> List[EvaluationResult]:
         """Evaluate a dataset of queries.
         
+        Documents for all queries are retrieved with one batched search of
+        the pipeline's vector store, with the k, min_score and filter of its
+        retriever so evaluated retrieval matches production retrieval. The
+        batch time is split evenly across the queries. Without a store
+        supporting search_batch, each query is retrieved on its own.
+        
         Args:
             queries: List of queries to evaluate
             rag_pipeline: The RAG pipeline to evaluate
             ground_truths: Optional list of ground truth answers
             expected_doc_ids: Optional list of lists of expected document IDs
+            vector_store: Vector store supporting search_batch (default: the store behind the pipeline's retriever)
+            k: Number of documents to retrieve per query (default: the retriever's k, else the pipeline's k_documents)
             
         Returns:
             List of evaluation results
         """
         results = []
         
+        # Retrieve documents for every query at once, with the retriever's settings
+        retriever = getattr(rag_pipeline, "retriever", None)
+        vector_store = vector_store or getattr(retriever, "store", None)
+        batch_docs = None
+        retrieval_time = None
+        if vector_store is not None and hasattr(vector_store, "search_batch") and queries:
+            k = k or getattr(retriever, "k", None) or getattr(rag_pipeline, "k_documents", None)
+            search_kwargs = {"min_score": getattr(retriever, "min_score", None)}
+            # Not every store supports metadata filters, so only pass one if set
+            if getattr(retriever, "filter", None) is not None:
+                search_kwargs["filter"] = retriever.filter
+            retrieval_start = time.time()
+            try:
+                batch_docs = vector_store.search_batch(queries, k=k, **search_kwargs)
+                retrieval_time = (time.time() - retrieval_start) / len(queries)
+                logger.info(f"Retrieved documents for {len(queries)} queries in {time.time() - retrieval_start:.2f}s")
+            except Exception as e:
+                logger.warning(f"Batch retrieval failed, retrieving per query: {str(e)}")
+                batch_docs = None
+        
         # Process each query
         for i, query in enumerate(queries):
             # Get corresponding ground truth and expected docs if available
@@ -165,7 +203,9 @@ class RAGEvaluator:
                 query=query,
                 rag_pipeline=rag_pipeline,
                 ground_truth=ground_truth,
-                expected_doc_ids=expected_docs
+                expected_doc_ids=expected_docs,
+                retrieved_docs=batch_docs[i] if batch_docs is not None else None,
+                retrieval_time=retrieval_time
             )
             
             results.append(result)
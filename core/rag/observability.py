@@ -178,6 +178,105 @@ class RagObservability:
         
         return summary
     
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get the counters of the shared in-memory embedding cache.
+        
+        Returns:
+            Dictionary with hits, misses, evictions, entries, bytes and hit rate
+        """
+        from core.embeddings.embedding_manager import get_memory_cache
+        
+        memory_cache = get_memory_cache()
+        if memory_cache is None:
+            return {"error": "Embedding memory cache is not enabled"}
+        
+        stats = memory_cache.stats
+        return {
+            "hits": stats.hits,
+            "misses": stats.misses,
+            "evictions": stats.evictions,
+            "entries": stats.entries,
+            "bytes": stats.bytes,
+            "hit_rate": stats.hit_rate
+        }
+    
+    def get_response_cache_stats(self) -> Dict[str, Any]:
+        """Get the counters of the shared LLM response cache.
+        
+        Returns:
+            Dictionary with memory and disk hits, misses, evictions, entries and hit rate
+        """
+        from core.llm.response_cache import get_response_cache
+        
+        stats = get_response_cache().stats
+        return {
+            "hits": stats.hits,
+            "memory_hits": stats.memory_hits,
+            "disk_hits": stats.disk_hits,
+            "misses": stats.misses,
+            "evictions": stats.evictions,
+            "entries": stats.entries,
+            "hit_rate": stats.hit_rate
+        }
+    
+    def get_timeout_stats(self) -> Dict[str, Any]:
+        """Get the counters of the shared API executor, including timed-out work.
+        
+        Returns:
+            Dictionary with submitted, completed, timed out, cancelled and late task counts
+        """
+        from core.llm.timeouts import get_executor
+        
+        stats = get_executor().stats
+        return {
+            "submitted": stats.submitted,
+            "completed": stats.completed,
+            "timed_out": stats.timed_out,
+            "cancelled": stats.cancelled,
+            "late": stats.late
+        }
+    
+    def get_rate_limit_stats(self) -> Dict[str, Any]:
+        """Get the counters of the per-model rate limiters, including their queue depth.
+        
+        Returns:
+            Dictionary of model -> acquired, throttled, wait time, waiting, max waiting and tokens
+        """
+        from core.llm.rate_limiter import get_rate_limiters
+        
+        return {
+            model: {
+                "acquired": limiter.stats.acquired,
+                "throttled": limiter.stats.throttled,
+                "wait_time": limiter.stats.wait_time,
+                "waiting": limiter.stats.waiting,
+                "max_waiting": limiter.stats.max_waiting,
+                "tokens": limiter.stats.tokens
+            }
+            for model, limiter in get_rate_limiters().items()
+        }
+
+    def get_circuit_breaker_stats(self) -> Dict[str, Any]:
+        """Get the state and counters of the per-model circuit breakers.
+
+        Returns:
+            Dictionary of model -> state, successes, failures, rejected, opened, hedges and hedge wins
+        """
+        from core.llm.circuit_breaker import get_circuit_breakers
+
+        return {
+            model: {
+                "state": breaker.state,
+                "successes": breaker.stats.successes,
+                "failures": breaker.stats.failures,
+                "rejected": breaker.stats.rejected,
+                "opened": breaker.stats.opened,
+                "hedges": breaker.stats.hedges,
+                "hedge_wins": breaker.stats.hedge_wins
+            }
+            for model, breaker in get_circuit_breakers().items()
+        }
+
     def clear_timing_data(self):
         """Clear all timing data."""
         self.timings = {}
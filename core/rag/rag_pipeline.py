@@ -1,14 +1,20 @@
 # core/rag/rag_pipeline.py
 
-from typing import List, Dict, Any, Optional, Callable, Union, Tuple
+import time
+from typing import List, Dict, Any, Optional, Callable, Union, Tuple, Iterator
 from langchain.schema import Document
 from config.app_config import config
 from config.logging_config import get_module_logger
 from core.llm.llm_client import LLMClient
+from core.embeddings.store_retriever import ScoredStoreRetriever
+from core.rag.semantic_cache import CachedAnswer, SemanticAnswerCache
 
 # Create a logger for this module
 logger = get_module_logger("rag_pipeline")
 
+# Answer returned when generation fails; never cached
+GENERATION_ERROR_MESSAGE = "Sorry, I encountered an error while generating a response."
+
 class RAGPipeline:
     """RAG pipeline with standardized components and observability."""
     
@@ -17,7 +23,8 @@ class RAGPipeline:
                  retriever: Optional[Any] = None,
                  prompt_template: Optional[str] = None,
                  k_documents: int = None,
-                 observability_callbacks: List[Callable] = None):
+                 observability_callbacks: List[Callable] = None,
+                 semantic_cache: Optional[SemanticAnswerCache] = None):
         """Initialize with components.
         
         Args:
@@ -26,6 +33,7 @@ class RAGPipeline:
             prompt_template: Prompt template for RAG
             k_documents: Number of documents to retrieve
             observability_callbacks: Callbacks for pipeline observability
+            semantic_cache: Cache answering near-duplicate questions (see get_semantic_cache)
         """
         # Initialize LLM
         self.llm = llm
@@ -42,6 +50,9 @@ class RAGPipeline:
         # Initialize observability callbacks
         self.observability_callbacks = observability_callbacks or []
         
+        # Answers of earlier questions over the same index
+        self.semantic_cache = semantic_cache
+        
         # Define format docs function
         self.format_docs = lambda docs: "\n\n".join(doc.page_content for doc in docs)
         
@@ -70,9 +81,10 @@ class RAGPipeline:
         # Create a simple callable chain instead of using the pipe operator
         # This avoids compatibility issues with different LangChain versions
         
-        def chain_runner(query):
-            # Step 1: Retrieve context and documents
-            context, docs = self._retrieval_step(query)
+        def chain_runner(query, context=None):
+            # Step 1: Retrieve context and documents unless already retrieved
+            if context is None:
+                context, docs = self._retrieval_step(query)
             
             # Step 2: Format prompt with context and question
             prompt = self._prompt_step({"context": context, "question": query})
@@ -84,11 +96,12 @@ class RAGPipeline:
         
         self.rag_chain = chain_runner
     
-    def _retrieval_step(self, query: str) -> Tuple[str, List[Document]]:
+    def _retrieval_step(self, query: str, query_vector: Optional[Any] = None) -> Tuple[str, List[Document]]:
         """Retrieval step with observability.
         
         Args:
             query: User query
+            query_vector: Query embedding from the semantic cache lookup, reused instead of embedding again
             
         Returns:
             Tuple of (formatted context, source documents)
@@ -101,7 +114,9 @@ class RAGPipeline:
         try:
             # Retrieve documents using the correct method based on retriever type
             # VectorStoreRetriever has a get_relevant_documents method, not callable directly
-            if hasattr(self.retriever, 'get_relevant_documents'):
+            if query_vector is not None and isinstance(self.retriever, ScoredStoreRetriever):
+                docs = self.retriever.invoke(query, query_vector=list(query_vector))
+            elif hasattr(self.retriever, 'get_relevant_documents'):
                 docs = self.retriever.get_relevant_documents(query)
             else:
                 # Fallback for other retriever types
@@ -185,13 +200,195 @@ class RAGPipeline:
             
         except Exception as e:
             logger.error(f"Error in generation step: {str(e)}", exc_info=True)
-            return "Sorry, I encountered an error while generating a response."
+            return GENERATION_ERROR_MESSAGE
+    
+    def _generation_stream(self, prompt: str) -> Iterator[str]:
+        """Streaming generation step with observability.
+        
+        LLMs without a streaming interface produce the whole response as
+        one piece.
+        
+        Args:
+            prompt: Formatted prompt
+            
+        Yields:
+            Pieces of the generated response
+        """
+        pieces = []
+        streaming = True
+        try:
+            if hasattr(self.llm, 'stream_chat_completion'):
+                # Custom LLMClient
+                stream = self.llm.stream_chat_completion(
+                    messages=[{"role": "user", "content": prompt}]
+                )
+            elif hasattr(self.llm, 'stream'):
+                # Native LangChain ChatModel
+                stream = (
+                    chunk.content if hasattr(chunk, "content") else str(chunk)
+                    for chunk in self.llm.stream(prompt)
+                )
+            else:
+                # The generation step reports to the callbacks itself
+                streaming = False
+                stream = iter([self._generation_step(prompt)])
+                
+            for piece in stream:
+                if piece:
+                    pieces.append(piece)
+                    yield piece
+            
+        except Exception as e:
+            logger.error(f"Error in generation step: {str(e)}", exc_info=True)
+            if not pieces:
+                pieces.append(GENERATION_ERROR_MESSAGE)
+                yield GENERATION_ERROR_MESSAGE
+            return
+        
+        # Call observability callbacks for generation step
+        if streaming:
+            for callback in self.observability_callbacks:
+                callback(step="generation", input=prompt, output="".join(pieces))
+    
+    def _cached_response(self, query: str, cached: CachedAnswer, start_time: float) -> Dict[str, Any]:
+        """Build the response to a query answered from the semantic cache.
+        
+        Args:
+            query: User query
+            cached: Cache hit
+            start_time: Start of the run
+            
+        Returns:
+            Response dictionary like run returns
+        """
+        for callback in self.observability_callbacks:
+            callback(step="semantic_cache", input=query, output=cached.question)
+        
+        source_docs = cached.response["source_documents"]
+        return {
+            "result": cached.response["result"],
+            "source_documents": source_docs,
+            "execution_time": time.time() - start_time,
+            "metadata": {
+                "query": query,
+                "num_docs": len(source_docs) if source_docs else 0,
+                "semantic_cache": {"question": cached.question, "similarity": cached.similarity}
+            }
+        }
+    
+    def _cache_answer(self, query: str, response: Dict[str, Any], vector: Any) -> None:
+        """Store a successful answer in the semantic cache.
+        
+        Args:
+            query: User query
+            response: Pipeline response
+            vector: Query embedding from the cache lookup
+        """
+        if self.semantic_cache is None or not response["result"] or response["result"] == GENERATION_ERROR_MESSAGE:
+            return
+        # Answers without context, e.g. after a failed retrieval, must not be served to later questions
+        if not response["source_documents"]:
+            return
+        self.semantic_cache.store(query, {
+            "result": response["result"],
+            "source_documents": response["source_documents"]
+        }, vector)
+    
+    def stream(self, query: str, documents: Optional[List[Document]] = None) -> Iterator[Dict[str, Any]]:
+        """Run the RAG pipeline on a query, streaming the answer as it is generated.
+        
+        Events are dictionaries with a "type":
+        - "sources": the retrieved documents, in "source_documents", sent before generation starts
+        - "token": the next piece of the answer, in "content"
+        - "end": the same response dictionary run returns
+        
+        Args:
+            query: User query
+            documents: Optional already retrieved documents (skips the retrieval step and the semantic cache)
+            
+        Yields:
+            Pipeline events
+        """
+        try:
+            logger.info(f"Streaming query: {query[:50]}...")
+            
+            # Call observability callbacks for run start
+            for callback in self.observability_callbacks:
+                callback(step="start", input=query, output=None)
+            
+            start_time = time.time()
+            
+            # Answer near-duplicates of earlier questions without retrieval or generation
+            cached, query_vector = None, None
+            if documents is None and self.semantic_cache is not None:
+                cached, query_vector = self.semantic_cache.lookup(query)
+            if cached is not None:
+                response = self._cached_response(query, cached, start_time)
+                response["metadata"]["time_to_first_token"] = response["execution_time"]
+                yield {"type": "sources", "source_documents": response["source_documents"]}
+                yield {"type": "token", "content": response["result"]}
+                for callback in self.observability_callbacks:
+                    callback(step="end", input=query, output=response)
+                yield {"type": "end", **response}
+                return
+            
+            if documents is None:
+                context, source_docs = self._retrieval_step(query, query_vector)
+            else:
+                context, source_docs = self.format_docs(documents), documents
+            
+            # Sources can be shown while the answer is still being generated
+            yield {"type": "sources", "source_documents": source_docs}
+            
+            prompt = self._prompt_step({"context": context, "question": query})
+            
+            pieces = []
+            first_token_time = None
+            for piece in self._generation_stream(prompt):
+                if first_token_time is None:
+                    first_token_time = time.time() - start_time
+                pieces.append(piece)
+                yield {"type": "token", "content": piece}
+            
+            execution_time = time.time() - start_time
+            response = {
+                "result": "".join(pieces),
+                "source_documents": source_docs,
+                "execution_time": execution_time,
+                "metadata": {
+                    "query": query,
+                    "num_docs": len(source_docs) if source_docs else 0,
+                    "time_to_first_token": first_token_time
+                }
+            }
+            
+            # Call observability callbacks for run end
+            for callback in self.observability_callbacks:
+                callback(step="end", input=query, output=response)
+            
+            logger.info(f"Streamed query in {execution_time:.2f}s (first token after "
+                        f"{first_token_time or 0.0:.2f}s) with {len(source_docs)} documents")
+            
+            if documents is None:
+                self._cache_answer(query, response, query_vector)
+            
+            yield {"type": "end", **response}
+            
+        except Exception as e:
+            logger.error(f"Error in RAG pipeline: {str(e)}", exc_info=True)
+            yield {
+                "type": "end",
+                "result": f"Error processing query: {str(e)}",
+                "source_documents": [],
+                "error": str(e)
+            }
     
-    def run(self, query: str) -> Dict[str, Any]:
+    def run(self, query: str, documents: Optional[List[Document]] = None) -> Dict[str, Any]:
         """Run the RAG pipeline on a query.
         
         Args:
             query: User query
+            documents: Optional already retrieved documents (skips the retrieval step and the semantic cache)
             
         Returns:
             Dictionary with response and additional info
@@ -205,16 +402,30 @@ class RAGPipeline:
                 callback(step="start", input=query, output=None)
             
             # Start timers and metrics
-            start_time = __import__('time').time()
+            start_time = time.time()
+            
+            # Answer near-duplicates of earlier questions without retrieval or generation
+            query_vector = None
+            if documents is None and self.semantic_cache is not None:
+                cached, query_vector = self.semantic_cache.lookup(query)
+                if cached is not None:
+                    response = self._cached_response(query, cached, start_time)
+                    for callback in self.observability_callbacks:
+                        callback(step="end", input=query, output=response)
+                    logger.info(f"Answered query from the semantic cache (similarity {cached.similarity:.3f})")
+                    return response
             
             # Run the retrieval step separately to get documents
-            context, source_docs = self._retrieval_step(query)
+            if documents is None:
+                context, source_docs = self._retrieval_step(query, query_vector)
+            else:
+                context, source_docs = self.format_docs(documents), documents
             
-            # Run the chain
-            result = self.rag_chain(query)
+            # Run the chain on the retrieved context
+            result = self.rag_chain(query, context=context)
             
             # Calculate execution time
-            execution_time = __import__('time').time() - start_time
+            execution_time = time.time() - start_time
             
             # Create response
             response = {
@@ -234,6 +445,9 @@ class RAGPipeline:
             # Log completion
             logger.info(f"Completed query in {execution_time:.2f}s with {len(source_docs)} documents")
             
+            if documents is None:
+                self._cache_answer(query, response, query_vector)
+            
             return response
             
         except Exception as e:
@@ -260,6 +474,8 @@ class RAGPipeline:
             retriever: Retriever object
         """
         self.retriever = retriever
+        # Cached answers came from the previous retriever
+        self.semantic_cache = None
         logger.debug("Updated retriever in RAG pipeline")
     
     def set_llm(self, llm: Any):
@@ -269,4 +485,6 @@ class RAGPipeline:
             llm: Language model
         """
         self.llm = llm
+        # Cached answers came from the previous LLM
+        self.semantic_cache = None
         logger.debug(f"Updated LLM in RAG pipeline: {type(llm).__name__}")
\ No newline at end of file
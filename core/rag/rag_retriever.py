@@ -4,7 +4,7 @@ from typing import List, Dict, Any, Optional, Callable, Union
 from langchain.schema import Document
 from config.app_config import config
 from config.logging_config import get_module_logger
-from core.embeddings.vector_store_factory import VectorStoreFactory
+from core.embeddings.store_registry import VectorStoreRegistry
 
 # Create a logger for this module
 logger = get_module_logger("rag_retriever")
@@ -29,13 +29,13 @@ class HybridRetriever:
         Args:
             vector_store: Any vector store implementation
             k_documents: Number of documents to retrieve
-            store_type: Type of vector store to create if one isn't provided
+            store_type: Type of vector store to use if one isn't provided
         """
         if vector_store:
             self.vector_store = vector_store
         else:
-            # Use the factory to create a vector store
-            self.vector_store = VectorStoreFactory.create_vector_store(store_type=store_type)
+            # Share the process-wide store for this index
+            self.vector_store = VectorStoreRegistry.get_vector_store(store_type=store_type)
             
         self.k_documents = k_documents or config.vector_store.similarity_top_k
         logger.debug(f"Initialized hybrid retriever with k={self.k_documents}")
@@ -111,7 +111,7 @@ class WebAugmentedRetriever(HybridRetriever):
             k_documents: Number of documents to retrieve
             web_search_enabled: Whether to enable web search
             max_web_results: Maximum number of web search results
-            store_type: Type of vector store to create if one isn't provided
+            store_type: Type of vector store to use if one isn't provided
         """
         super().__init__(vector_store, k_documents, store_type)
         self.web_search_enabled = web_search_enabled
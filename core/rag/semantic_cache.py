@@ -0,0 +1,261 @@
+# core/rag/semantic_cache.py
+
+import re
+import time
+import hashlib
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from config.app_config import config
+from config.logging_config import get_module_logger
+
+# Create a logger for this module
+logger = get_module_logger("semantic_cache")
+
+@dataclass
+class SemanticCacheStats:
+    """Counters of a semantic answer cache."""
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0  # Times the cache was emptied because the indexed documents changed
+    evictions: int = 0
+    entries: int = 0
+    
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups answered from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+@dataclass
+class CachedAnswer:
+    """Answer found in a semantic cache."""
+    response: Dict[str, Any]  # Pipeline response of the earlier question
+    question: str  # The earlier question
+    similarity: float  # Cosine similarity of the two questions (1.0 for the same wording)
+
+class SemanticAnswerCache:
+    """Cache of pipeline answers looked up by question similarity.
+    
+    Questions are embedded with the vector store's embedding provider and
+    compared by cosine similarity against the questions answered before;
+    the best match above the threshold is returned with its answer and
+    sources. Questions that only differ in case, spacing or trailing
+    punctuation are matched without embedding them.
+    
+    Every entry belongs to one version of the index (see index_version on
+    the stores): when the version reported by version_fn changes, because
+    documents were added, deleted or rebuilt, the whole cache is dropped.
+    """
+    
+    _PUNCTUATION = re.compile(r"[\s?!.]+$")
+    _WHITESPACE = re.compile(r"\s+")
+    
+    def __init__(self,
+                 embedding_provider: Any,
+                 version_fn: Optional[Callable[[], Any]] = None,
+                 threshold: Optional[float] = None,
+                 max_entries: Optional[int] = None,
+                 ttl: Optional[float] = None):
+        """Initialize with the embedding provider and limits.
+        
+        Args:
+            embedding_provider: Provider with embed_query, the one the index uses
+            version_fn: Returns the current index version (None: entries never go stale by version)
+            threshold: Minimum cosine similarity of a hit (default: from config)
+            max_entries: Questions kept; the least recently used are evicted (default: from config)
+            ttl: Seconds an answer stays valid (default: from config)
+        """
+        self.embedding_provider = embedding_provider
+        self.version_fn = version_fn
+        self.threshold = threshold if threshold is not None else config.vector_store.semantic_cache_threshold
+        self.max_entries = max_entries or config.vector_store.semantic_cache_max_entries
+        self.ttl = ttl if ttl is not None else config.vector_store.semantic_cache_ttl
+        self.stats = SemanticCacheStats()
+        self._lock = threading.Lock()
+        self._version: Any = None
+        self._reset()
+        
+        logger.debug(f"Initialized semantic answer cache with threshold={self.threshold}, "
+                     f"max_entries={self.max_entries}")
+    
+    def _reset(self) -> None:
+        """Drop every entry. Rows are allocated once the embedding dimension is known."""
+        self._vectors: Optional[np.ndarray] = None
+        self._questions: List[str] = []
+        self._keys: List[str] = []
+        self._responses: List[Dict[str, Any]] = []
+        self._created = np.zeros(self.max_entries)
+        self._last_used = np.zeros(self.max_entries)
+        self._exact: Dict[str, int] = {}
+        self.stats.entries = 0
+    
+    def _normalize(self, question: str) -> str:
+        """Key of a question for exact matching."""
+        return self._PUNCTUATION.sub("", self._WHITESPACE.sub(" ", question.strip().lower()))
+    
+    def _sync_version(self) -> None:
+        """Drop the cache if the index changed since the entries were stored. Call under the lock."""
+        if self.version_fn is None:
+            return
+        version = self.version_fn()
+        if version != self._version:
+            if self._questions:
+                self.stats.invalidations += 1
+                logger.info(f"Index version changed to {version}, dropped {len(self._questions)} cached answers")
+            self._reset()
+            self._version = version
+    
+    def _embed(self, question: str) -> Optional[np.ndarray]:
+        """Embed a question as a unit vector, None if embedding fails."""
+        try:
+            vector = np.asarray(self.embedding_provider.embed_query(question), dtype=np.float32)
+        except Exception as e:
+            logger.warning(f"Could not embed question for the semantic cache: {str(e)}")
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else None
+    
+    def lookup(self, question: str) -> Tuple[Optional[CachedAnswer], Optional[np.ndarray]]:
+        """Find the answer of an earlier question similar to this one.
+        
+        Args:
+            question: User question
+        
+        Returns:
+            (cached answer or None, the question's embedding to hand to store; None if it was not needed)
+        """
+        now = time.time()
+        key = self._normalize(question)
+        
+        with self._lock:
+            self._sync_version()
+            row = self._exact.get(key)
+            if row is not None and now - self._created[row] < self.ttl:
+                return self._hit(row, 1.0, now), None
+        
+        vector = self._embed(question)
+        
+        with self._lock:
+            self._sync_version()
+            size = len(self._questions)
+            if vector is not None and size and self._vectors.shape[1] == len(vector):
+                similarities = self._vectors[:size] @ vector
+                similarities[self._created[:size] <= now - self.ttl] = -1.0
+                row = int(np.argmax(similarities))
+                if similarities[row] >= self.threshold:
+                    return self._hit(row, float(similarities[row]), now), vector
+            
+            self.stats.misses += 1
+            return None, vector
+    
+    def _hit(self, row: int, similarity: float, now: float) -> CachedAnswer:
+        """Record a hit on a row. Call under the lock."""
+        self._last_used[row] = now
+        self.stats.hits += 1
+        logger.debug(f"Semantic cache hit ({similarity:.3f}) on: {self._questions[row][:50]}...")
+        return CachedAnswer(response=self._responses[row], question=self._questions[row], similarity=similarity)
+    
+    def store(self, question: str, response: Dict[str, Any], vector: Optional[np.ndarray] = None) -> None:
+        """Cache the answer to a question.
+        
+        Args:
+            question: User question
+            response: Pipeline response
+            vector: The question's embedding from lookup (embedded here if None)
+        """
+        if vector is None:
+            vector = self._embed(question)
+            if vector is None:
+                return
+        
+        now = time.time()
+        key = self._normalize(question)
+        
+        with self._lock:
+            self._sync_version()
+            if self._vectors is not None and self._vectors.shape[1] != len(vector):
+                # The embedding model changed under the cache
+                self._reset()
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+            
+            row = self._exact.get(key)
+            if row is None and len(self._questions) < self.max_entries:
+                row = len(self._questions)
+                self._questions.append(question)
+                self._keys.append(key)
+                self._responses.append(response)
+            else:
+                if row is None:
+                    row = int(np.argmin(self._last_used))
+                    del self._exact[self._keys[row]]
+                    self.stats.evictions += 1
+                self._questions[row] = question
+                self._keys[row] = key
+                self._responses[row] = response
+            
+            self._vectors[row] = vector
+            self._created[row] = now
+            self._last_used[row] = now
+            self._exact[key] = row
+            self.stats.entries = len(self._questions)
+    
+    def invalidate(self) -> None:
+        """Drop every cached answer, e.g. after the documents changed behind the index version."""
+        with self._lock:
+            if self._questions:
+                self.stats.invalidations += 1
+            self._reset()
+        logger.debug("Invalidated semantic answer cache")
+
+def answer_scope(*parts: Any) -> str:
+    """Key of the settings an answer depends on (model, prompt template, document count...).
+    
+    Args:
+        *parts: Settings of the pipeline
+    
+    Returns:
+        Short stable digest of the settings
+    """
+    return hashlib.sha256("\0".join(str(part) for part in parts).encode("utf-8")).hexdigest()[:16]
+
+_caches: "weakref.WeakKeyDictionary[Any, Dict[str, SemanticAnswerCache]]" = weakref.WeakKeyDictionary()
+_caches_lock = threading.Lock()
+
+def get_semantic_cache(vector_store: Any, scope: str = "") -> Optional[SemanticAnswerCache]:
+    """Get the process-wide semantic cache of answers over a vector store.
+    
+    Pipelines answering from the same store with the same settings share
+    one cache, so a question answered in one session is reused in the
+    others. The cache follows the store's index_version.
+    
+    Args:
+        vector_store: Vector store the answers are retrieved from
+        scope: Settings the answers depend on (see answer_scope)
+    
+    Returns:
+        Shared SemanticAnswerCache, or None if disabled in config or the store has no embedding provider
+    """
+    if not config.vector_store.semantic_cache_enabled:
+        return None
+    
+    embedding_provider = getattr(vector_store, "embedding_provider", None)
+    if embedding_provider is None:
+        logger.warning(f"{type(vector_store).__name__} has no embedding provider, semantic cache disabled")
+        return None
+    
+    # The cache must not keep the store alive
+    store_ref = weakref.ref(vector_store)
+    
+    def version_fn() -> Any:
+        store = store_ref()
+        return getattr(store, "index_version", None) if store is not None else None
+    
+    with _caches_lock:
+        caches = _caches.setdefault(vector_store, {})
+        if scope not in caches:
+            caches[scope] = SemanticAnswerCache(embedding_provider, version_fn=version_fn)
+        return caches[scope]
@@ -0,0 +1,38 @@
+# core/rag/test_evaluation.py
+
+from core.embeddings.vector_store import FAISSVectorStore
+from core.embeddings.test_index_segments import FakeEmbeddings, _docs
+from core.rag.evaluation import RAGEvaluator
+from core.rag.rag_pipeline import RAGPipeline
+
+class FakeLLM:
+    """Stands in for LLMClient."""
+
+    def chat_completion(self, messages):
+        return {"content": "answer"}
+
+def test_dataset_is_retrieved_in_one_batch_with_the_retriever_settings(tmp_path, monkeypatch):
+    store = FAISSVectorStore(index_dir=str(tmp_path / "index"), embedding_provider=FakeEmbeddings())
+    store.build_index(_docs("manual", 4) + _docs("notes", 4))
+    retriever = store.as_retriever(search_kwargs={"k": 3, "score_threshold": 0.0, "filter": {"source": "notes.txt"}})
+    pipeline = RAGPipeline(llm=FakeLLM(), retriever=retriever)
+
+    calls = []
+    search_batch = store.search_batch
+
+    def counting_search_batch(queries, **kwargs):
+        calls.append(kwargs)
+        return search_batch(queries, **kwargs)
+
+    def single_retrieval(query):
+        raise AssertionError(f"Retrieved {query!r} on its own")
+
+    monkeypatch.setattr(store, "search_batch", counting_search_batch)
+    monkeypatch.setattr(pipeline, "_retrieval_step", single_retrieval)
+
+    evaluator = RAGEvaluator(save_dir=str(tmp_path / "results"))
+    results = evaluator.evaluate_dataset(["manual chunk 1", "notes chunk 2"], pipeline)
+
+    assert calls == [{"k": 3, "min_score": 0.0, "filter": {"source": "notes.txt"}}]
+    assert [result.document_count for result in results] == [3, 3]
+    assert all(doc_id for result in results for doc_id in result.document_ids)
@@ -0,0 +1,69 @@
+# core/rag/test_semantic_cache.py
+
+from core.embeddings.vector_store import FAISSVectorStore
+from core.embeddings.test_index_segments import FakeEmbeddings, _docs
+from core.rag.rag_pipeline import RAGPipeline
+from core.rag.semantic_cache import SemanticAnswerCache
+
+class CountingEmbeddings(FakeEmbeddings):
+    """Fake embeddings counting the query embeddings."""
+
+    def __init__(self):
+        super().__init__()
+        self.queries = 0
+
+    def embed_query(self, text):
+        self.queries += 1
+        return super().embed_query(text)
+
+class FakeLLM:
+    """Stands in for LLMClient."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def chat_completion(self, messages):
+        self.calls += 1
+        return {"content": f"answer {self.calls}"}
+
+def _pipeline(tmp_path, retriever=None):
+    embeddings = CountingEmbeddings()
+    store = FAISSVectorStore(index_dir=str(tmp_path), embedding_provider=embeddings)
+    store.build_index(_docs("manual", 4))
+    cache = SemanticAnswerCache(embeddings, version_fn=lambda: store.index_version)
+    llm = FakeLLM()
+    pipeline = RAGPipeline(
+        llm=llm,
+        retriever=retriever or store.as_retriever(search_kwargs={"k": 2}),
+        semantic_cache=cache
+    )
+    return pipeline, store, embeddings, llm
+
+def test_query_is_embedded_once_and_repeats_are_cached(tmp_path):
+    pipeline, store, embeddings, llm = _pipeline(tmp_path)
+    embeddings.queries = 0
+
+    first = pipeline.run("manual chunk 1")
+
+    # Retrieval reuses the embedding of the cache lookup
+    assert embeddings.queries == 1
+    assert len(first["source_documents"]) == 2
+
+    second = pipeline.run("manual chunk 1")
+    assert second["result"] == first["result"]
+    assert second["metadata"]["semantic_cache"]["similarity"] > 0.99
+    assert llm.calls == 1
+
+    # Changing the index drops the cached answers
+    store.add_documents(_docs("appendix", 1))
+    assert pipeline.run("manual chunk 1")["result"] == "answer 2"
+    assert pipeline.semantic_cache.stats.invalidations == 1
+
+def test_answers_without_sources_are_not_cached(tmp_path):
+    pipeline, _, _, llm = _pipeline(tmp_path, retriever=lambda query: [])
+
+    pipeline.run("manual chunk 1")
+    pipeline.run("manual chunk 1")
+
+    assert llm.calls == 2
+    assert pipeline.semantic_cache.stats.entries == 0
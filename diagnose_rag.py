@@ -273,7 +273,7 @@ def main():
         "--store-type", 
         type=str, 
         default="faiss",
-        choices=["faiss", "chroma", "vertex"],
+        choices=["faiss", "faiss_sharded", "chroma", "vertex"],
         help="Type of vector store to use"
     )
     parser.add_argument(
@@ -8,10 +8,11 @@ import time
 
 from config.app_config import config
 from config.logging_config import get_module_logger
-from core.embeddings.vector_store_factory import VectorStoreFactory
+from core.embeddings.store_registry import VectorStoreRegistry
 from core.llm.llm_client import LLMClient
 from core.rag.chain_builder import RAGChainBuilder
 from core.rag.rag_pipeline import RAGPipeline
+from core.rag.semantic_cache import answer_scope, get_semantic_cache
 from core.rag.observability import RagObservability
 from ui.state_manager import state_manager
 from fix_vector_store import verify_store_type
@@ -51,14 +52,11 @@ def initialize_application() -> Dict[str, Any]:
             logger.error(f"Error initializing LLM client: {str(e)}", exc_info=True)
             errors.append(f"LLM client initialization error: {str(e)}")
         
-        # Step 2: Initialize vector store using factory
+        # Step 2: Initialize the shared vector store
         logger.debug("Initializing vector store")
         try:
-            embedding_provider = VectorStoreFactory.create_embeddings_provider()
-            vector_store = VectorStoreFactory.create_vector_store(
-                store_type=store_type,
-                embedding_provider=embedding_provider
-            )
+            embedding_provider = VectorStoreRegistry.get_embedding_provider()
+            vector_store = VectorStoreRegistry.get_vector_store(store_type=store_type)
             components["vector_store"] = vector_store
             components["embedding_provider"] = embedding_provider
             logger.debug(f"Vector store initialized successfully: {type(vector_store).__name__}")
@@ -90,6 +88,16 @@ def initialize_application() -> Dict[str, Any]:
                     retriever=components["vector_store"].as_retriever(),
                     observability_callbacks=observability_callbacks
                 )
+                # Answers depend on the model, the prompt and the number of retrieved documents
+                rag_pipeline.semantic_cache = get_semantic_cache(
+                    components["vector_store"],
+                    scope=answer_scope(
+                        config.llm.model_name,
+                        config.llm.temperature,
+                        rag_pipeline.prompt_template,
+                        rag_pipeline.k_documents
+                    )
+                )
                 components["rag_chain"] = rag_pipeline
                 logger.debug("RAG pipeline initialized successfully")
             else:
@@ -159,9 +167,7 @@ def update_system_state(components: Dict[str, Any]):
 
 def process_existing_data_files(app_components: Dict[str, Any]) -> None:
     """Process existing data files in the data directory on startup."""
-    from langchain.schema import Document
-    from core.document_processing.document_loader import DocumentLoader
-    from core.document_processing.file_handler import FileHandler
+    from core.pipelines.ingest_pipeline import DocumentIngestPipeline
     
     data_dir = config.document.data_dir
     logger.info(f"Checking for existing documents in {data_dir}")
@@ -176,17 +182,13 @@ def process_existing_data_files(app_components: Dict[str, Any]) -> None:
         logger.error("Vector store not initialized. Cannot process existing documents.")
         return
     
-    # Initialize document loader
-    document_loader = DocumentLoader()
-    file_handler = FileHandler()
-    
     # Process only if not already processed
     if not state_manager.get("documents_processed", False):
-        files_processed = 0
-        documents = []
+        file_paths = []
+        file_metadata = {}
         
         # List all files in data directory
-        for filename in os.listdir(data_dir):
+        for filename in sorted(os.listdir(data_dir)):
             file_path = os.path.join(data_dir, filename)
             
             # Skip directories
@@ -198,46 +200,47 @@ def process_existing_data_files(app_components: Dict[str, Any]) -> None:
             if ext.lower() not in ['.pdf', '.docx', '.txt', '.md', '.csv', '.json']:
                 continue
             
-            try:
-                # Load document
-                result = document_loader.load_single_document(file_path)
-                
-                if not result.success:
-                    logger.warning(f"Error processing {filename}: {result.error_message}")
-                    continue
-                
-                # Add to list
-                document = result.document
-                document.metadata["source"] = filename
-                document.metadata["id"] = f"doc_{len(documents)}"
-                documents.append(document)
-                files_processed += 1
-                
-            except Exception as e:
-                logger.error(f"Error processing {filename}: {str(e)}")
+            # Chunk IDs are derived from the file's identity and text; the identity is
+            # its path in the data directory, so uploads with the same name stay separate
+            file_metadata[file_path] = {
+                "source": filename,
+                "source_id": os.path.relpath(file_path, data_dir)
+            }
+            file_paths.append(file_path)
         
-        # Add documents to vector store and state
-        if documents:
-            try:
-                # Add to vector store
-                success = vector_store.add_documents(documents)
-                
-                if success:
-                    # Add to state
-                    for doc in documents:
+        if not file_paths:
+            return
+        
+        try:
+            # Stream files through chunking and batched embedding, replacing chunks of changed files
+            ingest_pipeline = DocumentIngestPipeline(vector_store)
+            result = ingest_pipeline.ingest_files(file_paths, metadata=file_metadata, replace=True)
+            
+            for file_path, error in result.errors.items():
+                logger.warning(f"Error processing {os.path.basename(file_path)}: {error}")
+            
+            if result.documents:
+                # Add to state, once per file even when a failed run is retried
+                known = {doc.metadata.get("source_id") for doc in state_manager.get("documents", [])}
+                for doc in result.documents:
+                    if doc.metadata.get("source_id") not in known:
                         state_manager.append("documents", doc)
-                    
-                    state_manager.set("documents_processed", True)
-                    logger.info(f"Processed {files_processed} existing documents on startup")
-                    
-                    # Update system state
-                    state_manager.update_system_state(
-                        vector_store_initialized=True
-                    )
-                else:
-                    logger.error("Failed to add documents to vector store")
-            except Exception as e:
-                logger.error(f"Error adding documents to vector store: {str(e)}")
+                
+                logger.info(f"Processed {len(result.documents)} existing documents "
+                            f"({result.chunk_count} chunks) on startup")
+                
+                # Update system state
+                state_manager.update_system_state(
+                    vector_store_initialized=True
+                )
+            
+            # Files that failed are retried on the next run
+            if result.success:
+                state_manager.set("documents_processed", True)
+            elif not result.documents:
+                logger.error("Failed to add documents to vector store")
+        except Exception as e:
+            logger.error(f"Error adding documents to vector store: {str(e)}")
 
 def check_environment() -> bool:
     """Check if the environment is properly configured.
@@ -11,11 +11,12 @@ import uuid
 from config.app_config import config
 from config.logging_config import get_module_logger
 from ui.state_manager import state_manager
+from ui.components.common import render_streamed_answer
 
 # Import core functionality
 from core.document_processing.file_handler import FileHandler, FileHandlerError
-from core.document_processing.document_loader import DocumentLoader
 from core.embeddings.vector_store import FAISSVectorStore
+from core.pipelines.ingest_pipeline import DocumentIngestPipeline, IngestProgress
 from core.rag.chain_builder import RAGChainBuilder
 
 # Import main initialization
@@ -102,7 +103,6 @@ def process_uploaded_files(uploaded_files, app_components: Dict[str, Any]):
     
     # Initialize handlers
     file_handler = FileHandler()
-    document_loader = DocumentLoader()
     
     # Process only if not already processed
     if not state_manager.get("documents_processed", False):
@@ -111,41 +111,51 @@ def process_uploaded_files(uploaded_files, app_components: Dict[str, Any]):
         with st.spinner("Processing documents..."):
             st.write("### Processing Files")
             
+            # Save uploads to temporary files
+            file_paths = []
+            file_metadata = {}
             for file in uploaded_files:
-                status_container = st.empty()
-                status_container.info(f"Processing {file.name}...")
-                
                 try:
-                    # Process uploaded file
                     uploaded_file = file_handler.process_uploaded_file(file)
-                    
-                    # Load document
-                    result = document_loader.load_single_document(uploaded_file.temp_path)
-                    
-                    if not result.success:
-                        status_container.error(f"Error processing {file.name}: {result.error_message}")
-                        processing_success = False
-                        continue
-                    
-                    # Add to state
-                    document = result.document
-                    document.metadata["source"] = file.name
-                    document.metadata["upload_time"] = datetime.now().isoformat()
-                    
-                    state_manager.append("documents", document)
-                    
-                    # Add to vector store
-                    vector_store.add_documents([document])
-                    
-                    status_container.success(f"Successfully processed {file.name}")
-                    
+                    file_paths.append(uploaded_file.temp_path)
+                    file_metadata[uploaded_file.temp_path] = {
+                        "source": file.name,
+                        "source_id": uploaded_file.source_id,
+                        "upload_time": datetime.now().isoformat()
+                    }
                 except FileHandlerError as e:
-                    status_container.error(f"Error handling {file.name}: {str(e)}")
+                    st.error(f"Error handling {file.name}: {str(e)}")
                     processing_success = False
-                except Exception as e:
-                    logger.error(f"Unexpected error processing {file.name}: {str(e)}", exc_info=True)
-                    status_container.error(f"Unexpected error processing {file.name}")
+            
+            # Render ingest progress as chunks are embedded and stored
+            progress_bar = st.progress(0.0)
+            status_container = st.empty()
+            
+            def render_progress(progress: IngestProgress):
+                progress_bar.progress(progress.fraction)
+                status_container.info(progress.message)
+            
+            try:
+                ingest_pipeline = DocumentIngestPipeline(vector_store, progress_callback=render_progress)
+                result = ingest_pipeline.ingest_files(file_paths, metadata=file_metadata, replace=True)
+                
+                for file_path, error in result.errors.items():
+                    file_name = file_metadata.get(file_path, {}).get("source", file_path)
+                    st.error(f"Error processing {file_name}: {error}")
                     processing_success = False
+                
+                # Add to state
+                for document in result.documents:
+                    state_manager.append("documents", document)
+                
+                status_container.success(
+                    f"Indexed {result.chunk_count} chunks from {len(result.documents)} documents "
+                    f"({result.skipped_count} unchanged chunks skipped)"
+                )
+            except Exception as e:
+                logger.error(f"Unexpected error processing documents: {str(e)}", exc_info=True)
+                status_container.error("Unexpected error processing documents")
+                processing_success = False
             
             if processing_success:
                 state_manager.set("documents_processed", True)
@@ -235,54 +245,51 @@ def create_chat_tab(app_components: Dict[str, Any]):
         
         # Generate response
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                try:
-                    # Get RAG chain from components
-                    rag_chain = app_components.get("rag_chain")
-                    
-                    if rag_chain:
-                        # Run RAG chain
-                        response = rag_chain.run(prompt)
-                        
-                        # Format response
-                        message_data = {
-                            "role": "assistant",
-                            "content": response["result"],
-                            "sources": response.get("source_documents", [])
-                        }
-                    else:
-                        # Fallback response if chain not available
-                        message_data = {
-                            "role": "assistant",
-                            "content": "I can help answer questions about documents once they're uploaded. For now, I can assist with general educational questions.",
-                            "sources": []
-                        }
-                    
-                    # Add to chat history
-                    state_manager.append("messages", message_data)
-                    
-                    # Display response
-                    st.markdown(message_data["content"])
+            try:
+                # Get RAG chain from components
+                rag_chain = app_components.get("rag_chain")
+                
+                if rag_chain:
+                    # Stream the answer into the chat as it is generated
+                    response = render_streamed_answer(rag_chain, prompt)
                     
-                    # Display sources if available
-                    if message_data["sources"]:
-                        with st.expander("View Sources"):
-                            for i, doc in enumerate(message_data["sources"], 1):
-                                st.write(f"Source {i}:")
-                                st.write(doc.page_content)
-                                if doc.metadata.get('source'):
-                                    st.write(f"Source: {doc.metadata['source']}")
-                                st.write("---")
-                                
-                except Exception as e:
-                    logger.error(f"Error generating response: {str(e)}", exc_info=True)
-                    error_message = {
+                    # Format response
+                    message_data = {
                         "role": "assistant",
-                        "content": f"I encountered an error while processing your question. Please try again.",
+                        "content": response["result"],
+                        "sources": response.get("source_documents", [])
+                    }
+                else:
+                    # Fallback response if chain not available
+                    message_data = {
+                        "role": "assistant",
+                        "content": "I can help answer questions about documents once they're uploaded. For now, I can assist with general educational questions.",
                         "sources": []
                     }
-                    state_manager.append("messages", error_message)
-                    st.markdown(error_message["content"])
+                    st.markdown(message_data["content"])
+                
+                # Add to chat history
+                state_manager.append("messages", message_data)
+                
+                # Display sources if available
+                if message_data["sources"]:
+                    with st.expander("View Sources"):
+                        for i, doc in enumerate(message_data["sources"], 1):
+                            st.write(f"Source {i}:")
+                            st.write(doc.page_content)
+                            if doc.metadata.get('source'):
+                                st.write(f"Source: {doc.metadata['source']}")
+                            st.write("---")
+                            
+            except Exception as e:
+                logger.error(f"Error generating response: {str(e)}", exc_info=True)
+                error_message = {
+                    "role": "assistant",
+                    "content": f"I encountered an error while processing your question. Please try again.",
+                    "sources": []
+                }
+                state_manager.append("messages", error_message)
+                st.markdown(error_message["content"])
     
     # Add clear chat button
     if st.session_state.messages and st.button("Clear Chat History"):
@@ -4,7 +4,7 @@ import streamlit as st
 from typing import Dict, Any, List, Optional
 from config.logging_config import get_module_logger
 from ui.state_manager import state_manager
-from ui.components.common import display_error, display_info
+from ui.components.common import display_error, display_info, render_streamed_answer
 from utils.ui_validation import validate_response_structure, validate_document_structure
 
 # Create a logger for this module
@@ -71,72 +71,70 @@ def handle_chat_input(app_components: Dict[str, Any]):
         
         # Generate response
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                try:
-                    # Get RAG chain from components
-                    rag_chain = app_components.get("rag_chain")
-                    
-                    if not rag_chain:
-                        # Fallback response if chain not available
+            try:
+                # Get RAG chain from components
+                rag_chain = app_components.get("rag_chain")
+                
+                if not rag_chain:
+                    # Fallback response if chain not available
+                    message_data = {
+                        "role": "assistant",
+                        "content": "I can help answer questions about documents once they're uploaded. For now, I can assist with general educational questions.",
+                        "sources": []
+                    }
+                    st.markdown(message_data["content"])
+                else:
+                    try:
+                        # Stream the answer into the chat as it is generated
+                        response = render_streamed_answer(rag_chain, prompt)
+                        
+                        # Validate response structure
+                        is_valid, error_msg = validate_response_structure(response)
+                        if not is_valid:
+                            raise ValueError(error_msg)
+                        
+                        # Format response
+                        message_data = {
+                            "role": "assistant",
+                            "content": response["result"],
+                            "sources": response.get("source_documents", [])
+                        }
+                    except Exception as chain_error:
+                        logger.error(f"Error in RAG chain: {str(chain_error)}", exc_info=True)
                         message_data = {
                             "role": "assistant",
-                            "content": "I can help answer questions about documents once they're uploaded. For now, I can assist with general educational questions.",
+                            "content": f"I encountered an error processing your question. Please try a different question or check if documents are properly loaded.",
                             "sources": []
                         }
-                    else:
-                        try:
-                            # Run RAG chain
-                            response = rag_chain.run(prompt)
+                        st.markdown(message_data["content"])
+                
+                # Add to chat history
+                state_manager.append("messages", message_data)
+                
+                # Display sources if available
+                if message_data.get("sources"):
+                    with st.expander("View Sources"):
+                        for i, doc in enumerate(message_data["sources"], 1):
+                            st.write(f"Source {i}:")
                             
-                            # Validate response structure
-                            is_valid, error_msg = validate_response_structure(response)
-                            if not is_valid:
-                                raise ValueError(error_msg)
+                            # Validate document structure
+                            is_valid, doc_data = validate_document_structure(doc)
                             
-                            # Format response
-                            message_data = {
-                                "role": "assistant",
-                                "content": response["result"],
-                                "sources": response.get("source_documents", [])
-                            }
-                        except Exception as chain_error:
-                            logger.error(f"Error in RAG chain: {str(chain_error)}", exc_info=True)
-                            message_data = {
-                                "role": "assistant",
-                                "content": f"I encountered an error processing your question. Please try a different question or check if documents are properly loaded.",
-                                "sources": []
-                            }
-                    
-                    # Add to chat history
-                    state_manager.append("messages", message_data)
-                    
-                    # Display response
-                    st.markdown(message_data["content"])
-                    
-                    # Display sources if available
-                    if message_data.get("sources"):
-                        with st.expander("View Sources"):
-                            for i, doc in enumerate(message_data["sources"], 1):
-                                st.write(f"Source {i}:")
-                                
-                                # Validate document structure
-                                is_valid, doc_data = validate_document_structure(doc)
-                                
-                                if is_valid and doc_data["content"]:
-                                    st.write(doc_data["content"])
-                                else:
-                                    st.write("Source content unavailable")
-                                    
-                                source = doc_data["metadata"].get("source", "Unknown source")
-                                st.write(f"Source: {source}")
-                                st.write("---")
+                            if is_valid and doc_data["content"]:
+                                st.write(doc_data["content"])
+                            else:
+                                st.write("Source content unavailable")
                                 
-                except Exception as e:
-                    logger.error(f"Error generating response: {str(e)}", exc_info=True)
-                    error_message = {
-                        "role": "assistant",
-                        "content": f"I encountered an error while processing your question. Please try again.",
-                        "sources": []
-                    }
-                    state_manager.append("messages", error_message)
-                    st.markdown(error_message["content"])
+                            source = doc_data["metadata"].get("source", "Unknown source")
+                            st.write(f"Source: {source}")
+                            st.write("---")
+                            
+            except Exception as e:
+                logger.error(f"Error generating response: {str(e)}", exc_info=True)
+                error_message = {
+                    "role": "assistant",
+                    "content": f"I encountered an error while processing your question. Please try again.",
+                    "sources": []
+                }
+                state_manager.append("messages", error_message)
+                st.markdown(error_message["content"])
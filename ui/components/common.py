@@ -66,3 +66,44 @@ def format_timestamp(timestamp: str) -> str:
         return dt.strftime("%Y-%m-%d %H:%M")
     except:
         return timestamp
+
+def render_streamed_answer(rag_chain: Any, prompt: str) -> Dict[str, Any]:
+    """Answer a question with the RAG chain, rendering the answer as it is generated.
+    
+    A spinner covers retrieval only; answer tokens are shown as soon as
+    they arrive. Chains without streaming support are run to completion.
+    
+    Args:
+        rag_chain: RAG pipeline
+        prompt: User question
+        
+    Returns:
+        Response dictionary as returned by the chain's run method
+    """
+    placeholder = st.empty()
+    
+    if not hasattr(rag_chain, "stream"):
+        with st.spinner("Thinking..."):
+            response = rag_chain.run(prompt)
+        placeholder.markdown(response["result"])
+        return response
+    
+    events = rag_chain.stream(prompt)
+    with st.spinner("Searching documents..."):
+        event = next(events, None)
+    
+    answer = ""
+    response: Dict[str, Any] = {"result": "", "source_documents": []}
+    while event is not None:
+        if event["type"] == "sources":
+            response["source_documents"] = event["source_documents"]
+            placeholder.markdown("▌")
+        elif event["type"] == "token":
+            answer += event["content"]
+            placeholder.markdown(answer + "▌")
+        elif event["type"] == "end":
+            response = {key: value for key, value in event.items() if key != "type"}
+        event = next(events, None)
+    
+    placeholder.markdown(response["result"] or answer)
+    return response
@@ -8,7 +8,7 @@ from typing import Dict, Any, List, Optional
 
 from config.logging_config import get_module_logger
 from core.document_processing.file_handler import FileHandler, FileHandlerError
-from core.document_processing.document_loader import DocumentLoader
+from core.pipelines.ingest_pipeline import DocumentIngestPipeline, IngestProgress
 from ui.state_manager import state_manager
 from ui.components.common import display_error, display_success, display_info, display_warning
 
@@ -62,7 +62,6 @@ def process_uploaded_files(uploaded_files, app_components: Dict[str, Any]):
     
     # Initialize handlers
     file_handler = FileHandler()
-    document_loader = DocumentLoader()
     
     processing_success = True
     documents_processed = 0
@@ -70,46 +69,53 @@ def process_uploaded_files(uploaded_files, app_components: Dict[str, Any]):
     with st.spinner("Processing documents..."):
         st.write("### Processing Files")
         
+        # Save uploads to temporary files
+        file_paths = []
+        file_metadata = {}
         for file in uploaded_files:
-            status_container = st.empty()
-            status_container.info(f"Processing {file.name}...")
-            
             try:
-                # Process uploaded file
                 uploaded_file = file_handler.process_uploaded_file(file)
-                
-                # Load document
-                result = document_loader.load_single_document(uploaded_file.temp_path)
-                
-                if not result.success:
-                    status_container.error(f"Error processing {file.name}: {result.error_message}")
-                    processing_success = False
-                    continue
-                
-                # Add to state
-                document = result.document
-                document.metadata["source"] = file.name
-                document.metadata["upload_time"] = datetime.now().isoformat()
-                document.metadata["id"] = f"doc_{len(state_manager.get('documents', []))}"
-                
-                state_manager.append("documents", document)
-                
-                # Add to vector store
-                if not vector_store.add_documents([document]):
-                    status_container.error(f"Error adding {file.name} to vector store")
-                    processing_success = False
-                    continue
-                
-                documents_processed += 1
-                status_container.success(f"Successfully processed {file.name}")
-                
+                file_paths.append(uploaded_file.temp_path)
+                file_metadata[uploaded_file.temp_path] = {
+                    "source": file.name,
+                    "source_id": uploaded_file.source_id,
+                    "upload_time": datetime.now().isoformat(),
+                    "id": f"doc_{len(state_manager.get('documents', [])) + len(file_paths) - 1}"
+                }
             except FileHandlerError as e:
-                status_container.error(f"Error handling {file.name}: {str(e)}")
+                display_error(f"Error handling {file.name}: {str(e)}")
                 processing_success = False
-            except Exception as e:
-                logger.error(f"Unexpected error processing {file.name}: {str(e)}", exc_info=True)
-                status_container.error(f"Unexpected error processing {file.name}")
+        
+        # Render ingest progress as chunks are embedded and stored
+        progress_bar = st.progress(0.0)
+        status_container = st.empty()
+        
+        def render_progress(progress: IngestProgress):
+            progress_bar.progress(progress.fraction)
+            status_container.info(progress.message)
+        
+        try:
+            ingest_pipeline = DocumentIngestPipeline(vector_store, progress_callback=render_progress)
+            result = ingest_pipeline.ingest_files(file_paths, metadata=file_metadata, replace=True)
+            
+            for file_path, error in result.errors.items():
+                file_name = file_metadata.get(file_path, {}).get("source", file_path)
+                display_error(f"Error processing {file_name}: {error}")
                 processing_success = False
+            
+            # Add to state
+            for document in result.documents:
+                state_manager.append("documents", document)
+            documents_processed = len(result.documents)
+            
+            status_container.success(
+                f"Indexed {result.chunk_count} chunks from {documents_processed} documents "
+                f"({result.skipped_count} unchanged chunks skipped)"
+            )
+        except Exception as e:
+            logger.error(f"Unexpected error processing documents: {str(e)}", exc_info=True)
+            status_container.error("Unexpected error processing documents")
+            processing_success = False
         
         if processing_success and documents_processed > 0:
             state_manager.set("documents_processed", True)